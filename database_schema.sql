@@ -391,6 +391,8 @@ CREATE TABLE player_lines (
 -- =====================================================
 -- 7. INDEXES FOR PERFORMANCE
 -- =====================================================
+-- Composite and covering indexes proposed by uploadFiles/index_advisor.py are
+-- versioned migrations in migrations/; run `python migrate.py` after this file.
 
 -- Player stats indexes
 CREATE INDEX idx_player_stats_player_name ON player_stats(player_name);
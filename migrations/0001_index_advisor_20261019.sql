@@ -0,0 +1,12 @@
+-- Generated by index_advisor.py on 2026-10-19 (week 352)
+-- Plan cost before -> after for the statements that improved:
+--   18,897.2 -> 13,523.7  SELECT player_name, position_id, team_id, AVG(passing_attempts) AS avg_passing_attempts, AVG(complet
+--   17,255.6 -> 11,067.6  SELECT player_name, position_id, team_id, COALESCE(AVG(rushing_attempts), ?) AS rushing_attempts, CO
+--   4,593.0 -> 3,371.4  SELECT player_name, position_id, COUNT(*) as actual_games_played FROM player_stats GROUP BY player_n
+--   4,950.0 -> 3,677.3  SELECT DISTINCT normalized_name, player_name, position_id, team_id FROM player_stats
+--   703.8 -> 32.6  SELECT passing_attempts, completions, passing_yards, passing_tds, interceptions, rushing_attempts, r
+
+CREATE INDEX IF NOT EXISTS idx_player_stats_normalized_name_cov ON player_stats (normalized_name) INCLUDE (passing_attempts, completions, passing_yards, passing_tds, interceptions, rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds);
+CREATE INDEX IF NOT EXISTS idx_player_stats_snaps_player_name_position_id_team_id ON player_stats (snaps, player_name, position_id, team_id);
+CREATE INDEX IF NOT EXISTS idx_player_stats_player_name_position_id_team_id_cov ON player_stats (player_name, position_id, team_id) INCLUDE (rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds, passing_attempts, passing_yards, passing_tds);
+CREATE INDEX IF NOT EXISTS idx_player_stats_normalized_name_player_name_position_id_team_i ON player_stats (normalized_name, player_name, position_id, team_id);
@@ -0,0 +1,182 @@
+-- Season-partitioned game logs
+-- player_stats, general_defensive_stats and qb_defensive_stats become LIST partitioned
+-- tables keyed by season, with season added to their natural keys. Rows already stored
+-- belong to the 2025 season, the only one uploaded before this migration.
+-- New seasons get their partitions from create_season_partitions(season), which the
+-- uploaders call before inserting.
+
+-- =====================================================
+-- player_stats
+-- =====================================================
+
+CREATE TABLE player_stats_by_season (
+    id INTEGER NOT NULL DEFAULT nextval('player_stats_id_seq'),
+    season INTEGER NOT NULL DEFAULT 2025,
+    player_name VARCHAR(255) NOT NULL,
+    normalized_name VARCHAR(255),
+    position_id VARCHAR(10) NOT NULL,
+    team_id VARCHAR(10) NOT NULL,
+    week INTEGER NOT NULL,
+    matchup VARCHAR(255),
+    fpts INTEGER DEFAULT 0,
+    completions INTEGER DEFAULT 0,
+    passing_attempts INTEGER DEFAULT 0,
+    passing_yards INTEGER DEFAULT 0,
+    passing_tds INTEGER DEFAULT 0,
+    interceptions INTEGER DEFAULT 0,
+    rushing_attempts INTEGER DEFAULT 0,
+    rushing_yards INTEGER DEFAULT 0,
+    rushing_tds INTEGER DEFAULT 0,
+    receptions INTEGER DEFAULT 0,
+    receiving_yards INTEGER DEFAULT 0,
+    receiving_tds INTEGER DEFAULT 0,
+    targets INTEGER DEFAULT 0,
+    snaps INTEGER,
+    opponent VARCHAR(255),
+    games_played INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, id),
+    UNIQUE (season, player_name, team_id, week)
+) PARTITION BY LIST (season);
+
+CREATE TABLE player_stats_2025 PARTITION OF player_stats_by_season FOR VALUES IN (2025);
+
+INSERT INTO player_stats_by_season (
+    id, season, player_name, normalized_name, position_id, team_id, week, matchup, fpts,
+    completions, passing_attempts, passing_yards, passing_tds, interceptions,
+    rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds,
+    targets, snaps, opponent, games_played, created_at
+)
+SELECT
+    id, 2025, player_name, normalized_name, position_id, team_id, week, matchup, fpts,
+    completions, passing_attempts, passing_yards, passing_tds, interceptions,
+    rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds,
+    targets, snaps, opponent, games_played, created_at
+FROM player_stats;
+
+ALTER SEQUENCE player_stats_id_seq OWNED BY NONE;
+DROP TABLE player_stats;
+ALTER TABLE player_stats_by_season RENAME TO player_stats;
+ALTER SEQUENCE player_stats_id_seq OWNED BY player_stats.id;
+
+CREATE INDEX idx_player_stats_player_name ON player_stats(player_name);
+CREATE INDEX idx_player_stats_position_id ON player_stats(position_id);
+CREATE INDEX idx_player_stats_team_id ON player_stats(team_id);
+CREATE INDEX idx_player_stats_week ON player_stats(week);
+CREATE INDEX idx_player_stats_normalized_name ON player_stats(normalized_name);
+-- From 0001_index_advisor_20261019
+CREATE INDEX idx_player_stats_normalized_name_cov ON player_stats (normalized_name) INCLUDE (passing_attempts, completions, passing_yards, passing_tds, interceptions, rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds);
+CREATE INDEX idx_player_stats_snaps_player_name_position_id_team_id ON player_stats (snaps, player_name, position_id, team_id);
+CREATE INDEX idx_player_stats_player_name_position_id_team_id_cov ON player_stats (player_name, position_id, team_id) INCLUDE (rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds, passing_attempts, passing_yards, passing_tds);
+CREATE INDEX idx_player_stats_normalized_name_player_name_position_id_team_i ON player_stats (normalized_name, player_name, position_id, team_id);
+
+-- =====================================================
+-- general_defensive_stats
+-- =====================================================
+
+CREATE TABLE general_defensive_stats_by_season (
+    id INTEGER NOT NULL DEFAULT nextval('general_defensive_stats_id_seq'),
+    season INTEGER NOT NULL DEFAULT 2025,
+    team_id VARCHAR(10) NOT NULL,
+    position_id VARCHAR(10) NOT NULL,
+    week INTEGER NOT NULL,
+    matchup VARCHAR(255),
+    rushing_attempts INTEGER DEFAULT 0,
+    total_rushing_yards INTEGER DEFAULT 0,
+    avg_yards_per_carry DECIMAL(5,2) DEFAULT 0,
+    rushing_tds INTEGER DEFAULT 0,
+    targets INTEGER DEFAULT 0,
+    receptions INTEGER DEFAULT 0,
+    total_receiving_yards INTEGER DEFAULT 0,
+    avg_yards_per_catch DECIMAL(5,2) DEFAULT 0,
+    receiving_tds INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, id),
+    UNIQUE (season, team_id, position_id, week)
+) PARTITION BY LIST (season);
+
+CREATE TABLE general_defensive_stats_2025 PARTITION OF general_defensive_stats_by_season FOR VALUES IN (2025);
+
+INSERT INTO general_defensive_stats_by_season (
+    id, season, team_id, position_id, week, matchup, rushing_attempts, total_rushing_yards,
+    avg_yards_per_carry, rushing_tds, targets, receptions, total_receiving_yards,
+    avg_yards_per_catch, receiving_tds, created_at
+)
+SELECT
+    id, 2025, team_id, position_id, week, matchup, rushing_attempts, total_rushing_yards,
+    avg_yards_per_carry, rushing_tds, targets, receptions, total_receiving_yards,
+    avg_yards_per_catch, receiving_tds, created_at
+FROM general_defensive_stats;
+
+ALTER SEQUENCE general_defensive_stats_id_seq OWNED BY NONE;
+DROP TABLE general_defensive_stats;
+ALTER TABLE general_defensive_stats_by_season RENAME TO general_defensive_stats;
+ALTER SEQUENCE general_defensive_stats_id_seq OWNED BY general_defensive_stats.id;
+
+CREATE INDEX idx_general_defensive_stats_team_id ON general_defensive_stats(team_id);
+CREATE INDEX idx_general_defensive_stats_position_id ON general_defensive_stats(position_id);
+CREATE INDEX idx_general_defensive_stats_week ON general_defensive_stats(week);
+
+-- =====================================================
+-- qb_defensive_stats
+-- =====================================================
+
+CREATE TABLE qb_defensive_stats_by_season (
+    id INTEGER NOT NULL DEFAULT nextval('qb_defensive_stats_id_seq'),
+    season INTEGER NOT NULL DEFAULT 2025,
+    team_id VARCHAR(10) NOT NULL,
+    week INTEGER NOT NULL,
+    matchup VARCHAR(255),
+    passing_attempts INTEGER DEFAULT 0,
+    completions INTEGER DEFAULT 0,
+    passing_yards INTEGER DEFAULT 0,
+    passing_tds INTEGER DEFAULT 0,
+    interceptions INTEGER DEFAULT 0,
+    rate DECIMAL(5,2) DEFAULT 0,
+    rushing_attempts INTEGER DEFAULT 0,
+    rushing_yards INTEGER DEFAULT 0,
+    avg_rushing_yards DECIMAL(5,2) DEFAULT 0,
+    rushing_tds INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, id),
+    UNIQUE (season, team_id, week)
+) PARTITION BY LIST (season);
+
+CREATE TABLE qb_defensive_stats_2025 PARTITION OF qb_defensive_stats_by_season FOR VALUES IN (2025);
+
+INSERT INTO qb_defensive_stats_by_season (
+    id, season, team_id, week, matchup, passing_attempts, completions, passing_yards,
+    passing_tds, interceptions, rate, rushing_attempts, rushing_yards, avg_rushing_yards,
+    rushing_tds, created_at
+)
+SELECT
+    id, 2025, team_id, week, matchup, passing_attempts, completions, passing_yards,
+    passing_tds, interceptions, rate, rushing_attempts, rushing_yards, avg_rushing_yards,
+    rushing_tds, created_at
+FROM qb_defensive_stats;
+
+ALTER SEQUENCE qb_defensive_stats_id_seq OWNED BY NONE;
+DROP TABLE qb_defensive_stats;
+ALTER TABLE qb_defensive_stats_by_season RENAME TO qb_defensive_stats;
+ALTER SEQUENCE qb_defensive_stats_id_seq OWNED BY qb_defensive_stats.id;
+
+CREATE INDEX idx_qb_defensive_stats_team_id ON qb_defensive_stats(team_id);
+CREATE INDEX idx_qb_defensive_stats_week ON qb_defensive_stats(week);
+
+-- =====================================================
+-- Partition management
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION create_season_partitions(p_season INTEGER)
+RETURNS void AS $$
+DECLARE
+    game_log TEXT;
+BEGIN
+    FOREACH game_log IN ARRAY ARRAY['player_stats', 'general_defensive_stats', 'qb_defensive_stats'] LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (%s)',
+            game_log || '_' || p_season, game_log, p_season
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
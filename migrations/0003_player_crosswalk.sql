@@ -0,0 +1,22 @@
+-- Player ID crosswalk
+-- Confirmed links from a source's spelling of a player (CBS box scores, sportsbook odds)
+-- to the SportsData PlayerID, recorded once and resolved by lookup on later runs.
+-- position_id is '' when the source does not carry a position (odds).
+
+CREATE TABLE player_crosswalk (
+    id SERIAL PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,
+    source_name VARCHAR(255) NOT NULL,
+    position_id VARCHAR(10) NOT NULL DEFAULT '',
+    player_id INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    method VARCHAR(20) NOT NULL,
+    confirmed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (source, source_name, position_id)
+);
+
+CREATE INDEX idx_player_crosswalk_player_id ON player_crosswalk(player_id);
+
+-- SportsData PlayerID on the game logs, filled in by uploadPlayer.py
+ALTER TABLE player_stats ADD COLUMN player_id INTEGER;
+CREATE INDEX idx_player_stats_player_id ON player_stats(player_id);
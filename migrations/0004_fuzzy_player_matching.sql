@@ -0,0 +1,24 @@
+-- Fuzzy player matching
+-- Links found by the trigram matcher keep their confidence for review, and names no
+-- method could link are parked in unmatched_players with the scraped row and the ranked
+-- candidates instead of being dropped. Confirming one with crosswalk.py marks it resolved;
+-- re-running the week's upload then inserts the row.
+
+ALTER TABLE player_crosswalk ADD COLUMN confidence DECIMAL(4,3);
+
+CREATE TABLE unmatched_players (
+    id SERIAL PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,
+    source_name VARCHAR(255) NOT NULL,
+    position_id VARCHAR(10) NOT NULL DEFAULT '',
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    payload JSONB NOT NULL,
+    candidates JSONB NOT NULL DEFAULT '[]',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    resolved_at TIMESTAMP,
+    UNIQUE (source, source_name, position_id, season, week)
+);
+
+CREATE INDEX idx_unmatched_players_open ON unmatched_players(source, source_name, position_id)
+    WHERE resolved_at IS NULL;
@@ -0,0 +1,36 @@
+-- Projection horizon
+-- projection_horizon.py projects every player for the next N weeks (or the rest of the
+-- season) in one pass. Rows are keyed by week; each run replaces the season's previous
+-- horizon. player_projections (one week, no week column) is unchanged.
+
+CREATE TABLE player_projection_horizon (
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    normalized_name VARCHAR(255),
+    position VARCHAR(10) NOT NULL,
+    team_id VARCHAR(10) NOT NULL,
+    opponent VARCHAR(10) NOT NULL,
+    is_home BOOLEAN NOT NULL,
+    stat_key VARCHAR(50) NOT NULL,
+    projection DECIMAL(8,2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, week, player_name, position, stat_key)
+);
+
+CREATE INDEX idx_player_projection_horizon_player ON player_projection_horizon(normalized_name, season);
+
+-- Rest-of-season totals over the stored horizon (run projection_horizon.py without --weeks)
+CREATE VIEW player_projections_ros AS
+SELECT season,
+       player_name,
+       normalized_name,
+       position,
+       team_id,
+       stat_key,
+       MIN(week) AS first_week,
+       MAX(week) AS last_week,
+       COUNT(*) AS games,
+       SUM(projection) AS projection
+FROM player_projection_horizon
+GROUP BY season, player_name, normalized_name, position, team_id, stat_key;
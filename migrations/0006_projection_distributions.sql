@@ -0,0 +1,27 @@
+-- Projection distributions
+-- projection_sim.py simulates each player's per-stat outcomes for a week and stores the
+-- percentiles and, where player_lines has a line, the probability of going over it.
+-- Each run replaces that week's rows.
+
+CREATE TABLE player_projection_distributions (
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    normalized_name VARCHAR(255),
+    position VARCHAR(10) NOT NULL,
+    team_id VARCHAR(10) NOT NULL,
+    opponent VARCHAR(10) NOT NULL,
+    stat_key VARCHAR(50) NOT NULL,
+    mean DECIMAL(8,2) NOT NULL,
+    p10 DECIMAL(8,2) NOT NULL,
+    p50 DECIMAL(8,2) NOT NULL,
+    p90 DECIMAL(8,2) NOT NULL,
+    line DECIMAL(8,2),
+    p_over DECIMAL(5,4),
+    samples INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, week, player_name, position, stat_key)
+);
+
+CREATE INDEX idx_player_projection_distributions_player
+    ON player_projection_distributions(normalized_name, season, week);
@@ -0,0 +1,25 @@
+-- Recency-weighted player averages
+-- recency.py keeps an exponentially weighted average per (player, stat) for each configured
+-- half-life (in weeks). A row stores the decayed sum and weight as of its last week, so a
+-- new week is folded in without reading the player's history:
+--     weighted_sum = weighted_sum * 0.5 ^ (weeks since last_week / half_life) + value
+--     weight_total = weight_total * 0.5 ^ (weeks since last_week / half_life) + 1
+-- and the average is weighted_sum / weight_total.
+
+CREATE TABLE player_recency_averages (
+    season INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    position_id VARCHAR(10) NOT NULL,
+    half_life DECIMAL(5,2) NOT NULL,
+    stat_key VARCHAR(50) NOT NULL,
+    normalized_name VARCHAR(255),
+    team_id VARCHAR(10) NOT NULL,
+    weighted_sum DOUBLE PRECISION NOT NULL,
+    weight_total DOUBLE PRECISION NOT NULL,
+    last_value DOUBLE PRECISION NOT NULL,
+    last_week INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    average DOUBLE PRECISION GENERATED ALWAYS AS (weighted_sum / NULLIF(weight_total, 0)) STORED,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, half_life, player_name, position_id, stat_key)
+);
@@ -0,0 +1,30 @@
+-- Props edges
+-- props_edges.py lines up the week's sportsbook lines (player_lines) with the player's
+-- projection for that week's opponent (player_projections) and stores the edge, the
+-- book's implied and the simulated probability of the side, and its rank in the week.
+-- Each run replaces that week's rows.
+
+CREATE TABLE player_edges (
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    normalized_name VARCHAR(255) NOT NULL,
+    position VARCHAR(10) NOT NULL,
+    team_id VARCHAR(10),
+    opponent VARCHAR(10) NOT NULL,
+    stat_key VARCHAR(50) NOT NULL,
+    line DECIMAL(8,2) NOT NULL,
+    projection DECIMAL(8,2) NOT NULL,
+    edge DECIMAL(8,2) NOT NULL,
+    edge_pct DECIMAL(8,4),
+    side VARCHAR(5) NOT NULL,
+    implied_probability DECIMAL(5,4) NOT NULL,
+    model_probability DECIMAL(5,4),
+    probability_edge DECIMAL(5,4),
+    rank INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, week, player_name, stat_key)
+);
+
+CREATE INDEX idx_player_edges_rank ON player_edges(season, week, rank);
+CREATE INDEX idx_player_edges_player ON player_edges(normalized_name, season, week);
@@ -0,0 +1,64 @@
+-- Player line history
+-- uploadPlayerLines.py keeps every bookmaker's line for each player and market.
+-- player_line_history gets a row only when a book's line or prices change from its
+-- previous snapshot for the week, so the table grows with line movement rather than
+-- with upload frequency. player_line_consensus holds the current median and best lines
+-- across books. player_lines keeps the median line, as before.
+-- stat_key uses the player_lines column names without "projected_" (passing_yards,
+-- completions, ...), like player_projection_distributions.
+
+CREATE TABLE player_line_history (
+    season INTEGER NOT NULL,
+    week SMALLINT NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    stat_key VARCHAR(30) NOT NULL,
+    bookmaker VARCHAR(40) NOT NULL,
+    point DECIMAL(6,2) NOT NULL,
+    over_price DECIMAL(7,3),
+    under_price DECIMAL(7,3),
+    observed_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (season, week, player_name, stat_key, bookmaker, observed_at)
+);
+
+-- One player's movement across the season
+CREATE INDEX idx_player_line_history_player ON player_line_history(player_name, stat_key, season, observed_at);
+
+CREATE TABLE player_line_consensus (
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    player_name VARCHAR(255) NOT NULL,
+    stat_key VARCHAR(30) NOT NULL,
+    books INTEGER NOT NULL,
+    line DECIMAL(6,2) NOT NULL,
+    over_price DECIMAL(7,3),
+    under_price DECIMAL(7,3),
+    best_over_line DECIMAL(6,2),
+    best_over_price DECIMAL(7,3),
+    best_over_book VARCHAR(40),
+    best_under_line DECIMAL(6,2),
+    best_under_price DECIMAL(7,3),
+    best_under_book VARCHAR(40),
+    updated_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (season, week, player_name, stat_key)
+);
+
+-- Opening and current line per book, and how far it has moved
+CREATE VIEW player_line_movement AS
+SELECT DISTINCT ON (season, week, player_name, stat_key, bookmaker)
+       season,
+       week,
+       player_name,
+       stat_key,
+       bookmaker,
+       first_value(point) OVER book AS open_point,
+       point AS current_point,
+       point - first_value(point) OVER book AS movement,
+       over_price,
+       under_price,
+       count(*) OVER book AS snapshots,
+       first_value(observed_at) OVER book AS opened_at,
+       observed_at AS updated_at
+FROM player_line_history
+WINDOW book AS (PARTITION BY season, week, player_name, stat_key, bookmaker ORDER BY observed_at
+                ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+ORDER BY season, week, player_name, stat_key, bookmaker, observed_at DESC;
@@ -0,0 +1,29 @@
+-- Pick settlement
+-- settle_picks.py grades open user picks once a week's game logs are in: each pick is
+-- resolved to the player's game that week by normalized name and marked win, loss or
+-- push against player_stats. user_pick_records holds every user's running record per
+-- season, recomputed from the graded picks.
+
+ALTER TABLE picks ADD COLUMN normalized_name VARCHAR(255);
+ALTER TABLE picks ADD COLUMN season INTEGER;
+ALTER TABLE picks ADD COLUMN week INTEGER;
+ALTER TABLE picks ADD COLUMN actual DECIMAL(8,2);
+ALTER TABLE picks ADD COLUMN result VARCHAR(5);
+ALTER TABLE picks ADD COLUMN settled_at TIMESTAMP;
+
+-- The open picks each settlement run looks at, and a user's graded picks
+CREATE INDEX idx_picks_open ON picks(created_at) WHERE result IS NULL;
+CREATE INDEX idx_picks_graded ON picks(season, name) WHERE result IS NOT NULL;
+
+CREATE TABLE user_pick_records (
+    season INTEGER NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    picks INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    pushes INTEGER NOT NULL,
+    win_pct DECIMAL(5,4),
+    last_week INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (season, name)
+);
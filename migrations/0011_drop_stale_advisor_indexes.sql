@@ -0,0 +1,14 @@
+-- Drop the stale index advisor indexes
+-- 0001 came from a replay of the synthetic layout before player_stats was partitioned by
+-- season (weeks numbered across seasons, up to week 352), and 0002 recreated the same
+-- indexes on the partitioned table. The current queries don't use them:
+--   * the snaps index leads with a column no query filters on; it only matched a sort order
+--   * the name/position/team index was cut to 63 characters (..._team_i) by Postgres
+--   * the covering indexes don't lead with season, so the season-filtered scans of each
+--     partition can't seek on them
+-- 0012 holds what index_advisor.py proposes for the current queries.
+
+DROP INDEX IF EXISTS idx_player_stats_normalized_name_cov;
+DROP INDEX IF EXISTS idx_player_stats_snaps_player_name_position_id_team_id;
+DROP INDEX IF EXISTS idx_player_stats_player_name_position_id_team_id_cov;
+DROP INDEX IF EXISTS idx_player_stats_normalized_name_player_name_position_id_team_i;
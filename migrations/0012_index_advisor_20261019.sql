@@ -0,0 +1,5 @@
+-- Generated by index_advisor.py on 2026-10-19 (week 10)
+-- Plan cost before -> after for the statements that improved:
+--   51.5 -> 4.6  SELECT passing_attempts, completions, passing_yards, passing_tds, interceptions, rushing_attempts, r
+
+CREATE INDEX IF NOT EXISTS idx_player_stats_season_normalized_name_cov ON player_stats (season, normalized_name) INCLUDE (passing_attempts, completions, passing_yards, passing_tds, interceptions, rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds);
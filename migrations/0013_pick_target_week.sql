@@ -0,0 +1,9 @@
+-- Picks carry the week they were made for
+-- The website now fills in picks.season and picks.week (0010) when a pick is submitted:
+-- the week after the one the pipeline last loaded, the games Players to Watch covers.
+-- settle_picks.py grades a pick only against its player's game in that week, instead
+-- of any game log stored after the pick. Open picks submitted before this have no week
+-- and are left open.
+
+DROP INDEX IF EXISTS idx_picks_open;
+CREATE INDEX idx_picks_open ON picks(season, week) WHERE result IS NULL;
@@ -1,8 +1,12 @@
 import os
+import sys
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import execute_values
 
+from pipeline_shared import connect_analytics_db, load_recency_averages
+from config import get_current_season  # on sys.path through pipeline_shared
+
 load_dotenv()
 
 SUPABASE_HOST = os.getenv("SUPABASE_HOST")
@@ -11,6 +15,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 def connect_db():
     return psycopg2.connect(
         host=SUPABASE_HOST,
@@ -21,9 +27,17 @@ def connect_db():
         sslmode="require"
     )
 
-def generate_hot_and_cold_players():
-    conn = connect_db()
-    cursor = conn.cursor()
+def recent_form(cursor):
+    """(player_name, position) -> recent passing/rushing/receiving yards: the 3-week average, or the recency averages."""
+    recency_averages = load_recency_averages(cursor, CURRENT_SEASON, "the last 3 weeks")
+    if recency_averages is not None:
+        # Only players seen in the last 3 weeks, like recent_player_stats
+        latest_week = max(player.last_week for player in recency_averages.values())
+        return {
+            key: {stat: player.averages.get(f"{stat}_yards", 0) for stat in ("passing", "rushing", "receiving")}
+            for key, player in recency_averages.items()
+            if player.last_week > latest_week - 3
+        }
 
     # Fetch recent 3-week stats
     cursor.execute("""
@@ -32,8 +46,38 @@ def generate_hot_and_cold_players():
     """)
     recent_data = cursor.fetchall()
 
+    # Group recent stats
+    recent_stats = {}
+    for name, position, pass_yds, rush_yds, recv_yds in recent_data:
+        key = (name, position)
+        if key not in recent_stats:
+            recent_stats[key] = {
+                "passing_yards": [],
+                "rushing_yards": [],
+                "receiving_yards": []
+            }
+        recent_stats[key]["passing_yards"].append(float(pass_yds) if pass_yds else 0)
+        recent_stats[key]["rushing_yards"].append(float(rush_yds) if rush_yds else 0)
+        recent_stats[key]["receiving_yards"].append(float(recv_yds) if recv_yds else 0)
+
+    def get_avg(lst):
+        return sum(lst) / len(lst) if lst else 0
+
+    return {
+        key: {
+            "passing": get_avg(values["passing_yards"]),
+            "rushing": get_avg(values["rushing_yards"]),
+            "receiving": get_avg(values["receiving_yards"])
+        }
+        for key, values in recent_stats.items()
+    }
+
+def find_hot_and_cold(cursor, stats_cursor):
+    """Hot and cold player rows, and counts for the summary, from recent stats against season averages."""
+    recent_averages = recent_form(cursor)
+
     # Fetch season averages (calculate from ALL weeks in player_stats)
-    cursor.execute("""
+    stats_cursor.execute("""
         SELECT 
             player_name, 
             position_id, 
@@ -41,17 +85,19 @@ def generate_hot_and_cold_players():
             AVG(rushing_yards) as avg_rushing_yards, 
             AVG(receiving_yards) as avg_receiving_yards
         FROM player_stats
+        WHERE season = %s
         GROUP BY player_name, position_id
-    """)
-    season_averages = cursor.fetchall()
+    """, (CURRENT_SEASON,))
+    season_averages = stats_cursor.fetchall()
 
     # Calculate actual games played by counting records per player
-    cursor.execute("""
+    stats_cursor.execute("""
         SELECT player_name, position_id, COUNT(*) as actual_games_played 
-        FROM player_stats 
+        FROM player_stats
+        WHERE season = %s
         GROUP BY player_name, position_id
-    """)
-    games_played_data = cursor.fetchall()
+    """, (CURRENT_SEASON,))
+    games_played_data = stats_cursor.fetchall()
 
     # Lookup maps
     averages_map = {
@@ -68,20 +114,6 @@ def generate_hot_and_cold_players():
         for row in games_played_data
     }
 
-    # Group recent stats
-    player_stats = {}
-    for name, position, pass_yds, rush_yds, recv_yds in recent_data:
-        key = (name, position)
-        if key not in player_stats:
-            player_stats[key] = {
-                "passing_yards": [],
-                "rushing_yards": [],
-                "receiving_yards": []
-            }
-        player_stats[key]["passing_yards"].append(float(pass_yds) if pass_yds else 0)
-        player_stats[key]["rushing_yards"].append(float(rush_yds) if rush_yds else 0)
-        player_stats[key]["receiving_yards"].append(float(recv_yds) if recv_yds else 0)
-
     hot_players = []
     cold_players = []
     
@@ -93,7 +125,7 @@ def generate_hot_and_cold_players():
         "passed_filters": 0
     }
 
-    for key, values in player_stats.items():
+    for key, recent in recent_averages.items():
         name, position = key
         if key not in averages_map or key not in games_played_map:
             filtered_out_reasons["missing_data"] += 1
@@ -102,15 +134,6 @@ def generate_hot_and_cold_players():
         avg_stats = averages_map[key]
         games_played = games_played_map[key]
 
-        def get_avg(lst):
-            return sum(lst) / len(lst) if lst else 0
-
-        recent = {
-            "passing": get_avg(values["passing_yards"]),
-            "rushing": get_avg(values["rushing_yards"]),
-            "receiving": get_avg(values["receiving_yards"])
-        }
-
         deltas = {
             "passing": recent["passing"] - avg_stats["avg_passing_yards"],
             "rushing": recent["rushing"] - avg_stats["avg_rushing_yards"],
@@ -182,6 +205,15 @@ def generate_hot_and_cold_players():
         elif absolute_change < 0:
             cold_players.append(row)
 
+    counts = {
+        "players": len(recent_averages),
+        "averages": len(averages_map),
+        "games_played": len(games_played_map),
+        **filtered_out_reasons,
+    }
+    return hot_players, cold_players, counts
+
+def write_hot_and_cold(cursor, hot_players, cold_players):
     # Refresh DB
     cursor.execute("DELETE FROM hot_players;")
     cursor.execute("DELETE FROM cold_players;")
@@ -198,22 +230,36 @@ def generate_hot_and_cold_players():
         ) VALUES %s
     """, cold_players)
 
+def generate_hot_and_cold_players():
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    # Season aggregates run on the local mirror when one is available
+    stats_conn = connect_analytics_db(connect_db)
+    stats_cursor = stats_conn.cursor()
+    try:
+        hot_players, cold_players, counts = find_hot_and_cold(cursor, stats_cursor)
+    finally:
+        stats_cursor.close()
+        stats_conn.close()
+
+    write_hot_and_cold(cursor, hot_players, cold_players)
+
     conn.commit()
     cursor.close()
     conn.close()
 
-    print(f"Processed {len(player_stats)} players from recent stats.")
-    print(f"Found {len(averages_map)} players in season averages.")
-    print(f"Found {len(games_played_map)} players with games played data.")
+    print(f"Processed {counts['players']} players from recent stats.")
+    print(f"Found {counts['averages']} players in season averages.")
+    print(f"Found {counts['games_played']} players with games played data.")
     print(f"Filter results:")
-    print(f"  - Missing data: {filtered_out_reasons['missing_data']}")
-    print(f"  - Low volume: {filtered_out_reasons['low_volume']}")
-    print(f"  - Low change (<10%): {filtered_out_reasons['low_change']}")
-    print(f"  - Passed filters: {filtered_out_reasons['passed_filters']}")
+    print(f"  - Missing data: {counts['missing_data']}")
+    print(f"  - Low volume: {counts['low_volume']}")
+    print(f"  - Low change (<10%): {counts['low_change']}")
+    print(f"  - Passed filters: {counts['passed_filters']}")
     print(f"Inserted {len(hot_players)} hot players and {len(cold_players)} cold players.")
 
 if __name__ == "__main__":
-    import sys
     # Set UTF-8 encoding for Windows console
     if sys.platform == "win32":
         import codecs
@@ -1,8 +1,14 @@
+import math
 import os
+import sys
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import execute_values
 
+from pipeline_shared import connect_analytics_db, load_matchup_factors, load_recency_averages, load_schedule_index
+from config import get_current_season  # on sys.path through pipeline_shared
+from names import normalize_name
+
 load_dotenv()
 
 SUPABASE_HOST = os.getenv("SUPABASE_HOST")
@@ -11,6 +17,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 # CURRENT_WEEK will be passed as parameter
 
 def connect_db():
@@ -23,75 +31,82 @@ def connect_db():
         sslmode="require"
     )
 
-def normalize_name(name):
-    return name.lower().replace("-", "").replace(".", "").replace("’", "").replace("'", "").replace("`", "").strip()
-
 def generate_players_to_watch(current_week):
     conn = connect_db()
     cursor = conn.cursor()
 
-    # Fetch all necessary data
-    cursor.execute("""
-        SELECT player_name, position_id, team_id, passing_yards, rushing_yards, receiving_yards, week 
-        FROM recent_player_stats
-    """)
-    recent = cursor.fetchall()
+    # Recent form: recency averages when configured, else the 3-week recent_player_stats
+    recency_averages = load_recency_averages(cursor, CURRENT_SEASON, "the last 3 weeks")
+    if recency_averages is None:
+        cursor.execute("""
+            SELECT player_name, position_id, team_id, passing_yards, rushing_yards, receiving_yards, week 
+            FROM recent_player_stats
+        """)
+        recent = cursor.fetchall()
 
-    cursor.execute("""
+    # Game-log aggregates and the schedule run on the local mirror when one is available
+    stats_conn = connect_analytics_db(connect_db)
+    stats_cursor = stats_conn.cursor()
+
+    stats_cursor.execute("""
         SELECT 
             player_name, 
             position_id, 
             AVG(passing_yards) as avg_passing_yards,
             AVG(rushing_yards) as avg_rushing_yards, 
-            AVG(receiving_yards) as avg_receiving_yards
+            AVG(receiving_yards) as avg_receiving_yards,
+            MAX(normalized_name) as normalized_name
         FROM player_stats
+        WHERE season = %s
         GROUP BY player_name, position_id
-    """)
-    season = cursor.fetchall()
+    """, (CURRENT_SEASON,))
+    season = stats_cursor.fetchall()
 
     # Calculate actual games played by counting records per player
-    cursor.execute("""
+    stats_cursor.execute("""
         SELECT player_name, position_id, COUNT(*) as actual_games_played 
-        FROM player_stats 
+        FROM player_stats
+        WHERE season = %s
         GROUP BY player_name, position_id
-    """)
-    games_played_data = cursor.fetchall()
-
-    cursor.execute("SELECT team_id, opponent_id FROM team_schedule WHERE week = %s", (current_week + 1,))
-    matchups_data = cursor.fetchall()
-    matchups = dict(matchups_data)
+    """, (CURRENT_SEASON,))
+    games_played_data = stats_cursor.fetchall()
+
+    schedule_index = load_schedule_index(stats_cursor)
+    stats_cursor.close()
+    stats_conn.close()
+    # Byes map to None, so they count as "no opponent" below
+    matchups = schedule_index.week(current_week + 1)
     
     print(f"Looking for matchups in week {current_week + 1}")
     print(f"Found {len(matchups)} matchups in team_schedule")
 
-    cursor.execute("SELECT team_id, avg_passing_yards FROM defense_averages_qb")
-    qb_defense = {row[0]: float(row[1]) if row[1] else 0 for row in cursor.fetchall()}
-
-    cursor.execute("SELECT team_id, avg_rushing_yards, avg_receiving_yards FROM defense_averages")
-    def_defense = {row[0]: {"rushing": float(row[1]) if row[1] else 0, "receiving": float(row[2]) if row[2] else 0} for row in cursor.fetchall()}
-
-    cursor.execute("SELECT avg_passing_yards FROM all_defense_averages_qb")
-    league_passing_avg = cursor.fetchone()[0]
-
-    cursor.execute("SELECT avg_rushing_yards, avg_receiving_yards FROM all_defense_averages")
-    league_rushing_avg, league_receiving_avg = cursor.fetchone()
-
-    league_avg = {
-        "passing": float(league_passing_avg or 0),
-        "rushing": float(league_rushing_avg or 0),
-        "receiving": float(league_receiving_avg or 0)
-    }
+    # Yards each defense allows per position, and the league averages, per (team, position, stat)
+    factors = load_matchup_factors(connect_db)
 
     # Build maps
-    recent_map = {}
-    for row in recent:
-        player_name, position_id, team_id, passing_yards, rushing_yards, receiving_yards, week = row
-        key = (player_name, position_id, team_id)
-        if key not in recent_map:
-            recent_map[key] = {"passing": [], "rushing": [], "receiving": []}
-        if passing_yards: recent_map[key]["passing"].append(passing_yards)
-        if rushing_yards: recent_map[key]["rushing"].append(rushing_yards)
-        if receiving_yards: recent_map[key]["receiving"].append(receiving_yards)
+    if recency_averages is not None:
+        # Only players seen in the last 3 weeks, like recent_player_stats
+        latest_week = max(player.last_week for player in recency_averages.values())
+        recent_averages = {
+            (player_name, position_id, player.team_id): {
+                stat: player.averages.get(f"{stat}_yards", 0) for stat in ("passing", "rushing", "receiving")
+            }
+            for (player_name, position_id), player in recency_averages.items()
+            if player.last_week > latest_week - 3
+        }
+    else:
+        def avg(lst): return sum(lst) / len(lst) if lst else 0
+
+        recent_map = {}
+        for row in recent:
+            player_name, position_id, team_id, passing_yards, rushing_yards, receiving_yards, week = row
+            key = (player_name, position_id, team_id)
+            if key not in recent_map:
+                recent_map[key] = {"passing": [], "rushing": [], "receiving": []}
+            if passing_yards: recent_map[key]["passing"].append(passing_yards)
+            if rushing_yards: recent_map[key]["rushing"].append(rushing_yards)
+            if receiving_yards: recent_map[key]["receiving"].append(receiving_yards)
+        recent_averages = {key: {stat: avg(values) for stat, values in stats.items()} for key, stats in recent_map.items()}
 
     season_map = {
         (row[0], row[1]): {
@@ -101,6 +116,8 @@ def generate_players_to_watch(current_week):
         }
         for row in season
     }
+    # normalized_name is persisted at ingest (uploadFiles/names.py); reuse it as-is
+    normalized_names = {(row[0], row[1]): row[5] for row in season}
 
     games_played_map = {
         (row[0], row[1]): row[2] or 0
@@ -119,7 +136,7 @@ def generate_players_to_watch(current_week):
         "added": 0
     }
 
-    for key, stats in recent_map.items():
+    for key, player_avgs in recent_averages.items():
         debug_counts["processed"] += 1
         player_name, position, team_id = key
         if (player_name, position) not in season_map:
@@ -128,14 +145,6 @@ def generate_players_to_watch(current_week):
         averages = season_map[(player_name, position)]
         games_played = games_played_map.get((player_name, position), 0)
 
-        def avg(lst): return sum(lst) / len(lst) if lst else 0
-
-        player_avgs = {
-            "passing": avg(stats["passing"]),
-            "rushing": avg(stats["rushing"]),
-            "receiving": avg(stats["receiving"])
-        }
-
         stat_used = None
         is_overperforming = False
         is_underperforming = False
@@ -181,27 +190,26 @@ def generate_players_to_watch(current_week):
             debug_counts["low_volume"] += 1
             continue
 
-        opponent = matchups.get(team_id)
-        if not opponent:
+        game = schedule_index.game(team_id, current_week + 1)
+        if not game or not game.opponent:
             debug_counts["no_opponent"] += 1
             continue
 
-        # Clean opponent ID (remove @ symbol for away games)
-        clean_opponent = opponent.lstrip('@') if opponent else None
+        # Canonical opponent for the defense lookups; players_to_watch keeps the '@' for away games
+        clean_opponent = game.opponent
+        opponent = clean_opponent if game.is_home else "@" + clean_opponent
         
         if debug_counts["processed"] <= 5:
             print(f"  Opponent: {opponent} -> cleaned: {clean_opponent}")
 
-        if stat_used == "passing":
-            defense_val = float(qb_defense.get(clean_opponent, 0))
-        else:
-            defense_val = float(def_defense.get(clean_opponent, {}).get(stat_used, 0))
+        defense_val = factors.allowed(clean_opponent, position, f"{stat_used}_yards")
+        league_val = factors.league_average(position, f"{stat_used}_yards")
 
-        if not defense_val:
+        if not defense_val or math.isnan(defense_val) or math.isnan(league_val):
             debug_counts["no_defense_data"] += 1
             continue
 
-        matchup_score = league_avg[stat_used] - defense_val
+        matchup_score = league_val - defense_val
 
         # Format the yards differential
         if matchup_score > 0:
@@ -224,7 +232,7 @@ def generate_players_to_watch(current_week):
             performance_type = "Overperforming" if is_overperforming else "Underperforming"
             debug_counts["added"] += 1
             players_to_watch.append((
-                normalize_name(player_name),  # ✅ normalized_name
+                normalized_names[(player_name, position)] or normalize_name(player_name),  # ✅ normalized_name
                 player_name,
                 position,
                 {
@@ -268,7 +276,6 @@ def generate_players_to_watch(current_week):
     print(f"Inserted {len(players_to_watch)} players to watch.")
 
 if __name__ == "__main__":
-    import sys
     # Set UTF-8 encoding for Windows console
     if sys.platform == "win32":
         import codecs
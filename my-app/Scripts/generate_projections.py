@@ -1,8 +1,13 @@
+import math
 import os
+import sys
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import execute_values, DictCursor
 
+from pipeline_shared import connect_analytics_db, load_matchup_factors, load_recency_averages, load_schedule_index
+from config import get_current_season  # on sys.path through pipeline_shared
+
 load_dotenv()
 
 SUPABASE_HOST = os.getenv("SUPABASE_HOST")
@@ -11,6 +16,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 def connect_db():
     return psycopg2.connect(
         host=SUPABASE_HOST,
@@ -21,56 +28,42 @@ def connect_db():
         sslmode="require"
     )
 
-def generate_and_store_projections():
+def upcoming_week(stats_cursor):
+    """The week after the latest one in player_stats (capped at 18)."""
+    stats_cursor.execute("SELECT MAX(week) FROM player_stats WHERE season = %s", (CURRENT_SEASON,))
+    latest = stats_cursor.fetchone()[0]
+    return min((latest or 0) + 1, 18)
+
+def generate_and_store_projections(week=None):
     print("📤 Uploading player projections to database...")
 
     conn = connect_db()
     cursor = conn.cursor(cursor_factory=DictCursor)
+    # Game logs and the schedule are read from the local mirror when one is available
+    stats_conn = connect_analytics_db(connect_db)
+    stats_cursor = stats_conn.cursor(cursor_factory=DictCursor)
 
     # Load player info
-    cursor.execute("SELECT DISTINCT normalized_name, player_name, position_id, team_id FROM player_stats")
-    players = cursor.fetchall()
-
-    # Load defensive team stats
-    cursor.execute("SELECT * FROM defense_averages")
-    defense_map = {(row["team_id"], row["position_id"]): row for row in cursor.fetchall()}
+    stats_cursor.execute(
+        "SELECT DISTINCT normalized_name, player_name, position_id, team_id FROM player_stats WHERE season = %s",
+        (CURRENT_SEASON,)
+    )
+    players = stats_cursor.fetchall()
 
-    cursor.execute("SELECT * FROM defense_averages_qb")
-    defense_qb_map = {row["team_id"]: row for row in cursor.fetchall()}
+    # Opponents for the projected week (the schedule's last week was used before)
+    if week is None:
+        week = upcoming_week(stats_cursor)
+    schedule_index = load_schedule_index(stats_cursor)
+    print(f"📅 Projecting week {week}")
 
-    # Load league-wide averages
-    cursor.execute("SELECT * FROM all_defense_averages")
-    league_rows = cursor.fetchall()
-    league_pos_map = {row["position_id"]: row for row in league_rows}
+    # Defense/league ratios per (team, position, stat)
+    factors = load_matchup_factors(connect_db)
 
-    cursor.execute("SELECT * FROM all_defense_averages_qb")
-    league_qb_averages = cursor.fetchone()
+    # Player averages weighted toward recent weeks instead of the season mean, when configured
+    recency_averages = load_recency_averages(cursor, CURRENT_SEASON, "season averages")
 
     projections = []
 
-    # Stat → column map for league/defense table lookup
-    stat_column_map = {
-        "passing_attempts": "avg_passing_attempts",
-        "completions": "avg_completions",
-        "passing_yards": "avg_passing_yards",
-        "passing_tds": "avg_passing_tds",
-        "interceptions": "avg_interceptions",
-        "rushing_attempts": "avg_rushing_attempts",
-        "rushing_yards": "avg_rushing_yards",
-        "rushing_tds": "avg_rushing_tds",
-        "receptions": "avg_receptions",
-        "receiving_yards": "avg_receiving_yards",
-        "receiving_tds": "avg_receiving_tds"
-    }
-
-    # Override QB-specific rushing keys
-    qb_stat_column_map = {
-        **stat_column_map,
-        "rushing_attempts": "avg_qb_rushing_attempts",
-        "rushing_yards": "avg_qb_rushing_yards",
-        "rushing_tds": "avg_qb_rushing_tds"
-    }
-
     position_stat_map = {
         "QB": ["passing_attempts", "completions", "passing_yards", "passing_tds", "interceptions", "rushing_attempts", "rushing_yards", "rushing_tds"],
         "RB": ["rushing_attempts", "rushing_yards", "rushing_tds", "receptions", "receiving_yards", "receiving_tds"],
@@ -80,39 +73,33 @@ def generate_and_store_projections():
 
     for normalized_name, player_name, position_id, team_id in players:
         # Get player stat rows
-        cursor.execute("""
+        stats_cursor.execute("""
             SELECT passing_attempts, completions, passing_yards, passing_tds, interceptions,
                    rushing_attempts, rushing_yards, rushing_tds,
                    receptions, receiving_yards, receiving_tds
             FROM player_stats
-            WHERE normalized_name = %s
-        """, (normalized_name,))
-        stats = cursor.fetchall()
+            WHERE season = %s AND normalized_name = %s
+        """, (CURRENT_SEASON, normalized_name))
+        stats = stats_cursor.fetchall()
         if not stats:
             print(f"⛔ Skipped {player_name}: No player stats found")
             continue
 
-        # Get opponent
-        opp_cursor = conn.cursor()
-        opp_cursor.execute("SELECT opponent_id FROM team_schedule WHERE team_id = %s ORDER BY week DESC LIMIT 1", (team_id,))
-        opp = opp_cursor.fetchone()
-        opp_cursor.close()
-        if not opp:
-            print(f"⛔ Skipped {player_name}: No opponent found for team {team_id}")
+        # Get opponent (canonical team_id, no '@')
+        opponent_id = schedule_index.opponent(team_id, week)
+        if not opponent_id:
+            print(f"⛔ Skipped {player_name}: No opponent found for team {team_id} in week {week}")
             continue
-        opponent_id = opp[0].replace("@", "").replace("JAX", "JAC")
 
-        # Get defense and league row
-        defense = defense_qb_map.get(opponent_id) if position_id == "QB" else defense_map.get((opponent_id, position_id))
-        league = league_qb_averages if position_id == "QB" else league_pos_map.get(position_id)
-        if not defense or not league:
+        # Get the defense's factors for the position
+        defense_factors = factors.factor_row(opponent_id, position_id)
+        if defense_factors is None:
             print(f"⛔ Skipped {player_name}: Missing defense or league data for team {opponent_id}, position {position_id}")
             continue
 
         stat_keys = position_stat_map.get(position_id, [])
-        column_names = [desc.name for desc in cursor.description]
+        column_names = [desc.name for desc in stats_cursor.description]
         available_stats = {col: idx for idx, col in enumerate(column_names)}
-        col_map = qb_stat_column_map if position_id == "QB" else stat_column_map
 
         for stat in stat_keys:
             if stat not in available_stats:
@@ -125,19 +112,29 @@ def generate_and_store_projections():
                 print(f"⛔ Skipped {player_name}: No non-null values for stat {stat}")
                 continue
 
-            player_avg = sum(values) / len(values)
-            col_name = col_map.get(stat)
-
-            defense_val = float(defense.get(col_name, 0))
-            league_val = float(league.get(col_name, 1))  # avoid divide-by-zero
+            if recency_averages is not None:
+                recent = recency_averages.get((player_name, position_id))
+                player_avg = recent.averages.get(stat) if recent else None
+                if player_avg is None:
+                    print(f"⛔ Skipped {player_name}: No recency average for stat {stat}")
+                    continue
+            else:
+                player_avg = sum(values) / len(values)
+            factor = factors.factor(opponent_id, position_id, stat)
+            if math.isnan(factor):  # No defense or league average for the stat
+                print(f"⛔ Skipped {player_name}: No defense factor for stat {stat}")
+                continue
 
             if player_avg > 0:
-                defense_impact = player_avg * (defense_val / league_val)
+                defense_impact = player_avg * factor
                 projected = player_avg * 0.7 + defense_impact * 0.3
-                print(f"📈 [{player_name}] {stat.upper()} | avg={player_avg:.2f} | def_val={defense_val:.2f} | league_val={league_val:.2f}")
+                print(f"📈 [{player_name}] {stat.upper()} | avg={player_avg:.2f} | factor={factor:.3f}")
                 projections.append((player_name, normalized_name, position_id, str(opponent_id), stat, round(projected, 2)))
 
     print("📤 Uploading player projections to database...")
+    stats_cursor.close()
+    stats_conn.close()
+
     cursor.execute("DELETE FROM player_projections")
     execute_values(cursor, """
         INSERT INTO player_projections (
@@ -152,11 +149,11 @@ def generate_and_store_projections():
     print(f"✅ Inserted {len(projections)} player projections.")
 
 if __name__ == "__main__":
-    import sys
     # Set UTF-8 encoding for Windows console
     if sys.platform == "win32":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
         sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
     
-    generate_and_store_projections()
+    # Week to project from the command line, else the week after the latest stats
+    generate_and_store_projections(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -1,8 +1,12 @@
 import os
+import sys
 from dotenv import load_dotenv
 import psycopg2
 from psycopg2.extras import execute_values
 
+from pipeline_shared import connect_analytics_db
+from config import get_current_season  # on sys.path through pipeline_shared
+
 # Load credentials from .env
 load_dotenv()
 
@@ -12,6 +16,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 def connect_db():
     return psycopg2.connect(
         host=SUPABASE_HOST,
@@ -22,36 +28,43 @@ def connect_db():
         sslmode="require"
     )
 
+# Stat used to rank each position
+STAT_MAP = {
+    "QB": "passing_yards",
+    "RB": "rushing_yards",
+    "WR": "receiving_yards",
+    "TE": "receiving_yards",
+}
+
+def fetch_leaders(stats_cursor, week, position):
+    """Top 5 at a position for the week, as weekly_leaders rows."""
+    stat_field = STAT_MAP[position]
+    query = f"""
+        SELECT player_name, position_id, {stat_field}, matchup
+        FROM player_stats
+        WHERE season = %s AND week = %s AND position_id = %s
+        ORDER BY {stat_field} DESC
+        LIMIT 5
+    """
+    stats_cursor.execute(query, (CURRENT_SEASON, week, position))
+    top_players = stats_cursor.fetchall()
+
+    return [
+        (week, player_name, position_id, stat_value, matchup, rank)
+        for rank, (player_name, position_id, stat_value, matchup) in enumerate(top_players, start=1)
+    ]
+
 def generate_weekly_leaders(week):
     conn = connect_db()
     cursor = conn.cursor()
-
-    # Define which stat to use per position
-    stat_map = {
-        "QB": "passing_yards",
-        "RB": "rushing_yards",
-        "WR": "receiving_yards",
-        "TE": "receiving_yards",
-    }
+    stats_conn = connect_analytics_db(connect_db)
+    stats_cursor = stats_conn.cursor()
 
     all_leaders = []
-
-    for position, stat_field in stat_map.items():
-        query = f"""
-            SELECT player_name, position_id, {stat_field}, matchup
-            FROM player_stats
-            WHERE week = %s AND position_id = %s
-            ORDER BY {stat_field} DESC
-            LIMIT 5
-        """
-        cursor.execute(query, (week, position))
-        top_players = cursor.fetchall()
-
-        for rank, row in enumerate(top_players, start=1):
-            player_name, position_id, stat_value, matchup = row
-            all_leaders.append((
-                week, player_name, position_id, stat_value, matchup, rank
-            ))
+    for position in STAT_MAP:
+        all_leaders.extend(fetch_leaders(stats_cursor, week, position))
+    stats_cursor.close()
+    stats_conn.close()
 
     # Insert into weekly_leaders table
     insert_query = """
@@ -69,7 +82,6 @@ def generate_weekly_leaders(week):
     print(f"Inserted top players for week {week}.")
 
 if __name__ == "__main__":
-    import sys
     # Set UTF-8 encoding for Windows console
     if sys.platform == "win32":
         import codecs
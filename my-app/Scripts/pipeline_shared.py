@@ -0,0 +1,53 @@
+"""
+Helpers the frontend generators share with the upload pipeline (../../uploadFiles):
+the local DuckDB mirror, the (team, week) schedule index, recency averages and the
+published matchup factors. Importing this module puts uploadFiles on sys.path once;
+the pipeline modules themselves are imported when first used.
+
+Each helper takes the calling script's connect_db, so tools that re-point a script's
+connect_db (benchmark_pipeline.py, index_advisor.py) re-point these reads too.
+"""
+
+import os
+import sys
+
+UPLOAD_FILES_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "uploadFiles"))
+if UPLOAD_FILES_DIR not in sys.path:
+    sys.path.append(UPLOAD_FILES_DIR)
+
+
+def connect_analytics_db(connect_db):
+    """Local DuckDB mirror of the game logs when run_all_uploads.py synced one, else connect_db()."""
+    if not os.getenv("STATSX_LOCAL_MIRROR"):
+        return connect_db()
+    import local_mirror
+    return local_mirror.connect_analytics(connect_db)
+
+
+def load_schedule_index(db):
+    """Season schedule indexed by (team, week), shared with uploadFiles (matchups.py)."""
+    import dimensions
+    return dimensions.matchups(db)
+
+
+def load_matchup_factors(connect_db):
+    """Defense/league ratios published by the averages phase (uploadFiles/matchup_factors.py)."""
+    import matchup_factors
+    return matchup_factors.load(connect_db)
+
+
+def load_recency_averages(db, season, fallback):
+    """
+    Exponentially weighted averages (uploadFiles/recency.py) when STATSX_RECENCY_HALF_LIFE
+    is set, else None. `fallback` names what the caller uses instead, for the log line.
+    """
+    half_life = os.getenv("STATSX_RECENCY_HALF_LIFE")
+    if not half_life:
+        return None
+    import recency
+    averages = recency.load_averages(db, season, float(half_life))
+    if not averages:
+        print(f"⚠️ No recency averages stored for half-life {half_life}, using {fallback}")
+        return None
+    print(f"📈 Using recency averages (half-life {half_life} weeks)")
+    return averages
@@ -20,7 +20,7 @@ export async function GET() {
 
 export async function POST(request: Request) {
   try {
-    const { currentWeek } = await request.json();
+    const { currentWeek, season } = await request.json();
 
     if (!currentWeek || currentWeek < 1 || currentWeek > 18) {
       return NextResponse.json(
@@ -32,7 +32,8 @@ export async function POST(request: Request) {
     const config = {
       currentWeek,
       lastUpdated: new Date().toISOString(),
-      season: "2025",
+      // The season the frontend filters player_stats and the defensive game logs to
+      season: String(season || 2025),
     };
 
     // Use the same path resolution logic as GET
@@ -3,6 +3,28 @@ import { createClient } from '@supabase/supabase-js';
 import fs from 'fs';
 import path from 'path';
 
+// Parsed config/current-week.json (currentWeek, season), or null when none is found
+function readWeekConfig(): any {
+  // Try several likely filesystem locations for a local config file. Avoid bundler requires.
+  const candidates = [
+    path.join(process.cwd(), 'config', 'current-week.json'),
+    path.join(process.cwd(), 'my-app', 'config', 'current-week.json'),
+    path.join(__dirname, '..', '..', 'config', 'current-week.json'),
+    path.join(__dirname, '..', '..', '..', 'config', 'current-week.json'),
+  ];
+  for (const pth of candidates) {
+    try {
+      if (fs.existsSync(pth)) {
+        const cfg = JSON.parse(fs.readFileSync(pth, 'utf8'));
+        if (cfg && cfg.currentWeek) return cfg;
+      }
+    } catch (e) {
+      // ignore parse/read errors and try next candidate
+    }
+  }
+  return null;
+}
+
 export async function POST(req: NextRequest) {
   try {
   const { playerName, playerId: providedPlayerId, season, weeks, limit = 200, offset = 0 } = await req.json();
@@ -117,6 +139,13 @@ export async function POST(req: NextRequest) {
   // `nfl_historical_stats` (ordered by season then week). Remove legacy
   // `player_game_stats` table usage since it's not present in the catalog.
   const statsTables = ['player_stats', 'nfl_historical_stats', 'recent_player_stats', 'player_season_stats'];
+  // player_stats holds every loaded season (partitioned by season); read the requested one,
+  // else the current season from the week config, so seasons are never mixed
+  const statsSeason = Number(season) || Number(readWeekConfig()?.season) || 2025;
+  const fromTable = (tbl: string) => {
+    const q = supabase.from(tbl).select('*');
+    return tbl === 'player_stats' ? q.eq('season', statsSeason) : q;
+  };
 
   async function tryFetchFromTable(table: string) {
       // Trial-query approach: attempt queries with progressively relaxed filters.
@@ -161,29 +190,29 @@ export async function POST(req: NextRequest) {
         if (pid) {
           // Strict: player_id + season + weeks if provided and table supports season/week
           if (tablesWithSeason.has(table) && season && tablesWithWeek.has(table) && weeks && Array.isArray(weeks) && weeks.length) {
-            attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').eq('player_id', pid).eq('season', season).in('week', weeks).limit(200))));
+            attempts.push(() => exec(orderFor(table, fromTable(table).eq('player_id', pid).eq('season', season).in('week', weeks).limit(200))));
           }
           // player_id + season (only for tables that support season)
           if (tablesWithSeason.has(table) && season) {
-            attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').eq('player_id', pid).eq('season', season).limit(200))));
+            attempts.push(() => exec(orderFor(table, fromTable(table).eq('player_id', pid).eq('season', season).limit(200))));
           }
           // player_id + week filtering (if weeks provided and table supports week)
           if (tablesWithWeek.has(table) && weeks && Array.isArray(weeks) && weeks.length) {
-            attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').eq('player_id', pid).in('week', weeks).limit(200))));
+            attempts.push(() => exec(orderFor(table, fromTable(table).eq('player_id', pid).in('week', weeks).limit(200))));
           }
           // player_id + limit & ordering (no season/week)
-          attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').eq('player_id', pid).limit(200))));
+          attempts.push(() => exec(orderFor(table, fromTable(table).eq('player_id', pid).limit(200))));
         }
 
         // Next, try by player_name (if name available)
         if (playerRow?.name) {
-          attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').ilike('player_name', `%${playerRow.name}%`).limit(200))));
-          if (tablesWithSeason.has(table) && season) attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').ilike('player_name', `%${playerRow.name}%`).eq('season', season).limit(200))));
-          if (tablesWithWeek.has(table) && weeks && Array.isArray(weeks) && weeks.length) attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').ilike('player_name', `%${playerRow.name}%`).in('week', weeks).limit(200))));
+          attempts.push(() => exec(orderFor(table, fromTable(table).ilike('player_name', `%${playerRow.name}%`).limit(200))));
+          if (tablesWithSeason.has(table) && season) attempts.push(() => exec(orderFor(table, fromTable(table).ilike('player_name', `%${playerRow.name}%`).eq('season', season).limit(200))));
+          if (tablesWithWeek.has(table) && weeks && Array.isArray(weeks) && weeks.length) attempts.push(() => exec(orderFor(table, fromTable(table).ilike('player_name', `%${playerRow.name}%`).in('week', weeks).limit(200))));
         }
 
         // Final more permissive attempt: select * (may return many rows but bounded by limit)
-        attempts.push(() => exec(orderFor(table, supabase.from(table).select('*').limit(200))));
+        attempts.push(() => exec(orderFor(table, fromTable(table).limit(200))));
 
         // Execute attempts in sequence, handling recoverable errors by moving to the next attempt.
         for (const at of attempts) {
@@ -254,7 +283,7 @@ export async function POST(req: NextRequest) {
       else {
         // fallback: try to read from player_list or player_stats by id
         try {
-          const pl = await supabase.from('player_stats').select('team_id').eq('player_id', playerRow.id).limit(1).maybeSingle();
+          const pl = await supabase.from('player_stats').select('team_id').eq('player_id', playerRow.id).eq('season', statsSeason).order('week', { ascending: false }).limit(1).maybeSingle();
           if (pl?.data && pl.data.team_id) playerTeamId = pl.data.team_id;
         } catch (e) {
           // ignore
@@ -276,32 +305,8 @@ export async function POST(req: NextRequest) {
     try {
       const cw = Number(process.env.CURRENT_WEEK || (process.env.NEXT_PUBLIC_CURRENT_WEEK || 0)) || 0;
       // prefer config file if available
-      let configWeek = cw;
-      try {
-        // Try several likely filesystem locations for a local config file. Avoid bundler requires.
-        const candidates = [
-          path.join(process.cwd(), 'config', 'current-week.json'),
-          path.join(process.cwd(), 'my-app', 'config', 'current-week.json'),
-          path.join(__dirname, '..', '..', 'config', 'current-week.json'),
-          path.join(__dirname, '..', '..', '..', 'config', 'current-week.json'),
-        ];
-        for (const pth of candidates) {
-          try {
-            if (fs.existsSync(pth)) {
-              const raw = fs.readFileSync(pth, 'utf8');
-              const cfg = JSON.parse(raw);
-              if (cfg && cfg.currentWeek) {
-                configWeek = Number(cfg.currentWeek);
-                break;
-              }
-            }
-          } catch (e) {
-            // ignore parse/read errors and try next candidate
-          }
-        }
-      } catch (e) {
-        // ignore
-      }
+      const cfg = readWeekConfig();
+      const configWeek = cfg ? Number(cfg.currentWeek) : cw;
       const weekToCheck = configWeek || cw || 0;
       if (playerTeamId && weekToCheck) {
         try {
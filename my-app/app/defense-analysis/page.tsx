@@ -12,6 +12,7 @@ import { Button } from "@/components/ui/button";
 import { BarChart3, Shield } from "lucide-react";
 import supabase from "../supabaseClient";
 import { useState, useEffect, useCallback } from "react"; // ✅ Keep this single import
+import { useCurrentWeek } from "../../hooks/useCurrentWeek";
 
 export default function DefenseAnalysis() {
   const [selectedTeam, setSelectedTeam] = useState("");
@@ -24,6 +25,7 @@ export default function DefenseAnalysis() {
   const [leagueAvg, setLeagueAvg] = useState(0);
   const [teamNames, setTeamNames] = useState({});
   const [currentPage, setCurrentPage] = useState(1);
+  const { season } = useCurrentWeek(); // the game-log tables hold every season; analyse the current one
   const teamsPerPage = 10;
 
   // Paginate Data
@@ -171,7 +173,8 @@ export default function DefenseAnalysis() {
       let query = supabase
         .from(teamTable)
         .select("*")
-        .eq("team_id", selectedTeam);
+        .eq("team_id", selectedTeam)
+        .eq("season", season);
       if (selectedPosition !== "QB") {
         query = query.eq("position_id", selectedPosition);
       }
@@ -362,6 +365,7 @@ export default function DefenseAnalysis() {
             .select("*")
             .eq("opponent", selectedTeam)
             .eq("position_id", selectedPosition)
+            .eq("season", season)
             .eq("week", week);
 
           if (playerStatsError) {
@@ -38,7 +38,7 @@ export default function MatchupAnalysis() {
   const [selectedStat, setSelectedStat] = useState("fpts");
   const [selectedRecentStat, setSelectedRecentStat] = useState("fpts");
 
-  const { currentWeek } = useCurrentWeek(); // Get current week from API
+  const { currentWeek, season } = useCurrentWeek(); // Get current week and season from API
 
   // Get position-specific stats for dropdown
   const getPositionStats = (position) => {
@@ -138,6 +138,7 @@ export default function MatchupAnalysis() {
         .from("player_stats")
         .select("player_name, position_id, team_id")
         .eq("player_name", playerName)
+        .eq("season", season)
         .limit(1);
 
       if (!playerStats || playerStats.length === 0) {
@@ -211,6 +212,7 @@ export default function MatchupAnalysis() {
         .from("player_stats")
         .select("*")
         .eq("player_name", playerName)
+        .eq("season", season)
         .order("week", { ascending: false })
         .limit(4);
 
@@ -8,7 +8,7 @@ import Link from "next/link";
 import { BarChart3, TrendingUp, Users, Shield, Send } from "lucide-react";
 import { useState, useEffect } from "react";
 import supabase from "./supabaseClient";
-import { useCurrentWeek } from "../hooks/useCurrentWeek";
+import { LAST_WEEK, useCurrentWeek } from "../hooks/useCurrentWeek";
 
 export default function Home() {
   const [feedback, setFeedback] = useState(""); // For feedback input
@@ -26,7 +26,7 @@ export default function Home() {
   const [overUnder, setOverUnder] = useState(""); // Over/Under selection
   const [suggestions, setSuggestions] = useState([]); // Player name suggestions
 
-  const { currentWeek, loading: weekLoading } = useCurrentWeek(); // Get current week from API
+  const { currentWeek, season, loading: weekLoading } = useCurrentWeek(); // Get current week from API
   const [allPlayersToWatch, setAllPlayersToWatch] = useState([]);
 
   const [performanceFilter, setPerformanceFilter] = useState<
@@ -388,6 +388,16 @@ export default function Home() {
       return;
     }
 
+    // A pick is for next week's games; after the last week there are none to grade it against
+    if (weekLoading) {
+      setPicksError("Still loading the current week, please try again.");
+      return;
+    }
+    if (currentWeek >= LAST_WEEK) {
+      setPicksError("Picks are closed for the season.");
+      return;
+    }
+
     try {
       const { error } = await supabase.from("picks").insert([
         {
@@ -397,6 +407,9 @@ export default function Home() {
           value: parseFloat(value).toFixed(1),
           over_under: overUnder,
           reason: reason.trim(),
+          // Picks are for the upcoming games; settle_picks.py grades them against this week
+          season,
+          week: currentWeek + 1,
           created_at: new Date(),
         },
       ]);
@@ -426,7 +439,7 @@ export default function Home() {
       const { data, error } = await supabase
         .from("picks")
         .select(
-          "id, name, player_name, stat, value, over_under, reason, created_at"
+          "id, name, player_name, stat, value, over_under, reason, week, created_at"
         )
         .order("created_at", { ascending: false });
 
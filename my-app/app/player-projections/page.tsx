@@ -7,6 +7,7 @@ import { BarChart3 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import Papa from "papaparse";
 import supabase from "../supabaseClient";
+import { useCurrentWeek } from "../../hooks/useCurrentWeek";
 
 // Import chart components from recharts
 import {
@@ -31,6 +32,7 @@ export default function PlayerProjections() {
   // eslint-disable-next-line @typescript-eslint/no-unused-vars
   const [error, setError] = useState<string | null>(null); // Error state
   const [topPicks, setTopPicks] = useState([]);
+  const { season } = useCurrentWeek(); // player_stats holds every season; show the current one
 
   // Utility function to normalize strings
   const normalizeString = (str) =>
@@ -247,7 +249,8 @@ export default function PlayerProjections() {
             .select(
               "week, rushing_yards, receiving_yards, rushing_tds, receiving_tds, passing_yards, passing_attempts, completions, passing_tds, interceptions, rushing_attempts, receptions"
             )
-            .eq("normalized_name", normalizedName);
+            .eq("normalized_name", normalizedName)
+            .eq("season", season);
 
           if (error) {
             console.error("Error fetching weekly stats:", error.message);
@@ -268,7 +271,7 @@ export default function PlayerProjections() {
 
       fetchWeeklyStats();
     }
-  }, [fetchTriggered, playerName]);
+  }, [fetchTriggered, playerName, season]);
 
   // Fetch player name suggestions
   const fetchSuggestions = async (query) => {
@@ -366,7 +369,8 @@ export default function PlayerProjections() {
         .select(
           "week, rushing_yards, receiving_yards, rushing_tds, receiving_tds, passing_yards, passing_attempts, completions, passing_tds, interceptions, rushing_attempts, receptions"
         )
-        .eq("normalized_name", normalizedPlayerName);
+        .eq("normalized_name", normalizedPlayerName)
+        .eq("season", season);
 
       if (error) {
         console.error("Error fetching weekly stats:", error.message);
@@ -408,6 +412,7 @@ export default function PlayerProjections() {
         .from("player_stats")
         .select("position_id")
         .eq("normalized_name", normalizedName)
+        .eq("season", season)
         .limit(1)
         .single();
 
@@ -30,7 +30,7 @@ export default function PlayerStats() {
 
   // Add this state near the top
   const [weeklyLeaders, setWeeklyLeaders] = useState([]);
-  const { currentWeek } = useCurrentWeek(); // Get current week from API
+  const { currentWeek, season } = useCurrentWeek(); // Get current week and season from API
 
   // Fetch top 1 players per position (rank 1)
   useEffect(() => {
@@ -221,7 +221,8 @@ export default function PlayerStats() {
       const { data: initialWeeklyStats, error: statsError } = await supabase
         .from("player_stats")
         .select("*")
-        .eq("player_name", playerName);
+        .eq("player_name", playerName)
+        .eq("season", season);
 
       if (statsError) {
         console.error("Error fetching weekly stats:", statsError.message);
@@ -239,7 +240,8 @@ export default function PlayerStats() {
         // Get all player stats and find matches using normalized names
         const { data: allStats, error: allStatsError } = await supabase
           .from("player_stats")
-          .select("*");
+          .select("*")
+          .eq("season", season);
 
         if (allStatsError) {
           console.error(
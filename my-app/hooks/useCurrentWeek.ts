@@ -6,8 +6,16 @@ interface WeekConfig {
   season: string;
 }
 
+// Season the game-log tables (player_stats, *_defensive_stats) are filtered to when the
+// config has none; they hold every loaded season, partitioned by the season column
+export const DEFAULT_SEASON = 2025;
+
+// Weeks in the regular season (WEEKS in uploadFiles/matchups.py)
+export const LAST_WEEK = 18;
+
 export function useCurrentWeek() {
   const [currentWeek, setCurrentWeek] = useState<number>(1);
+  const [season, setSeason] = useState<number>(DEFAULT_SEASON);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -23,6 +31,7 @@ export function useCurrentWeek() {
 
         const config: WeekConfig = await response.json();
         setCurrentWeek(config.currentWeek);
+        setSeason(Number(config.season) || DEFAULT_SEASON);
         setError(null);
       } catch (err) {
         console.error("Error fetching current week:", err);
@@ -37,5 +46,5 @@ export function useCurrentWeek() {
     fetchCurrentWeek();
   }, []);
 
-  return { currentWeek, loading, error };
+  return { currentWeek, season, loading, error };
 }
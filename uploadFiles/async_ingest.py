@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Async Ingest Mode
+Runs the ingest scripts (uploadPlayerList, uploadPlayer, uploadDefense,
+scrape_nfl_schedule) as coroutines on one event loop instead of one blocking
+subprocess each. Every script shares one httpx.AsyncClient (one connection pool for
+all scrapes) and one psycopg 3 AsyncConnectionPool, so page fetches for all scripts
+are in flight together and rows are written with pipelined statements while other
+pages are still downloading. Parsing runs in worker threads so it never stalls the
+loop.
+
+Each script keeps its blocking main() and adds `async def main_async(ingest, week)`
+built from the same parse/merge functions and SQL. Scripts are re-imported on every run,
+so the settings they read at import time (season, API key) are current, and each one
+collects its own run_metrics counters and spans. Requests and writes made through Ingest
+are counted like the HTTP and database hooks count them for a subprocess run; --trace-sql
+has no async equivalent and is rejected with --async.
+
+Usage:
+    python run_all_uploads.py --async
+    python async_ingest.py uploadPlayer.py uploadDefense.py --week 6
+
+Needs httpx and psycopg 3: pip install httpx "psycopg[binary]" psycopg_pool
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+import run_metrics
+from run_state import FLUSH_STATS_MIN_VERSION, FLUSH_STATS_QUERY
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+ASYNC_SCRIPTS = ("uploadPlayerList.py", "uploadPlayer.py", "uploadDefense.py", "scrape_nfl_schedule.py")
+
+# Concurrent requests across all scripts, and database connections shared by them
+HTTP_CONNECTIONS = 16
+HTTP_TIMEOUT = 30
+DB_POOL_SIZE = 4
+
+
+def _async_deps():
+    try:
+        import httpx
+        import psycopg_pool
+    except ImportError:
+        raise RuntimeError('Async mode needs httpx and psycopg 3: pip install httpx "psycopg[binary]" psycopg_pool')
+    return httpx, psycopg_pool
+
+
+def conninfo() -> str:
+    """Supabase connection string, from the same variables connect_db() uses."""
+    from psycopg.conninfo import make_conninfo
+
+    return make_conninfo(
+        host=os.getenv("SUPABASE_HOST"),
+        port=os.getenv("SUPABASE_PORT"),
+        dbname=os.getenv("SUPABASE_DB"),
+        user=os.getenv("SUPABASE_USER"),
+        password=os.getenv("SUPABASE_PASSWORD"),
+        sslmode="require",
+    )
+
+
+def row_statement(query: str, width: int) -> str:
+    """Turn an execute_values() statement (`VALUES %s`) into a one-row statement for executemany()."""
+    return query.replace("VALUES %s", "VALUES (" + ", ".join(["%s"] * width) + ")", 1)
+
+
+class Ingest:
+    """The shared HTTP client and database pool handed to every main_async()."""
+
+    def __init__(self, http, pool):
+        self.http = http
+        self.pool = pool
+
+    async def get(self, url: str, **kwargs) -> Optional[bytes]:
+        """GET a page; None (and a message) on a non-200 response."""
+        response = await self._get(url, **kwargs)
+        if response.status_code != 200:
+            print(f"Failed to fetch {url}: {response.status_code}")
+            return None
+        return response.content
+
+    async def get_json(self, url: str, **kwargs):
+        response = await self._get(url, **kwargs)
+        if response.status_code != 200:
+            print(f"Error fetching data: {response.status_code}, {response.text}")
+            return []
+        return response.json()
+
+    async def _get(self, url: str, **kwargs):
+        response = await self.http.get(url, **kwargs)
+        run_metrics.incr("http_requests")
+        run_metrics.incr("http_bytes", len(response.content or b""))
+        return response
+
+    async def fetch_all(self, query: str, params: Sequence = ()) -> List[tuple]:
+        async with self.pool.connection() as conn:
+            cursor = await conn.execute(query, params)
+            rows = await cursor.fetchall()
+        run_metrics.incr("db_queries")
+        run_metrics.incr("rows_read", len(rows))
+        return rows
+
+    async def write(self, statements: Sequence[Tuple[str, Sequence]] = (),
+                    batches: Sequence[Tuple[str, Sequence[tuple]]] = ()) -> int:
+        """
+        Run `statements`, then each (execute_values() statement, rows) batch row by row,
+        pipelined and committed as one transaction. Returns the number of rows written.
+        """
+        async with self.pool.connection() as conn:
+            async with conn.transaction():
+                async with conn.pipeline():
+                    for query, params in statements:
+                        await conn.execute(query, params)
+                    async with conn.cursor() as cursor:
+                        for query, rows in batches:
+                            if rows:
+                                await cursor.executemany(row_statement(query, len(rows[0])), rows)
+                    if conn.info.server_version >= FLUSH_STATS_MIN_VERSION:
+                        # The pooled connection stays open; publish the write counters the
+                        # run state fingerprints on commit
+                        await conn.execute(FLUSH_STATS_QUERY)
+        written = sum(len(rows) for _, rows in batches)
+        run_metrics.incr("db_queries", len(statements) + written)
+        run_metrics.incr("rows_written", written)
+        return written
+
+
+class AsyncRunner:
+    """One event loop, HTTP client and database pool reused by every phase of a run."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._ingest: Optional[Ingest] = None
+
+    async def _open(self) -> Ingest:
+        if self._ingest is None:
+            httpx, psycopg_pool = _async_deps()
+            http = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=HTTP_CONNECTIONS), timeout=HTTP_TIMEOUT, follow_redirects=True,
+            )
+            pool = psycopg_pool.AsyncConnectionPool(conninfo(), min_size=1, max_size=DB_POOL_SIZE, open=False)
+            await pool.open()
+            self._ingest = Ingest(http, pool)
+        return self._ingest
+
+    @staticmethod
+    def load_script(script: str):
+        """
+        Import a script for this run. One imported by an earlier run (the daemon keeps this
+        runner) is executed again, so the settings it reads at import time are current.
+        """
+        name = os.path.splitext(script)[0]
+        module = sys.modules.get(name)
+        return importlib.reload(module) if module is not None else importlib.import_module(name)
+
+    async def _run_script(self, ingest: Ingest, script: str, week: int) -> Tuple[bool, float, Optional[str], dict]:
+        start = time.perf_counter()
+        with run_metrics.stage() as metrics:
+            try:
+                module = self.load_script(script)
+                await module.main_async(ingest, week)
+                return True, time.perf_counter() - start, None, metrics.to_dict()
+            except Exception as e:
+                return False, time.perf_counter() - start, f"{type(e).__name__}: {e}", metrics.to_dict()
+
+    async def _run(self, scripts: Sequence[str], week: int) -> Dict[str, Tuple[bool, float, Optional[str], dict]]:
+        ingest = await self._open()
+        results = await asyncio.gather(*(self._run_script(ingest, script, week) for script in scripts))
+        return dict(zip(scripts, results))
+
+    def run(self, scripts: Sequence[str], week: int) -> Dict[str, Tuple[bool, float, Optional[str], dict]]:
+        """Run the scripts concurrently; (ok, seconds, error, run_metrics report) per script."""
+        unknown = [script for script in scripts if script not in ASYNC_SCRIPTS]
+        if unknown:
+            raise ValueError(f"No async mode for {unknown}; expected some of {ASYNC_SCRIPTS}")
+        return self.loop.run_until_complete(self._run(scripts, week))
+
+    async def _close(self):
+        if self._ingest is not None:
+            await self._ingest.http.aclose()
+            await self._ingest.pool.close()
+            self._ingest = None
+
+    def close(self):
+        self.loop.run_until_complete(self._close())
+        self.loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingest scripts concurrently on one event loop")
+    parser.add_argument("scripts", nargs="*", default=list(ASYNC_SCRIPTS[:3]), choices=ASYNC_SCRIPTS,
+                        help="Scripts to run (default: the core phase)")
+    parser.add_argument("--week", "-w", type=int, default=None, help="NFL week (default: config.py)")
+    args = parser.parse_args()
+
+    from config import get_current_week
+
+    runner = AsyncRunner()
+    try:
+        results = runner.run(args.scripts, args.week or get_current_week())
+    finally:
+        runner.close()
+
+    for script, (ok, seconds, error, _) in results.items():
+        print(f"{'✅' if ok else '❌'} {script} {seconds:.1f}s{'' if ok else ' - ' + error}")
+    sys.exit(0 if all(ok for ok, _, _, _ in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Projection Backtest
+Scores the projection blend (avg * w + avg * defense/league * (1 - w), 0.7 in
+calculate_projection() and generate_projections.py) against what actually happened.
+For every past week the player averages and defense factors are rebuilt from the games
+before it (player_stats, general_defensive_stats, qb_defensive_stats), each player who
+played that week is projected for every weight setting, and the errors are summed into
+MAE, RMSE and bias per position and stat.
+
+The season is loaded once into dense arrays (player x week x stat, team x position x
+week x stat) and saved as .npy files; a process pool fans the weeks out and every worker
+memory-maps the same files, so nothing is copied per task.
+
+Opponents come from team_schedule, which only holds the current season's schedule (it has
+no season column), so only the current season (config.get_current_season()) can be
+replayed; --season rejects any other.
+
+Usage:
+    python backtest.py                                  # current season, weights 0.5-1.0
+    python backtest.py --weights 0.6 0.7 0.8 --workers 4
+    python backtest.py --weeks 5-18 --min-games 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import dimensions
+import local_mirror
+from config import get_current_season
+from local_mirror import connect_db
+from matchups import WEEKS, canonical_team
+from projection_horizon import POSITION_STATS, POSITIONS, STATS
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_reports")
+
+DEFAULT_WEIGHTS = (0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+# Stat -> general_defensive_stats column (yards allowed to RB/WR/TE)
+GENERAL_DEFENSE_COLUMNS = {
+    "rushing_attempts": "rushing_attempts",
+    "rushing_yards": "total_rushing_yards",
+    "rushing_tds": "rushing_tds",
+    "receptions": "receptions",
+    "receiving_yards": "total_receiving_yards",
+    "receiving_tds": "receiving_tds",
+}
+
+# Stat -> qb_defensive_stats column
+QB_DEFENSE_COLUMNS = {stat: stat for stat in POSITION_STATS["QB"]}
+
+# Per-week partial sums each worker returns: (weights x positions x stats)
+METRIC_SUMS = ("abs_error", "sq_error", "error", "count")
+
+# Memory-mapped season arrays, opened once per worker process
+_data: Dict[str, np.ndarray] = {}
+
+
+def _game_log_array(rows: List[tuple], index_of, shape: Tuple[int, ...], columns: List[str]) -> np.ndarray:
+    """Average rows into a dense array; cells with no game stay NaN."""
+    sums = np.zeros(shape)
+    counts = np.zeros(shape[:-1])
+    for row in rows:
+        cell = index_of(row)
+        if cell is None:
+            continue
+        values = [np.nan if value is None else float(value) for value in row[-len(columns):]]
+        sums[cell] += np.nan_to_num(values)
+        counts[cell] += 1
+    with np.errstate(invalid="ignore"):
+        return np.where(counts[..., None] > 0, sums / counts[..., None], np.nan)
+
+
+def load_season(stats_cursor, season: int) -> Dict[str, np.ndarray]:
+    """
+    The season as dense arrays:
+      actuals   (players x weeks x stats)  stats per game, NaN when the player didn't play
+      teams     (players x weeks)          team index that week, -1 when the player didn't play
+      positions (players)                  index into POSITIONS
+      opponents (teams x weeks)            opponent team index, -1 on a bye
+      defense   (teams x positions x weeks x stats)  stats allowed per game, NaN on a bye
+    """
+    index = dimensions.matchups(stats_cursor)
+    team_names, opponent_vectors = index.opponent_vectors()
+    team_index = {team: i for i, team in enumerate(team_names)}
+    opponents = np.array(
+        [[team_index.get(opponent, -1) if opponent else -1 for opponent in row] for row in opponent_vectors],
+        dtype=np.int64,
+    ).reshape(len(team_names), WEEKS)
+
+    stats_cursor.execute(f"""
+        SELECT player_name, position_id, team_id, week, {', '.join(STATS)}
+        FROM player_stats
+        WHERE season = %s AND position_id IN ('QB', 'RB', 'WR', 'TE');
+    """, (season,))
+    player_rows = stats_cursor.fetchall()
+    players = sorted({(row[0], row[1]) for row in player_rows})
+    player_index = {player: i for i, player in enumerate(players)}
+    positions = np.array([POSITIONS.index(position) for _, position in players], dtype=np.int64)
+
+    # COALESCE(stat, 0) like the season averages the pipeline computes
+    actuals = np.nan_to_num(_game_log_array(
+        player_rows, lambda row: (player_index[(row[0], row[1])], row[3] - 1),
+        (len(players), WEEKS, len(STATS)), list(STATS),
+    ), nan=0.0)
+    teams = np.full((len(players), WEEKS), -1, dtype=np.int64)
+    for player_name, position, team_id, week, *_ in player_rows:
+        teams[player_index[(player_name, position)], week - 1] = team_index.get(canonical_team(team_id), -1)
+    actuals[teams < 0] = np.nan
+
+    defense = np.full((len(team_names), len(POSITIONS), WEEKS, len(STATS)), np.nan)
+    stats_cursor.execute(f"""
+        SELECT team_id, position_id, week, {', '.join(GENERAL_DEFENSE_COLUMNS.values())}
+        FROM general_defensive_stats
+        WHERE season = %s;
+    """, (season,))
+    general = _game_log_array(
+        stats_cursor.fetchall(),
+        lambda row: ((team_index[canonical_team(row[0])], POSITIONS.index(row[1]), row[2] - 1)
+                     if canonical_team(row[0]) in team_index and row[1] in POSITIONS else None),
+        (len(team_names), len(POSITIONS), WEEKS, len(GENERAL_DEFENSE_COLUMNS)), list(GENERAL_DEFENSE_COLUMNS),
+    )
+    for j, stat in enumerate(GENERAL_DEFENSE_COLUMNS):
+        defense[:, 1:, :, STATS.index(stat)] = general[:, 1:, :, j]
+
+    stats_cursor.execute(f"""
+        SELECT team_id, week, {', '.join(QB_DEFENSE_COLUMNS.values())}
+        FROM qb_defensive_stats
+        WHERE season = %s;
+    """, (season,))
+    qb = _game_log_array(
+        stats_cursor.fetchall(),
+        lambda row: ((team_index[canonical_team(row[0])], row[1] - 1)
+                     if canonical_team(row[0]) in team_index else None),
+        (len(team_names), WEEKS, len(QB_DEFENSE_COLUMNS)), list(QB_DEFENSE_COLUMNS),
+    )
+    for j, stat in enumerate(QB_DEFENSE_COLUMNS):
+        defense[:, 0, :, STATS.index(stat)] = qb[:, :, j]
+
+    return {"actuals": actuals, "teams": teams, "positions": positions,
+            "opponents": opponents, "defense": defense}
+
+
+def _open_data(data_dir: str):
+    """Pool initializer: memory-map the season arrays once per worker."""
+    for name in os.listdir(data_dir):
+        if name.endswith(".npy"):
+            _data[name[:-4]] = np.load(os.path.join(data_dir, name), mmap_mode="r")
+
+
+def score_week(week: int, weights: Tuple[float, ...], min_games: int) -> Dict[str, np.ndarray]:
+    """
+    Project every player who played `week` from the games before it, for every weight,
+    and return the summed errors per (weight, position, stat).
+    """
+    actuals, teams, positions = _data["actuals"], _data["teams"], _data["positions"]
+    opponents, defense = _data["opponents"], _data["defense"]
+    before = slice(0, week - 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # Teams with no games yet at a position average to NaN and are skipped
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # As-of-week player averages and games played
+        games = np.sum(~np.isnan(actuals[:, before, 0]), axis=1)
+        averages = np.nansum(actuals[:, before], axis=1) / games[:, None]
+
+        # As-of-week defense averages; league = mean of the team averages (uploadAllDefenseAVG.py)
+        allowed = np.nanmean(defense[:, :, before], axis=2)                 # teams x positions x stats
+        league = np.nanmean(allowed, axis=0)                                 # positions x stats
+        factors = np.where(league == 0, 1.0, allowed / league)
+
+    team = teams[:, week - 1]
+    opponent = np.where(team >= 0, opponents[np.maximum(team, 0), week - 1], -1)
+    factor = factors[np.maximum(opponent, 0), positions]                     # players x stats
+    actual = actuals[:, week - 1]
+
+    projected_stats = np.array([[stat in POSITION_STATS[position] for stat in STATS] for position in POSITIONS])
+    valid = (projected_stats[positions] & (opponent >= 0)[:, None] & (games >= min_games)[:, None]
+             & np.isfinite(averages) & np.isfinite(factor) & np.isfinite(actual))
+
+    w = np.asarray(weights)[:, None, None]
+    projection = averages[None] * w + averages[None] * factor[None] * (1 - w)    # weights x players x stats
+    error = np.where(valid[None], projection - actual[None], 0.0)
+
+    one_hot = np.eye(len(POSITIONS))[positions]                                  # players x positions
+    sums = {
+        "abs_error": np.abs(error),
+        "sq_error": error ** 2,
+        "error": error,
+        "count": np.broadcast_to(valid[None], error.shape).astype(float),
+    }
+    return {name: np.einsum("wps,pq->wqs", values, one_hot) for name, values in sums.items()}
+
+
+def summarize(totals: Dict[str, np.ndarray], weights: Tuple[float, ...]) -> List[dict]:
+    """MAE, RMSE and bias per weight, position and stat."""
+    rows = []
+    for w, weight in enumerate(weights):
+        for q, position in enumerate(POSITIONS):
+            for j, stat in enumerate(STATS):
+                n = totals["count"][w, q, j]
+                if not n:
+                    continue
+                rows.append({
+                    "weight": weight, "position": position, "stat": stat, "n": int(n),
+                    "mae": totals["abs_error"][w, q, j] / n,
+                    "rmse": float(np.sqrt(totals["sq_error"][w, q, j] / n)),
+                    "bias": totals["error"][w, q, j] / n,
+                })
+    return rows
+
+
+def run_backtest(season: int, weeks: List[int], weights: Tuple[float, ...], min_games: int = 1,
+                 workers: int = None) -> List[dict]:
+    stats_conn = local_mirror.connect_analytics(connect_db)
+    try:
+        started = time.perf_counter()
+        data = load_season(stats_conn.cursor(), season)
+    finally:
+        stats_conn.close()
+    print(f"✅ Loaded {data['actuals'].shape[0]} players and {data['defense'].shape[0]} defenses "
+          f"for {season} in {time.perf_counter() - started:.2f}s")
+
+    data_dir = tempfile.mkdtemp(prefix=f"backtest_{season}_")
+    try:
+        for name, array in data.items():
+            np.save(os.path.join(data_dir, f"{name}.npy"), array)
+        del data
+
+        started = time.perf_counter()
+        totals = None
+        if workers == 1:
+            _open_data(data_dir)
+            results = [score_week(week, weights, min_games) for week in weeks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_open_data, initargs=(data_dir,)) as pool:
+                results = list(pool.map(score_week, weeks, [weights] * len(weeks), [min_games] * len(weeks)))
+        for result in results:
+            totals = result if totals is None else {name: totals[name] + result[name] for name in METRIC_SUMS}
+        print(f"✅ Scored {len(weeks)} weeks x {len(weights)} weights in {time.perf_counter() - started:.2f}s")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return summarize(totals, weights) if totals is not None else []
+
+
+def print_report(rows: List[dict], weights: Tuple[float, ...]):
+    """MAE per weight for every position/stat, best weight marked, and bias at the best weight."""
+    by_cell: Dict[Tuple[str, str], Dict[float, dict]] = {}
+    for row in rows:
+        by_cell.setdefault((row["position"], row["stat"]), {})[row["weight"]] = row
+
+    header = "".join(f"{weight:>9.2f}" for weight in weights)
+    print(f"\n📊 MAE by player weight (defense weight = 1 - w)\n{'position/stat':<24}{'n':>6}{header}   bias@best")
+    for (position, stat), cells in by_cell.items():
+        best = min(cells.values(), key=lambda row: row["mae"])
+        maes = "".join(
+            f"{cells[weight]['mae']:>8.2f}{'*' if cells[weight] is best else ' '}" if weight in cells else " " * 9
+            for weight in weights
+        )
+        print(f"{position + ' ' + stat:<24}{best['n']:>6}{maes}   {best['bias']:+.2f}")
+
+
+def parse_weeks(text: str) -> List[int]:
+    if "-" in text:
+        first, last = text.split("-", 1)
+        return list(range(int(first), int(last) + 1))
+    return [int(week) for week in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the projection blend over a season's weeks")
+    parser.add_argument("--season", type=int, default=CURRENT_SEASON,
+                        help="Season to replay; must be the current season, whose schedule team_schedule holds")
+    parser.add_argument("--weeks", default=f"2-{WEEKS}", help="Weeks to score, e.g. 2-18 or 5,6,7 (default: 2-18)")
+    parser.add_argument("--weights", type=float, nargs="+", default=list(DEFAULT_WEIGHTS),
+                        help="Player weights to compare (defense weight is 1 - w)")
+    parser.add_argument("--min-games", type=int, default=1, help="Games a player needs before a week to be scored")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU; 1 = in process)")
+    args = parser.parse_args()
+
+    weeks = [week for week in parse_weeks(args.weeks) if 2 <= week <= WEEKS]
+    if not weeks or args.min_games < 1:
+        print("❌ Invalid arguments! Weeks must be within 2-18 and --min-games at least 1.")
+        sys.exit(1)
+    if args.season != CURRENT_SEASON:
+        # Scoring would pair the season's games with the current season's opponents
+        print(f"❌ team_schedule only holds the {CURRENT_SEASON} schedule; cannot backtest {args.season}.")
+        sys.exit(1)
+    weights = tuple(args.weights)
+
+    print(f"🔁 Backtesting {args.season} weeks {weeks[0]}-{weeks[-1]} with weights {', '.join(map(str, weights))}...")
+    rows = run_backtest(args.season, weeks, weights, args.min_games, args.workers)
+    if not rows:
+        print("⚠️ Nothing to score (no games in those weeks)")
+        sys.exit(1)
+    print_report(rows, weights)
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    path = os.path.join(REPORTS_DIR, f"backtest_{args.season}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"season": args.season, "weeks": weeks, "weights": weights,
+                   "min_games": args.min_games, "metrics": rows}, f, indent=2)
+    print(f"\n📝 Full metrics written to {path}")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark
+Loads synthetic seasons into a throwaway local Postgres database and times every
+calculation phase of run_all_uploads.py at increasing data sizes.
+
+Usage: python benchmark_pipeline.py --scales 1 5 20
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import psycopg2
+
+import migrate
+import synthetic_data
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "my-app", "Scripts")
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database_schema.sql")
+sys.path.insert(0, SCRIPTS_DIR)
+
+# Local server used for throwaway databases (never point this at Supabase)
+DEFAULT_ADMIN_DSN = os.getenv("BENCHMARK_PG_DSN", "host=localhost port=5432 dbname=postgres user=postgres")
+
+
+def build_stages(week: int) -> Dict[str, list]:
+    """
+    Stages per phase, mirroring UploadManager.run_all_uploads. Scraping phases are
+    replaced by the synthetic loader; uploadPlayerLines needs a real PlayerProps.csv.
+    """
+    def call(func_name, *args):
+        return lambda module: getattr(module, func_name)(*args)
+
+    def recent_stats(module):
+        module.clear_recent_stats()
+        module.upload_recent_stats(module.fetch_recent_stats(week))
+
+    def defense_averages(module):
+        module.insert_defense_averages(*module.calculate_defense_averages())
+
+    def all_defense_averages(module):
+        module.insert_all_defense_averages(*module.calculate_all_defense_averages())
+
+    def matchup_rank(module):
+        team_defense, league_avg = module.get_defensive_data()
+        module.insert_rankings(module.calculate_rankings(team_defense, league_avg))
+
+    return {
+        "averages": [
+            ("uploadPlayerAverages.py", "uploadPlayerAverages", call("main")),
+            ("uploadDefenseAverage.py", "uploadDefenseAverage", defense_averages),
+            ("uploadAllDefenseAVG.py", "uploadAllDefenseAVG", all_defense_averages),
+        ],
+        "projections": [
+            ("uploadPlayerProjections.py", "uploadPlayerProjections", call("upload_player_projections", week)),
+            ("uploadMatchupRank.py", "uploadMatchupRank", matchup_rank),
+        ],
+        "optional": [
+            ("uploadPlayerRecent.py", "uploadPlayerRecent", recent_stats),
+        ],
+        "frontend": [
+            ("generate_weekly_leaders.py", "generate_weekly_leaders", call("generate_weekly_leaders", week)),
+            ("generate_hot_cold_players.py", "generate_hot_cold_players", call("generate_hot_and_cold_players")),
+            ("generate_players_to_watch.py", "generate_players_to_watch", call("generate_players_to_watch", week)),
+            ("generate_projections.py", "generate_projections", call("generate_and_store_projections")),
+        ],
+    }
+
+
+def create_database(admin_dsn: str, name: str):
+    conn = psycopg2.connect(admin_dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(f'DROP DATABASE IF EXISTS "{name}";')
+    cursor.execute(f'CREATE DATABASE "{name}";')
+    cursor.close()
+    conn.close()
+
+
+def drop_database(admin_dsn: str, name: str):
+    conn = psycopg2.connect(admin_dsn)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute(f'DROP DATABASE IF EXISTS "{name}";')
+    cursor.close()
+    conn.close()
+
+
+def database_dsn(admin_dsn: str, name: str) -> str:
+    """Swap the dbname in a libpq DSN for the throwaway database."""
+    parts = [part for part in admin_dsn.split() if not part.startswith("dbname=")]
+    return " ".join(parts + [f"dbname={name}"])
+
+
+def apply_schema(conn):
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema_sql = f.read()
+    cursor = conn.cursor()
+    cursor.execute(schema_sql)
+    conn.commit()
+    cursor.close()
+
+
+def point_modules_at(dsn: str, module_names: List[str]) -> Dict[str, object]:
+    """Import each stage module and route its connect_db() to the benchmark database."""
+    modules = {}
+    for module_name in module_names:
+        module = __import__(module_name)
+        module.connect_db = lambda: psycopg2.connect(dsn)
+        modules[module_name] = module
+    return modules
+
+
+def table_sizes(conn) -> Dict[str, int]:
+    cursor = conn.cursor()
+    sizes = {}
+    for table in synthetic_data.TABLE_COLUMNS:
+        cursor.execute(f"SELECT COUNT(*) FROM {table};")
+        sizes[table] = cursor.fetchone()[0]
+    cursor.close()
+    return sizes
+
+
+def run_scale(admin_dsn: str, seasons: int, week: int, verbose: bool, keep: bool) -> dict:
+    """Benchmark the pipeline against `seasons` seasons of synthetic history."""
+    db_name = f"statsx_bench_{seasons}x_{os.getpid()}"
+    dsn = database_dsn(admin_dsn, db_name)
+    result = {"scale": seasons, "database": db_name, "phases": {}}
+
+    print(f"\n🏈 Scale {seasons}x: generating {seasons} season(s) of synthetic data...")
+    start = time.perf_counter()
+    dataset = synthetic_data.generate_dataset(seasons)
+    result["generate_seconds"] = round(time.perf_counter() - start, 3)
+
+    create_database(admin_dsn, db_name)
+    try:
+        conn = psycopg2.connect(dsn)
+        apply_schema(conn)
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            migrate.apply_pending(conn)
+        start = time.perf_counter()
+        synthetic_data.load_dataset(conn, dataset)
+        result["load_seconds"] = round(time.perf_counter() - start, 3)
+        result["rows"] = table_sizes(conn)
+        conn.close()
+
+        # The newest synthetic season is the configured current season
+        stages = build_stages(week)
+        modules = point_modules_at(dsn, [m for phase in stages.values() for _, m, _ in phase])
+
+        for phase, phase_stages in stages.items():
+            phase_result = {"seconds": 0.0, "stages": {}}
+            for label, module_name, call in phase_stages:
+                start = time.perf_counter()
+                status = "ok"
+                try:
+                    if verbose:
+                        call(modules[module_name])
+                    else:
+                        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                            call(modules[module_name])
+                except Exception as e:
+                    status = f"error: {e}"
+                elapsed = time.perf_counter() - start
+                phase_result["stages"][label] = {"seconds": round(elapsed, 3), "status": status}
+                phase_result["seconds"] += elapsed
+                print(f"  ⏱️ {phase:<12} {label:<32} {elapsed:9.3f}s  {status}")
+            phase_result["seconds"] = round(phase_result["seconds"], 3)
+            result["phases"][phase] = phase_result
+    finally:
+        if not keep:
+            drop_database(admin_dsn, db_name)
+
+    return result
+
+
+def print_scaling_report(results: List[dict]):
+    """Show stage times side by side with growth relative to the smallest scale."""
+    if not results:
+        return
+    base = results[0]
+    header = f"{'stage':<34}" + "".join(f"{str(r['scale']) + 'x':>12}" for r in results) + f"{'growth':>10}"
+    print("\n📊 Scaling Report")
+    print("Rows in player_stats: " + ", ".join(f"{r['scale']}x={r['rows']['player_stats']}" for r in results))
+    print(header)
+    print("-" * len(header))
+    for phase, phase_result in base["phases"].items():
+        for label in phase_result["stages"]:
+            times = [r["phases"][phase]["stages"][label]["seconds"] for r in results]
+            growth = times[-1] / times[0] if times[0] else float("inf")
+            row_growth = results[-1]["rows"]["player_stats"] / max(1, base["rows"]["player_stats"])
+            flag = " ⚠️" if growth > row_growth * 1.5 else ""
+            print(f"{label:<34}" + "".join(f"{t:>12.3f}" for t in times) + f"{growth:>9.1f}x{flag}")
+    print("⚠️ marks stages growing faster than the data (superlinear).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the upload pipeline on synthetic data")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 5, 20],
+                        help="Number of seasons to load for each run (default: 1 5 20)")
+    parser.add_argument("--week", type=int, default=10, help="Week of the newest season treated as current")
+    parser.add_argument("--admin-dsn", default=DEFAULT_ADMIN_DSN,
+                        help="libpq DSN of a local server allowed to CREATE/DROP DATABASE")
+    parser.add_argument("--output", default=None, help="Write JSON results to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark databases")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Show stage output")
+    args = parser.parse_args()
+
+    if not (1 <= args.week <= synthetic_data.WEEKS_PER_SEASON):
+        print("❌ Invalid week number. Must be between 1 and 18.")
+        sys.exit(1)
+
+    results = [run_scale(args.admin_dsn, scale, args.week, args.verbose, args.keep) for scale in sorted(args.scales)]
+    print_scaling_report(results)
+
+    output = args.output or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": datetime.now().isoformat(), "week": args.week, "results": results}, f, indent=2)
+    print(f"\n✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
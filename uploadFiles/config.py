@@ -3,10 +3,19 @@ Configuration file for NFL Data Upload System
 Update the CURRENT_WEEK here to easily change the default week for all uploads.
 """
 
+import os
+
 # Current NFL Week (1-18)
 # Update this value to change the default week for all uploads
 CURRENT_WEEK = 7
 
+# Current NFL season (year the season starts)
+# player_stats and the defensive game logs are partitioned by this value
+CURRENT_SEASON = 2025
+
+# run_all_uploads.py --season exports the season its scripts work on here
+SEASON_ENV = "STATSX_SEASON"
+
 # Default configuration for upload phases
 DEFAULT_CONFIG = {
     'skip_schedule': True,   # Set to False to include schedule updates (normally one-time setup)
@@ -14,6 +23,14 @@ DEFAULT_CONFIG = {
     'verbose': False,        # Set to True for detailed output
 }
 
+# Half-lives (weeks) recency.py keeps exponentially weighted player averages for
+RECENCY_HALF_LIVES = (2, 4)
+
+# Jobs pipeline_daemon.py runs on its own: job ("all" or a phase name) -> minutes between runs
+DAEMON_SCHEDULE = {
+    'all': 24 * 60,
+}
+
 # Script configuration for week-dependent scripts
 WEEK_DEPENDENT_SCRIPTS = {
     'uploadPlayer.py': {
@@ -44,21 +61,68 @@ WEEK_DEPENDENT_SCRIPTS = {
         'week_param': 'command_line',
         'script_path': '../my-app/Scripts/generate_players_to_watch.py',
         'description': 'Generates players to watch based on performance and matchups'
+    },
+    'recency.py': {
+        'week_param': 'command_line',
+        'description': 'Folds the week into the exponentially weighted player averages'
+    },
+    'projection_horizon.py': {
+        'week_param': 'command_line',
+        'description': 'Projects every player from the given week through the rest of the season'
+    },
+    'projection_sim.py': {
+        'week_param': 'command_line',
+        'description': 'Simulates floor/median/ceiling and P(over line) for every player in the week'
+    },
+    'settle_picks.py': {
+        'week_param': 'command_line',
+        'description': 'Grades open user picks against the week\'s player stats'
+    },
+    'props_edges.py': {
+        'week_param': 'command_line',
+        'description': 'Ranks the week\'s betting lines against the player projections'
     }
 }
 
+# What each script writes (tables, or files as "file:<path>"); run_all_uploads.py --resume
+# only skips a completed script while these still match their recorded fingerprints
+SCRIPT_OUTPUTS = {
+    'scrape_nfl_schedule.py': ['team_schedule'],
+    'uploadMatchup.py': ['team_schedule'],
+    'uploadPlayerList.py': ['player_list'],
+    'uploadPlayer.py': ['player_stats'],
+    'settle_picks.py': ['picks', 'user_pick_records'],
+    'uploadDefense.py': ['general_defensive_stats', 'qb_defensive_stats'],
+    'uploadPlayerAverages.py': ['player_averages'],
+    'recency.py': ['player_recency_averages'],
+    'uploadDefenseAverage.py': ['defense_averages', 'defense_averages_qb'],
+    'uploadAllDefenseAVG.py': ['all_defense_averages', 'all_defense_averages_qb'],
+    'matchup_factors.py': ['file:artifacts/matchup_factors/current.json'],
+    'uploadPlayerProjections.py': ['player_projections'],
+    'uploadMatchupRank.py': ['defensive_matchup_rankings'],
+    'uploadPlayerLines.py': ['player_lines', 'player_line_consensus', 'player_line_history'],
+    'uploadPlayerRecent.py': ['recent_player_stats'],
+    'generate_weekly_leaders.py': ['weekly_leaders'],
+    'generate_hot_cold_players.py': ['hot_players', 'cold_players'],
+    'generate_players_to_watch.py': ['players_to_watch'],
+    'generate_projections.py': ['player_projections'],
+    'projection_horizon.py': ['player_projection_horizon'],
+    'projection_sim.py': ['player_projection_distributions'],
+    'props_edges.py': ['player_edges'],
+}
+
 # Phase definitions
 PHASES = {
     'schedule': {
-        'scripts': ['scrape_nfl_schedule.py', 'uploadMatchup.py'],
-        'description': 'Schedule management - updates NFL schedule and uploads to database'
+        'scripts': ['scrape_nfl_schedule.py'],
+        'description': 'Schedule management - scrapes the NFL schedule straight into the database'
     },
     'core': {
-        'scripts': ['uploadPlayerList.py', 'uploadPlayer.py', 'uploadDefense.py'],
+        'scripts': ['uploadPlayerList.py', 'uploadPlayer.py', 'settle_picks.py', 'uploadDefense.py'],
         'description': 'Core data upload - player lists, stats, and defense data'
     },
     'averages': {
-        'scripts': ['uploadPlayerAverages.py', 'uploadDefenseAverage.py', 'uploadAllDefenseAVG.py'],
+        'scripts': ['uploadPlayerAverages.py', 'recency.py', 'uploadDefenseAverage.py', 'uploadAllDefenseAVG.py', 'matchup_factors.py'],
         'description': 'Calculated averages - player and defense averages from raw data'
     },
     'projections': {
@@ -66,7 +130,7 @@ PHASES = {
         'description': 'Projections and analysis - player projections and defensive rankings'
     },
     'optional': {
-        'scripts': ['uploadPlayerLines.py', 'uploadPlayerRecent.py'],
+        'scripts': ['uploadPlayerLines.py', 'props_edges.py', 'uploadPlayerRecent.py'],
         'description': 'Optional/weekly data - betting lines and recent stats'
     },
     'frontend': {
@@ -79,6 +143,10 @@ def get_current_week():
     """Get the current week from configuration"""
     return CURRENT_WEEK
 
+def get_current_season():
+    """Get the current season: the one run_all_uploads.py exported, else CURRENT_SEASON"""
+    return int(os.getenv(SEASON_ENV, CURRENT_SEASON))
+
 def update_current_week(new_week):
     """Update the current week in the configuration file"""
     if not (1 <= new_week <= 18):
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Player ID Crosswalk
+Resolves a data source's spelling of a player (CBS box scores, sportsbook odds) to the
+SportsData PlayerID. Confirmed links live in player_crosswalk (migrations/0003), so known
+players resolve with a dict lookup and only new or unseen names go through matching.
+Names with no exact or match-key candidate fall back to trigram matching (fuzzy_match.py);
+rows that still have no player are held in unmatched_players (migrations/0004) for review.
+
+    resolver = PlayerResolver(conn, "cbs")
+    player_id = resolver.resolve("Deebo Samuel", "WR")      # None if never confirmed
+    ...
+    resolver.confirm("Deebo Samuel", "WR", 12345, "Deebo Samuel Sr.", "match_key")
+    resolver.flush()
+
+Usage:
+    python crosswalk.py list --source cbs
+    python crosswalk.py confirm --source cbs --name "Deebo Samuel" --position WR --player-id <PlayerID> \\
+        --player-name "Deebo Samuel Sr."
+    python crosswalk.py forget --source odds --name "Deebo Samuel"
+    python crosswalk.py unmatched --source cbs      # held rows and their ranked candidates
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+import run_metrics
+from fuzzy_match import TrigramIndex, accepted
+from matchups import canonical_team
+from names import match_key, normalize_name
+
+SOURCES = ("cbs", "odds")
+
+
+class CandidateIndex:
+    """
+    Candidate records for matching, grouped by the match key of their name. The trigram
+    index for fuzzy matching is only built when some name gets that far. `teams_of` gives
+    the teams of a record's game, so a name shared by two players can be told apart by
+    the game the source row comes from.
+    """
+
+    def __init__(self, records: Iterable, id_of: Callable[[Any], int], name_of: Callable[[Any], str],
+                 position_of: Callable[[Any], Optional[str]] = lambda record: None,
+                 teams_of: Callable[[Any], Iterable[str]] = lambda record: ()):
+        self.records = list(records)
+        self.id_of = id_of
+        self.name_of = name_of
+        self.position_of = position_of
+        self.teams_of = teams_of
+        self._by_key: Dict[str, list] = {}
+        for record in self.records:
+            self._by_key.setdefault(match_key(name_of(record)), []).append(record)
+        self._trigrams: Optional[TrigramIndex] = None
+
+    def candidates(self, name: str, position: Optional[str], team: Optional[str] = None) -> list:
+        """
+        Candidates sharing the name's match key, narrowed to the position and then to the
+        game of `team` while more than one is left and the narrowing keeps some.
+        """
+        candidates = self._by_key.get(match_key(name), [])
+        if position and len(candidates) > 1:
+            same_position = [c for c in candidates if self.position_of(c) == position]
+            if same_position:
+                candidates = same_position
+        if team and len(candidates) > 1:
+            same_game = [c for c in candidates if self.in_game(c, team)]
+            if same_game:
+                candidates = same_game
+        return candidates
+
+    def in_game(self, record, team: str) -> bool:
+        """Whether `team` played in the record's game."""
+        return canonical_team(team) in {canonical_team(t) for t in self.teams_of(record) if t}
+
+    def fuzzy(self, name: str, position: Optional[str]) -> List[Tuple[Any, float]]:
+        """Ranked (candidate, score) pairs at the same position (any position if unknown)."""
+        if self._trigrams is None:
+            self._trigrams = TrigramIndex(self.records, self.name_of, self.position_of)
+        return self._trigrams.rank(name, position or None)
+
+
+class PlayerResolver:
+    """Confirmed (source name, position) -> PlayerID links for one source."""
+
+    def __init__(self, conn, source: str):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown crosswalk source {source!r}; expected one of {SOURCES}")
+        self.conn = conn
+        self.source = source
+        self._known: Dict[Tuple[str, str], int] = {}
+        self._pending: Dict[Tuple[str, str], tuple] = {}
+        self._ranked: Dict[Tuple[str, str], list] = {}
+        self._unmatched: Dict[tuple, tuple] = {}
+
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT source_name, position_id, player_id FROM player_crosswalk WHERE source = %s;", (source,)
+        )
+        for source_name, position_id, player_id in cursor.fetchall():
+            self._known[(source_name, position_id)] = player_id
+        cursor.close()
+
+    def resolve(self, name: str, position: Optional[str] = None) -> Optional[int]:
+        player_id = self._known.get((name, position or ""))
+        run_metrics.incr("crosswalk_hits" if player_id is not None else "crosswalk_misses")
+        return player_id
+
+    def confirm(self, name: str, position: Optional[str], player_id: int, player_name: str, method: str,
+                confidence: Optional[float] = None):
+        """Record a link; written to the database by flush()."""
+        key = (name, position or "")
+        self._known[key] = player_id
+        self._pending[key] = (self.source, name, position or "", player_id, player_name, method, confidence)
+
+    def match(self, name: str, position: Optional[str], index: CandidateIndex, team: Optional[str] = None,
+              link: bool = True):
+        """
+        Match an unseen name against candidate records. An exact (normalized) name wins;
+        otherwise a single candidate sharing the match key does (narrowed by position and
+        by the game of `team`, see CandidateIndex.candidates); otherwise the best fuzzy
+        candidate at the same position, if fuzzy_match.accepted() takes it. Anything else is
+        left unconfirmed and reported with its ranked candidates, never guessed.
+
+        With link=False the match is returned but not confirmed, for a second player
+        sharing a name (and position) that is already linked to someone else.
+        """
+        id_of, name_of = index.id_of, index.name_of
+        candidates = index.candidates(name, position, team)
+        exact = [c for c in candidates if normalize_name(name_of(c)) == normalize_name(name)]
+        confidence = None
+        if len(exact) == 1:
+            chosen, method = exact[0], "exact"
+        elif len(candidates) == 1:
+            chosen, method = candidates[0], "match_key"
+        else:
+            ranked = index.fuzzy(name, position)
+            best = accepted(ranked) if not candidates else None
+            if best is None:
+                self._ranked[(name, position or "")] = [
+                    {"player_id": id_of(c), "player_name": name_of(c), "score": round(score, 3)} for c, score in ranked
+                ]
+                if candidates:
+                    run_metrics.incr("crosswalk_ambiguous")
+                    print(f"⚠️  Ambiguous {self.source} name {name} {position or ''}")
+                else:
+                    run_metrics.incr("crosswalk_unmatched")
+                    print(f"⚠️  No confident {self.source} match for {name} {position or ''}")
+                for candidate, score in ranked:
+                    print(f"    {score:.2f}  {name_of(candidate)} ({id_of(candidate)})")
+                print(f"    Confirm one with: python crosswalk.py confirm --source {self.source} "
+                      f"--name \"{name}\" --position \"{position or ''}\" --player-id <id> --player-name <name>")
+                return None
+            (chosen, confidence), method = best, "fuzzy"
+            run_metrics.incr("crosswalk_fuzzy")
+            print(f"🔎 Fuzzy match {name} -> {name_of(chosen)} ({id_of(chosen)}), confidence {confidence:.2f}")
+
+        if link:
+            self.confirm(name, position, id_of(chosen), name_of(chosen), method, confidence)
+            run_metrics.incr("crosswalk_new")
+        return chosen
+
+    def hold(self, name: str, position: Optional[str], season: int, week: int, payload: dict):
+        """
+        Park a row whose player could not be matched in unmatched_players (on flush), with
+        the ranked candidates from match(), so it can be confirmed and re-uploaded later.
+        """
+        candidates = self._ranked.get((name, position or ""), [])
+        self._unmatched[(name, position or "", season, week)] = (
+            self.source, name, position or "", season, week,
+            json.dumps(payload, default=str), json.dumps(candidates),
+        )
+
+    def flush(self) -> int:
+        """Write new links and held rows; links also resolve any held rows for the same name."""
+        if not self._pending and not self._unmatched:
+            return 0
+        cursor = self.conn.cursor()
+        if self._pending:
+            execute_values(cursor, """
+                INSERT INTO player_crosswalk (source, source_name, position_id, player_id, player_name, method, confidence)
+                VALUES %s
+                ON CONFLICT (source, source_name, position_id) DO UPDATE SET
+                    player_id = EXCLUDED.player_id,
+                    player_name = EXCLUDED.player_name,
+                    method = EXCLUDED.method,
+                    confidence = EXCLUDED.confidence,
+                    confirmed_at = CURRENT_TIMESTAMP;
+            """, list(self._pending.values()))
+            execute_values(cursor, """
+                UPDATE unmatched_players AS u SET resolved_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v (source, source_name, position_id)
+                WHERE u.source = v.source AND u.source_name = v.source_name
+                  AND u.position_id = v.position_id AND u.resolved_at IS NULL;
+            """, [(self.source, name, position) for name, position in self._pending])
+        if self._unmatched:
+            execute_values(cursor, """
+                INSERT INTO unmatched_players (source, source_name, position_id, season, week, payload, candidates)
+                VALUES %s
+                ON CONFLICT (source, source_name, position_id, season, week) DO UPDATE SET
+                    payload = EXCLUDED.payload,
+                    candidates = EXCLUDED.candidates,
+                    resolved_at = NULL;
+            """, list(self._unmatched.values()))
+        self.conn.commit()
+        cursor.close()
+        written = len(self._pending) + len(self._unmatched)
+        self._pending.clear()
+        self._unmatched.clear()
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the player ID crosswalk")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    listing = sub.add_parser("list", help="Show confirmed links")
+    listing.add_argument("--source", choices=SOURCES, default=None)
+
+    confirm = sub.add_parser("confirm", help="Record or correct a link by hand")
+    confirm.add_argument("--source", choices=SOURCES, required=True)
+    confirm.add_argument("--name", required=True, help="Name exactly as the source spells it")
+    confirm.add_argument("--position", default="", help="Position (omit for odds)")
+    confirm.add_argument("--player-id", type=int, required=True, help="SportsData PlayerID")
+    confirm.add_argument("--player-name", required=True, help="SportsData name")
+
+    forget = sub.add_parser("forget", help="Drop a link so the name is matched again")
+    forget.add_argument("--source", choices=SOURCES, required=True)
+    forget.add_argument("--name", required=True)
+    forget.add_argument("--position", default="")
+
+    unmatched = sub.add_parser("unmatched", help="Show held rows still waiting for a link")
+    unmatched.add_argument("--source", choices=SOURCES, default=None)
+
+    args = parser.parse_args()
+
+    from local_mirror import connect_db
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        if args.command == "list":
+            cursor.execute("""
+                SELECT source, source_name, position_id, player_id, player_name, method, confidence, confirmed_at
+                FROM player_crosswalk
+                WHERE %s IS NULL OR source = %s
+                ORDER BY source, source_name;
+            """, (args.source, args.source))
+            for source, name, position, player_id, player_name, method, confidence, confirmed_at in cursor.fetchall():
+                score = f"{confidence:.2f}" if confidence is not None else ""
+                print(f"{source:<5} {name:<30} {position:<3} -> {player_id:>6} {player_name:<30} "
+                      f"{method:<10} {score:<5} {confirmed_at:%Y-%m-%d}")
+        elif args.command == "unmatched":
+            cursor.execute("""
+                SELECT source, source_name, position_id, season, week, candidates
+                FROM unmatched_players
+                WHERE resolved_at IS NULL AND (%s IS NULL OR source = %s)
+                ORDER BY source, season, week, source_name;
+            """, (args.source, args.source))
+            for source, name, position, season, week, candidates in cursor.fetchall():
+                print(f"{source:<5} {season} wk{week:<2} {name:<30} {position:<3}")
+                for candidate in candidates:
+                    print(f"      {candidate['score']:.2f}  {candidate['player_name']} ({candidate['player_id']})")
+        elif args.command == "confirm":
+            resolver = PlayerResolver(conn, args.source)
+            resolver.confirm(args.name, args.position, args.player_id, args.player_name, "manual")
+            resolver.flush()
+            print(f"✅ {args.source} {args.name} {args.position} -> {args.player_id} ({args.player_name})")
+        else:
+            cursor.execute(
+                "DELETE FROM player_crosswalk WHERE source = %s AND source_name = %s AND position_id = %s;",
+                (args.source, args.name, args.position),
+            )
+            conn.commit()
+            print(f"✅ Removed {cursor.rowcount} link(s)")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Database Query Tracing
+Traced psycopg2 connection/cursor factory that records every statement's
+fingerprint, duration, row count and call site, aggregates them per
+fingerprint so N+1 loops show up as "1,034 calls of the same statement",
+and writes a slow-query log with optional EXPLAIN (ANALYZE, BUFFERS) plans.
+
+Opting in from a script:
+    import db_trace
+    db_trace.enable()                      # report written at exit
+    conn = db_trace.traced_connect(host=..., dbname=...)
+
+Or without code changes, when launched by UploadManager:
+    python run_all_uploads.py --week 7 --trace-sql --explain-top 5
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+TRACE_ENV = "STATSX_SQL_TRACE"
+TRACE_DIR_ENV = "STATSX_SQL_TRACE_DIR"
+EXPLAIN_TOP_ENV = "STATSX_SQL_EXPLAIN_TOP"
+SLOW_MS_ENV = "STATSX_SLOW_QUERY_MS"
+
+DEFAULT_TRACE_DIR = os.path.join("run_reports", "sql")
+DEFAULT_SLOW_MS = 200
+
+# Statements called this many times from one call site are reported as N+1 patterns
+N_PLUS_ONE_CALLS = 25
+
+# Keep the slow-query log and stored samples bounded
+MAX_SLOW_ENTRIES = 500
+MAX_SAMPLE_CHARS = 200_000
+
+# Frames from these files are skipped when looking for the caller of a query
+_INTERNAL_FILES = ("db_trace.py", "run_metrics.py", os.path.join("psycopg2", ""))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_KEYWORD_LITERAL = re.compile(r"\b(?:NULL|TRUE|FALSE)\b", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_TUPLE = r"\(\s*\?(?:\s*,\s*\?)*\s*\)"
+_TUPLE_LIST = re.compile(_TUPLE + r"(?:\s*,\s*" + _TUPLE + r")+")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_COMMENT = re.compile(r"--[^\n]*")
+
+
+def _as_text(query) -> str:
+    if isinstance(query, bytes):
+        return query.decode("utf-8", errors="replace")
+    if isinstance(query, str):
+        return query
+    # psycopg2.sql.Composed and friends
+    return str(query)
+
+
+def fingerprint(query) -> str:
+    """
+    Reduce a statement to its shape: literals and placeholders become '?',
+    multi-row VALUES lists and IN lists collapse, whitespace is normalized.
+    """
+    text = _COMMENT.sub(" ", _as_text(query))
+    text = _STRING_LITERAL.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _KEYWORD_LITERAL.sub("?", text)
+    text = _TUPLE_LIST.sub("(...), ...", text)
+    text = _IN_LIST.sub("IN (...)", text)
+    return _WHITESPACE.sub(" ", text).strip().rstrip(";").strip()
+
+
+def call_site() -> str:
+    """file:line (function) of the first frame outside the tracing machinery."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not any(part in filename for part in _INTERNAL_FILES):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryStats:
+    """Aggregate for one statement fingerprint."""
+
+    def __init__(self, fingerprint_text: str):
+        self.fingerprint = fingerprint_text
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.call_sites = Counter()
+        self.sample_sql = None
+        self.sample_params = None
+
+    def add(self, sql: str, params, rowcount: int, seconds: float, site: str):
+        self.calls += 1
+        self.total_seconds += seconds
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        self.call_sites[site] += 1
+        # Keep the slowest call as the sample used for EXPLAIN
+        if seconds >= self.max_seconds:
+            self.max_seconds = seconds
+            if len(sql) <= MAX_SAMPLE_CHARS:
+                self.sample_sql = sql
+                self.sample_params = params
+
+    def to_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "calls": self.calls,
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "mean_ms": round(self.total_seconds * 1000 / self.calls, 3) if self.calls else 0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "rows": self.rows,
+            "call_sites": dict(self.call_sites.most_common(5)),
+        }
+
+
+class QueryTrace:
+    """Per-process collection of traced statements."""
+
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_MS):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.stats: Dict[str, QueryStats] = {}
+        self.slow_queries: List[dict] = []
+        self.started_at = time.time()
+
+    def record(self, query, params, rowcount: int, seconds: float):
+        sql = _as_text(query)
+        site = call_site()
+        key = fingerprint(sql)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = QueryStats(key)
+        stats.add(sql, params, rowcount, seconds, site)
+
+        if seconds * 1000 >= self.slow_ms and len(self.slow_queries) < MAX_SLOW_ENTRIES:
+            self.slow_queries.append({
+                "at": round(time.time() - self.started_at, 3),
+                "ms": round(seconds * 1000, 2),
+                "rows": rowcount,
+                "call_site": site,
+                "fingerprint": key,
+                "sql": sql[:2000],
+            })
+
+    def top(self, limit: int = 20) -> List[QueryStats]:
+        return sorted(self.stats.values(), key=lambda s: s.total_seconds, reverse=True)[:limit]
+
+    def n_plus_one(self) -> List[dict]:
+        """Statements repeatedly issued from the same line, i.e. queries inside a loop."""
+        patterns = []
+        for stats in self.stats.values():
+            site, calls = stats.call_sites.most_common(1)[0]
+            if calls >= N_PLUS_ONE_CALLS:
+                patterns.append({
+                    "fingerprint": stats.fingerprint,
+                    "call_site": site,
+                    "calls": calls,
+                    "total_ms": round(stats.total_seconds * 1000, 2),
+                })
+        return sorted(patterns, key=lambda p: p["calls"], reverse=True)
+
+
+TRACE = QueryTrace(float(os.getenv(SLOW_MS_ENV, DEFAULT_SLOW_MS)))
+
+# Callbacks invoked for every statement: fn(query, rowcount, seconds)
+_listeners: List[Callable] = []
+
+# Arguments of the most recent traced connection, reused to run EXPLAIN at report time
+_last_connect = None
+
+
+def add_listener(listener: Callable):
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def _after_statement(query, params, rowcount, seconds):
+    for listener in _listeners:
+        listener(query, rowcount, seconds)
+    if TRACE.enabled:
+        TRACE.record(query, params, rowcount, seconds)
+
+
+_cursor_classes = {}
+
+
+def traced_cursor_class(base):
+    """Subclass any psycopg2 cursor class (plain, DictCursor, ...) with statement tracing."""
+    if base not in _cursor_classes:
+        class TracedCursor(base):
+            def execute(self, query, vars=None):
+                start = time.perf_counter()
+                try:
+                    return super().execute(query, vars)
+                finally:
+                    _after_statement(query, vars, self.rowcount, time.perf_counter() - start)
+
+            def executemany(self, query, vars_list):
+                start = time.perf_counter()
+                try:
+                    return super().executemany(query, vars_list)
+                finally:
+                    _after_statement(query, None, self.rowcount, time.perf_counter() - start)
+
+            def copy_expert(self, sql, file, size=8192):
+                start = time.perf_counter()
+                try:
+                    return super().copy_expert(sql, file, size)
+                finally:
+                    _after_statement(sql, None, self.rowcount, time.perf_counter() - start)
+
+        TracedCursor.__name__ = f"Traced{base.__name__}"
+        _cursor_classes[base] = TracedCursor
+    return _cursor_classes[base]
+
+
+class TracedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors (of any cursor_factory) are traced."""
+
+    def cursor(self, *args, **kwargs):
+        base = kwargs.pop("cursor_factory", None) or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = traced_cursor_class(base)
+        return super().cursor(*args, **kwargs)
+
+
+_original_connect = psycopg2.connect
+
+
+def traced_connect(*args, **kwargs):
+    """psycopg2.connect() returning a TracedConnection."""
+    global _last_connect
+    kwargs.setdefault("connection_factory", TracedConnection)
+    _last_connect = (args, {k: v for k, v in kwargs.items() if k != "connection_factory"})
+    return _original_connect(*args, **kwargs)
+
+
+def install():
+    """Route every psycopg2.connect() in this process through traced_connect()."""
+    psycopg2.connect = traced_connect
+
+
+def enable(write_at_exit: bool = True):
+    """Start collecting per-fingerprint statistics (and write the report at exit)."""
+    TRACE.enabled = True
+    install()
+    if write_at_exit:
+        atexit.register(write_report)
+
+
+def enabled_from_env() -> bool:
+    return os.getenv(TRACE_ENV, "").lower() in ("1", "true", "yes")
+
+
+def explain(stats: QueryStats, analyze: bool) -> Optional[str]:
+    """EXPLAIN the slowest sample of a fingerprint on a fresh connection, rolled back afterwards."""
+    if _last_connect is None or stats.sample_sql is None:
+        return None
+    options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+    args, kwargs = _last_connect
+    conn = _original_connect(*args, **kwargs)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN ({options}) {stats.sample_sql}", stats.sample_params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        cursor.close()
+        return plan
+    except psycopg2.Error as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def build_report(explain_top: int = 0) -> dict:
+    top = TRACE.top()
+    report = {
+        "script": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "unknown",
+        "statements": sum(s.calls for s in TRACE.stats.values()),
+        "distinct_statements": len(TRACE.stats),
+        "total_ms": round(sum(s.total_seconds for s in TRACE.stats.values()) * 1000, 2),
+        "top": [s.to_dict() for s in top],
+        "n_plus_one": TRACE.n_plus_one(),
+        "slow_queries": TRACE.slow_queries,
+        "plans": [],
+    }
+    for stats in top[:explain_top]:
+        # ANALYZE executes the statement, so only read-only statements get real timings
+        read_only = stats.fingerprint.split(" ", 1)[0].upper() in ("SELECT", "WITH")
+        plan = explain(stats, analyze=read_only)
+        if plan:
+            report["plans"].append({"fingerprint": stats.fingerprint, "analyzed": read_only, "plan": plan})
+    return report
+
+
+def format_report(report: dict) -> str:
+    """Human-readable slow-query log."""
+    lines = [
+        f"SQL trace for {report['script']}: {report['statements']:,} statements, "
+        f"{report['distinct_statements']} distinct, {report['total_ms']:,.0f} ms total",
+        "",
+        "Top statements by total time:",
+    ]
+    for entry in report["top"]:
+        site = next(iter(entry["call_sites"]), "unknown")
+        lines.append(
+            f"  {entry['total_ms']:>10,.1f} ms  {entry['calls']:>7,} calls  "
+            f"{entry['mean_ms']:>8.2f} ms avg  {entry['rows']:>8,} rows  {site}"
+        )
+        lines.append(f"      {entry['fingerprint'][:160]}")
+    if report["n_plus_one"]:
+        lines += ["", "Possible N+1 patterns:"]
+        for pattern in report["n_plus_one"]:
+            lines.append(f"  {pattern['calls']:,} calls of the same statement from {pattern['call_site']}")
+            lines.append(f"      {pattern['fingerprint'][:160]}")
+    if report["slow_queries"]:
+        lines += ["", f"Slow queries (>= {TRACE.slow_ms:.0f} ms):"]
+        for entry in report["slow_queries"]:
+            lines.append(f"  +{entry['at']:>8.2f}s {entry['ms']:>9.1f} ms  {entry['call_site']}  {entry['fingerprint'][:120]}")
+    for plan in report["plans"]:
+        lines += ["", f"EXPLAIN {'(ANALYZE, BUFFERS) ' if plan['analyzed'] else ''}{plan['fingerprint'][:120]}", plan["plan"]]
+    return "\n".join(lines) + "\n"
+
+
+def write_report(explain_top: Optional[int] = None, directory: Optional[str] = None) -> Optional[str]:
+    """Write <script>_<pid>.json and .log into the trace directory; returns the JSON path."""
+    if not TRACE.stats:
+        return None
+    if explain_top is None:
+        explain_top = int(os.getenv(EXPLAIN_TOP_ENV, "0") or 0)
+    directory = directory or os.getenv(TRACE_DIR_ENV, DEFAULT_TRACE_DIR)
+    report = build_report(explain_top)
+
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{os.path.splitext(report['script'])[0]}_{os.getpid()}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(base + ".log", "w", encoding="utf-8") as f:
+        f.write(format_report(report))
+    return base + ".json"
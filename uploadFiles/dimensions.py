@@ -0,0 +1,109 @@
+"""
+Dimension Caches
+The small lookup tables every upload reads (teams, positions, the weekly schedule and
+the season's matchup index),
+loaded once per process and kept in memory. A standalone script loads each one once per
+run; under pipeline_daemon.py the process lives across runs, so a triggered refresh
+reads them from memory. Entries expire after CACHE_TTL seconds, and scripts that write a
+dimension call invalidate() so the next reader loads the new rows.
+
+    team_mapping = dimensions.teams(connect_db)      # {abbreviation: team_id}
+    schedules = dimensions.schedule(cursor, week)    # [(team_id, week, opponent_id)]
+    index = dimensions.matchups(cursor)              # matchups.ScheduleIndex
+    dimensions.invalidate("schedule")
+
+`db` is a cursor, a connection, or a zero-argument function returning a connection
+(such as a script's connect_db); a connection opened here is closed again.
+"""
+
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from matchups import ScheduleIndex
+
+DIMENSIONS = ("teams", "positions", "schedule")
+
+# Teams and positions never change in season; this bounds how stale a daemon can get
+CACHE_TTL = 6 * 60 * 60
+
+_cache: Dict[tuple, Tuple[float, object]] = {}
+_lock = threading.Lock()
+
+
+def _fetch_all(db, query: str, params: tuple = ()) -> List[tuple]:
+    if hasattr(db, "fetchall"):
+        db.execute(query, params)
+        return db.fetchall()
+    if hasattr(db, "cursor"):
+        cursor = db.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    conn = db()
+    try:
+        return _fetch_all(conn, query, params)
+    finally:
+        conn.close()
+
+
+def _cached(key: tuple, load):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < CACHE_TTL:
+            return entry[1]
+    value = load()
+    with _lock:
+        _cache[key] = (time.monotonic(), value)
+    return value
+
+
+def teams(db) -> Dict[str, int]:
+    """Team abbreviation -> team_id."""
+    mapping = _cached(("teams",), lambda: {
+        abbreviation: team_id
+        for team_id, abbreviation in _fetch_all(db, "SELECT team_id, abbreviation FROM teams;")
+    })
+    return dict(mapping)
+
+
+def positions(db) -> List[str]:
+    """Valid position_id values."""
+    return list(_cached(("positions",), lambda: [
+        row[0] for row in _fetch_all(db, "SELECT position_id FROM positions;")
+    ]))
+
+
+def schedule(db, week: int) -> List[tuple]:
+    """(team_id, week, opponent_id) for every team playing in `week`."""
+    return list(_cached(("schedule", week), lambda: [
+        tuple(row) for row in _fetch_all(
+            db, "SELECT team_id, week, opponent_id FROM team_schedule WHERE week = %s;", (week,)
+        )
+    ]))
+
+
+def matchups(db) -> ScheduleIndex:
+    """The whole season's schedule indexed by (team, week); dropped with "schedule"."""
+    return _cached(("schedule", "index"), lambda: ScheduleIndex(
+        _fetch_all(db, "SELECT team_id, week, opponent_id FROM team_schedule;")
+    ))
+
+
+def invalidate(*names: str):
+    """Drop the named dimensions (all of them when none are named)."""
+    unknown = set(names) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions {sorted(unknown)}; expected some of {DIMENSIONS}")
+    with _lock:
+        for key in list(_cache):
+            if not names or key[0] in names:
+                del _cache[key]
+
+
+def cached() -> List[str]:
+    """Names of the dimensions currently held (schedule entries per week)."""
+    with _lock:
+        return sorted("/".join(str(part) for part in key) for key in _cache)
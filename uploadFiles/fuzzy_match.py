@@ -0,0 +1,76 @@
+"""
+Fuzzy Name Matching
+Ranks candidate players for a name that failed the exact and match-key lookups. Names
+are broken into character trigrams (of their match_key(), padded so first and last
+letters count) and an inverted index per block (position) maps each trigram to the
+candidates containing it, so only candidates sharing a trigram are ever scored. Score is
+the Sørensen-Dice coefficient of the two trigram sets (0-1).
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from names import CACHE_SIZE, match_key
+
+# A fuzzy match is only accepted on its own when it is this confident...
+ACCEPT_SCORE = 0.7
+# ...and this much ahead of the runner-up
+ACCEPT_MARGIN = 0.15
+# Candidates kept for review when nothing is accepted
+MAX_CANDIDATES = 5
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def trigrams(name: str) -> FrozenSet[str]:
+    padded = f"  {match_key(name)} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """Inverted trigram index over candidate records, blocked by a key such as position."""
+
+    def __init__(self, records: list, name_of: Callable[[dict], str],
+                 block_of: Callable[[dict], Optional[Hashable]] = lambda record: None):
+        self.records = records
+        self._grams: List[FrozenSet[str]] = []
+        self._postings: Dict[Optional[Hashable], Dict[str, List[int]]] = {}
+        for i, record in enumerate(records):
+            grams = trigrams(name_of(record))
+            self._grams.append(grams)
+            postings = self._postings.setdefault(block_of(record), {})
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+
+    def _blocks(self, block: Optional[Hashable]) -> List[Dict[str, List[int]]]:
+        # No block (e.g. odds names carry no position) searches every block
+        if block is None:
+            return list(self._postings.values())
+        return [self._postings.get(block, {})]
+
+    def rank(self, name: str, block: Optional[Hashable] = None,
+             limit: int = MAX_CANDIDATES) -> List[Tuple[dict, float]]:
+        """Candidates sharing at least one trigram with `name`, best first, with Dice scores."""
+        query = trigrams(name)
+        shared: Dict[int, int] = {}
+        for postings in self._blocks(block):
+            for gram in query:
+                for i in postings.get(gram, ()):
+                    shared[i] = shared.get(i, 0) + 1
+
+        scored = [
+            (self.records[i], 2.0 * count / (len(query) + len(self._grams[i])))
+            for i, count in shared.items()
+        ]
+        scored.sort(key=lambda pair: pair[1], reverse=True)
+        return scored[:limit]
+
+
+def accepted(ranked: List[Tuple[dict, float]]) -> Optional[Tuple[dict, float]]:
+    """The top candidate if it is confident enough and clearly ahead of the next one."""
+    if not ranked:
+        return None
+    best, score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    if score >= ACCEPT_SCORE and score - runner_up >= ACCEPT_MARGIN:
+        return best, score
+    return None
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Index Advisor
+Replays the pipeline's calculation stages with SQL tracing on, EXPLAINs every read
+statement they issue, proposes composite, covering and BRIN indexes from the plans,
+measures each candidate in a rolled-back transaction, and writes the winners as the
+next versioned migration in ../migrations.
+
+The replay recalculates the derived tables, so it always runs in a scratch database on
+--admin-dsn: synthetic seasons by default, or a copy of --dsn taken through a read-only
+Parquet snapshot (snapshot.py). The database behind --dsn is only read, unless --apply
+is given.
+
+Usage:
+    python index_advisor.py                          # synthetic 5-season database on local Postgres
+    python index_advisor.py --scale 20 --write-migration
+    python index_advisor.py --dsn "host=... dbname=..." --week 7 --write-migration --apply
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import psycopg2
+
+import benchmark_pipeline
+import db_trace
+import migrate
+import snapshot
+import synthetic_data
+
+# A candidate must cut a query's current plan cost by at least this fraction
+DEFAULT_MIN_IMPROVEMENT = 0.2
+# Queries whose cost x calls is below this are already cheap enough to ignore
+DEFAULT_MIN_COST = 1000.0
+# BRIN only pays off on large tables whose physical order follows the column
+BRIN_MIN_ROWS = 100_000
+BRIN_MIN_CORRELATION = 0.9
+# Covering indexes INCLUDE at most this many extra columns
+MAX_INCLUDE_COLUMNS = 12
+# Postgres truncates longer identifiers
+MAX_IDENTIFIER = 63
+
+SCAN_NODES = ("Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+READ_VERBS = ("SELECT", "WITH")
+
+_CONDITION_COLUMN = re.compile(r"\b(\w+)\)*(?:::[a-z ]+(?:\[\])?)?\)*\s*(<=|>=|<>|!=|=|<|>)")
+_RANGE_OPERATORS = ("<", ">", "<=", ">=")
+
+
+class Candidate:
+    """A proposed index."""
+
+    def __init__(self, table: str, columns: List[str], include: List[str] = None, method: str = "btree"):
+        self.table = table
+        self.columns = columns
+        self.include = include or []
+        self.method = method
+
+    @property
+    def key(self):
+        return (self.table, tuple(self.columns), tuple(self.include), self.method)
+
+    @property
+    def name(self) -> str:
+        suffix = {"btree": "", "brin": "_brin"}[self.method] + ("_cov" if self.include else "")
+        name = f"idx_{self.table}_{'_'.join(self.columns)}{suffix}"
+        if len(name) <= MAX_IDENTIFIER:
+            return name
+        # Keep whole column names and tell long keys apart by a digest of the full name
+        digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+        columns = list(self.columns)
+        while columns and len(f"idx_{self.table}_{'_'.join(columns)}_{digest}{suffix}") > MAX_IDENTIFIER:
+            columns.pop()
+        return f"idx_{'_'.join([self.table] + columns)}_{digest}{suffix}"
+
+    def ddl(self, if_not_exists: bool = False) -> str:
+        using = "" if self.method == "btree" else f" USING {self.method}"
+        include = f" INCLUDE ({', '.join(self.include)})" if self.include else ""
+        exists = "IF NOT EXISTS " if if_not_exists else ""
+        return f"CREATE INDEX {exists}{self.name} ON {self.table}{using} ({', '.join(self.columns)}){include};"
+
+
+def capture_workload(dsn: str, week: int) -> List[dict]:
+    """Run the calculation stages against `dsn` and return their distinct read statements."""
+    db_trace.TRACE.enabled = True
+    db_trace.install()
+    stages = benchmark_pipeline.build_stages(week)
+    modules = benchmark_pipeline.point_modules_at(dsn, [m for phase in stages.values() for _, m, _ in phase])
+
+    for phase_stages in stages.values():
+        for label, module_name, call in phase_stages:
+            try:
+                with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                    call(modules[module_name])
+            except Exception as e:
+                print(f"⚠️ {label} failed during replay: {e}")
+
+    workload = []
+    for stats in db_trace.TRACE.stats.values():
+        if stats.sample_sql and stats.fingerprint.split(" ", 1)[0].upper() in READ_VERBS:
+            workload.append({
+                "fingerprint": stats.fingerprint,
+                "sql": stats.sample_sql,
+                "params": stats.sample_params,
+                "calls": stats.calls,
+            })
+    db_trace.TRACE.enabled = False
+    return workload
+
+
+def explain_json(cursor, sql: str, params) -> dict:
+    cursor.execute(f"EXPLAIN (VERBOSE, FORMAT JSON) {sql}", params)
+    return cursor.fetchone()[0][0]["Plan"]
+
+
+def walk(node: dict, parent: Optional[dict] = None):
+    yield node, parent
+    for child in node.get("Plans", []):
+        yield from walk(child, node)
+
+
+def plan_indexes(plan: dict) -> List[str]:
+    return sorted({node["Index Name"] for node, _ in walk(plan) if "Index Name" in node})
+
+
+def bare_column(expression: str) -> str:
+    """'player_stats.passing_yards DESC' -> 'passing_yards'"""
+    return expression.split()[0].split(".")[-1].strip("()")
+
+
+def scan_usage(plan: dict, table_columns: Dict[str, set], parents: Dict[str, str] = None) -> List[dict]:
+    """
+    Columns each base-table scan filters, sorts, groups and returns. Scans of a partition
+    (player_stats_2025) count for its partitioned table, where the index would be created.
+    """
+    parents = parents or {}
+    usages = []
+    for node, parent in walk(plan):
+        table = node.get("Relation Name")
+        table = parents.get(table, table)
+        if node.get("Node Type") not in SCAN_NODES or table not in table_columns:
+            continue
+        columns = table_columns[table]
+
+        conditions = [node.get("Filter", ""), node.get("Index Cond", ""), node.get("Recheck Cond", "")]
+        conditions += [child.get("Index Cond", "") for child in node.get("Plans", [])]
+        equality, ranges = [], []
+        for column, operator in _CONDITION_COLUMN.findall(" AND ".join(c for c in conditions if c)):
+            if column not in columns:
+                continue
+            target = ranges if operator in _RANGE_OPERATORS else equality
+            if column not in equality and column not in ranges:
+                target.append(column)
+
+        order, group = [], []
+        if parent is not None and parent.get("Node Type") == "Sort":
+            order = [bare_column(key) for key in parent.get("Sort Key", [])]
+        if parent is not None and parent.get("Node Type") == "Aggregate":
+            group = [bare_column(key) for key in parent.get("Group Key", [])]
+        output = []
+        for expression in node.get("Output", []):
+            column = bare_column(expression)
+            if column in columns and column not in output:
+                output.append(column)
+
+        usages.append({
+            "table": table,
+            "equality": equality,
+            "ranges": ranges,
+            "order": [c for c in order if c in columns],
+            "group": [c for c in group if c in columns],
+            "output": output,
+        })
+    return usages
+
+
+def existing_indexes(cursor, table: str) -> List[dict]:
+    cursor.execute("""
+        SELECT am.amname, ix.indnkeyatts,
+               ARRAY(SELECT a.attname
+                     FROM unnest(ix.indkey) WITH ORDINALITY AS k(attnum, ord)
+                     JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+                     ORDER BY k.ord)
+        FROM pg_index ix
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_am am ON am.oid = i.relam
+        WHERE t.relname = %s;
+    """, (table,))
+    return [
+        {"method": method, "columns": list(columns[:key_count]), "include": list(columns[key_count:])}
+        for method, key_count, columns in cursor.fetchall()
+    ]
+
+
+def already_indexed(candidate: Candidate, indexes: List[dict]) -> bool:
+    for index in indexes:
+        if index["method"] != candidate.method:
+            continue
+        if index["columns"][:len(candidate.columns)] == candidate.columns:
+            stored = set(index["columns"]) | set(index["include"])
+            if set(candidate.include) <= stored:
+                return True
+    return False
+
+
+def partition_parents(cursor) -> Dict[str, str]:
+    """partition -> the partitioned table it belongs to (player_stats_2025 -> player_stats)."""
+    cursor.execute("""
+        SELECT child.relname, parent.relname
+        FROM pg_inherits i
+        JOIN pg_class child ON child.oid = i.inhrelid
+        JOIN pg_class parent ON parent.oid = i.inhparent
+        WHERE parent.relkind = 'p';
+    """)
+    return dict(cursor.fetchall())
+
+
+def column_stats(cursor, table: str, column: str):
+    """(estimated rows, physical order correlation) used to decide on BRIN."""
+    # A partitioned table holds no rows itself; count its partitions
+    cursor.execute("""
+        SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)
+        FROM pg_class c
+        WHERE c.relname = %s
+           OR c.oid IN (SELECT i.inhrelid FROM pg_inherits i JOIN pg_class p ON p.oid = i.inhparent
+                        WHERE p.relname = %s);
+    """, (table, table))
+    rows = cursor.fetchone()[0]
+    cursor.execute("SELECT correlation FROM pg_stats WHERE tablename = %s AND attname = %s;", (table, column))
+    row = cursor.fetchone()
+    return rows, (row[0] if row and row[0] is not None else 0)
+
+
+def propose_candidates(cursor, usages: List[dict]) -> List[Candidate]:
+    candidates = {}
+    indexes = {}
+
+    def add(candidate: Candidate):
+        if candidate.table not in indexes:
+            indexes[candidate.table] = existing_indexes(cursor, candidate.table)
+        if already_indexed(candidate, indexes[candidate.table]):
+            return
+        # One covering index per key serves every query on it: merge the INCLUDE lists
+        key = (candidate.table, tuple(candidate.columns), bool(candidate.include), candidate.method)
+        existing = candidates.get(key)
+        if existing is None:
+            candidates[key] = candidate
+        elif len(set(existing.include) | set(candidate.include)) <= MAX_INCLUDE_COLUMNS:
+            existing.include += [c for c in candidate.include if c not in existing.include]
+
+    for usage in usages:
+        table = usage["table"]
+        prefix = usage["equality"]
+        # Equality columns first, then one range column or the sort order. A sort order on
+        # its own never leads: no query seeks on it, so the index would only be scanned whole
+        if prefix or usage["ranges"]:
+            keys = prefix + (usage["ranges"][:1] or usage["order"])
+        else:
+            keys = usage["group"]
+        if not keys:
+            continue
+
+        if prefix and keys != prefix:
+            add(Candidate(table, prefix))
+        add(Candidate(table, keys))
+        include = [c for c in usage["output"] if c not in keys]
+        if 0 < len(include) <= MAX_INCLUDE_COLUMNS:
+            add(Candidate(table, keys, include))
+
+        for column in usage["ranges"] + usage["equality"]:
+            rows, correlation = column_stats(cursor, table, column)
+            if rows >= BRIN_MIN_ROWS and abs(correlation) >= BRIN_MIN_CORRELATION:
+                add(Candidate(table, [column], method="brin"))
+    return list(candidates.values())
+
+
+def workload_costs(cursor, workload: List[dict], tables: Optional[set] = None, baseline: List[float] = None) -> List[float]:
+    """Plan cost per query; queries not touching `tables` keep their baseline cost."""
+    costs = []
+    for i, query in enumerate(workload):
+        if tables is not None and baseline is not None and not (query["tables"] & tables):
+            costs.append(baseline[i])
+            continue
+        costs.append(explain_json(cursor, query["sql"], query["params"])["Total Cost"])
+    return costs
+
+
+def evaluate_candidates(conn, workload: List[dict], candidates: List[Candidate], baseline: List[float]) -> Dict[tuple, List[float]]:
+    """Plan costs with each candidate on its own, built inside a savepoint and rolled back."""
+    cursor = conn.cursor()
+    results = {}
+    for candidate in candidates:
+        cursor.execute("SAVEPOINT advisor_candidate;")
+        try:
+            cursor.execute(candidate.ddl())
+            results[candidate.key] = workload_costs(cursor, workload, {candidate.table}, baseline)
+        except psycopg2.Error as e:
+            print(f"⚠️ Could not evaluate {candidate.name}: {e}")
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT advisor_candidate;")
+    conn.rollback()
+    cursor.close()
+    return results
+
+
+def choose_indexes(workload: List[dict], candidates: List[Candidate], baseline: List[float],
+                   results: Dict[tuple, List[float]], min_improvement: float, min_cost: float) -> List[Candidate]:
+    """
+    Greedy selection: repeatedly take the candidate with the largest calls-weighted cost
+    reduction, counting only queries it speeds up by at least `min_improvement`.
+    """
+    current = list(baseline)
+    chosen = []
+    remaining = [c for c in candidates if c.key in results]
+    while remaining:
+        best, best_gain = None, 0.0
+        for candidate in remaining:
+            gain = 0.0
+            for i, cost in enumerate(results[candidate.key]):
+                weighted = current[i] * workload[i]["calls"]
+                if weighted >= min_cost and cost <= current[i] * (1 - min_improvement):
+                    gain += (current[i] - cost) * workload[i]["calls"]
+            if gain > best_gain:
+                best, best_gain = candidate, gain
+        if best is None:
+            break
+        chosen.append(best)
+        remaining.remove(best)
+        current = [min(c, n) for c, n in zip(current, results[best.key])]
+    return chosen
+
+
+def measure_chosen(conn, workload: List[dict], chosen: List[Candidate]) -> List[dict]:
+    """Before/after cost and index usage per query with all chosen indexes in place."""
+    cursor = conn.cursor()
+    before = []
+    for query in workload:
+        plan = explain_json(cursor, query["sql"], query["params"])
+        before.append((plan["Total Cost"], plan_indexes(plan)))
+    for candidate in chosen:
+        cursor.execute(candidate.ddl())
+    rows = []
+    for query, (cost, used) in zip(workload, before):
+        plan = explain_json(cursor, query["sql"], query["params"])
+        rows.append({
+            "fingerprint": query["fingerprint"],
+            "calls": query["calls"],
+            "before_cost": cost,
+            "after_cost": plan["Total Cost"],
+            "indexes_before": used,
+            "indexes_after": plan_indexes(plan),
+        })
+    conn.rollback()
+    cursor.close()
+    return rows
+
+
+def table_columns_map(cursor) -> Dict[str, set]:
+    cursor.execute("""
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = 'public';
+    """)
+    columns = {}
+    for table, column in cursor.fetchall():
+        columns.setdefault(table, set()).add(column)
+    return columns
+
+
+def advise(dsn: str, week: int, min_improvement: float, min_cost: float) -> dict:
+    print("🔁 Replaying calculation stages to capture the query set...")
+    workload = capture_workload(dsn, week)
+    print(f"📋 Captured {len(workload)} distinct read statements")
+
+    conn = psycopg2.connect(dsn)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("ANALYZE;")
+        conn.commit()
+        columns = table_columns_map(cursor)
+        parents = partition_parents(cursor)
+
+        usages = []
+        baseline = []
+        for query in workload:
+            plan = explain_json(cursor, query["sql"], query["params"])
+            query_usages = scan_usage(plan, columns, parents)
+            query["tables"] = {usage["table"] for usage in query_usages}
+            usages.extend(query_usages)
+            baseline.append(plan["Total Cost"])
+
+        candidates = propose_candidates(cursor, usages)
+        conn.rollback()
+        cursor.close()
+        print(f"🧪 Evaluating {len(candidates)} candidate index(es)...")
+
+        results = evaluate_candidates(conn, workload, candidates, baseline)
+        chosen = choose_indexes(workload, candidates, baseline, results, min_improvement, min_cost)
+        queries = measure_chosen(conn, workload, chosen)
+    finally:
+        conn.close()
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "week": week,
+        "candidates": [c.ddl() for c in candidates],
+        "chosen": [c.ddl(if_not_exists=True) for c in chosen],
+        "queries": queries,
+    }
+
+
+def print_report(report: dict):
+    print("\n📊 Plan cost per query (before -> after, calls-weighted order)")
+    queries = sorted(report["queries"], key=lambda q: q["before_cost"] * q["calls"], reverse=True)
+    for query in queries:
+        change = (query["after_cost"] - query["before_cost"]) / query["before_cost"] * 100 if query["before_cost"] else 0
+        marker = "⬇️" if change <= -1 else "  "
+        print(f"  {marker} {query['before_cost']:>12,.1f} -> {query['after_cost']:>12,.1f} ({change:+6.1f}%) "
+              f"x{query['calls']:<6} {query['fingerprint'][:90]}")
+    if report["chosen"]:
+        print("\n✅ Proposed indexes:")
+        for ddl in report["chosen"]:
+            print(f"  {ddl}")
+    else:
+        print("\n✅ No new indexes would pay off for this workload")
+
+
+def write_migration(report: dict, directory: str) -> Optional[str]:
+    if not report["chosen"]:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    version = migrate.next_version(directory)
+    path = os.path.join(directory, f"{version:04d}_index_advisor_{datetime.now().strftime('%Y%m%d')}.sql")
+    lines = [
+        f"-- Generated by index_advisor.py on {report['generated_at'][:10]} (week {report['week']})",
+        "-- Plan cost before -> after for the statements that improved:",
+    ]
+    for query in report["queries"]:
+        if query["after_cost"] < query["before_cost"]:
+            lines.append(f"--   {query['before_cost']:,.1f} -> {query['after_cost']:,.1f}  {query['fingerprint'][:100]}")
+    lines += [""] + report["chosen"] + [""]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def copy_database(source_dsn: str, dsn: str):
+    """
+    Load the game logs, schedule and derived tables of `source_dsn` into the (migrated)
+    database at `dsn` through a Parquet snapshot. The source is read in a read-only transaction.
+    """
+    source = psycopg2.connect(source_dsn)
+    source.set_session(readonly=True)
+    try:
+        with tempfile.TemporaryDirectory(prefix="statsx_advisor_") as snapshot_dir:
+            snapshot.export_snapshot(source, snapshot_dir)
+            conn = psycopg2.connect(dsn)
+            try:
+                snapshot.restore_snapshot(conn, snapshot_dir)
+            finally:
+                conn.close()
+    finally:
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose indexes for the queries the pipeline runs")
+    parser.add_argument("--dsn", default=None,
+                        help="Populated database to analyse; it is copied into a scratch database and "
+                             "only read. Default: synthetic data")
+    parser.add_argument("--admin-dsn", default=benchmark_pipeline.DEFAULT_ADMIN_DSN,
+                        help="Local server used for the scratch database")
+    parser.add_argument("--scale", type=int, default=5, help="Seasons of synthetic data (default: 5)")
+    parser.add_argument("--week", type=int, default=10, help="Current week to replay")
+    parser.add_argument("--min-improvement", type=float, default=DEFAULT_MIN_IMPROVEMENT,
+                        help="Minimum fractional plan-cost reduction for a query to count (default: 0.2)")
+    parser.add_argument("--min-cost", type=float, default=DEFAULT_MIN_COST,
+                        help="Ignore queries whose cost x calls is below this (default: 1000)")
+    parser.add_argument("--write-migration", action="store_true", help="Write the proposal as the next migration")
+    parser.add_argument("--apply", action="store_true", help="Apply pending migrations to --dsn afterwards")
+    parser.add_argument("--migrations-dir", default=migrate.MIGRATIONS_DIR)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    if args.apply and not args.dsn:
+        print("❌ --apply needs --dsn (the synthetic database is thrown away)")
+        sys.exit(1)
+
+    db_name = f"statsx_advisor_{os.getpid()}"
+    dsn = benchmark_pipeline.database_dsn(args.admin_dsn, db_name)
+    benchmark_pipeline.create_database(args.admin_dsn, db_name)
+    try:
+        conn = psycopg2.connect(dsn)
+        benchmark_pipeline.apply_schema(conn)
+        # Evaluate on top of the indexes earlier migrations already add
+        migrate.apply_pending(conn, args.migrations_dir)
+        if args.dsn:
+            conn.close()
+            print(f"🏈 Copying {args.dsn} into {db_name}...")
+            copy_database(args.dsn, dsn)
+            conn = psycopg2.connect(dsn)
+        else:
+            print(f"🏈 Loading {args.scale} season(s) of synthetic data into {db_name}...")
+            synthetic_data.load_dataset(conn, synthetic_data.generate_dataset(args.scale))
+        # A freshly loaded table has no visibility map, which hides index-only scans
+        conn.autocommit = True
+        conn.cursor().execute("VACUUM ANALYZE;")
+        conn.close()
+
+        report = advise(dsn, args.week, args.min_improvement, args.min_cost)
+    finally:
+        benchmark_pipeline.drop_database(args.admin_dsn, db_name)
+
+    print_report(report)
+    output = args.output or f"index_advisor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📝 Report written to {output}")
+
+    if args.write_migration:
+        path = write_migration(report, args.migrations_dir)
+        if path:
+            print(f"🗂️ Migration written to {path}")
+    if args.apply:
+        conn = psycopg2.connect(args.dsn)
+        try:
+            migrate.apply_pending(conn, args.migrations_dir)
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
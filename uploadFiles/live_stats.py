@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Live Game-Day Polling
+Polls CBS's live leaders pages (the pages uploadPlayer.py scrapes once a week) during a
+game window. It keeps the last stat line of every player in memory and only writes
+players whose line changed since the previous poll. Database writes therefore follow the
+games, not the polling rate:
+
+  - a page whose body is byte-for-byte the same as last poll is not even parsed
+  - changed rows go through the same crosswalk merge as uploadPlayer.py and are upserted
+    into player_stats; the current week's recent_player_stats rows are updated with them
+  - weekly_leaders is rewritten only for positions whose top 5 actually changed
+  - hot_players/cold_players are recomputed at most every HOT_COLD_INTERVAL seconds, and
+    only written when the result differs
+
+The interval adapts: it drops to --min-interval after a poll that changed something and
+doubles after each quiet one up to --max-interval. Polling stops at --until or after
+--max-idle minutes without a change (the window is over). A failed fetch or write is
+logged and treated as a quiet poll; the in-memory lines only advance once a write has
+committed, so the next poll writes the same changes again (reconnecting if needed).
+
+Usage:
+    python live_stats.py --week 7
+    python live_stats.py --week 7 --min-interval 20 --max-interval 300 --until 23:45
+    python live_stats.py --week 7 --once        # a single poll
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+import requests
+from psycopg2.extras import execute_values
+
+import dimensions
+import run_metrics
+import uploadPlayer
+from crosswalk import PlayerResolver
+from uploadPlayer import CURRENT_SEASON, connect_db, position_map
+
+# The frontend generators live with the website
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "my-app", "Scripts"))
+import generate_hot_cold_players  # noqa: E402
+import generate_weekly_leaders  # noqa: E402
+
+MIN_INTERVAL = 30
+MAX_INTERVAL = 300
+MAX_IDLE_MINUTES = 90
+
+# Hot/cold reads the whole season, so it is refreshed less often than the stats
+HOT_COLD_INTERVAL = 600
+
+# A name that could not be merged is retried once the API payload is this old
+API_REFRESH_INTERVAL = 300
+
+# Errors a poll can hit that the next poll may not: network trouble, a dropped connection
+TRANSIENT_ERRORS = (requests.RequestException, psycopg2.OperationalError, psycopg2.InterfaceError)
+
+# Scraped fields that make up a player's stat line
+STAT_FIELDS = (
+    "matchup", "fpts", "completions", "passing_attempts", "passing_yards", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_yards", "rushing_tds", "receptions", "receiving_yards", "receiving_tds", "targets",
+)
+
+# Unlike the weekly upsert, a live upsert replaces the stat line, and leaves rows alone
+# when nothing in them differs
+LIVE_UPSERT_QUERY = """
+    INSERT INTO player_stats (
+        season, player_name, normalized_name, player_id, position_id, team_id, week, matchup, fpts,
+        completions, passing_attempts, passing_yards, passing_tds, interceptions,
+        rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds,
+        targets, snaps, opponent
+    ) VALUES %s
+    ON CONFLICT (season, player_name, team_id, week) DO UPDATE SET
+        normalized_name = EXCLUDED.normalized_name,
+        player_id = COALESCE(EXCLUDED.player_id, player_stats.player_id),
+        matchup = EXCLUDED.matchup,
+        fpts = EXCLUDED.fpts,
+        completions = EXCLUDED.completions,
+        passing_attempts = EXCLUDED.passing_attempts,
+        passing_yards = EXCLUDED.passing_yards,
+        passing_tds = EXCLUDED.passing_tds,
+        interceptions = EXCLUDED.interceptions,
+        rushing_attempts = EXCLUDED.rushing_attempts,
+        rushing_yards = EXCLUDED.rushing_yards,
+        rushing_tds = EXCLUDED.rushing_tds,
+        receptions = EXCLUDED.receptions,
+        receiving_yards = EXCLUDED.receiving_yards,
+        receiving_tds = EXCLUDED.receiving_tds,
+        targets = EXCLUDED.targets,
+        snaps = COALESCE(EXCLUDED.snaps, player_stats.snaps),
+        opponent = COALESCE(EXCLUDED.opponent, player_stats.opponent)
+    WHERE (player_stats.matchup, player_stats.fpts, player_stats.completions, player_stats.passing_attempts,
+           player_stats.passing_yards, player_stats.passing_tds, player_stats.interceptions,
+           player_stats.rushing_attempts, player_stats.rushing_yards, player_stats.rushing_tds,
+           player_stats.receptions, player_stats.receiving_yards, player_stats.receiving_tds, player_stats.targets)
+        IS DISTINCT FROM
+          (EXCLUDED.matchup, EXCLUDED.fpts, EXCLUDED.completions, EXCLUDED.passing_attempts,
+           EXCLUDED.passing_yards, EXCLUDED.passing_tds, EXCLUDED.interceptions,
+           EXCLUDED.rushing_attempts, EXCLUDED.rushing_yards, EXCLUDED.rushing_tds,
+           EXCLUDED.receptions, EXCLUDED.receiving_yards, EXCLUDED.receiving_tds, EXCLUDED.targets);
+"""
+
+RECENT_COLUMNS = """player_name, position_id, week, team_id, passing_attempts, completions, passing_yards,
+    passing_tds, interceptions, rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards,
+    receiving_tds, targets"""
+
+# recent_player_stats has no unique key: update the players it has, add the ones it lacks
+RECENT_UPDATE_QUERY = f"""
+    UPDATE recent_player_stats AS r SET
+        passing_attempts = v.passing_attempts, completions = v.completions, passing_yards = v.passing_yards,
+        passing_tds = v.passing_tds, interceptions = v.interceptions, rushing_attempts = v.rushing_attempts,
+        rushing_yards = v.rushing_yards, rushing_tds = v.rushing_tds, receptions = v.receptions,
+        receiving_yards = v.receiving_yards, receiving_tds = v.receiving_tds, targets = v.targets
+    FROM (VALUES %s) AS v ({RECENT_COLUMNS})
+    WHERE r.player_name = v.player_name AND r.team_id = v.team_id AND r.week = v.week;
+"""
+RECENT_INSERT_QUERY = f"""
+    INSERT INTO recent_player_stats ({RECENT_COLUMNS})
+    SELECT * FROM (VALUES %s) AS v ({RECENT_COLUMNS})
+    WHERE NOT EXISTS (
+        SELECT 1 FROM recent_player_stats r
+        WHERE r.player_name = v.player_name AND r.team_id = v.team_id AND r.week = v.week
+    );
+"""
+
+
+def stat_line(row: dict) -> tuple:
+    return tuple(row[field] for field in STAT_FIELDS)
+
+
+def recent_values(p: dict) -> tuple:
+    return (
+        p['player_name'], p['position_id'], p['week'], p['team_id'], p['passing_attempts'], p['completions'],
+        p['passing_yards'], p['passing_tds'], p['interceptions'], p['rushing_attempts'], p['rushing_yards'],
+        p['rushing_tds'], p['receptions'], p['receiving_yards'], p['receiving_tds'], p['targets'],
+    )
+
+
+class LivePoller:
+    """In-memory state of one week's live pages, and the writes each change needs."""
+
+    def __init__(self, conn, week: int, session=None):
+        self.conn = conn
+        self.week = week
+        self.session = session or requests.Session()
+        self.season = f"{CURRENT_SEASON}REG"
+        self.team_mapping = dimensions.teams(conn)
+        self.resolver = PlayerResolver(conn, "cbs")
+        self.unmatched_players: List[str] = []
+
+        self.page_digests: Dict[str, bytes] = {}
+        self.lines: Dict[Tuple[str, str], tuple] = {}
+        # Names that did not merge, with the API payload version they were tried against
+        self.retry: Dict[Tuple[str, str], int] = {}
+        self.api_version = 0
+        self.api_fetched_at = 0.0
+
+        self.leaders: Dict[str, list] = {}
+        self.hot_cold = None
+        self.hot_cold_at = 0.0
+        self.hot_cold_dirty = False
+
+        cursor = conn.cursor()
+        # Make sure the season's partition exists (migrations/0002)
+        cursor.execute("SELECT create_season_partitions(%s);", (CURRENT_SEASON,))
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM recent_player_stats WHERE week = %s);", (week,))
+        # Only keep recent_player_stats current when uploadPlayerRecent.py put this week in it
+        self.recent_has_week = cursor.fetchone()[0]
+        # Start from what is already stored, so the first poll only writes real changes
+        cursor.execute(
+            f"SELECT position_id, player_name, {', '.join(STAT_FIELDS)} FROM player_stats WHERE season = %s AND week = %s;",
+            (CURRENT_SEASON, week),
+        )
+        for position, player_name, *line in cursor.fetchall():
+            self.lines[(position, player_name)] = tuple(line)
+        for position in generate_weekly_leaders.STAT_MAP:
+            self.leaders[position] = generate_weekly_leaders.fetch_leaders(cursor, week, position)
+        conn.commit()
+        cursor.close()
+        self.refresh_api()
+
+    def refresh_api(self):
+        api_data = uploadPlayer.fetch_player_stats(self.season, self.week, self.session)
+        self.api_by_id, self.api_index = uploadPlayer.build_api_index(api_data)
+        self.api_version += 1
+        self.api_fetched_at = time.monotonic()
+        # Pages must be parsed again for the retried names
+        self.page_digests.clear()
+
+    def reconnect(self, conn):
+        """Continue on a new connection after the old one dropped; unflushed links are kept."""
+        self.conn = conn
+        self.resolver.conn = conn
+
+    def changed_rows(self, position: str) -> Tuple[List[dict], Optional[bytes]]:
+        """
+        Rows of a position's page whose stat line changed (or that are due a retry), and the
+        page digest to remember once they are written (None when there is nothing new).
+        """
+        content = uploadPlayer.fetch_page(self.session, self.week, position)
+        if content is None:
+            return [], None
+        digest = hashlib.sha1(content).digest()
+        if self.page_digests.get(position) == digest:
+            run_metrics.incr("live_pages_unchanged")
+            return [], None
+
+        changed = []
+        for row in uploadPlayer.parse_page(content, self.week, position):
+            key = (position, row["player_name"])
+            if self.lines.get(key) != stat_line(row) or self.retry.get(key, self.api_version) < self.api_version:
+                changed.append(row)
+        return changed, digest
+
+    def poll(self) -> int:
+        """Fetch every position once and write what changed; returns the rows written."""
+        run_metrics.incr("live_polls")
+        if self.retry and time.monotonic() - self.api_fetched_at > API_REFRESH_INTERVAL:
+            self.refresh_api()
+
+        changed, digests = [], {}
+        for position in position_map.values():
+            rows, digest = self.changed_rows(position)
+            changed.extend(rows)
+            if digest is not None:
+                digests[position] = digest
+        if changed:
+            merged = list(uploadPlayer.merge_stats(
+                changed, self.api_by_id, self.api_index, self.team_mapping, self.resolver, self.unmatched_players
+            ))
+            self.write(merged)
+            self.resolver.flush()
+        else:
+            merged = []
+
+        # Only now that the rows are committed do they count as seen; a failed write above
+        # leaves the lines and digests as they were, so the next poll writes them again
+        written = {(row["position_id"], row["player_name"]) for row in merged}
+        for row in changed:
+            key = (row["position_id"], row["player_name"])
+            self.lines[key] = stat_line(row)
+            if key in written:
+                self.retry.pop(key, None)
+            else:
+                self.retry[key] = self.api_version
+        self.page_digests.update(digests)
+        run_metrics.incr("live_rows_changed", len(merged))
+        return len(merged)
+
+    def write(self, merged: List[dict]):
+        if not merged:
+            return
+        cursor = self.conn.cursor()
+        leaders_changed = {}
+        try:
+            rows = uploadPlayer.unique_rows(uploadPlayer.stats_values(p) for p in merged)
+            execute_values(cursor, LIVE_UPSERT_QUERY, rows, page_size=len(rows))
+            if self.recent_has_week:
+                recent = [recent_values(p) for p in merged]
+                execute_values(cursor, RECENT_UPDATE_QUERY, recent, page_size=len(recent))
+                execute_values(cursor, RECENT_INSERT_QUERY, recent, page_size=len(recent))
+
+            for position in sorted({p["position_id"] for p in merged} & set(generate_weekly_leaders.STAT_MAP)):
+                leaders = generate_weekly_leaders.fetch_leaders(cursor, self.week, position)
+                if leaders != self.leaders.get(position):
+                    cursor.execute("DELETE FROM weekly_leaders WHERE week = %s AND position_id = %s;",
+                                   (self.week, position))
+                    execute_values(cursor, """
+                        INSERT INTO weekly_leaders (week, player_name, position_id, stat_value, matchup, rank)
+                        VALUES %s
+                    """, leaders)
+                    leaders_changed[position] = leaders
+            self.conn.commit()
+        except Exception:
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        for position, leaders in leaders_changed.items():
+            self.leaders[position] = leaders
+            run_metrics.incr("live_leaders_rewritten")
+            print(f"🏆 {position} leaders changed: {', '.join(row[1] for row in leaders)}")
+        self.hot_cold_dirty = True
+
+    def refresh_hot_cold(self, force: bool = False):
+        """Recompute hot/cold players after changes, at most every HOT_COLD_INTERVAL seconds."""
+        if not self.hot_cold_dirty or (not force and time.monotonic() - self.hot_cold_at < HOT_COLD_INTERVAL):
+            return
+        cursor = self.conn.cursor()
+        try:
+            hot, cold, _ = generate_hot_cold_players.find_hot_and_cold(cursor, cursor)
+            rewrite = (hot, cold) != self.hot_cold
+            if rewrite:
+                generate_hot_cold_players.write_hot_and_cold(cursor, hot, cold)
+            self.conn.commit()
+        except Exception:
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+        if rewrite:
+            self.hot_cold = (hot, cold)
+            run_metrics.incr("live_hot_cold_rewritten")
+            print(f"🔥 Hot/cold refreshed: {len(hot)} hot, {len(cold)} cold")
+        self.hot_cold_at = time.monotonic()
+        self.hot_cold_dirty = False
+
+
+def next_interval(interval: float, changed: int, min_interval: float, max_interval: float) -> float:
+    """Back to the minimum after a change, otherwise twice as long (up to the maximum)."""
+    return min_interval if changed else min(interval * 2, max_interval)
+
+
+def parse_until(value: Optional[str]) -> Optional[float]:
+    """HH:MM today (tomorrow if already past) as a timestamp."""
+    if not value:
+        return None
+    now = datetime.now()
+    until = datetime.combine(now.date(), datetime.strptime(value, "%H:%M").time())
+    if until <= now:
+        until += timedelta(days=1)
+    return until.timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll CBS live stats during games and upsert what changed")
+    parser.add_argument("--week", "-w", type=int, required=True, help="NFL week being played")
+    parser.add_argument("--min-interval", type=float, default=MIN_INTERVAL, help="Seconds between polls while stats change")
+    parser.add_argument("--max-interval", type=float, default=MAX_INTERVAL, help="Longest wait between quiet polls")
+    parser.add_argument("--max-idle", type=float, default=MAX_IDLE_MINUTES,
+                        help="Stop after this many minutes without a change")
+    parser.add_argument("--until", default=None, help="Stop at this local time (HH:MM)")
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args()
+
+    until = parse_until(args.until)
+    conn = connect_db()
+    try:
+        poller = LivePoller(conn, args.week)
+        interval = args.min_interval
+        last_change = time.time()
+        while True:
+            try:
+                if conn.closed:
+                    conn = connect_db()
+                    poller.reconnect(conn)
+                changed = poller.poll()
+                if changed:
+                    last_change = time.time()
+                poller.refresh_hot_cold()
+                interval = next_interval(interval, changed, args.min_interval, args.max_interval)
+                print(f"[{datetime.now():%H:%M:%S}] {changed} row(s) changed; next poll in {interval:.0f}s")
+            except TRANSIENT_ERRORS as e:
+                # Back off as after a quiet poll; the same changes are written next time
+                run_metrics.incr("live_poll_errors")
+                interval = next_interval(interval, 0, args.min_interval, args.max_interval)
+                print(f"[{datetime.now():%H:%M:%S}] ⚠️ Poll failed ({type(e).__name__}: {e}); "
+                      f"retrying in {interval:.0f}s")
+
+            if args.once or (until and time.time() >= until) or time.time() - last_change > args.max_idle * 60:
+                break
+            time.sleep(interval)
+        poller.refresh_hot_cold(force=True)
+    except KeyboardInterrupt:
+        print("\n⏹️ Live polling stopped.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
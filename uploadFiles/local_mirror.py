@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Local DuckDB Mirror
+Keeps a local columnar copy of the raw game logs (player_stats and the defensive
+game logs) and team_schedule so the averages, projections and frontend phases can
+run their scans locally and only push the derived rows back to Supabase.
+
+Sync is incremental per (season, week): archived seasons are copied once, and the
+current season is compared week by week against a digest computed in Postgres,
+so only weeks that changed are pulled again.
+
+Usage:
+    python local_mirror.py            # sync into mirror/statsx.duckdb
+    python local_mirror.py --rebuild  # drop the mirror and copy everything again
+
+run_all_uploads.py --local-mirror syncs after the core phase and exports
+STATSX_LOCAL_MIRROR so scripts read through connect_analytics().
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import psycopg2
+from dotenv import load_dotenv
+
+from config import get_current_season
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+# Supabase credentials from env
+SUPABASE_HOST = os.getenv("SUPABASE_HOST")
+SUPABASE_PORT = os.getenv("SUPABASE_PORT")
+SUPABASE_DB = os.getenv("SUPABASE_DB")
+SUPABASE_USER = os.getenv("SUPABASE_USER")
+SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
+
+CURRENT_SEASON = get_current_season()
+
+MIRROR_ENV = "STATSX_LOCAL_MIRROR"
+DEFAULT_MIRROR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mirror", "statsx.duckdb")
+
+# Season-partitioned tables synced incrementally, and small tables copied whole
+GAME_LOG_TABLES = ("player_stats", "general_defensive_stats", "qb_defensive_stats")
+FULL_REFRESH_TABLES = ("team_schedule",)
+
+DUCKDB_TYPES = {
+    "integer": "INTEGER",
+    "bigint": "BIGINT",
+    "smallint": "SMALLINT",
+    "numeric": "DOUBLE",
+    "double precision": "DOUBLE",
+    "real": "DOUBLE",
+    "boolean": "BOOLEAN",
+    "date": "DATE",
+    "timestamp without time zone": "TIMESTAMP",
+    "timestamp with time zone": "TIMESTAMPTZ",
+}
+
+
+# Connect to Supabase database
+def connect_db():
+    try:
+        return psycopg2.connect(
+            host=SUPABASE_HOST,
+            port=SUPABASE_PORT,
+            dbname=SUPABASE_DB,
+            user=SUPABASE_USER,
+            password=SUPABASE_PASSWORD,
+            sslmode="require"
+        )
+    except Exception as e:
+        print(f"Error connecting to database: {e}")
+        raise
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("The local mirror needs DuckDB: pip install duckdb")
+    return duckdb
+
+
+# =====================================================
+# Read side: psycopg2-shaped access to the mirror
+# =====================================================
+
+Column = namedtuple("Column", "name type_code display_size internal_size precision scale null_ok")
+
+_PLACEHOLDER = re.compile(r"%(s|%)")
+_NUMERIC = re.compile(r"numeric\((\d+),(\d+)\)")
+
+
+class MirrorRow(tuple):
+    """Row that also supports row["column"] and row.get(), like psycopg2's DictRow."""
+
+    def __new__(cls, values, index: Dict[str, int]):
+        row = super().__new__(cls, values)
+        row._index = index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return super().__getitem__(self._index[key])
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._index else default
+
+    def keys(self):
+        return list(self._index)
+
+
+class MirrorCursor:
+    """The subset of the psycopg2 cursor API the calculation scripts use."""
+
+    def __init__(self, connection, dict_rows: bool):
+        self._cursor = connection.cursor()
+        self._dict_rows = dict_rows
+        self.description = None
+        self.rowcount = -1
+
+    def execute(self, query, vars=None):
+        # psycopg2 placeholders (%s, %%) -> DuckDB (?, %)
+        query = _PLACEHOLDER.sub(lambda m: "?" if m.group(1) == "s" else "%", query)
+        self._cursor.execute(query, list(vars) if vars else None)
+        self.description = [
+            Column(d[0], d[1], None, None, None, None, None) for d in (self._cursor.description or [])
+        ]
+        self.rowcount = -1
+
+    def _wrap(self, rows):
+        # DuckDB returns AVG() and other numeric expressions as DOUBLE where Postgres returns
+        # numeric; hand them back as Decimal so scripts round exactly as they do on Supabase
+        # (the mirrored tables have no float columns)
+        doubles = [i for i, column in enumerate(self.description) if str(column.type_code) == "DOUBLE"]
+        if doubles:
+            rows = [
+                tuple(Decimal(repr(v)) if i in doubles and v is not None else v for i, v in enumerate(row))
+                for row in rows
+            ]
+        if not self._dict_rows:
+            return rows
+        index = {column.name: i for i, column in enumerate(self.description)}
+        return [MirrorRow(row, index) for row in rows]
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self.rowcount = len(rows)
+        return self._wrap(rows)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._wrap([row])[0] if row is not None else None
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._cursor.close()
+
+
+class MirrorConnection:
+    """Read-only connection to the mirror with the psycopg2 connection methods scripts call."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = _duckdb().connect(path, read_only=True)
+
+    def cursor(self, cursor_factory=None):
+        # Any cursor_factory (DictCursor, RealDictCursor, ...) gets rows that also index by name
+        return MirrorCursor(self._connection, dict_rows=cursor_factory is not None)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._connection.close()
+
+
+def connect(path: str = DEFAULT_MIRROR_PATH) -> MirrorConnection:
+    return MirrorConnection(path)
+
+
+def connect_analytics(fallback):
+    """
+    Connection for read-only analytics over the raw game logs and schedule: the local
+    mirror when run_all_uploads.py synced one for this run, otherwise fallback().
+    """
+    path = os.getenv(MIRROR_ENV)
+    if path and os.path.exists(path):
+        return connect(path)
+    return fallback()
+
+
+# =====================================================
+# Write side: incremental sync from Postgres
+# =====================================================
+
+def pg_columns(pg_cursor, table: str) -> List[Tuple[str, str]]:
+    pg_cursor.execute("""
+        SELECT column_name,
+               CASE WHEN data_type = 'numeric' AND numeric_precision IS NOT NULL
+                    THEN format('numeric(%%s,%%s)', numeric_precision, numeric_scale)
+                    ELSE data_type END
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+        ORDER BY ordinal_position;
+    """, (table,))
+    return pg_cursor.fetchall()
+
+
+def duckdb_type(data_type: str) -> str:
+    numeric = _NUMERIC.fullmatch(data_type)
+    if numeric:
+        return f"DECIMAL({numeric.group(1)},{numeric.group(2)})"
+    return DUCKDB_TYPES.get(data_type, "VARCHAR")
+
+
+def ensure_state_table(mirror):
+    mirror.execute("""
+        CREATE TABLE IF NOT EXISTS _mirror_state (
+            table_name VARCHAR,
+            season INTEGER,
+            week INTEGER,
+            row_count BIGINT,
+            digest VARCHAR,
+            synced_at TIMESTAMP DEFAULT current_timestamp
+        );
+    """)
+
+
+def ensure_mirror_table(mirror, table: str, columns: List[Tuple[str, str]]) -> bool:
+    """Create the mirror table; recreate it when the Postgres columns changed. Returns True if (re)created."""
+    existing = mirror.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position;",
+        [table],
+    ).fetchall()
+    wanted = [name for name, _ in columns]
+    if [name for name, in existing] == wanted:
+        return False
+    mirror.execute(f"DROP TABLE IF EXISTS {table};")
+    mirror.execute("DELETE FROM _mirror_state WHERE table_name = ?;", [table])
+    definition = ", ".join(f"{name} {duckdb_type(data_type)}" for name, data_type in columns)
+    mirror.execute(f"CREATE TABLE {table} ({definition});")
+    return True
+
+
+def pg_seasons(pg_cursor, table: str) -> List[int]:
+    """Seasons with a partition in Postgres, read from the catalog without scanning data."""
+    pg_cursor.execute("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = %s;
+    """, (table,))
+    seasons = []
+    for name, in pg_cursor.fetchall():
+        suffix = name[len(table) + 1:]
+        if suffix.isdigit():
+            seasons.append(int(suffix))
+    return sorted(seasons)
+
+
+def pg_week_digests(pg_cursor, table: str, seasons: List[int]) -> Dict[Tuple[int, int], Tuple[int, str]]:
+    """(season, week) -> (row count, md5 of the rows) computed server-side for the given seasons."""
+    if not seasons:
+        return {}
+    pg_cursor.execute(f"""
+        SELECT season, week, COUNT(*), md5(string_agg(md5(t::text), '' ORDER BY id))
+        FROM {table} t
+        WHERE season = ANY(%s)
+        GROUP BY season, week;
+    """, (seasons,))
+    return {(season, week): (count, digest) for season, week, count, digest in pg_cursor.fetchall()}
+
+
+def mirror_week_digests(mirror, table: str) -> Dict[Tuple[int, int], Tuple[int, str]]:
+    rows = mirror.execute(
+        "SELECT season, week, row_count, digest FROM _mirror_state WHERE table_name = ?;", [table]
+    ).fetchall()
+    return {(season, week): (count, digest) for season, week, count, digest in rows}
+
+
+def copy_into_mirror(pg_cursor, mirror, table: str, columns: List[str], where: str = "", params=None) -> int:
+    """Stream rows out of Postgres with COPY and bulk load them into the mirror."""
+    select = pg_cursor.mogrify(f"SELECT {', '.join(columns)} FROM {table} {where}", params).decode()
+    fd, path = tempfile.mkstemp(prefix=f"mirror_{table}_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            pg_cursor.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        before = mirror.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        mirror.execute(f"COPY {table} FROM '{path}' (FORMAT csv, HEADER);")
+        return mirror.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0] - before
+    finally:
+        os.remove(path)
+
+
+def sync_game_log(pg_cursor, mirror, table: str, current_season: int, rebuilt: bool) -> int:
+    columns = [name for name, _ in pg_columns(pg_cursor, table)]
+    known = mirror_week_digests(mirror, table)
+    known_seasons = {season for season, _ in known}
+    seasons = pg_seasons(pg_cursor, table)
+
+    # Archived seasons are immutable once mirrored; the current season is always rechecked
+    to_check = [s for s in seasons if s == current_season or s not in known_seasons or rebuilt]
+    remote = pg_week_digests(pg_cursor, table, to_check)
+
+    changed = sorted(key for key, value in remote.items() if known.get(key) != value)
+    removed = sorted(
+        key for key in known
+        if key[0] not in seasons or (key[0] in to_check and key not in remote)
+    )
+
+    for season, week in removed:
+        mirror.execute(f"DELETE FROM {table} WHERE season = ? AND week = ?;", [season, week])
+        mirror.execute("DELETE FROM _mirror_state WHERE table_name = ? AND season = ? AND week = ?;",
+                       [table, season, week])
+
+    copied = 0
+    by_season: Dict[int, List[int]] = {}
+    for season, week in changed:
+        by_season.setdefault(season, []).append(week)
+    for season, weeks in by_season.items():
+        mirror.execute(f"DELETE FROM {table} WHERE season = ? AND week IN ({', '.join('?' * len(weeks))});",
+                       [season] + weeks)
+        copied += copy_into_mirror(pg_cursor, mirror, table, columns,
+                                   "WHERE season = %s AND week = ANY(%s)", (season, weeks))
+        for week in weeks:
+            count, digest = remote[(season, week)]
+            mirror.execute("DELETE FROM _mirror_state WHERE table_name = ? AND season = ? AND week = ?;",
+                           [table, season, week])
+            mirror.execute("INSERT INTO _mirror_state (table_name, season, week, row_count, digest) VALUES (?, ?, ?, ?, ?);",
+                           [table, season, week, count, digest])
+
+    print(f"🦆 {table}: {len(changed)} week(s) pulled ({copied} rows), {len(removed)} removed, "
+          f"{len(remote) - len(changed)} unchanged")
+    return copied
+
+
+def sync_full_table(pg_cursor, mirror, table: str) -> int:
+    columns = [name for name, _ in pg_columns(pg_cursor, table)]
+    mirror.execute(f"DELETE FROM {table};")
+    copied = copy_into_mirror(pg_cursor, mirror, table, columns)
+    print(f"🦆 {table}: refreshed ({copied} rows)")
+    return copied
+
+
+def sync_mirror(pg_conn, path: str = DEFAULT_MIRROR_PATH, current_season: int = CURRENT_SEASON,
+                rebuild: bool = False) -> int:
+    """Bring the mirror at `path` up to date with Postgres. Returns the number of rows copied."""
+    duckdb = _duckdb()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if rebuild and os.path.exists(path):
+        os.remove(path)
+
+    mirror = duckdb.connect(path)
+    pg_cursor = pg_conn.cursor()
+    copied = 0
+    try:
+        ensure_state_table(mirror)
+        mirror.execute("BEGIN TRANSACTION;")
+        for table in GAME_LOG_TABLES + FULL_REFRESH_TABLES:
+            rebuilt = ensure_mirror_table(mirror, table, pg_columns(pg_cursor, table))
+            if table in GAME_LOG_TABLES:
+                copied += sync_game_log(pg_cursor, mirror, table, current_season, rebuilt)
+            else:
+                copied += sync_full_table(pg_cursor, mirror, table)
+        mirror.execute("COMMIT;")
+    except Exception:
+        mirror.execute("ROLLBACK;")
+        raise
+    finally:
+        pg_conn.rollback()
+        pg_cursor.close()
+        mirror.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the local DuckDB mirror of the game logs")
+    parser.add_argument("--path", default=os.getenv(MIRROR_ENV) or DEFAULT_MIRROR_PATH, help="Mirror file")
+    parser.add_argument("--season", type=int, default=CURRENT_SEASON, help="Current season (always rechecked)")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the mirror and copy everything again")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    conn = connect_db()
+    try:
+        copied = sync_mirror(conn, args.path, args.season, args.rebuild)
+    finally:
+        conn.close()
+    print(f"✅ Mirror {args.path} synced in {time.perf_counter() - start:.1f}s ({copied} rows copied)")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Matchup Factors
+The defense/league ratios every matchup consumer uses, computed once per change in the
+defense averages instead of by each script. The averages phase builds a (team x position
+x stat) array of defense / league from defense_averages, defense_averages_qb,
+all_defense_averages and all_defense_averages_qb. It is stored next to the allowed
+averages and league averages it came from. Missing cells are NaN; a league average of 0
+gives a factor of 1.
+
+Artifacts live in artifacts/matchup_factors/<version>/ (factors.npy, defense.npy,
+league.npy, meta.json). The version is a digest of the arrays and labels, so unchanged
+defense data keeps its version and directory. current.json points at the latest one and is
+replaced atomically; the KEEP_VERSIONS most recent other versions are kept, older ones are
+pruned. current.json also records a digest of the source rows (the four defense average
+tables, a few hundred rows), so readers can tell when it no longer matches the database.
+Readers load the version it names once per process:
+
+    factors = matchup_factors.load(connect_db)
+    factors.factor("DAL", "RB", "rushing_yards")      # 1.08: DAL allows 8% over league average
+    factors.factor_row("DAL", "QB")                    # every stat, in FACTOR_STATS order
+    factors.allowed("DAL", "WR", "receiving_yards")    # yards allowed per game
+    factors.league_average("WR", "receiving_yards")
+
+load() checks the source digest with one query on every call. When no artifact exists
+yet, or the defense averages changed since it was built (matchup_factors.py was not rerun,
+or the artifact came from another database), it rebuilds and publishes the factors.
+
+Usage:
+    python matchup_factors.py           # build and publish (run after uploadAllDefenseAVG.py)
+    python matchup_factors.py --check   # compare the published version with the database
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from local_mirror import connect_db
+from matchups import canonical_team
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts", "matchup_factors")
+CURRENT_FILE = "current.json"
+
+POSITIONS = ("QB", "RB", "WR", "TE")
+
+FACTOR_STATS = (
+    "passing_attempts", "completions", "passing_yards", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_yards", "rushing_tds",
+    "receptions", "receiving_yards", "receiving_tds", "targets",
+)
+
+# Stat -> column in defense_averages / all_defense_averages (RB, WR, TE)
+DEFENSE_COLUMNS = {
+    "rushing_attempts": "avg_rushing_attempts",
+    "rushing_yards": "avg_rushing_yards",
+    "rushing_tds": "avg_rushing_tds",
+    "receptions": "avg_receptions",
+    "receiving_yards": "avg_receiving_yards",
+    "receiving_tds": "avg_receiving_tds",
+    "targets": "avg_targets",
+}
+
+# Stat -> column in defense_averages_qb / all_defense_averages_qb
+QB_DEFENSE_COLUMNS = {
+    "passing_attempts": "avg_passing_attempts",
+    "completions": "avg_completions",
+    "passing_yards": "avg_passing_yards",
+    "passing_tds": "avg_passing_tds",
+    "interceptions": "avg_interceptions",
+    "rushing_attempts": "avg_qb_rushing_attempts",
+    "rushing_yards": "avg_qb_rushing_yards",
+    "rushing_tds": "avg_qb_rushing_tds",
+}
+
+ARRAYS = ("factors", "defense", "league")
+
+SOURCE_TABLES = ("defense_averages", "defense_averages_qb", "all_defense_averages", "all_defense_averages_qb")
+
+# Digest of every row of the source tables, read in one round trip
+SOURCE_QUERY = "SELECT {};".format(", ".join(
+    f"(SELECT md5(COALESCE(string_agg(t::text, '|' ORDER BY t::text), '')) FROM {table} t)"
+    for table in SOURCE_TABLES
+))
+
+# Versions kept besides the current one, newest first
+KEEP_VERSIONS = 5
+
+_loaded: Dict[str, "MatchupFactors"] = {}
+_lock = threading.Lock()
+
+
+class MatchupFactors:
+    """
+    factors and defense are (team x position x stat), league is (position x stat), with
+    axes in `teams`, POSITIONS and FACTOR_STATS order.
+    """
+
+    def __init__(self, version: str, teams: List[str], factors: np.ndarray, defense: np.ndarray,
+                 league: np.ndarray, source: Optional[str] = None):
+        self.version = version
+        self.source = source
+        self.teams = teams
+        self.factors = factors
+        self.defense = defense
+        self.league = league
+        self._team_index = {canonical_team(team): i for i, team in enumerate(teams)}
+        self._stat_index = {stat: j for j, stat in enumerate(FACTOR_STATS)}
+
+    def team(self, team_id: str) -> Optional[int]:
+        return self._team_index.get(canonical_team(team_id))
+
+    def _cell(self, array: np.ndarray, team_id: str, position: str, stat: str) -> float:
+        team = self.team(team_id)
+        if team is None or position not in POSITIONS or stat not in self._stat_index:
+            return float("nan")
+        return float(array[team, POSITIONS.index(position), self._stat_index[stat]])
+
+    def factor(self, team_id: str, position: str, stat: str) -> float:
+        """defense / league for one matchup and stat; NaN when either is missing."""
+        return self._cell(self.factors, team_id, position, stat)
+
+    def allowed(self, team_id: str, position: str, stat: str) -> float:
+        """What the defense allows per game to the position; NaN when missing."""
+        return self._cell(self.defense, team_id, position, stat)
+
+    def league_average(self, position: str, stat: str) -> float:
+        if position not in POSITIONS or stat not in self._stat_index:
+            return float("nan")
+        return float(self.league[POSITIONS.index(position), self._stat_index[stat]])
+
+    def factor_row(self, team_id: str, position: str) -> Optional[np.ndarray]:
+        """Factors for every stat (FACTOR_STATS order), or None when the defense has none for the position."""
+        team = self.team(team_id)
+        if team is None or position not in POSITIONS:
+            return None
+        row = self.factors[team, POSITIONS.index(position)]
+        return None if np.isnan(row).all() else row
+
+    def for_teams(self, teams: Sequence[str], stats: Sequence[str]) -> np.ndarray:
+        """(len(teams) x position x len(stats)) factors in the given orders; NaN for unknown teams."""
+        result = np.full((len(teams), len(POSITIONS), len(stats)), np.nan)
+        columns = [self._stat_index[stat] for stat in stats]
+        for i, team_id in enumerate(teams):
+            team = self.team(team_id)
+            if team is not None:
+                result[i] = self.factors[team][:, columns]
+        return result
+
+
+def _dict_rows(cursor, query: str) -> List[Dict[str, object]]:
+    cursor.execute(query)
+    names = [column[0] for column in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def _fill(array: np.ndarray, row: Dict[str, object], columns: Dict[str, str]):
+    for stat, column in columns.items():
+        if row.get(column) is not None:
+            array[FACTOR_STATS.index(stat)] = float(row[column])
+
+
+def read_defense_tables(cursor) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """teams, allowed averages (team x position x stat) and league averages (position x stat)."""
+    defense_rows = _dict_rows(cursor, "SELECT * FROM defense_averages;")
+    qb_rows = _dict_rows(cursor, "SELECT * FROM defense_averages_qb;")
+    teams = sorted({row["team_id"] for row in defense_rows} | {row["team_id"] for row in qb_rows})
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    defense = np.full((len(teams), len(POSITIONS), len(FACTOR_STATS)), np.nan)
+    for row in defense_rows:
+        if row["position_id"] in POSITIONS[1:]:
+            _fill(defense[team_index[row["team_id"]], POSITIONS.index(row["position_id"])], row, DEFENSE_COLUMNS)
+    for row in qb_rows:
+        _fill(defense[team_index[row["team_id"]], 0], row, QB_DEFENSE_COLUMNS)
+
+    league = np.full((len(POSITIONS), len(FACTOR_STATS)), np.nan)
+    for row in _dict_rows(cursor, "SELECT * FROM all_defense_averages;"):
+        if row["position_id"] in POSITIONS[1:]:
+            _fill(league[POSITIONS.index(row["position_id"])], row, DEFENSE_COLUMNS)
+    for row in _dict_rows(cursor, "SELECT * FROM all_defense_averages_qb;")[:1]:
+        _fill(league[0], row, QB_DEFENSE_COLUMNS)
+    return teams, defense, league
+
+
+def compute_factors(defense: np.ndarray, league: np.ndarray) -> np.ndarray:
+    """defense / league; 1 where the league average is 0, NaN where either is missing."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(league == 0, 1.0, defense / league)
+
+
+def content_version(teams: List[str], arrays: Dict[str, np.ndarray]) -> str:
+    digest = hashlib.sha1(json.dumps([teams, POSITIONS, FACTOR_STATS]).encode("utf-8"))
+    for name in ARRAYS:
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def source_fingerprint(cursor) -> str:
+    """Digest of the defense average rows the factors are built from."""
+    cursor.execute(SOURCE_QUERY)
+    return hashlib.sha1("|".join(cursor.fetchone()).encode("utf-8")).hexdigest()[:16]
+
+
+def build(cursor, source: Optional[str] = None) -> MatchupFactors:
+    # Digest first: rows written in between make the next load() rebuild, never skip one
+    source = source or source_fingerprint(cursor)
+    teams, defense, league = read_defense_tables(cursor)
+    arrays = {"factors": compute_factors(defense, league), "defense": defense, "league": league}
+    return MatchupFactors(content_version(teams, arrays), teams, source=source, **arrays)
+
+
+def save(factors: MatchupFactors, root: str = ARTIFACT_DIR) -> bool:
+    """Write the version's artifact if it is new and point current.json at it. True if it was new."""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, factors.version)
+    created = not os.path.isdir(path)
+    if created:
+        staging = tempfile.mkdtemp(prefix=f".{factors.version}_", dir=root)
+        for name in ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), getattr(factors, name))
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": factors.version, "teams": factors.teams, "positions": POSITIONS,
+                       "stats": FACTOR_STATS, "built_at": datetime.now().isoformat()}, f, indent=2)
+        try:
+            os.rename(staging, path)
+        except OSError:
+            # Another process published the same version first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    pointer = os.path.join(root, CURRENT_FILE)
+    temp_pointer = f"{pointer}.{os.getpid()}.tmp"
+    with open(temp_pointer, "w", encoding="utf-8") as f:
+        json.dump({"version": factors.version, "source": factors.source,
+                   "published_at": datetime.now().isoformat()}, f)
+    os.replace(temp_pointer, pointer)
+    prune(root, factors.version)
+    return created
+
+
+def prune(root: str, current: str, keep: int = KEEP_VERSIONS) -> int:
+    """Remove all but the `keep` most recent versions besides `current`; returns how many went."""
+    versions = [name for name in os.listdir(root)
+                if name != current and not name.startswith(".") and os.path.isdir(os.path.join(root, name))]
+    versions.sort(key=lambda name: os.path.getmtime(os.path.join(root, name)), reverse=True)
+    for name in versions[keep:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    return len(versions[keep:])
+
+
+def current_pointer(root: str = ARTIFACT_DIR) -> Optional[dict]:
+    """current.json: the published version and the source digest it was built from."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return pointer if "version" in pointer else None
+
+
+def current_version(root: str = ARTIFACT_DIR) -> Optional[str]:
+    pointer = current_pointer(root)
+    return pointer["version"] if pointer else None
+
+
+def read(version: str, root: str = ARTIFACT_DIR) -> MatchupFactors:
+    path = os.path.join(root, version)
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy")) for name in ARRAYS}
+    return MatchupFactors(version, meta["teams"], **arrays)
+
+
+def load(connect=None, root: str = ARTIFACT_DIR) -> MatchupFactors:
+    """
+    The published factors, read from disk once per version and process. Through `connect`
+    the artifact is checked against the defense averages first; with none yet, or a stale
+    one, the factors are built from the database and published. Without `connect` the
+    published version is trusted as is.
+    """
+    pointer = current_pointer(root)
+    if connect is None:
+        if pointer is None:
+            raise FileNotFoundError(f"No matchup factors in {root}; run matchup_factors.py")
+    else:
+        conn = connect()
+        try:
+            cursor = conn.cursor()
+            source = source_fingerprint(cursor)
+            if pointer is None or pointer.get("source") != source:
+                if pointer is None:
+                    print("⚠️ No matchup factors published yet, building them from the defense averages")
+                else:
+                    print(f"⚠️ Matchup factors {pointer['version']} are stale (defense averages changed), rebuilding")
+                factors = build(cursor, source)
+                save(factors, root)
+                with _lock:
+                    _loaded[factors.version] = factors
+                pointer = {"version": factors.version, "source": source}
+        finally:
+            conn.close()
+    version = pointer["version"]
+    with _lock:
+        factors = _loaded.get(version)
+    if factors is None:
+        factors = read(version, root)
+        with _lock:
+            _loaded[version] = factors
+    return factors
+
+
+def publish(check: bool = False) -> bool:
+    started = time.perf_counter()
+    conn = connect_db()
+    try:
+        factors = build(conn.cursor())
+    except Exception as e:
+        print(f"❌ Error reading defense averages: {e}")
+        return False
+    finally:
+        conn.close()
+
+    pointer = current_pointer() or {}
+    published = pointer.get("version")
+    if check:
+        if published == factors.version and pointer.get("source") == factors.source:
+            print(f"✅ Published matchup factors {published} match the defense averages")
+            return True
+        print(f"⚠️ Published matchup factors {published} are stale; the defense averages are {factors.version}")
+        return False
+
+    created = save(factors)
+    missing = int(np.isnan(factors.factors).sum())
+    print(f"✅ {'Published' if created else 'Unchanged,'} matchup factors {factors.version}: "
+          f"{len(factors.teams)} teams x {len(POSITIONS)} positions x {len(FACTOR_STATS)} stats "
+          f"({missing} missing cells) in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and publish the defense/league matchup factors")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report whether the published factors match the database")
+    args = parser.parse_args()
+    if not publish(args.check):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,91 @@
+"""
+Matchup Resolver
+The season schedule indexed by (team, week), so projection code resolves opponents
+the same way everywhere. team_schedule stores opponents as written on FantasyData
+('NO' at home, '@NO' away, 'Bye', Jacksonville as 'JAX'); the index parses that once
+and answers with canonical team_ids (the teams table's 'JAC').
+
+    index = dimensions.matchups(cursor)           # loaded once per process
+    index.opponent("ARI", 7)                       # 'GB'
+    game = index.game("ARI", 1)                    # Matchup(team='ARI', week=1, opponent='NO', is_home=False)
+    index.is_bye("ARI", 8)                         # True
+    teams, opponents = index.opponent_vectors()    # 32 teams x 18 weeks
+"""
+
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+WEEKS = 18
+
+# Schedule spellings -> teams.team_id
+TEAM_ALIASES = {'JAX': 'JAC'}
+
+# One team's game in one week; opponent and is_home are None in its bye week
+Matchup = namedtuple("Matchup", ["team", "week", "opponent", "is_home"])
+
+
+def canonical_team(team_id: str) -> str:
+    team_id = team_id.strip().upper()
+    return TEAM_ALIASES.get(team_id, team_id)
+
+
+def parse_opponent_id(opponent_id: str) -> Tuple[Optional[str], Optional[bool]]:
+    """team_schedule.opponent_id -> (opponent, is_home); (None, None) for a bye."""
+    opponent_id = (opponent_id or "").strip()
+    if not opponent_id or opponent_id.upper() == "BYE":
+        return None, None
+    return canonical_team(opponent_id.lstrip("@")), not opponent_id.startswith("@")
+
+
+class ScheduleIndex:
+    """team_schedule rows held as one list of weeks per team; every lookup is two index operations."""
+
+    def __init__(self, rows: Iterable[tuple]):
+        games: Dict[str, List[Optional[Matchup]]] = {}
+        for team_id, week, opponent_id in rows:
+            team = canonical_team(team_id)
+            opponent, is_home = parse_opponent_id(opponent_id)
+            games.setdefault(team, [None] * WEEKS)[int(week) - 1] = Matchup(team, int(week), opponent, is_home)
+        self.teams = sorted(games)
+        self._games = games
+
+    def __len__(self):
+        return sum(game is not None for weeks in self._games.values() for game in weeks)
+
+    def game(self, team_id: str, week: int) -> Optional[Matchup]:
+        """The team's game in `week` (a bye is a Matchup with no opponent); None if not scheduled."""
+        weeks = self._games.get(canonical_team(team_id))
+        if weeks is None or not 1 <= week <= WEEKS:
+            return None
+        return weeks[week - 1]
+
+    def opponent(self, team_id: str, week: int) -> Optional[str]:
+        """Canonical opponent team_id, or None for a bye or an unscheduled week."""
+        game = self.game(team_id, week)
+        return game.opponent if game else None
+
+    def is_home(self, team_id: str, week: int) -> Optional[bool]:
+        game = self.game(team_id, week)
+        return game.is_home if game else None
+
+    def is_bye(self, team_id: str, week: int) -> bool:
+        game = self.game(team_id, week)
+        return game is not None and game.opponent is None
+
+    def week(self, week: int) -> Dict[str, Optional[str]]:
+        """team_id -> opponent for every scheduled team in `week` (None on a bye)."""
+        return {
+            team: weeks[week - 1].opponent
+            for team, weeks in self._games.items()
+            if 1 <= week <= WEEKS and weeks[week - 1] is not None
+        }
+
+    def opponent_vectors(self) -> Tuple[List[str], List[List[Optional[str]]]]:
+        """
+        (teams, opponents): opponents[i][week - 1] is teams[i]'s opponent that week, None on
+        a bye or an unscheduled week. Rows follow `teams` (sorted), columns weeks 1-18.
+        """
+        return self.teams, [
+            [game.opponent if game else None for game in self._games[team]]
+            for team in self.teams
+        ]
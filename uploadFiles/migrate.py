@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+Applies the versioned SQL files in ../migrations (0001_name.sql, 0002_name.sql, ...)
+in order and records each one in the schema_migrations table.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py --status   # list applied and pending migrations
+    python migrate.py --dry-run  # show what would be applied
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from typing import Dict, List, Tuple
+
+import psycopg2
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+# Supabase credentials from env
+SUPABASE_HOST = os.getenv("SUPABASE_HOST")
+SUPABASE_PORT = os.getenv("SUPABASE_PORT")
+SUPABASE_DB = os.getenv("SUPABASE_DB")
+SUPABASE_USER = os.getenv("SUPABASE_USER")
+SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+# Connect to Supabase database
+def connect_db():
+    try:
+        return psycopg2.connect(
+            host=SUPABASE_HOST,
+            port=SUPABASE_PORT,
+            dbname=SUPABASE_DB,
+            user=SUPABASE_USER,
+            password=SUPABASE_PASSWORD,
+            sslmode="require"
+        )
+    except Exception as e:
+        print(f"Error connecting to database: {e}")
+        raise
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def discover_migrations(directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    """(version, name, path) for every migration file, ordered by version."""
+    if not os.path.isdir(directory):
+        return []
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def next_version(directory: str = MIGRATIONS_DIR) -> int:
+    migrations = discover_migrations(directory)
+    return migrations[-1][0] + 1 if migrations else 1
+
+
+def file_checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def applied_migrations(cursor) -> Dict[int, str]:
+    """version -> checksum of every migration already applied."""
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT version, checksum FROM schema_migrations;")
+    return dict(cursor.fetchall())
+
+
+def pending_migrations(conn, directory: str = MIGRATIONS_DIR) -> List[Tuple[int, str, str]]:
+    cursor = conn.cursor()
+    applied = applied_migrations(cursor)
+    conn.commit()
+    cursor.close()
+
+    pending = []
+    for version, name, path in discover_migrations(directory):
+        if version not in applied:
+            pending.append((version, name, path))
+        elif applied[version] != file_checksum(path):
+            print(f"⚠️ Migration {version:04d}_{name} was edited after it was applied")
+    return pending
+
+
+def apply_pending(conn, directory: str = MIGRATIONS_DIR, dry_run: bool = False) -> List[str]:
+    """Apply every pending migration, each in its own transaction. Returns the applied names."""
+    applied = []
+    for version, name, path in pending_migrations(conn, directory):
+        label = f"{version:04d}_{name}"
+        if dry_run:
+            print(f"🔎 Would apply {label}")
+            applied.append(label)
+            continue
+
+        with open(path, "r", encoding="utf-8") as f:
+            migration_sql = f.read()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(migration_sql)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s);",
+                (version, name, file_checksum(path))
+            )
+            conn.commit()
+            print(f"✅ Applied {label}")
+            applied.append(label)
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Migration {label} failed: {e}")
+            raise
+        finally:
+            cursor.close()
+    return applied
+
+
+def print_status(conn, directory: str = MIGRATIONS_DIR):
+    cursor = conn.cursor()
+    applied = applied_migrations(cursor)
+    conn.commit()
+    cursor.close()
+    for version, name, _ in discover_migrations(directory):
+        state = "applied" if version in applied else "pending"
+        print(f"  {version:04d}_{name:<48} {state}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Show pending migrations without applying them")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="Migrations directory")
+    args = parser.parse_args()
+
+    conn = connect_db()
+    try:
+        if args.status:
+            print_status(conn, args.dir)
+            return
+        applied = apply_pending(conn, args.dir, dry_run=args.dry_run)
+        if not applied:
+            print("✅ Schema is up to date")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
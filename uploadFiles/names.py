@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Player Name Normalization
+The one place player names are normalized. normalize_name() produces the value stored
+in player_stats.normalized_name and the derived tables; it matches normalizeString() on
+the website (lowercase, no - . ` ' ’, single spaces). match_key() additionally drops
+generational suffixes for matching the same player across data sources, and
+normalize_name_sql() is the same normalization for queries that join on names.
+
+Usage:
+    python names.py --backfill     # (re)compute player_stats.normalized_name where it differs
+"""
+
+import argparse
+import re
+import sys
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+# Characters dropped from names, as a precompiled str.translate table
+_DROP = str.maketrans("", "", "-.`'’")
+_WHITESPACE = re.compile(r"\s+")
+_SUFFIX = re.compile(r" (?:sr|jr|ii|iii|iv|v)$")
+
+# Distinct player names across every season fit comfortably
+CACHE_SIZE = 16384
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_name(name: str) -> str:
+    """Canonical form of a player name, e.g. "D'Andre Swift Jr." -> "dandre swift jr"."""
+    return _WHITESPACE.sub(" ", name.lower().translate(_DROP)).strip()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def match_key(name: str) -> str:
+    """normalize_name() without a trailing Sr/Jr/II/III/IV/V, for cross-source matching."""
+    return _SUFFIX.sub("", normalize_name(name))
+
+
+def normalize_names(names: Iterable[Optional[str]]) -> List[Optional[str]]:
+    """Normalize a column of names, computing each distinct name once. None stays None."""
+    names = list(names)
+    distinct = {name: normalize_name(name) for name in set(names) if name is not None}
+    return [distinct.get(name) for name in names]
+
+
+def normalize_name_sql(column: str) -> str:
+    """normalize_name() as a SQL expression over `column`, for joining on names in set-based queries."""
+    # ’ is written as a regex escape so the statement stays ASCII
+    return (f"btrim(regexp_replace(regexp_replace(lower({column}), '[-.`''\\u2019]', '', 'g'), "
+            f"'\\s+', ' ', 'g'))")
+
+
+def backfill_normalized_names(conn, table: str = "player_stats") -> int:
+    """Set normalized_name on every row of `table` whose stored value is missing or stale."""
+    from psycopg2.extras import execute_values
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT DISTINCT player_name FROM {table};")
+        player_names = [row[0] for row in cursor.fetchall()]
+        pairs = list(zip(player_names, normalize_names(player_names)))
+        if not pairs:
+            return 0
+        # One statement so rowcount covers every page
+        execute_values(cursor, f"""
+            UPDATE {table} AS t SET normalized_name = v.normalized_name
+            FROM (VALUES %s) AS v (player_name, normalized_name)
+            WHERE t.player_name = v.player_name
+              AND t.normalized_name IS DISTINCT FROM v.normalized_name
+        """, pairs, page_size=len(pairs))
+        updated = cursor.rowcount
+        conn.commit()
+        return updated
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Player name normalization")
+    parser.add_argument("--backfill", action="store_true", help="Recompute player_stats.normalized_name")
+    parser.add_argument("--table", default="player_stats", help="Table to backfill (default: player_stats)")
+    parser.add_argument("names", nargs="*", help="Names to normalize and print")
+    args = parser.parse_args()
+
+    for name in args.names:
+        print(f"{name!r} -> {normalize_name(name)!r} (match key {match_key(name)!r})")
+
+    if args.backfill:
+        from local_mirror import connect_db
+
+        conn = connect_db()
+        try:
+            updated = backfill_normalized_names(conn, args.table)
+        finally:
+            conn.close()
+        print(f"✅ Updated normalized_name on {updated} rows of {args.table}")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
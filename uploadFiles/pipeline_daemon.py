@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+Pipeline Daemon
+Keeps one warm process running the upload pipeline instead of cold-starting an
+interpreter per script from cron. Everything that used to be rebuilt per script lives
+across runs:
+
+  - modules (bs4, pandas, psycopg2, the helper modules) are imported once; scripts are
+    still run as __main__ through run_metrics, so each one reports its own stage metrics
+  - psycopg2.connect() hands out pooled connections; a script's conn.close() resets the
+    session and returns it to the pool, and connections left open are reclaimed after
+    the script
+  - requests.get()/post() go through one keep-alive Session, and --async ingest keeps
+    its event loop, HTTP client and database pool
+  - the dimension caches (dimensions.py: teams, positions, schedule) stay in memory
+
+Jobs ("all", a phase from config.PHASES, or a single pipeline script from config.py)
+run one at a time from a queue, on the intervals in config.DAEMON_SCHEDULE or when
+triggered over a local socket. The socket has no authentication, so it only accepts
+those job names, never a path. Each job writes the usual run report through UploadManager.
+
+Usage:
+    python pipeline_daemon.py serve [--every core=30 --every all=1440] [--no-schedule] [--async]
+    python pipeline_daemon.py trigger core [--week 7] [--wait]
+    python pipeline_daemon.py status
+    python pipeline_daemon.py refresh        # drop the dimension caches
+    python pipeline_daemon.py stop
+
+Restart the daemon after changing a helper module. Upload scripts are read again on
+every run: run_metrics executes the file afresh, and --async re-imports the ingest scripts.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import itertools
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import psycopg2
+
+import config
+import db_trace
+import dimensions
+import run_metrics
+from config import DAEMON_SCHEDULE, DEFAULT_CONFIG, PHASES, get_current_season, get_current_week
+from run_all_uploads import UploadManager
+from run_state import FLUSH_STATS_MIN_VERSION, FLUSH_STATS_QUERY
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = int(os.getenv("STATSX_DAEMON_PORT", "8765"))
+
+# Imported at startup so the first triggered run does not pay for them
+WARM_MODULES = ("bs4", "pandas", "numpy", "requests", "psycopg2.extras", "dotenv",
+                "crosswalk", "streaming", "local_mirror", "names")
+
+# Idle connections kept per connect() arguments, and how long one may sit idle before
+# it is checked with a round trip on checkout
+POOL_SIZE = 4
+POOL_CHECK_AFTER = 30
+
+# Finished jobs kept for `status`
+HISTORY_SIZE = 20
+
+
+class PooledConnection(db_trace.TracedConnection):
+    """Traced connection whose close() hands it back to the pool."""
+
+    _pool = None
+    _pool_key = None
+
+    def close(self):
+        if self._pool is None or self.closed:
+            return super().close()
+        self._pool.release(self)
+
+    def discard(self):
+        self._pool = None
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """Idle psycopg2 connections, keyed by the arguments they were opened with."""
+
+    def __init__(self, connect, size: int = POOL_SIZE):
+        self._connect = connect
+        self.size = size
+        self._idle: Dict[tuple, List[PooledConnection]] = {}
+        self._checked_out: Dict[int, PooledConnection] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def connect(self, *args, **kwargs):
+        try:
+            key = (args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            return self._connect(*args, **kwargs)
+
+        conn = self._checkout(key)
+        if conn is None:
+            kwargs["connection_factory"] = PooledConnection
+            conn = self._connect(*args, **kwargs)
+            conn._pool_key = key
+            self.opened += 1
+        else:
+            self.reused += 1
+            run_metrics.incr("db_connections_reused")
+        conn._pool = self
+        with self._lock:
+            self._checked_out[id(conn)] = conn
+        return conn
+
+    def _checkout(self, key: tuple) -> Optional[PooledConnection]:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    return None
+                conn = idle.pop()
+            if not conn.closed and (time.monotonic() - conn._released_at < POOL_CHECK_AFTER or self._alive(conn)):
+                return conn
+            conn.discard()
+
+    @staticmethod
+    def _alive(conn: PooledConnection) -> bool:
+        # A plain (untraced) cursor, so the check does not show up in the stage's queries
+        try:
+            cursor = psycopg2.extensions.connection.cursor(conn)
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def release(self, conn: PooledConnection):
+        """Roll back, reset the session to its defaults and keep the connection for reuse."""
+        with self._lock:
+            if self._checked_out.pop(id(conn), None) is None:
+                return  # closed twice
+        try:
+            conn.rollback()
+            if conn.server_version >= FLUSH_STATS_MIN_VERSION:
+                # The run state fingerprints the script's outputs next, from these counters
+                cursor = psycopg2.extensions.connection.cursor(conn)
+                cursor.execute(FLUSH_STATS_QUERY)
+                cursor.close()
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+            conn.reset()
+        except psycopg2.Error:
+            conn.discard()
+            return
+        conn._released_at = time.monotonic()
+        with self._lock:
+            idle = self._idle.setdefault(conn._pool_key, [])
+            if len(idle) < self.size:
+                idle.append(conn)
+                return
+        conn.discard()
+
+    def reclaim(self) -> int:
+        """Take back connections a script left open, as process exit used to close them."""
+        with self._lock:
+            leftover = list(self._checked_out.values())
+        for conn in leftover:
+            conn.close()
+        return len(leftover)
+
+    def close_all(self):
+        self.reclaim()
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn in conns]
+            self._idle.clear()
+        for conn in idle:
+            conn.discard()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"idle": sum(len(conns) for conns in self._idle.values()),
+                    "checked_out": len(self._checked_out), "opened": self.opened, "reused": self.reused}
+
+
+class WarmProcess:
+    """The long-lived state scripts run against: hooks, connection pool, HTTP session."""
+
+    def __init__(self):
+        import requests
+
+        for module in WARM_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+
+        run_metrics.install_hooks()
+        self.pool = ConnectionPool(psycopg2.connect)
+        psycopg2.connect = self.pool.connect
+
+        self.http = requests.Session()
+        requests.get, requests.post, requests.request = self.http.get, self.http.post, self.http.request
+
+        self.async_runner = None
+        self._config_mtime = os.path.getmtime(config.__file__)
+
+    def reload_config(self):
+        """Pick up a week changed with update_week.py since the last job."""
+        mtime = os.path.getmtime(config.__file__)
+        if mtime != self._config_mtime:
+            importlib.reload(config)
+            self._config_mtime = mtime
+
+    def run(self, script_path: str, script_args: List[str], stdin_input: Optional[str],
+            env: Dict[str, str]) -> tuple:
+        """Run a script as __main__ in this process; (return code, stdout, stderr)."""
+        saved_env, saved_stdin = os.environ.copy(), sys.stdin
+        stdout, stderr = io.StringIO(), io.StringIO()
+        os.environ.clear()
+        os.environ.update(env)
+        sys.stdin = io.StringIO(stdin_input or "")
+        db_trace.TRACE = db_trace.QueryTrace(db_trace.TRACE.slow_ms)
+        db_trace.TRACE.enabled = db_trace.enabled_from_env()
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    return_code = run_metrics.run_script(script_path, script_args)
+                except Exception:
+                    traceback.print_exc()
+                    return_code = 1
+        finally:
+            sys.stdin = saved_stdin
+            os.environ.clear()
+            os.environ.update(saved_env)
+            self.pool.reclaim()
+            self.http.cookies.clear()
+        return return_code, stdout.getvalue(), stderr.getvalue()
+
+    def close(self):
+        if self.async_runner is not None:
+            self.async_runner.close()
+            self.async_runner = None
+        self.pool.close_all()
+        self.http.close()
+
+
+class DaemonUploadManager(UploadManager):
+    """UploadManager that runs scripts in the warm process instead of a subprocess each."""
+
+    def __init__(self, warm: WarmProcess, **kwargs):
+        super().__init__(**kwargs)
+        self.warm = warm
+        self.async_runner = warm.async_runner
+
+    def _run_script(self, script_name: str, week: Optional[int], env: Dict[str, str]) -> bool:
+        try:
+            launch = self.resolve_script(script_name, week)
+            if launch is None:
+                return False
+            return self.report_exit(script_name, *self.warm.run(*launch, env))
+        except Exception as e:
+            self.log(f"❌ Unexpected error running {script_name}: {e}", "ERROR")
+            return False
+
+    def close_async_runner(self):
+        # Kept open for the next job; WarmProcess.close() shuts it down
+        self.warm.async_runner = self.async_runner
+
+
+class Job:
+    _ids = itertools.count(1)
+
+    def __init__(self, name: str, week: Optional[int], source: str):
+        self.id = f"{next(Job._ids)}-{name}"
+        self.name = name
+        self.week = week
+        self.source = source
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.success = None
+        self.run_id = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "job": self.name,
+            "week": self.week,
+            "source": self.source,
+            "queued_at": datetime.fromtimestamp(self.queued_at).isoformat(timespec="seconds"),
+            "start_ms": round((self.started_at - self.queued_at) * 1000, 1) if self.started_at else None,
+            "seconds": round(self.finished_at - self.started_at, 2) if self.finished_at else None,
+            "success": self.success,
+            "run_id": self.run_id,
+        }
+
+
+def job_names() -> List[str]:
+    return ["all"] + list(PHASES)
+
+
+def pipeline_scripts() -> List[str]:
+    """Scripts a job may name: those of the phases and the week-dependent ones in config.py."""
+    scripts = {script for phase in PHASES.values() for script in phase["scripts"]}
+    return sorted(scripts | set(config.WEEK_DEPENDENT_SCRIPTS))
+
+
+class PipelineDaemon:
+    def __init__(self, schedule: Dict[str, float], async_ingest: bool = False, verbose: bool = False,
+                 local_mirror: bool = False):
+        self.schedule = schedule
+        self.async_ingest = async_ingest
+        self.verbose = verbose
+        self.local_mirror = local_mirror
+        self.started_at = time.time()
+        self.queue: "queue.Queue" = queue.Queue()
+        self.queued: Dict[tuple, Job] = {}
+        self.current: Optional[Job] = None
+        self.history: List[Job] = []
+        self.next_due = {name: time.time() + minutes * 60 for name, minutes in schedule.items()}
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+        # Our own messages go to the console even while a script's output is captured
+        self._console = sys.stdout
+        self.warm = WarmProcess()
+
+    def log(self, message: str, level: str = "INFO"):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] [{level}] [daemon] {message}", file=self._console, flush=True)
+
+    def submit(self, name: str, week: Optional[int] = None, source: str = "trigger") -> Job:
+        """Queue a job; an identical job that has not started yet is returned instead."""
+        if name not in job_names() and name not in pipeline_scripts():
+            raise ValueError(f"Unknown job {name!r}; expected one of {job_names()} or a pipeline script")
+        with self._lock:
+            job = self.queued.get((name, week))
+            if job is None:
+                job = self.queued[(name, week)] = Job(name, week, source)
+                self.queue.put(job)
+        return job
+
+    def work(self):
+        while not self.stopping.is_set():
+            try:
+                job = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self.queued.pop((job.name, job.week), None)
+                self.current = job
+            job.started_at = time.time()
+            self.log(f"▶️ {job.name} (week {job.week or 'default'}, {job.source}) started "
+                     f"{(job.started_at - job.queued_at) * 1000:.0f} ms after it was queued")
+            try:
+                job.success = self.run_job(job)
+            except Exception as e:
+                self.log(f"❌ {job.name} failed: {e}", "ERROR")
+                job.success = False
+            job.finished_at = time.time()
+            self.log(f"{'✅' if job.success else '❌'} {job.name} finished in {job.finished_at - job.started_at:.1f}s")
+            with self._lock:
+                self.current = None
+                self.history = (self.history + [job])[-HISTORY_SIZE:]
+            job.done.set()
+
+    def run_job(self, job: Job) -> bool:
+        self.warm.reload_config()
+        manager = DaemonUploadManager(
+            self.warm, current_week=job.week or get_current_week(), season=get_current_season(),
+            verbose=self.verbose, local_mirror=self.local_mirror, async_ingest=self.async_ingest,
+        )
+        job.run_id = manager.run_id
+        if job.name == "all":
+            return manager.run_all_uploads(
+                skip_schedule=DEFAULT_CONFIG['skip_schedule'], skip_optional=DEFAULT_CONFIG['skip_optional']
+            )
+        if job.name in PHASES:
+            return manager.run_specific_phase(job.name)
+        manager.current_phase = "adhoc"
+        try:
+            return manager.run_scripts([job.name])
+        finally:
+            manager.close_async_runner()
+            manager.write_run_report()
+
+    def tick(self):
+        """Queue scheduled jobs as they come due."""
+        while not self.stopping.wait(1):
+            now = time.time()
+            for name, minutes in self.schedule.items():
+                if now >= self.next_due[name]:
+                    self.next_due[name] = now + minutes * 60
+                    self.submit(name, source="schedule")
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started_at),
+                "current": self.current.to_dict() if self.current else None,
+                "queued": [job.to_dict() for job in self.queued.values()],
+                "recent": [job.to_dict() for job in reversed(self.history)],
+                "schedule": {
+                    name: {"every_minutes": minutes,
+                           "next_run": datetime.fromtimestamp(self.next_due[name]).isoformat(timespec="seconds")}
+                    for name, minutes in self.schedule.items()
+                },
+                "db_pool": self.warm.pool.stats(),
+                "dimensions": dimensions.cached(),
+            }
+
+    def handle(self, request: dict) -> dict:
+        command = request.get("command")
+        if command == "run":
+            job = self.submit(request["job"], request.get("week"))
+            if request.get("wait"):
+                job.done.wait()
+            return {"ok": True, "job": job.to_dict()}
+        if command == "status":
+            return {"ok": True, "status": self.status()}
+        if command == "refresh":
+            dimensions.invalidate()
+            return {"ok": True}
+        if command == "stop":
+            self.stopping.set()
+            return {"ok": True}
+        raise ValueError(f"Unknown command {command!r}")
+
+    def serve(self, port: int = DAEMON_PORT):
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    response = daemon.handle(json.loads(self.rfile.readline()))
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                if daemon.stopping.is_set():
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer((DAEMON_HOST, port), Handler)
+        server.daemon_threads = True
+
+        def stop(signum, frame):
+            self.stopping.set()
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+
+        worker = threading.Thread(target=self.work, name="pipeline-worker")
+        worker.start()
+        threading.Thread(target=self.tick, name="pipeline-schedule", daemon=True).start()
+        self.log(f"🟢 Listening on {DAEMON_HOST}:{port}; schedule: "
+                 + (", ".join(f"{name} every {minutes:g} min" for name, minutes in self.schedule.items()) or "none"))
+        try:
+            server.serve_forever(poll_interval=0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stopping.set()
+            server.server_close()
+            if self.current:
+                self.log(f"⏳ Waiting for {self.current.name} to finish...")
+            worker.join()
+            self.warm.close()
+            self.log("🔴 Stopped")
+
+
+def send(request: dict, port: int = DAEMON_PORT, timeout: Optional[float] = 5) -> dict:
+    """Send one command to a running daemon and return its reply."""
+    with socket.create_connection((DAEMON_HOST, port), timeout=timeout) as conn:
+        conn.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with conn.makefile("r", encoding="utf-8") as reply:
+            return json.loads(reply.readline())
+
+
+def parse_schedule(entries: List[str]) -> Dict[str, float]:
+    schedule = dict(DAEMON_SCHEDULE)
+    for entry in entries:
+        name, _, minutes = entry.partition("=")
+        if name not in job_names() or not minutes:
+            raise SystemExit(f"--every expects JOB=MINUTES with JOB one of {job_names()}, got {entry!r}")
+        schedule[name] = float(minutes)
+    return {name: minutes for name, minutes in schedule.items() if minutes > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm, long-running runner for the upload pipeline")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help=f"Local port (default: {DAEMON_PORT})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Start the daemon")
+    serve.add_argument("--every", action="append", default=[], metavar="JOB=MINUTES",
+                       help="Run a job on an interval (overrides config.DAEMON_SCHEDULE; 0 disables)")
+    serve.add_argument("--no-schedule", action="store_true", help="Only run triggered jobs")
+    serve.add_argument("--async", dest="async_ingest", action="store_true",
+                       help="Run the ingest scripts concurrently on one event loop")
+    serve.add_argument("--local-mirror", action="store_true", help="Sync and read the local DuckDB mirror")
+    serve.add_argument("--verbose", "-v", action="store_true", help="Print script output")
+
+    trigger = sub.add_parser("trigger", help="Queue a job on the running daemon")
+    trigger.add_argument("job", help=f"One of {job_names()} or a pipeline script (e.g. uploadPlayer.py)")
+    trigger.add_argument("--week", "-w", type=int, default=None, help="NFL week (default: config.py)")
+    trigger.add_argument("--wait", action="store_true", help="Wait for the job and exit with its status")
+
+    sub.add_parser("status", help="Show the current job, queue, schedule and pool")
+    sub.add_parser("refresh", help="Drop the in-memory dimension caches")
+    sub.add_parser("stop", help="Finish the current job and exit")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        schedule = {} if args.no_schedule else parse_schedule(args.every)
+        PipelineDaemon(schedule, async_ingest=args.async_ingest, verbose=args.verbose,
+                       local_mirror=args.local_mirror).serve(args.port)
+        return
+
+    request = {"command": args.command}
+    if args.command == "trigger":
+        request.update(command="run", job=args.job, week=args.week, wait=args.wait)
+    try:
+        response = send(request, args.port, timeout=None if request.get("wait") else 5)
+    except OSError as e:
+        print(f"❌ No daemon on {DAEMON_HOST}:{args.port}: {e}")
+        sys.exit(1)
+    if not response.get("ok"):
+        print(f"❌ {response.get('error')}")
+        sys.exit(1)
+    if "job" in response:
+        job = response["job"]
+        if job["success"] is None:
+            print(f"✅ Queued {job['job']} ({job['id']})")
+        else:
+            print(f"{'✅' if job['success'] else '❌'} {job['job']} finished in {job['seconds']}s (run {job['run_id']})")
+            sys.exit(0 if job["success"] else 1)
+    elif "status" in response:
+        print(json.dumps(response["status"], indent=2))
+    else:
+        print("✅ Done")
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
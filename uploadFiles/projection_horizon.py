@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Projection Horizon
+Projects every player for the next N weeks (or the rest of the season) in one pass and
+stores the rows by week in player_projection_horizon (migration 0005), next to the
+single-week player_projections the website reads.
+
+Season averages (players x stats) are broadcast against the (team x week) opponent
+matrix from the schedule index and the published (team x position x stat) defense/league
+factors (matchup_factors.py), so the whole league's horizon is one NumPy expression and
+one COPY:
+
+    projection = avg * 0.7 + avg * (defense / league) * 0.3
+
+The blend is the one calculate_projection() uses; stats are paired with their defense
+columns by name (QB rushing against the QB rushing columns). The horizon replaces the
+season's previous horizon in one transaction, and the player_projections_ros view sums
+it per player and stat.
+
+Usage:
+    python projection_horizon.py 7              # weeks 7-18
+    python projection_horizon.py 7 --weeks 3    # weeks 7-9
+    python projection_horizon.py 7 --dry-run    # compute and summarize, no write
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import dimensions
+import local_mirror
+import matchup_factors
+from config import get_current_season
+from local_mirror import connect_db
+from matchups import WEEKS, canonical_team
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+PLAYER_WEIGHT = 0.7
+DEFENSE_WEIGHT = 0.3
+
+POSITIONS = ("QB", "RB", "WR", "TE")
+
+STATS = (
+    "passing_attempts", "completions", "passing_yards", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_yards", "rushing_tds",
+    "receptions", "receiving_yards", "receiving_tds",
+)
+
+POSITION_STATS = {
+    "QB": ("passing_attempts", "completions", "passing_yards", "passing_tds", "interceptions",
+           "rushing_attempts", "rushing_yards", "rushing_tds"),
+    "RB": ("rushing_attempts", "rushing_yards", "rushing_tds", "receptions", "receiving_yards", "receiving_tds"),
+    "WR": ("receptions", "receiving_yards", "receiving_tds", "rushing_attempts", "rushing_yards", "rushing_tds"),
+    "TE": ("receptions", "receiving_yards", "receiving_tds", "rushing_attempts", "rushing_yards", "rushing_tds"),
+}
+
+HORIZON_COLUMNS = ("season", "week", "player_name", "normalized_name", "position", "team_id",
+                   "opponent", "is_home", "stat_key", "projection")
+
+
+def load_players(cursor, season: int) -> Tuple[List[tuple], np.ndarray]:
+    """
+    [(player_name, normalized_name, position, team_id)] and their season averages
+    (players x STATS, NaN for stats the position isn't projected on). A player's team is
+    the one from their latest game, so traded players are projected with their new team.
+    """
+    cursor.execute(f"""
+        SELECT player_name, position_id, MAX(normalized_name), MAX(week),
+               {', '.join(f'AVG(COALESCE({stat}, 0))' for stat in STATS)}
+        FROM player_stats
+        WHERE season = %s AND position_id IN ('QB', 'RB', 'WR', 'TE')
+        GROUP BY player_name, position_id
+        ORDER BY player_name, position_id;
+    """, (season,))
+    rows = cursor.fetchall()
+    cursor.execute(
+        "SELECT player_name, position_id, week, team_id FROM player_stats WHERE season = %s;", (season,)
+    )
+    latest_team = {}
+    for player_name, position_id, week, team_id in sorted(cursor.fetchall(), key=lambda row: row[2]):
+        latest_team[(player_name, position_id)] = team_id
+
+    players = []
+    averages = np.full((len(rows), len(STATS)), np.nan)
+    for i, (player_name, position_id, normalized_name, _, *stat_averages) in enumerate(rows):
+        players.append((player_name, normalized_name, position_id,
+                        canonical_team(latest_team[(player_name, position_id)])))
+        for j, stat in enumerate(STATS):
+            if stat in POSITION_STATS[position_id]:
+                averages[i, j] = float(stat_averages[j] or 0)
+    return players, averages
+
+
+def project_horizon(averages: np.ndarray, player_teams: np.ndarray, player_positions: np.ndarray,
+                    opponents: np.ndarray, factors: np.ndarray) -> np.ndarray:
+    """
+    (players x weeks x stats) projections, unrounded. `opponents` is (team x week) opponent
+    indexes (-1 on a bye); byes, missing defenses and unprojected stats come out NaN.
+    """
+    opponent = opponents[player_teams]                                  # players x weeks
+    factor = factors[np.maximum(opponent, 0), player_positions[:, None]]  # players x weeks x stats
+    factor[opponent < 0] = np.nan
+    player = averages[:, None, :]
+    return player * PLAYER_WEIGHT + player * factor * DEFENSE_WEIGHT
+
+
+def build_horizon(stats_cursor, factors, season: int, start_week: int, end_week: int):
+    """
+    Player list, weeks, and the (players x weeks x stats) projections with per-cell opponents.
+    `factors` is the published matchup_factors.MatchupFactors.
+    """
+    players, averages = load_players(stats_cursor, season)
+    index = dimensions.matchups(stats_cursor)
+    teams, opponent_vectors = index.opponent_vectors()
+    team_index = {team: i for i, team in enumerate(teams)}
+
+    weeks = list(range(start_week, end_week + 1))
+    opponents = np.array(
+        [[team_index.get(row[week - 1], -1) if row[week - 1] else -1 for week in weeks] for row in opponent_vectors],
+        dtype=np.int64,
+    ).reshape(len(teams), len(weeks))
+    # Players whose team isn't on the schedule get an all-bye row
+    opponents = np.vstack([opponents, np.full((1, len(weeks)), -1, dtype=np.int64)])
+    player_teams = np.array([team_index.get(team, len(teams)) for _, _, _, team in players], dtype=np.int64)
+    player_positions = np.array([POSITIONS.index(position) for _, _, position, _ in players], dtype=np.int64)
+
+    projections = project_horizon(averages, player_teams, player_positions, opponents,
+                                  factors.for_teams(teams, STATS))
+    return players, weeks, projections, index
+
+
+def horizon_rows(season: int, players: List[tuple], weeks: List[int], projections: np.ndarray, index) -> List[tuple]:
+    """One row per projected (player, week, stat) cell, rounded like calculate_projection()."""
+    projections = np.round(projections, 1)
+    rows = []
+    for i, w, j in zip(*np.nonzero(~np.isnan(projections))):
+        player_name, normalized_name, position, team_id = players[i]
+        game = index.game(team_id, weeks[w])
+        rows.append((season, weeks[w], player_name, normalized_name, position, team_id,
+                     game.opponent, game.is_home, STATS[j], float(projections[i, w, j])))
+    return rows
+
+
+def write_horizon(conn, season: int, rows: List[tuple]):
+    """Replace the season's horizon with `rows` in one transaction (bulk COPY)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM player_projection_horizon WHERE season = %s;", (season,))
+        cursor.copy_expert(
+            f"COPY player_projection_horizon ({', '.join(HORIZON_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def upload_projection_horizon(start_week: int, weeks: int = None, dry_run: bool = False) -> bool:
+    end_week = WEEKS if weeks is None else min(start_week + weeks - 1, WEEKS)
+    print(f"📅 Projecting weeks {start_week}-{end_week} of {CURRENT_SEASON}...")
+    started = time.perf_counter()
+
+    conn = connect_db()
+    try:
+        # Game logs and the schedule come from the local mirror when one is available
+        stats_conn = local_mirror.connect_analytics(connect_db)
+        try:
+            players, week_list, projections, index = build_horizon(
+                stats_conn.cursor(), matchup_factors.load(connect_db), CURRENT_SEASON, start_week, end_week
+            )
+        finally:
+            stats_conn.close()
+
+        rows = horizon_rows(CURRENT_SEASON, players, week_list, projections, index)
+        print(f"✅ Projected {len(players)} players x {len(week_list)} weeks: {len(rows)} rows "
+              f"in {time.perf_counter() - started:.2f}s")
+        if not rows:
+            print("⚠️ Nothing to project (no scheduled games or no player stats)")
+            return False
+        if dry_run:
+            for row in rows[:5]:
+                print(f"   {row}")
+            return True
+
+        write_horizon(conn, CURRENT_SEASON, rows)
+        print(f"✅ Stored the horizon in player_projection_horizon ({time.perf_counter() - started:.2f}s total)")
+        return True
+    except Exception as e:
+        print(f"❌ Error during projection horizon upload: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Project every player for the next N weeks in one pass")
+    parser.add_argument("week", type=int, help="First week to project (1-18)")
+    parser.add_argument("--weeks", type=int, default=None,
+                        help="Number of weeks to project (default: the rest of the season)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute and summarize without writing")
+    args = parser.parse_args()
+
+    if not 1 <= args.week <= WEEKS or (args.weeks is not None and args.weeks < 1):
+        print("❌ Invalid week range! Weeks are 1-18 and --weeks must be at least 1.")
+        sys.exit(1)
+    if not upload_projection_horizon(args.week, args.weeks, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
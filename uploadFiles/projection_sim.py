@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Projection Simulation
+Monte Carlo distributions around the week's projections: every player's per-stat
+outcomes are drawn as one (players x stats x samples) NumPy array, and p10/p50/p90
+plus the probability of going over the player's line (player_lines) are stored in
+player_projection_distributions (migration 0006).
+
+Each (player, stat) is centred on its projection_horizon.py projection. Its spread
+comes from the player's game-to-game coefficient of variation in player_stats,
+shrunk toward the position's typical one when the player has few games. Counting
+stats (attempts, completions, receptions, touchdowns, interceptions) are drawn from a
+negative binomial (Poisson when the history isn't overdispersed); yardage from a
+gamma. Stats are drawn independently.
+
+Samples are drawn for a chunk of players at a time, sized so one chunk's draws stay
+under --max-chunk-mb, so 10k samples for the full slate fits in a few hundred MB.
+
+Usage:
+    python projection_sim.py 8                      # 10,000 samples per player
+    python projection_sim.py 8 --samples 20000 --seed 7
+    python projection_sim.py 8 --dry-run
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+import warnings
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import local_mirror
+import matchup_factors
+from config import get_current_season
+from local_mirror import connect_db
+from matchups import WEEKS
+from names import normalize_name
+from projection_horizon import POSITIONS, STATS, build_horizon
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+DEFAULT_SAMPLES = 10000
+DEFAULT_MAX_CHUNK_MB = 256
+PERCENTILES = (10, 50, 90)
+
+COUNT_STATS = frozenset({
+    "passing_attempts", "completions", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_tds", "receptions", "receiving_tds",
+})
+
+# Games of history worth as much as the position's typical spread
+SHRINKAGE_GAMES = 4
+
+DISTRIBUTION_COLUMNS = ("season", "week", "player_name", "normalized_name", "position", "team_id",
+                        "opponent", "stat_key", "mean", "p10", "p50", "p90", "line", "p_over", "samples")
+
+
+def load_spreads(cursor, season: int, players: List[tuple]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(players x STATS) historical mean and standard deviation per game, and games played."""
+    cursor.execute(f"""
+        SELECT player_name, position_id, COUNT(*),
+               {', '.join(f'AVG(COALESCE({stat}, 0)), STDDEV_SAMP(COALESCE({stat}, 0))' for stat in STATS)}
+        FROM player_stats
+        WHERE season = %s
+        GROUP BY player_name, position_id;
+    """, (season,))
+    history = {(row[0], row[1]): row[2:] for row in cursor.fetchall()}
+
+    means = np.zeros((len(players), len(STATS)))
+    stddevs = np.zeros((len(players), len(STATS)))
+    games = np.zeros(len(players))
+    for i, (player_name, _, position, _) in enumerate(players):
+        row = history.get((player_name, position))
+        if row is None:
+            continue
+        games[i] = row[0]
+        means[i] = [float(value or 0) for value in row[1::2]]
+        stddevs[i] = [float(value or 0) for value in row[2::2]]
+    return means, stddevs, games
+
+
+def coefficients_of_variation(means: np.ndarray, stddevs: np.ndarray, games: np.ndarray,
+                              positions: np.ndarray) -> np.ndarray:
+    """(players x STATS) spread relative to the mean, shrunk toward the position's median."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(means > 0, stddevs / means, np.nan)
+    shrunk = np.zeros_like(cv)
+    for q in range(len(POSITIONS)):
+        rows = positions == q
+        if not rows.any():
+            continue
+        with warnings.catch_warnings():
+            # Stats nobody at the position has enough games in fall back to no spread
+            warnings.simplefilter("ignore", RuntimeWarning)
+            position_cv = np.nanmedian(np.where(games[rows, None] >= SHRINKAGE_GAMES, cv[rows], np.nan), axis=0)
+        position_cv = np.nan_to_num(position_cv, nan=0.0)
+        player_cv = np.where(np.isnan(cv[rows]), position_cv, cv[rows])
+        n = games[rows, None]
+        shrunk[rows] = (n * player_cv + SHRINKAGE_GAMES * position_cv) / (n + SHRINKAGE_GAMES)
+    return shrunk
+
+
+def load_lines(cursor, week: int, players: List[tuple]) -> np.ndarray:
+    """(players x STATS) sportsbook lines for the week, NaN where there is none."""
+    columns = [f"projected_{stat}" for stat in STATS]
+    cursor.execute(f"SELECT player_name, position, {', '.join(columns)} FROM player_lines WHERE week = %s;", (week,))
+    by_name = {}
+    for player_name, position, *values in cursor.fetchall():
+        by_name[(normalize_name(player_name), position)] = values
+        by_name.setdefault((normalize_name(player_name), None), values)
+
+    lines = np.full((len(players), len(STATS)), np.nan)
+    for i, (player_name, normalized_name, position, _) in enumerate(players):
+        name = normalized_name or normalize_name(player_name)
+        values = by_name.get((name, position)) or by_name.get((name, None))
+        if values is not None:
+            lines[i] = [np.nan if value is None else float(value) for value in values]
+    return lines
+
+
+def draw(rng: np.random.Generator, mean: np.ndarray, cv: np.ndarray, count: np.ndarray,
+         samples: int) -> np.ndarray:
+    """
+    (players x stats x samples) outcomes for one chunk. `mean` and `cv` are (players x stats);
+    `count` marks the columns drawn as integers. Cells with a zero mean or no spread stay at the mean.
+    """
+    mean = np.nan_to_num(mean)
+    shape = mean.shape + (samples,)
+    out = np.broadcast_to(mean[:, :, None], shape).astype(np.float32)
+    variance = (cv * mean) ** 2
+
+    # Yardage: gamma with the projection as its mean
+    continuous = (~count[None, :]) & (mean > 0) & (cv > 0)
+    if continuous.any():
+        k = 1.0 / cv[continuous] ** 2
+        theta = mean[continuous] * cv[continuous] ** 2
+        out[continuous] = rng.gamma(k[:, None], theta[:, None], size=(continuous.sum(), samples))
+
+    # Counting stats: negative binomial when overdispersed, else Poisson
+    discrete = count[None, :] & (mean > 0)
+    overdispersed = discrete & (variance > mean)
+    poisson = discrete & ~overdispersed
+    if overdispersed.any():
+        m, v = mean[overdispersed], variance[overdispersed]
+        out[overdispersed] = rng.negative_binomial((m * m / (v - m))[:, None], (m / v)[:, None],
+                                                   size=(overdispersed.sum(), samples))
+    if poisson.any():
+        out[poisson] = rng.poisson(mean[poisson][:, None], size=(poisson.sum(), samples))
+    return out
+
+
+def simulate(mean: np.ndarray, cv: np.ndarray, lines: np.ndarray, samples: int, seed: int = None,
+             max_chunk_mb: float = DEFAULT_MAX_CHUNK_MB) -> Dict[str, np.ndarray]:
+    """
+    Percentiles, sample mean and P(over line) per (player, stat), simulated a chunk of
+    players at a time. NaN means stay NaN (not projected).
+    """
+    rng = np.random.default_rng(seed)
+    players, stats = mean.shape
+    count = np.array([stat in COUNT_STATS for stat in STATS])
+    chunk = max(1, int(max_chunk_mb * 2 ** 20 // (stats * samples * 4)))
+
+    result = {name: np.full((players, stats), np.nan) for name in ("mean", "p_over")}
+    result.update({f"p{p}": np.full((players, stats), np.nan) for p in PERCENTILES})
+    for start in range(0, players, chunk):
+        rows = slice(start, min(start + chunk, players))
+        outcomes = draw(rng, mean[rows], cv[rows], count, samples)
+        for p, values in zip(PERCENTILES, np.percentile(outcomes, PERCENTILES, axis=-1)):
+            result[f"p{p}"][rows] = values
+        result["mean"][rows] = outcomes.mean(axis=-1)
+        line = lines[rows]
+        with np.errstate(invalid="ignore"):
+            result["p_over"][rows] = np.where(np.isnan(line), np.nan,
+                                              (outcomes > np.nan_to_num(line)[:, :, None]).mean(axis=-1))
+
+    unprojected = np.isnan(mean)
+    for values in result.values():
+        values[unprojected] = np.nan
+    return result
+
+
+def distribution_rows(season: int, week: int, players: List[tuple], index, result: Dict[str, np.ndarray],
+                      lines: np.ndarray, samples: int) -> List[tuple]:
+    rows = []
+    for i, j in zip(*np.nonzero(~np.isnan(result["mean"]))):
+        player_name, normalized_name, position, team_id = players[i]
+        line = None if np.isnan(lines[i, j]) else float(lines[i, j])
+        p_over = None if np.isnan(result["p_over"][i, j]) else round(float(result["p_over"][i, j]), 4)
+        rows.append((season, week, player_name, normalized_name, position, team_id,
+                     index.opponent(team_id, week), STATS[j],
+                     *(round(float(result[name][i, j]), 2) for name in ("mean", "p10", "p50", "p90")),
+                     line, p_over, samples))
+    return rows
+
+
+def write_distributions(conn, season: int, week: int, rows: List[tuple]):
+    """Replace the week's distributions with `rows` in one transaction (bulk COPY)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM player_projection_distributions WHERE season = %s AND week = %s;", (season, week))
+        cursor.copy_expert(
+            f"COPY player_projection_distributions ({', '.join(DISTRIBUTION_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def upload_projection_distributions(week: int, samples: int = DEFAULT_SAMPLES, seed: int = None,
+                                    max_chunk_mb: float = DEFAULT_MAX_CHUNK_MB, dry_run: bool = False) -> bool:
+    print(f"🎲 Simulating week {week} of {CURRENT_SEASON} ({samples:,} samples per player)...")
+    started = time.perf_counter()
+
+    conn = connect_db()
+    try:
+        # Game logs and the schedule come from the local mirror when one is available
+        stats_conn = local_mirror.connect_analytics(connect_db)
+        try:
+            stats_cursor = stats_conn.cursor()
+            cursor = conn.cursor()
+            players, _, projections, index = build_horizon(
+                stats_cursor, matchup_factors.load(connect_db), CURRENT_SEASON, week, week
+            )
+            means, stddevs, games = load_spreads(stats_cursor, CURRENT_SEASON, players)
+            lines = load_lines(cursor, week, players)
+            cursor.close()
+        finally:
+            stats_conn.close()
+        loaded = time.perf_counter()
+
+        positions = np.array([POSITIONS.index(position) for _, _, position, _ in players], dtype=np.int64)
+        cv = coefficients_of_variation(means, stddevs, games, positions)
+        result = simulate(projections[:, 0, :], cv, lines, samples, seed, max_chunk_mb)
+        rows = distribution_rows(CURRENT_SEASON, week, players, index, result, lines, samples)
+        print(f"✅ Simulated {len(players)} players ({len(rows)} player-stats) in "
+              f"{time.perf_counter() - loaded:.2f}s; {int(np.count_nonzero(~np.isnan(result['p_over'])))} with lines")
+        if not rows:
+            print("⚠️ Nothing to simulate (no scheduled games or no player stats)")
+            return False
+        if dry_run:
+            for row in rows[:5]:
+                print(f"   {row}")
+            return True
+
+        write_distributions(conn, CURRENT_SEASON, week, rows)
+        print(f"✅ Stored distributions in player_projection_distributions ({time.perf_counter() - started:.2f}s total)")
+        return True
+    except Exception as e:
+        print(f"❌ Error during projection simulation: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate per-stat outcome distributions for a week")
+    parser.add_argument("week", type=int, help="Week to simulate (1-18)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Samples per player and stat")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed, for reproducible runs")
+    parser.add_argument("--max-chunk-mb", type=float, default=DEFAULT_MAX_CHUNK_MB,
+                        help="Memory for one chunk of draws")
+    parser.add_argument("--dry-run", action="store_true", help="Simulate and summarize without writing")
+    args = parser.parse_args()
+
+    if not 1 <= args.week <= WEEKS or args.samples < 1:
+        print("❌ Invalid arguments! The week must be 1-18 and --samples at least 1.")
+        sys.exit(1)
+    if not upload_projection_distributions(args.week, args.samples, args.seed, args.max_chunk_mb, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Props Edges
+Compares the week's sportsbook lines (player_lines) with our projections and stores
+every (player, market) edge in player_edges (migration 0008), ranked for the week.
+
+One query unpivots player_lines into (player, market, line) rows, resolves each odds
+name to the player (player_crosswalk, else the same normalization as names.py) and joins
+the player's projection against that week's opponent (player_projections) and, when
+projection_sim.py has run for the week, its P(over line). The rest is one NumPy pass
+over the aligned columns:
+
+    edge = projection - line          side = over when edge >= 0, else under
+    edge_pct = edge / line            implied_probability = 1 / decimal price of the side
+    probability_edge = P(side) from the simulation - implied_probability
+
+Prices are the median across books (player_line_consensus, kept by uploadPlayerLines.py);
+a side with no price is taken at a standard -110 (1.91).
+Edges are ranked by |edge_pct|. Each run replaces the week's edges in one COPY.
+
+Usage:
+    python props_edges.py 7              # edges for week 7
+    python props_edges.py 7 --dry-run    # compute and print the top edges, no write
+"""
+
+import argparse
+import csv
+import io
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import dimensions
+from config import get_current_season
+from local_mirror import connect_db
+from matchups import TEAM_ALIASES, WEEKS
+from names import normalize_name_sql
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+# player_lines column -> stat_key in player_projections, and in player_projection_distributions
+# and player_line_consensus
+MARKETS = (
+    ("projected_passing_attempts", "passing_attempts", "passing_attempts"),
+    ("projected_completions", "passing_completions", "completions"),
+    ("projected_passing_yards", "passing_yards", "passing_yards"),
+    ("projected_passing_tds", "passing_tds", "passing_tds"),
+    ("projected_interceptions", "interceptions", "interceptions"),
+    ("projected_rushing_attempts", "rushing_attempts", "rushing_attempts"),
+    ("projected_rushing_yards", "rushing_yards", "rushing_yards"),
+    ("projected_rushing_tds", "rushing_tds", "rushing_tds"),
+    ("projected_receptions", "receptions", "receptions"),
+    ("projected_receiving_yards", "receiving_yards", "receiving_yards"),
+    ("projected_receiving_tds", "receiving_tds", "receiving_tds"),
+)
+
+# Decimal odds of a standard -110 line, for sides with no consensus price (PlayerProps.csv prices are decimal)
+DEFAULT_PRICE = 1.91
+
+EDGE_COLUMNS = ("season", "week", "player_name", "normalized_name", "position", "team_id", "opponent",
+                "stat_key", "line", "projection", "edge", "edge_pct", "side", "implied_probability",
+                "model_probability", "probability_edge", "rank")
+
+EDGE_QUERY = f"""
+    WITH latest AS (
+        SELECT DISTINCT ON (player_id) player_id, normalized_name, position_id, team_id
+        FROM player_stats
+        WHERE season = %(season)s AND player_id IS NOT NULL
+        ORDER BY player_id, week DESC
+    ),
+    week_games (team_id, opponent) AS (
+        SELECT * FROM unnest(%(teams)s::text[], %(opponents)s::text[])
+    ),
+    lines AS (
+        SELECT pl.player_name,
+               COALESCE(latest.normalized_name, {normalize_name_sql('pl.player_name')}) AS normalized_name,
+               COALESCE(pl.position, latest.position_id) AS position,
+               COALESCE(pl.team_id, latest.team_id) AS team_id,
+               market.stat_key, market.sim_stat_key, market.line
+        FROM player_lines pl
+        LEFT JOIN player_crosswalk cw
+               ON cw.source = 'odds' AND cw.source_name = pl.player_name AND cw.position_id = ''
+        LEFT JOIN latest ON latest.player_id = cw.player_id
+        CROSS JOIN LATERAL (VALUES {", ".join(f"('{stat}', '{sim_stat}', pl.{column})" for column, stat, sim_stat in MARKETS)})
+            AS market (stat_key, sim_stat_key, line)
+        WHERE pl.week = %(week)s AND market.line IS NOT NULL
+    )
+    SELECT DISTINCT ON (lines.player_name, lines.stat_key)
+           lines.player_name, lines.normalized_name, lines.position, lines.team_id, week_games.opponent,
+           lines.stat_key, lines.line, p.projection, d.p_over, c.over_price, c.under_price
+    FROM lines
+    LEFT JOIN week_games ON week_games.team_id = upper(lines.team_id)
+    LEFT JOIN player_projections p
+           ON p.normalized_name = lines.normalized_name AND p.position = lines.position
+          AND p.stat_key = lines.stat_key AND p.opponent = week_games.opponent
+    LEFT JOIN player_projection_distributions d
+           ON d.season = %(season)s AND d.week = %(week)s AND d.normalized_name = lines.normalized_name
+          AND d.position = lines.position AND d.stat_key = lines.sim_stat_key
+    LEFT JOIN player_line_consensus c
+           ON c.season = %(season)s AND c.week = %(week)s AND c.player_name = lines.player_name
+          AND c.stat_key = lines.sim_stat_key
+    ORDER BY lines.player_name, lines.stat_key, p.projection IS NULL, d.p_over IS NULL;
+"""
+
+
+def week_games(cursor, week: int) -> Tuple[List[str], List[str]]:
+    """(team_ids, opponents) playing in `week`, with every schedule spelling of a team (JAX and JAC)."""
+    teams, opponents = [], []
+    for team, opponent in dimensions.matchups(cursor).week(week).items():
+        if opponent is None:
+            continue  # Bye week
+        for spelling in [team] + [alias for alias, canonical in TEAM_ALIASES.items() if canonical == team]:
+            teams.append(spelling)
+            opponents.append(opponent)
+    return teams, opponents
+
+
+def load_aligned(cursor, season: int, week: int) -> Tuple[List[tuple], Dict[str, np.ndarray]]:
+    """
+    [(player_name, normalized_name, position, team_id, opponent, stat_key)] for every line
+    of the week, and the aligned line, projection, p_over and price columns (NaN where missing).
+    """
+    teams, opponents = week_games(cursor, week)
+    cursor.execute(EDGE_QUERY, {"season": season, "week": week, "teams": teams, "opponents": opponents})
+    rows = cursor.fetchall()
+    keys = [row[:6] for row in rows]
+    columns = {
+        name: np.array([np.nan if row[6 + k] is None else float(row[6 + k]) for row in rows], dtype=np.float64)
+        for k, name in enumerate(("line", "projection", "p_over", "over_price", "under_price"))
+    }
+    return keys, columns
+
+
+def compute_edges(line: np.ndarray, projection: np.ndarray, p_over: np.ndarray,
+                  over_price: np.ndarray, under_price: np.ndarray) -> Dict[str, np.ndarray]:
+    """Edge, side, implied/model probabilities and week rank for aligned (player, market) columns."""
+    edge = projection - line
+    over = edge >= 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge_pct = np.where(line > 0, edge / line, np.nan)
+    implied = 1.0 / np.where(over, over_price, under_price)
+    model = np.where(over, p_over, 1.0 - p_over)
+
+    # Largest |edge_pct| first; lines of 0 (no edge_pct) after the rest, by |edge|
+    strength = np.nan_to_num(np.abs(edge_pct), nan=-1.0)
+    order = np.lexsort((-np.abs(edge), -strength))
+    rank = np.empty(len(edge), dtype=np.int64)
+    rank[order] = np.arange(1, len(edge) + 1)
+    return {
+        "edge": edge,
+        "edge_pct": edge_pct,
+        "over": over,
+        "implied_probability": implied,
+        "model_probability": model,
+        "probability_edge": model - implied,
+        "rank": rank,
+    }
+
+
+def _value(x: float, digits: int):
+    return None if np.isnan(x) else round(float(x), digits)
+
+
+def edge_rows(season: int, week: int, keys: List[tuple], columns: Dict[str, np.ndarray],
+              edges: Dict[str, np.ndarray]) -> List[tuple]:
+    rows = []
+    for i in np.argsort(edges["rank"]):
+        player_name, normalized_name, position, team_id, opponent, stat_key = keys[i]
+        rows.append((season, week, player_name, normalized_name, position, team_id, opponent, stat_key,
+                     round(float(columns["line"][i]), 2), round(float(columns["projection"][i]), 2),
+                     round(float(edges["edge"][i]), 2), _value(edges["edge_pct"][i], 4),
+                     "over" if edges["over"][i] else "under", round(float(edges["implied_probability"][i]), 4),
+                     _value(edges["model_probability"][i], 4), _value(edges["probability_edge"][i], 4),
+                     int(edges["rank"][i])))
+    return rows
+
+
+def write_edges(conn, season: int, week: int, rows: List[tuple]):
+    """Replace the week's edges with `rows` in one transaction (bulk COPY)."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM player_edges WHERE season = %s AND week = %s;", (season, week))
+        cursor.copy_expert(f"COPY player_edges ({', '.join(EDGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def upload_edges(week: int, dry_run: bool = False) -> bool:
+    print(f"📐 Computing props edges for week {week} of {CURRENT_SEASON}...")
+    started = time.perf_counter()
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        keys, columns = load_aligned(cursor, CURRENT_SEASON, week)
+        cursor.close()
+        loaded = time.perf_counter()
+
+        # Only lines with a projection against the week's opponent have an edge
+        matched = ~np.isnan(columns["projection"])
+        keys = [key for key, keep in zip(keys, matched) if keep]
+        columns = {name: values[matched] for name, values in columns.items()}
+        over_price = np.where(np.isnan(columns["over_price"]), DEFAULT_PRICE, columns["over_price"])
+        under_price = np.where(np.isnan(columns["under_price"]), DEFAULT_PRICE, columns["under_price"])
+        edges = compute_edges(columns["line"], columns["projection"], columns["p_over"], over_price, under_price)
+        rows = edge_rows(CURRENT_SEASON, week, keys, columns, edges)
+
+        print(f"✅ Matched {len(rows)} of {len(matched)} lines to projections "
+              f"({int(np.count_nonzero(~np.isnan(columns['p_over'])))} with simulated P(over)) in "
+              f"{loaded - started:.2f}s + {time.perf_counter() - loaded:.3f}s")
+        if not rows:
+            print("⚠️ No edges (no lines for the week, or no projections against its opponents)")
+            return False
+        if dry_run:
+            for row in rows[:10]:
+                print(f"   #{row[-1]} {row[2]} {row[7]} {row[12]} {row[8]} (projection {row[9]}, edge {row[10]:+})")
+            return True
+
+        write_edges(conn, CURRENT_SEASON, week, rows)
+        print(f"✅ Stored {len(rows)} edges in player_edges ({time.perf_counter() - started:.2f}s total)")
+        return True
+    except Exception as e:
+        print(f"❌ Error computing props edges: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank the week's sportsbook lines against our projections")
+    parser.add_argument("week", type=int, help="Week of the lines (1-18)")
+    parser.add_argument("--dry-run", action="store_true", help="Compute and print the top edges without writing")
+    args = parser.parse_args()
+
+    if not 1 <= args.week <= WEEKS:
+        print("❌ Invalid week number! Please enter a number between 1 and 18.")
+        sys.exit(1)
+    if not upload_edges(args.week, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Recency Averages
+Exponentially weighted averages per (player, stat) in player_recency_averages
+(migration 0007), one set per half-life in config.RECENCY_HALF_LIVES. A game played k
+weeks before a player's latest one counts 0.5 ^ (k / half_life) as much, so a 2-week
+half-life follows form closely and a 4-week one is steadier. Season averages in
+player_averages weight week 1 the same as last week.
+
+Each row keeps its decayed sum and weight as of the player's last week. When a week lands,
+every player who played it is updated with a constant amount of work, without reading
+their history:
+
+    weighted_sum = weighted_sum * decay + value        decay = 0.5 ^ (weeks since / half_life)
+    weight_total = weight_total * decay + 1
+
+The store has been folded through the latest last_week of its rows. A run for a later
+week folds every week after that one, so a skipped or backfilled week (uploadPlayer.py 5-7)
+is caught up rather than decayed past. Uploading the latest folded week again replaces
+its value instead of adding it twice; an earlier week is refused (use --rebuild).
+Half-lives the store has no rows for yet are replayed from the season's games in
+player_stats, through the week.
+
+Projection and trend scripts read the store instead of season averages when
+STATSX_RECENCY_HALF_LIFE is set (run_all_uploads.py --recency-half-life 2).
+
+Usage:
+    python recency.py 7             # fold week 7 (and any weeks missed before it) into the store
+    python recency.py 7 --rebuild   # replay weeks 1-7 from player_stats
+    python recency.py 7 --dry-run
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+import local_mirror
+from config import RECENCY_HALF_LIVES, get_current_season
+from local_mirror import connect_db
+from matchups import WEEKS
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+# Half-life the projection and trend scripts read; unset means season averages
+RECENCY_ENV = "STATSX_RECENCY_HALF_LIFE"
+
+RECENCY_STATS = (
+    "passing_attempts", "completions", "passing_yards", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_yards", "rushing_tds",
+    "receptions", "receiving_yards", "receiving_tds", "targets",
+)
+
+STORE_COLUMNS = ("season", "player_name", "position_id", "half_life", "stat_key", "normalized_name",
+                 "team_id", "weighted_sum", "weight_total", "last_value", "last_week", "games")
+
+# One (player, stat, half-life) cell as of the player's last game with that stat
+RecencyState = namedtuple("RecencyState", ["weighted_sum", "weight_total", "last_value", "last_week", "games"])
+
+# A player's recency averages as read by the projection and trend scripts
+RecencyAverages = namedtuple("RecencyAverages", ["team_id", "normalized_name", "last_week", "averages"])
+
+# (player_name, position_id, half_life, stat_key)
+StateKey = Tuple[str, str, float, str]
+
+
+def configured_half_life() -> Optional[float]:
+    """The half-life readers should use (STATSX_RECENCY_HALF_LIFE), or None for season averages."""
+    value = os.getenv(RECENCY_ENV)
+    return float(value) if value else None
+
+
+def store_half_lives() -> List[float]:
+    """config.RECENCY_HALF_LIVES plus the half-life readers are configured for, if any."""
+    half_lives = {float(half_life) for half_life in RECENCY_HALF_LIVES}
+    if configured_half_life():
+        half_lives.add(configured_half_life())
+    return sorted(half_lives)
+
+
+def advance(state: Optional[RecencyState], half_life: float, week: int, value: float) -> Optional[RecencyState]:
+    """
+    Fold one game into a cell. A game in the cell's last week replaces that week's value.
+    Returns None for a game earlier than the last week; the player has to be replayed.
+    """
+    if state is None:
+        return RecencyState(value, 1.0, value, week, 1)
+    if week == state.last_week:
+        return state._replace(weighted_sum=state.weighted_sum - state.last_value + value, last_value=value)
+    if week < state.last_week:
+        return None
+    decay = 0.5 ** ((week - state.last_week) / half_life)
+    return RecencyState(state.weighted_sum * decay + value, state.weight_total * decay + 1.0,
+                        value, week, state.games + 1)
+
+
+def load_week(stats_cursor, season: int, first_week: int, last_week: int) -> List[tuple]:
+    """player_stats rows (player_name, position_id, team_id, normalized_name, week, *stats), oldest first."""
+    stats_cursor.execute(f"""
+        SELECT player_name, position_id, team_id, normalized_name, week, {', '.join(RECENCY_STATS)}
+        FROM player_stats
+        WHERE season = %s AND week BETWEEN %s AND %s AND position_id IN ('QB', 'RB', 'WR', 'TE')
+        ORDER BY week;
+    """, (season, first_week, last_week))
+    return stats_cursor.fetchall()
+
+
+def load_states(cursor, season: int, half_lives: Iterable[float]) -> Dict[StateKey, RecencyState]:
+    cursor.execute("""
+        SELECT player_name, position_id, half_life, stat_key,
+               weighted_sum, weight_total, last_value, last_week, games
+        FROM player_recency_averages
+        WHERE season = %s AND half_life = ANY(%s);
+    """, (season, [float(half_life) for half_life in half_lives]))
+    return {
+        (player_name, position_id, float(half_life), stat_key): RecencyState(*state)
+        for player_name, position_id, half_life, stat_key, *state in cursor.fetchall()
+    }
+
+
+def folded_through(states: Dict[StateKey, RecencyState]) -> Dict[float, int]:
+    """half_life -> the latest week folded into the store for it."""
+    weeks = {}
+    for (_, _, half_life, _), state in states.items():
+        weeks[half_life] = max(weeks.get(half_life, 0), state.last_week)
+    return weeks
+
+
+def apply_rows(states: Dict[StateKey, RecencyState], rows: Iterable[tuple], half_lives: Iterable[float]):
+    """
+    Fold game rows into `states` in place. Returns the keys that changed, each player's
+    latest (team_id, normalized_name), and the players a row arrived out of order for.
+    """
+    changed = set()
+    players = {}
+    out_of_order = set()
+    for player_name, position_id, team_id, normalized_name, week, *values in rows:
+        player = (player_name, position_id)
+        players[player] = (team_id, normalized_name)
+        for half_life in half_lives:
+            for stat, value in zip(RECENCY_STATS, values):
+                # NULL stats are skipped, like AVG() in the season averages
+                if value is None:
+                    continue
+                key = (player_name, position_id, half_life, stat)
+                state = advance(states.get(key), half_life, week, float(value))
+                if state is None:
+                    out_of_order.add(player)
+                    continue
+                states[key] = state
+                changed.add(key)
+    return changed, players, out_of_order
+
+
+def store_rows(season: int, states: Dict[StateKey, RecencyState], keys: Iterable[StateKey],
+               players: Dict[Tuple[str, str], Tuple[str, str]]) -> List[tuple]:
+    rows = []
+    for key in sorted(keys):
+        player_name, position_id, half_life, stat = key
+        team_id, normalized_name = players[(player_name, position_id)]
+        rows.append((season, player_name, position_id, half_life, stat, normalized_name, team_id, *states[key]))
+    return rows
+
+
+def write_store(conn, season: int, rows: List[tuple], replace_half_lives: Iterable[float] = ()):
+    """
+    Upsert changed cells in one transaction. Half-lives in `replace_half_lives` are cleared
+    for the season first and bulk-loaded with COPY.
+    """
+    replace_half_lives = [float(half_life) for half_life in replace_half_lives]
+    replaced = [row for row in rows if row[3] in replace_half_lives]
+    upserted = [row for row in rows if row[3] not in replace_half_lives]
+    cursor = conn.cursor()
+    try:
+        if replace_half_lives:
+            cursor.execute("DELETE FROM player_recency_averages WHERE season = %s AND half_life = ANY(%s);",
+                           (season, replace_half_lives))
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(replaced)
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY player_recency_averages ({', '.join(STORE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        if upserted:
+            updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in STORE_COLUMNS[5:])
+            execute_values(cursor, f"""
+                INSERT INTO player_recency_averages ({', '.join(STORE_COLUMNS)}) VALUES %s
+                ON CONFLICT (season, half_life, player_name, position_id, stat_key) DO UPDATE SET
+                    {updates}, updated_at = CURRENT_TIMESTAMP;
+            """, upserted, page_size=len(upserted))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def update_recency(week: int, half_lives: Iterable[float] = None, rebuild: bool = False,
+                   dry_run: bool = False) -> bool:
+    half_lives = [float(half_life) for half_life in half_lives] if half_lives else store_half_lives()
+    print(f"🧮 Updating recency averages for week {week} of {CURRENT_SEASON} "
+          f"(half-lives {', '.join(f'{half_life:g}' for half_life in half_lives)} weeks)...")
+    started = time.perf_counter()
+
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        states = {} if rebuild else load_states(cursor, CURRENT_SEASON, half_lives)
+        cursor.close()
+        stored = folded_through(states)
+        replay = [half_life for half_life in half_lives if half_life not in stored]
+        incremental = [half_life for half_life in half_lives if half_life in stored]
+
+        behind = [half_life for half_life in incremental if week < stored[half_life]]
+        if behind:
+            print(f"❌ Week {week} is before week {max(stored[h] for h in behind)}, already folded in "
+                  f"for half-lives {', '.join(f'{h:g}' for h in behind)}; run with --rebuild to replay it")
+            return False
+        # Weeks after the last one folded, or the last one again to replace its values
+        first_week = {half_life: min(stored[half_life] + 1, week) for half_life in incremental}
+        missed = sorted({w for half_life in incremental for w in range(first_week[half_life], week)})
+        if missed:
+            print(f"🔁 Catching up week{'s' if len(missed) > 1 else ''} {', '.join(map(str, missed))} "
+                  f"missed since the last run")
+
+        # Game logs come from the local mirror when one is available
+        stats_conn = local_mirror.connect_analytics(connect_db)
+        try:
+            stats_cursor = stats_conn.cursor()
+            week_rows = load_week(stats_cursor, CURRENT_SEASON, min(first_week.values(), default=week), week)
+            history = load_week(stats_cursor, CURRENT_SEASON, 1, week) if replay else []
+        finally:
+            stats_conn.close()
+
+        changed, players = set(), {}
+        for half_life in incremental:
+            fold = [row for row in week_rows if row[4] >= first_week[half_life]]
+            half_life_changed, half_life_players, _ = apply_rows(states, fold, [half_life])
+            changed |= half_life_changed
+            players.update(half_life_players)
+        if replay:
+            print(f"🔁 Replaying weeks 1-{week} for half-lives {', '.join(f'{h:g}' for h in replay)}")
+            replay_changed, replay_players, _ = apply_rows(states, history, replay)
+            changed |= replay_changed
+            players.update(replay_players)
+
+        rows = store_rows(CURRENT_SEASON, states, changed, players)
+        print(f"✅ {len(week_rows)} game rows -> {len(rows)} updated cells "
+              f"in {time.perf_counter() - started:.2f}s")
+        if dry_run:
+            for row in rows[:5]:
+                print(f"   {row}")
+            return True
+        if not rows:
+            print(f"⚠️ No player stats for week {week}, nothing to update")
+            return True
+
+        write_store(conn, CURRENT_SEASON, rows, replay)
+        print(f"✅ Stored recency averages ({time.perf_counter() - started:.2f}s total)")
+        return True
+    except Exception as e:
+        print(f"❌ Error updating recency averages: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def load_averages(cursor, season: int, half_life: float) -> Dict[Tuple[str, str], RecencyAverages]:
+    """(player_name, position_id) -> RecencyAverages, with averages keyed by stat. Empty if not stored."""
+    cursor.execute("""
+        SELECT player_name, position_id, team_id, normalized_name, last_week, stat_key, average
+        FROM player_recency_averages
+        WHERE season = %s AND half_life = %s;
+    """, (season, half_life))
+    players = {}
+    for player_name, position_id, team_id, normalized_name, last_week, stat, average in cursor.fetchall():
+        player = players.get((player_name, position_id))
+        if player is None or last_week > player.last_week:
+            # The team comes from the player's most recently updated stat
+            averages = player.averages if player else {}
+            player = players[(player_name, position_id)] = RecencyAverages(team_id, normalized_name, last_week, averages)
+        player.averages[stat] = float(average)
+    return players
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold a week into the exponentially weighted player averages")
+    parser.add_argument("week", type=int, help="Week that just landed in player_stats (1-18); "
+                                                "weeks missed since the last run are folded too")
+    parser.add_argument("--half-lives", type=float, nargs="+", default=None,
+                        help=f"Half-lives in weeks (default: {' '.join(map(str, RECENCY_HALF_LIVES))} "
+                             f"and {RECENCY_ENV} if set)")
+    parser.add_argument("--rebuild", action="store_true", help="Replay the season through the week from player_stats")
+    parser.add_argument("--dry-run", action="store_true", help="Compute and summarize without writing")
+    args = parser.parse_args()
+
+    if not 1 <= args.week <= WEEKS or any(half_life <= 0 for half_life in args.half_lives or ()):
+        print("❌ Invalid arguments! Week must be 1-18 and half-lives positive.")
+        sys.exit(1)
+    if not update_recency(args.week, args.half_lives, args.rebuild, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
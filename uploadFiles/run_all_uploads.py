@@ -7,12 +7,33 @@ Runs all upload scripts in the correct dependency order with easy week configura
 import subprocess
 import sys
 import os
+import tempfile
+import time
+import uuid
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import argparse
 import requests
 import json
-from config import get_current_week, DEFAULT_CONFIG, WEEK_DEPENDENT_SCRIPTS, PHASES
+from config import get_current_week, get_current_season, DEFAULT_CONFIG, SEASON_ENV, WEEK_DEPENDENT_SCRIPTS, PHASES
+from run_metrics import METRICS_FILE_ENV
+from db_trace import TRACE_ENV, TRACE_DIR_ENV, EXPLAIN_TOP_ENV
+from local_mirror import MIRROR_ENV, DEFAULT_MIRROR_PATH, connect_db
+from recency import RECENCY_ENV
+from run_state import RunState
+from async_ingest import ASYNC_SCRIPTS, AsyncRunner
+
+# Every script is launched through run_metrics.py so it reports spans and counters
+METRICS_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_metrics.py")
+REPORTS_DIR = "run_reports"
+HISTORY_FILE = os.path.join(REPORTS_DIR, "history.jsonl")
+
+# Phases whose scans can read the local DuckDB mirror instead of Supabase
+MIRROR_PHASES = ("averages", "projections", "optional", "frontend")
+
+# A stage counts as regressed when it is this much slower than the previous run
+REGRESSION_RATIO = 1.25
+REGRESSION_MIN_SECONDS = 1.0
 
 # Get independent scripts from phases
 INDEPENDENT_SCRIPTS = []
@@ -22,23 +43,67 @@ for phase_info in PHASES.values():
 INDEPENDENT_SCRIPTS = list(set(INDEPENDENT_SCRIPTS) - set(WEEK_DEPENDENT_SCRIPTS.keys()))
 
 class UploadManager:
-    def __init__(self, current_week: int = None, verbose: bool = None):
+    def __init__(self, current_week: int = None, verbose: bool = None, trace_sql: bool = False, explain_top: int = 0,
+                 season: int = None, local_mirror: bool = False, async_ingest: bool = False,
+                 resume: Optional[str] = None, recency_half_life: Optional[float] = None):
         self.current_week = current_week or get_current_week()
+        self.season = season or get_current_season()
         self.verbose = verbose if verbose is not None else DEFAULT_CONFIG['verbose']
         self.failed_scripts = []
         self.successful_scripts = []
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.started_at = datetime.now()
+        self.current_phase = None
+        self.stage_reports = []
+        self.trace_sql = trace_sql
+        self.explain_top = explain_top
+        self.trace_dir = os.path.abspath(os.path.join(REPORTS_DIR, "sql", self.run_id))
+        self.local_mirror = local_mirror
+        self.mirror_ready = False
+        self.async_ingest = async_ingest
+        self.async_runner = None
+        self.recency_half_life = recency_half_life
+        self.run_state = self.open_run_state(resume)
         
     def log(self, message: str, level: str = "INFO"):
         """Log messages with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"[{timestamp}] [{level}] {message}")
+
+    def open_run_state(self, resume: Optional[str]) -> RunState:
+        """Checkpoints for this run; with resume ("latest" or a run id), based on an earlier run's"""
+        previous = None
+        if resume:
+            previous = RunState.latest(self.current_week, self.season, None if resume == "latest" else resume)
+            if previous is None:
+                self.log(f"⚠️ No saved run state for week {self.current_week} to resume, running everything", "WARNING")
+            else:
+                self.log(f"🔁 Resuming run {previous['run_id']}: completed scripts with unchanged outputs are skipped")
+        return RunState(self.current_week, self.season, self.run_id, previous, connect=connect_db)
+
+    @staticmethod
+    def script_path(script_name: str) -> str:
+        return WEEK_DEPENDENT_SCRIPTS.get(script_name, {}).get('script_path', script_name)
+
+    def resume_skip(self, script_name: str) -> bool:
+        """With --resume, skip a script the resumed run completed whose outputs are unchanged"""
+        if not self.run_state.resuming:
+            return False
+        if self.run_state.skip(script_name, self.script_path(script_name)):
+            self.log(f"⏭️ {script_name} completed in run {self.run_state.previous['run_id']}, outputs unchanged - skipping")
+            self.record_stage(script_name, "skipped", 0)
+            self.successful_scripts.append(script_name)
+            return True
+        script, reason = self.run_state.resume_point
+        self.log(f"🔁 Resuming from {script} ({reason})")
+        return False
     
     def update_frontend_week(self, week: int) -> bool:
         """Update the frontend week configuration via API"""
         try:
             # Try to update via API (if Next.js app is running)
             api_url = "http://localhost:3000/api/current-week"
-            payload = {"currentWeek": week}
+            payload = {"currentWeek": week, "season": self.season}
             
             response = requests.post(api_url, json=payload, timeout=5)
             
@@ -70,7 +135,7 @@ class UploadManager:
             config = {
                 "currentWeek": week,
                 "lastUpdated": datetime.now().isoformat() + "Z",
-                "season": "2025"
+                "season": str(self.season)
             }
             
             with open(config_path, 'w') as f:
@@ -83,111 +148,204 @@ class UploadManager:
             self.log(f"❌ Error updating config file: {e}", "ERROR")
             return False
         
+    def record_stage(self, script_name: str, status: str, seconds: float, metrics_path: Optional[str] = None,
+                     metrics: Optional[dict] = None):
+        """Store timing and counters for one script run (from its metrics file, or `metrics`) in the run report"""
+        stage = {
+            "script": script_name,
+            "phase": self.current_phase,
+            "status": status,
+            "seconds": round(seconds, 3),
+            "counters": {},
+            "spans": [],
+        }
+        if metrics_path and os.path.exists(metrics_path):
+            try:
+                with open(metrics_path, 'r', encoding='utf-8') as f:
+                    metrics = json.load(f)
+            except (OSError, ValueError) as e:
+                self.log(f"Could not read metrics for {script_name}: {e}", "WARNING")
+            finally:
+                os.remove(metrics_path)
+        if metrics:
+            stage["counters"] = metrics.get("counters", {})
+            stage["spans"] = metrics.get("spans", [])
+            if metrics.get("sql_trace"):
+                stage["sql_trace"] = metrics["sql_trace"]
+        self.stage_reports.append(stage)
+        if status != "skipped":
+            self.run_state.record(script_name, status, seconds, self.script_path(script_name))
+
     def run_script(self, script_name: str, week: Optional[int] = None) -> bool:
         """Run a single script with proper error handling"""
+        if self.resume_skip(script_name):
+            return True
         self.log(f"Starting {script_name}...")
-        
+        start = time.perf_counter()
+        fd, metrics_path = tempfile.mkstemp(prefix="stage_metrics_", suffix=".json")
+        os.close(fd)
+        env = os.environ.copy()
+        env[METRICS_FILE_ENV] = metrics_path
+        env[SEASON_ENV] = str(self.season)
+        if self.trace_sql:
+            env[TRACE_ENV] = "1"
+            env[TRACE_DIR_ENV] = self.trace_dir
+            env[EXPLAIN_TOP_ENV] = str(self.explain_top)
+        if self.mirror_ready:
+            env[MIRROR_ENV] = DEFAULT_MIRROR_PATH
+        if self.recency_half_life:
+            env[RECENCY_ENV] = f"{self.recency_half_life:g}"
+        success = False
+
         try:
-            # Check if script exists
-            script_path_to_check = script_name
-            if script_name in WEEK_DEPENDENT_SCRIPTS:
-                script_config = WEEK_DEPENDENT_SCRIPTS[script_name]
-                script_path_to_check = script_config.get('script_path', script_name)
-            
-            if not os.path.exists(script_path_to_check):
-                self.log(f"Script {script_path_to_check} not found!", "ERROR")
+            success = self._run_script(script_name, week, env)
+            return success
+        finally:
+            status = "success" if success else "failed"
+            self.record_stage(script_name, status, time.perf_counter() - start, metrics_path)
+
+    def resolve_script(self, script_name: str, week: Optional[int]) -> Optional[Tuple[str, List[str], Optional[str]]]:
+        """Path, arguments and stdin input for a script, or None when it cannot run"""
+        script_config = WEEK_DEPENDENT_SCRIPTS.get(script_name)
+
+        # Check if script exists (get script path: default to script_name, or use custom path)
+        script_path = self.script_path(script_name)
+        if not os.path.exists(script_path):
+            self.log(f"Script {script_path} not found!", "ERROR")
+            return None
+
+        # Run independent scripts normally
+        if script_config is None:
+            return script_path, [], None
+
+        # Handle week-dependent scripts
+        week_to_use = week or self.current_week
+        self.log(f"Running {script_name} with week {week_to_use}")
+
+        # Check for CSV requirement
+        if script_config.get('requires_csv', False):
+            csv_path = script_config.get('csv_path', "my-app/public/PlayerProps.csv")
+            if not os.path.exists(csv_path):
+                self.log(f"Required CSV file not found: {csv_path}", "WARNING")
+                self.log(f"Skipping {script_name} - CSV file required", "WARNING")
+                return None
+
+        # Week as a command line argument, or as input (for current_week and week_input)
+        if script_config.get('week_param') == 'command_line':
+            return script_path, [str(week_to_use)], None
+        return script_path, [], str(week_to_use)
+
+    def report_exit(self, script_name: str, return_code: int, stdout: str, stderr: str) -> bool:
+        if return_code == 0:
+            self.log(f"✅ {script_name} completed successfully")
+            if self.verbose and stdout:
+                print(f"Output: {stdout}")
+            return True
+        self.log(f"❌ {script_name} failed with return code {return_code}", "ERROR")
+        if stderr:
+            self.log(f"Error output: {stderr}", "ERROR")
+        return False
+
+    def _run_script(self, script_name: str, week: Optional[int], env: Dict[str, str]) -> bool:
+        try:
+            launch = self.resolve_script(script_name, week)
+            if launch is None:
                 return False
-                
-            # Handle week-dependent scripts
-            if script_name in WEEK_DEPENDENT_SCRIPTS:
-                week_to_use = week or self.current_week
-                self.log(f"Running {script_name} with week {week_to_use}")
-                
-                # Create input for scripts that require user input
-                script_config = WEEK_DEPENDENT_SCRIPTS[script_name]
-                week_param = script_config.get('week_param')
-                
-                # Get script path (default to script_name, or use custom path)
-                script_path = script_config.get('script_path', script_name)
-                
-                # Check for CSV requirement
-                if script_config.get('requires_csv', False):
-                    csv_path = script_config.get('csv_path', "my-app/public/PlayerProps.csv")
-                    if not os.path.exists(csv_path):
-                        self.log(f"Required CSV file not found: {csv_path}", "WARNING")
-                        self.log(f"Skipping {script_name} - CSV file required", "WARNING")
-                        return False
-                
-                # Handle different week parameter types
-                if week_param == 'command_line':
-                    # Run script with week as command line argument
-                    result = subprocess.run(
-                        [sys.executable, script_path, str(week_to_use)],
-                        capture_output=True,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        env=os.environ.copy()
-                    )
-                    stdout, stderr = result.stdout, result.stderr
-                    return_code = result.returncode
-                else:
-                    # Run script with input (for current_week and week_input)
-                    process = subprocess.Popen(
-                        [sys.executable, script_path],
-                        stdin=subprocess.PIPE,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        encoding='utf-8',
-                        errors='replace',
-                        env=os.environ.copy()
-                    )
-                    
-                    stdout, stderr = process.communicate(input=str(week_to_use))
-                    return_code = process.returncode
-                
-                if return_code == 0:
-                    self.log(f"✅ {script_name} completed successfully")
-                    if self.verbose and stdout:
-                        print(f"Output: {stdout}")
-                    return True
-                else:
-                    self.log(f"❌ {script_name} failed with return code {return_code}", "ERROR")
-                    if stderr:
-                        self.log(f"Error output: {stderr}", "ERROR")
-                    return False
-                    
-            else:
-                # Run independent scripts normally
-                result = subprocess.run(
-                    [sys.executable, script_name],
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    errors='replace',
-                    env=os.environ.copy(),
-                    check=True
-                )
-                
-                self.log(f"✅ {script_name} completed successfully")
-                if self.verbose and result.stdout:
-                    print(f"Output: {result.stdout}")
-                return True
-                
-        except subprocess.CalledProcessError as e:
-            self.log(f"❌ {script_name} failed: {e}", "ERROR")
-            if e.stderr:
-                self.log(f"Error output: {e.stderr}", "ERROR")
-            return False
+            script_path, script_args, stdin_input = launch
+
+            result = subprocess.run(
+                [sys.executable, METRICS_RUNNER, script_path] + script_args,
+                input=stdin_input,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='replace',
+                env=env
+            )
+            return self.report_exit(script_name, result.returncode, result.stdout, result.stderr)
+
         except Exception as e:
             self.log(f"❌ Unexpected error running {script_name}: {e}", "ERROR")
             return False
     
+    def run_scripts(self, scripts: List[str], stop_on_failure: bool = True) -> bool:
+        """Run scripts in order, or the ingest scripts together on one event loop with --async"""
+        if self.async_ingest:
+            # Resumed scripts are skipped in order before the rest run concurrently
+            while scripts and scripts[0] in ASYNC_SCRIPTS and self.resume_skip(scripts[0]):
+                scripts = scripts[1:]
+            concurrent = [script for script in scripts if script in ASYNC_SCRIPTS]
+            if concurrent:
+                if not self.run_async_scripts(concurrent) and stop_on_failure:
+                    return False
+                scripts = [script for script in scripts if script not in ASYNC_SCRIPTS]
+        for script in scripts:
+            if not self.run_script(script):
+                self.failed_scripts.append(script)
+                if stop_on_failure:
+                    self.log(f"Stopping execution due to failure in {script}", "ERROR")
+                    return False
+                self.log(f"⚠️ {script} failed, but continuing with other scripts", "WARNING")
+            else:
+                self.successful_scripts.append(script)
+        return True
+
+    def run_async_scripts(self, scripts: List[str]) -> bool:
+        """Run ingest scripts as coroutines in this process, sharing one HTTP client and DB pool"""
+        self.log(f"⚡ Running {', '.join(scripts)} concurrently (async mode)")
+        # Scripts read the season when they are imported; AsyncRunner re-imports them every run
+        os.environ[SEASON_ENV] = str(self.season)
+        try:
+            if self.async_runner is None:
+                self.async_runner = AsyncRunner()
+            results = self.async_runner.run(scripts, self.current_week)
+        except Exception as e:
+            self.log(f"❌ Async mode failed: {e}", "ERROR")
+            self.failed_scripts.extend(scripts)
+            return False
+
+        for script, (ok, seconds, error, metrics) in results.items():
+            self.record_stage(script, "success" if ok else "failed", seconds, metrics=metrics)
+            if ok:
+                self.log(f"✅ {script} completed successfully ({seconds:.1f}s)")
+                self.successful_scripts.append(script)
+            else:
+                self.log(f"❌ {script} failed: {error}", "ERROR")
+                self.failed_scripts.append(script)
+        return all(ok for ok, _, _, _ in results.values())
+
+    def close_async_runner(self):
+        if self.async_runner is not None:
+            self.async_runner.close()
+            self.async_runner = None
+
+    def sync_local_mirror(self) -> bool:
+        """Bring the local DuckDB mirror up to date; later scripts read from it if this succeeds"""
+        if not self.local_mirror:
+            return False
+        self.log("🦆 Syncing local DuckDB mirror...")
+        previous_phase = self.current_phase
+        self.current_phase = "mirror"
+        try:
+            self.mirror_ready = self.run_script('local_mirror.py')
+        finally:
+            self.current_phase = previous_phase
+        if not self.mirror_ready:
+            self.log("⚠️ Mirror sync failed, calculations will read from Supabase", "WARNING")
+        return self.mirror_ready
+
     def run_all_uploads(self, skip_schedule: bool = True, skip_optional: bool = False) -> bool:
         """Run all upload scripts in the correct order"""
+        try:
+            return self._run_all_uploads(skip_schedule, skip_optional)
+        finally:
+            self.close_async_runner()
+            self.run_state.close()
+            self.write_run_report()
+
+    def _run_all_uploads(self, skip_schedule: bool, skip_optional: bool) -> bool:
         self.log("🚀 Starting NFL Data Upload Process")
-        self.log(f"Current Week: {self.current_week}")
+        self.log(f"Current Week: {self.current_week} (season {self.season})")
         self.log("=" * 60)
         
         # Update frontend week configuration
@@ -200,29 +358,27 @@ class UploadManager:
         # Phase 1: Schedule Management (Foundation)
         if not skip_schedule:
             self.log("📅 Phase 1: Schedule Management")
-            schedule_scripts = ['scrape_nfl_schedule.py', 'uploadMatchup.py']
-            for script in schedule_scripts:
-                if not self.run_script(script):
-                    self.failed_scripts.append(script)
-                    self.log(f"Stopping execution due to failure in {script}", "ERROR")
-                    return False
-                self.successful_scripts.append(script)
+            self.current_phase = "schedule"
+            # scrape_nfl_schedule.py upserts team_schedule itself; uploadMatchup.py is only for a hand-edited CSV
+            schedule_scripts = ['scrape_nfl_schedule.py']
+            if not self.run_scripts(schedule_scripts):
+                return False
         else:
             self.log("⏭️ Skipping schedule management phase (one-time setup)")
         
         # Phase 2: Core Data Upload
         self.log("📊 Phase 2: Core Data Upload")
-        core_scripts = ['uploadPlayerList.py', 'uploadPlayer.py', 'uploadDefense.py']
-        for script in core_scripts:
-            if not self.run_script(script):
-                self.failed_scripts.append(script)
-                self.log(f"Stopping execution due to failure in {script}", "ERROR")
-                return False
-            self.successful_scripts.append(script)
+        self.current_phase = "core"
+        core_scripts = ['uploadPlayerList.py', 'uploadPlayer.py', 'settle_picks.py', 'uploadDefense.py']
+        if not self.run_scripts(core_scripts):
+            return False
+        
+        self.sync_local_mirror()
         
         # Phase 3: Calculated Averages
         self.log("🧮 Phase 3: Calculated Averages")
-        average_scripts = ['uploadPlayerAverages.py', 'uploadDefenseAverage.py', 'uploadAllDefenseAVG.py']
+        self.current_phase = "averages"
+        average_scripts = ['uploadPlayerAverages.py', 'recency.py', 'uploadDefenseAverage.py', 'uploadAllDefenseAVG.py', 'matchup_factors.py']
         for script in average_scripts:
             if not self.run_script(script):
                 self.failed_scripts.append(script)
@@ -232,6 +388,7 @@ class UploadManager:
         
         # Phase 4: Projections & Analysis
         self.log("🔮 Phase 4: Projections & Analysis")
+        self.current_phase = "projections"
         projection_scripts = ['uploadPlayerProjections.py', 'uploadMatchupRank.py']
         for script in projection_scripts:
             if not self.run_script(script):
@@ -243,7 +400,8 @@ class UploadManager:
         # Phase 5: Optional/Weekly Data
         if not skip_optional:
             self.log("📈 Phase 5: Optional/Weekly Data")
-            optional_scripts = ['uploadPlayerLines.py', 'uploadPlayerRecent.py']
+            self.current_phase = "optional"
+            optional_scripts = ['uploadPlayerLines.py', 'props_edges.py', 'uploadPlayerRecent.py']
             for script in optional_scripts:
                 if not self.run_script(script):
                     self.log(f"⚠️ {script} failed, but continuing with other scripts", "WARNING")
@@ -255,6 +413,7 @@ class UploadManager:
         
         # Phase 6: Frontend Data Generation
         self.log("🎯 Phase 6: Frontend Data Generation")
+        self.current_phase = "frontend"
         frontend_scripts = ['generate_weekly_leaders.py', 'generate_hot_cold_players.py', 'generate_players_to_watch.py', 'generate_projections.py']
         for script in frontend_scripts:
             if not self.run_script(script):
@@ -289,15 +448,121 @@ class UploadManager:
         
         phase_info = PHASES[phase]
         self.log(f"🎯 Running {phase} phase: {phase_info['description']}")
+        self.current_phase = phase
         scripts = phase_info['scripts']
         
-        for script in scripts:
-            if not self.run_script(script):
-                self.failed_scripts.append(script)
-                return False
-            self.successful_scripts.append(script)
-        
-        return True
+        try:
+            if phase in MIRROR_PHASES:
+                self.sync_local_mirror()
+            return self.run_scripts(scripts)
+        finally:
+            self.close_async_runner()
+            self.run_state.close()
+            self.write_run_report()
+
+    def load_previous_run(self) -> Optional[Dict]:
+        """Return the most recent entry in the run history, if any"""
+        if not os.path.exists(HISTORY_FILE):
+            return None
+        previous = None
+        with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        previous = json.loads(line)
+                    except ValueError:
+                        continue
+        return previous
+
+    def find_regressions(self, previous: Optional[Dict]) -> List[Dict]:
+        """Compare stage durations with the previous run"""
+        if not previous:
+            return []
+        regressions = []
+        previous_stages = previous.get("stages", {})
+        for stage in self.stage_reports:
+            before = previous_stages.get(stage["script"])
+            if before is None or stage["status"] != "success":
+                continue
+            now = stage["seconds"]
+            if now >= before * REGRESSION_RATIO and now - before >= REGRESSION_MIN_SECONDS:
+                regressions.append({"script": stage["script"], "previous_seconds": before, "seconds": now})
+        return regressions
+
+    def write_run_report(self):
+        """Write the JSON run report, append to the history file and print a summary"""
+        if not self.stage_reports:
+            return
+
+        total_seconds = round(sum(stage["seconds"] for stage in self.stage_reports), 3)
+        totals = {}
+        for stage in self.stage_reports:
+            for name, value in stage["counters"].items():
+                totals[name] = totals.get(name, 0) + value
+
+        previous = self.load_previous_run()
+        regressions = self.find_regressions(previous)
+
+        report = {
+            "run_id": self.run_id,
+            "week": self.current_week,
+            "season": self.season,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "success": not self.failed_scripts,
+            "total_seconds": total_seconds,
+            "totals": totals,
+            "stages": self.stage_reports,
+            "regressions": regressions,
+            "previous_run_id": previous.get("run_id") if previous else None,
+        }
+
+        try:
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            report_path = os.path.join(REPORTS_DIR, f"run_week{self.current_week}_{self.run_id}.json")
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+            history_entry = {
+                "run_id": self.run_id,
+                "week": self.current_week,
+                "started_at": report["started_at"],
+                "success": report["success"],
+                "total_seconds": total_seconds,
+                # Skipped (resumed) stages would look like 0s baselines to the next run
+                "stages": {stage["script"]: stage["seconds"] for stage in self.stage_reports
+                           if stage["status"] != "skipped"},
+            }
+            with open(HISTORY_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(history_entry) + "\n")
+        except OSError as e:
+            self.log(f"❌ Could not write run report: {e}", "ERROR")
+            return
+
+        self.log("=" * 60)
+        self.log(f"⏱️ Time by stage (total {total_seconds:.1f}s):")
+        for stage in sorted(self.stage_reports, key=lambda s: s["seconds"], reverse=True):
+            counters = stage["counters"]
+            share = stage["seconds"] / total_seconds * 100 if total_seconds else 0
+            self.log(
+                f"  {stage['seconds']:8.2f}s {share:5.1f}%  {stage['script']:<32} "
+                f"queries={int(counters.get('db_queries', 0))} "
+                f"rows_read={int(counters.get('rows_read', 0))} "
+                f"rows_written={int(counters.get('rows_written', 0))} "
+                f"http={int(counters.get('http_requests', 0))} "
+                f"kb={counters.get('http_bytes', 0) / 1024:.0f}"
+                + ("" if stage["status"] == "success" else f"  [{stage['status']}]")
+            )
+        for regression in regressions:
+            self.log(
+                f"  🐢 {regression['script']} regressed: {regression['previous_seconds']:.2f}s -> "
+                f"{regression['seconds']:.2f}s (previous run {report['previous_run_id']})",
+                "WARNING"
+            )
+        if self.trace_sql and os.path.isdir(self.trace_dir):
+            self.log(f"🔎 SQL traces and slow-query logs written to {self.trace_dir}")
+        self.log(f"📝 Run report written to {report_path}")
 
 def main():
     # Set UTF-8 encoding for Windows console and environment
@@ -311,6 +576,8 @@ def main():
     parser = argparse.ArgumentParser(description='Unified NFL Data Upload Script')
     parser.add_argument('--week', '-w', type=int, default=None, 
                        help=f'Current NFL week (default: {get_current_week()})')
+    parser.add_argument('--season', '-s', type=int, default=None,
+                       help=f'NFL season to upload and aggregate (default: {get_current_season()})')
     parser.add_argument('--phase', '-p', type=str, 
                        choices=list(PHASES.keys()),
                        help='Run only a specific phase')
@@ -320,8 +587,23 @@ def main():
                        help='Skip optional/weekly data phase')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose output')
+    parser.add_argument('--trace-sql', action='store_true',
+                       help='Trace every SQL statement and write per-script slow-query logs')
+    parser.add_argument('--explain-top', type=int, default=0,
+                       help='With --trace-sql, EXPLAIN the N most expensive statements per script')
+    parser.add_argument('--local-mirror', action='store_true',
+                       help='Sync a local DuckDB copy of the game logs and run the calculation phases against it')
+    parser.add_argument('--async', dest='async_ingest', action='store_true',
+                       help='Run the ingest scripts concurrently on one event loop (needs httpx and psycopg 3)')
+    parser.add_argument('--resume', nargs='?', const='latest', default=None, metavar='RUN_ID',
+                       help="Skip scripts the week's last run (or RUN_ID) completed whose outputs are unchanged")
+    parser.add_argument('--recency-half-life', type=float, default=None, metavar='WEEKS',
+                       help='Project and pick trends from averages weighted toward recent weeks (recency.py)')
     
     args = parser.parse_args()
+    if args.async_ingest and (args.trace_sql or args.explain_top):
+        # The trace hooks psycopg2 cursors; async ingest writes through psycopg 3
+        parser.error("--trace-sql/--explain-top cannot be combined with --async")
     
     # Use provided week or default from config
     week = args.week or get_current_week()
@@ -332,7 +614,10 @@ def main():
         sys.exit(1)
     
     # Create upload manager
-    manager = UploadManager(current_week=week, verbose=args.verbose)
+    manager = UploadManager(current_week=week, verbose=args.verbose,
+                            trace_sql=args.trace_sql, explain_top=args.explain_top, season=args.season,
+                            local_mirror=args.local_mirror, async_ingest=args.async_ingest,
+                            resume=args.resume, recency_half_life=args.recency_half_life)
     
     try:
         if args.phase:
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Stage Instrumentation for the NFL Data Upload System
+Collects spans and counters (rows read/written, HTTP requests, bytes fetched,
+queries issued) while an upload script runs.
+
+UploadManager launches every script through this module:
+    python run_metrics.py uploadPlayer.py [args...]
+which installs the HTTP and database hooks, runs the script as __main__, and
+writes the collected metrics to the JSON file named by STATSX_METRICS_FILE.
+
+With STATSX_SQL_TRACE=1 the per-statement trace from db_trace.py is enabled as
+well and its slow-query log is linked from the metrics file.
+
+Scripts can also add their own spans and counters:
+    import run_metrics
+    with run_metrics.span("scrape"):
+        ...
+    run_metrics.incr("players_unmatched", len(unmatched))
+"""
+
+import contextvars
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+METRICS_FILE_ENV = "STATSX_METRICS_FILE"
+
+READ_VERBS = ("SELECT", "WITH", "SHOW")
+WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "COPY")
+
+
+class StageMetrics:
+    """Spans and counters for a single stage (one script run)."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.spans: List[dict] = []
+        self.extra: Dict[str, object] = {}
+        # Streaming scripts count from their fetch and write threads too
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({"name": name, "seconds": round(time.perf_counter() - start, 4)})
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "seconds": round(time.time() - self.started_at, 4),
+            "counters": dict(sorted(self.counters.items())),
+            "spans": self.spans,
+            **self.extra,
+        }
+
+
+# Process-wide collector; stays cheap and silent when the script runs standalone
+METRICS = StageMetrics()
+
+# Set by stage() for scripts sharing the process concurrently (async_ingest.py); asyncio
+# tasks and asyncio.to_thread() carry it along, so each script counts into its own stage
+_STAGE: "contextvars.ContextVar[StageMetrics]" = contextvars.ContextVar("stage_metrics")
+
+
+def current() -> StageMetrics:
+    return _STAGE.get(METRICS)
+
+
+def incr(name: str, amount: float = 1):
+    current().incr(name, amount)
+
+
+def span(name: str):
+    return current().span(name)
+
+
+@contextmanager
+def stage():
+    """Collect into a fresh StageMetrics for the current context, e.g. one async_ingest.py script."""
+    metrics = StageMetrics()
+    token = _STAGE.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _STAGE.reset(token)
+
+
+def statement_verb(query) -> str:
+    """First SQL keyword of a statement (psycopg2 may hand us bytes)."""
+    if isinstance(query, bytes):
+        query = query[:64].decode("utf-8", errors="replace")
+    elif not isinstance(query, str):
+        query = str(query)[:64]
+    words = query.lstrip(" \n\t(").split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def record_query(query, rowcount: int, seconds: float):
+    """Count one database round trip and the rows it touched."""
+    incr("db_queries")
+    incr("db_seconds", seconds)
+    if rowcount is None or rowcount < 0:
+        return
+    verb = statement_verb(query)
+    if verb in READ_VERBS:
+        incr("rows_read", rowcount)
+    elif verb in WRITE_VERBS:
+        incr("rows_written", rowcount)
+
+
+def _install_http_hook():
+    try:
+        import requests
+    except ImportError:
+        return
+
+    original_send = requests.Session.send
+
+    def send(self, request, **kwargs):
+        response = original_send(self, request, **kwargs)
+        incr("http_requests")
+        # Reading .content here is free: scripts read the full body anyway
+        if not kwargs.get("stream"):
+            incr("http_bytes", len(response.content or b""))
+        return response
+
+    requests.Session.send = send
+
+
+def _install_db_hook():
+    try:
+        import psycopg2
+        import db_trace
+    except ImportError:
+        return
+
+    # One traced cursor serves both the stage counters and the optional SQL trace
+    db_trace.add_listener(record_query)
+    db_trace.install()
+    if db_trace.enabled_from_env():
+        db_trace.TRACE.enabled = True
+
+    traced_connect = psycopg2.connect
+
+    def connect(*args, **kwargs):
+        incr("db_connections")
+        return traced_connect(*args, **kwargs)
+
+    psycopg2.connect = connect
+
+
+def install_hooks():
+    """Patch requests and psycopg2 so every HTTP request and query is counted."""
+    _install_http_hook()
+    _install_db_hook()
+
+
+def write_metrics(path: str, exit_code: int):
+    report = METRICS.to_dict()
+    report["exit_code"] = exit_code
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+def _write_sql_trace():
+    """Write the slow-query log when STATSX_SQL_TRACE is set and link it from the metrics."""
+    db_trace = sys.modules.get("db_trace")
+    if db_trace is None or not db_trace.TRACE.enabled:
+        return
+    try:
+        report_path = db_trace.write_report()
+    except Exception as e:
+        print(f"⚠️ Could not write SQL trace: {e}")
+        return
+    if report_path:
+        METRICS.extra["sql_trace"] = report_path
+
+
+def run_script(script_path: str, script_args: List[str]) -> int:
+    """
+    Run a script as __main__ with fresh metrics (hooks already installed), then write
+    them. pipeline_daemon.py calls this once per script in its long-lived process.
+    """
+    global METRICS
+    METRICS = StageMetrics()
+    saved_argv, saved_path = sys.argv, sys.path[0]
+    sys.argv = [script_path] + script_args
+    # Behave like `python script.py`: the script's own directory comes first on sys.path
+    sys.path[0] = os.path.dirname(os.path.abspath(script_path))
+
+    exit_code = 0
+    try:
+        runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        exit_code = 1
+        raise
+    finally:
+        sys.argv, sys.path[0] = saved_argv, saved_path
+        _write_sql_trace()
+        metrics_path = os.getenv(METRICS_FILE_ENV)
+        if metrics_path:
+            write_metrics(metrics_path, exit_code)
+    return exit_code
+
+
+def run_instrumented(script_path: str, script_args: List[str]) -> int:
+    """Run a script as __main__ with hooks installed, then write its metrics."""
+    install_hooks()
+    return run_script(script_path, script_args)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python run_metrics.py <script.py> [args...]")
+        sys.exit(2)
+    # Run through the importable module so scripts that `import run_metrics`
+    # share this collector instead of getting a fresh copy of it
+    import run_metrics
+    sys.exit(run_metrics.run_instrumented(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,185 @@
+"""
+Run State
+Durable per-script state for an upload run, so a run that fails late can be resumed
+instead of re-scraping everything. After each script, UploadManager records its status,
+a digest of the script's source and a fingerprint of what it wrote. The outputs are
+listed in config.SCRIPT_OUTPUTS: for a file, its sha1; for a table, the write counters
+Postgres keeps for it and each of its season partitions (rows inserted, updated and
+deleted since the statistics were last reset, and the storage file a TRUNCATE replaces).
+Reading them scans nothing, so checkpointing costs the same however many seasons a table
+holds. A backend only publishes its counters when it is idle, at most once a second, so
+connections that outlive a script (pipeline_daemon.py's pool, --async ingest) run
+FLUSH_STATS_QUERY after writing; otherwise a checkpoint could miss the script's own writes
+and every later resume would see its outputs as changed. The state lives in run_reports/state/week<N>_<run_id>.json and is rewritten
+atomically after every script.
+
+`run_all_uploads.py --resume` loads the latest state for the week and season, then
+skips scripts from the start of the pipeline while they are still valid. A script is
+valid if it completed, its source is unchanged, and every output still matches the
+last fingerprint recorded for it. From the first failed or stale script on, everything
+runs again.
+"""
+
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Optional
+
+from config import SCRIPT_OUTPUTS
+
+STATE_DIR = os.path.join("run_reports", "state")
+
+FILE_PREFIX = "file:"
+
+
+def file_digest(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Any write to a table or one of its partitions moves these; a statistics reset or a
+# VACUUM FULL does too, which only costs a script that could have been skipped
+TABLE_FINGERPRINT_QUERY = """
+    SELECT s.relname, pg_relation_filenode(s.relid), s.n_tup_ins, s.n_tup_upd, s.n_tup_del
+    FROM pg_stat_user_tables s
+    WHERE s.relid = %(table)s::regclass
+       OR s.relid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %(table)s::regclass)
+    ORDER BY s.relname;
+"""
+
+
+# Postgres 15+: publish this backend's counters as soon as its transaction ends
+FLUSH_STATS_QUERY = "SELECT pg_stat_force_next_flush();"
+FLUSH_STATS_MIN_VERSION = 150000
+
+
+def table_fingerprint(cursor, table: str) -> str:
+    """Relation count and md5 of the write counters of a table and its partitions."""
+    cursor.execute(TABLE_FINGERPRINT_QUERY, {"table": table})
+    rows = cursor.fetchall()
+    digest = hashlib.md5(";".join(":".join(map(str, row)) for row in rows).encode("utf-8")).hexdigest()
+    return f"{len(rows)}:{digest}"
+
+
+class RunState:
+    """Checkpoints of one run, optionally resuming the checkpoints of an earlier one."""
+
+    def __init__(self, week: int, season: int, run_id: str, previous: Optional[dict] = None,
+                 connect=None):
+        self.path = os.path.join(STATE_DIR, f"week{week}_{run_id}.json")
+        self.previous = previous
+        self.resuming = previous is not None
+        self.resume_point = None
+        self._connect = connect
+        self._conn = None
+        self.data = {
+            "run_id": run_id,
+            "week": week,
+            "season": season,
+            "started_at": datetime.now().isoformat(),
+            "resumed_from": previous["run_id"] if previous else None,
+            "nodes": {},
+            # Last fingerprint recorded for each output, by whichever script wrote it last
+            "outputs": {},
+        }
+
+    @staticmethod
+    def latest(week: int, season: int, run_id: Optional[str] = None) -> Optional[dict]:
+        """State of the given run, or of the most recent run for the week and season."""
+        candidates = []
+        for path in glob.glob(os.path.join(STATE_DIR, f"week{week}_*.json")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if state.get("season") == season and (run_id is None or state.get("run_id") == run_id):
+                candidates.append(state)
+        return max(candidates, key=lambda state: state["started_at"], default=None)
+
+    def _cursor(self):
+        if self._conn is None or self._conn.closed:
+            self._conn = self._connect()
+        return self._conn.cursor()
+
+    def fingerprint(self, output: str) -> Optional[str]:
+        if output.startswith(FILE_PREFIX):
+            return file_digest(output[len(FILE_PREFIX):])
+        try:
+            cursor = self._cursor()
+            try:
+                return table_fingerprint(cursor, output)
+            finally:
+                cursor.close()
+                self._conn.rollback()
+        except Exception as e:
+            print(f"⚠️ Could not fingerprint {output}: {e}")
+            return None
+
+    def save(self):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def record(self, script: str, status: str, seconds: float, script_path: str):
+        """Checkpoint a script that just ran."""
+        node = {
+            "status": status,
+            "seconds": round(seconds, 3),
+            "finished_at": datetime.now().isoformat(),
+            "script_digest": file_digest(script_path),
+            "outputs": {},
+        }
+        if status == "success":
+            for output in SCRIPT_OUTPUTS.get(script, ()):
+                node["outputs"][output] = self.fingerprint(output)
+            self.data["outputs"].update(node["outputs"])
+        self.data["nodes"][script] = node
+        self.save()
+
+    def stale_reason(self, script: str, script_path: str) -> Optional[str]:
+        """Why the resumed run's checkpoint of a script cannot be reused, or None if it can."""
+        node = self.previous["nodes"].get(script)
+        if node is None:
+            return "not run"
+        if node["status"] not in ("success", "skipped"):
+            return node["status"]
+        if node["script_digest"] != file_digest(script_path):
+            return "script changed"
+        for output in node["outputs"]:
+            expected = self.previous["outputs"].get(output)
+            if expected is None or self.fingerprint(output) != expected:
+                return f"{output} changed since"
+        return None
+
+    def skip(self, script: str, script_path: str) -> bool:
+        """
+        While resuming, carry a still-valid checkpoint over and return True. The first
+        script that is not valid ends the resume: it and everything after it run.
+        """
+        if not self.resuming:
+            return False
+        reason = self.stale_reason(script, script_path)
+        if reason is not None:
+            self.resuming = False
+            self.resume_point = (script, reason)
+            return False
+        node = dict(self.previous["nodes"][script], status="skipped")
+        self.data["nodes"][script] = node
+        self.data["outputs"].update({output: self.previous["outputs"][output] for output in node["outputs"]})
+        self.save()
+        return True
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -1,16 +1,29 @@
 #!/usr/bin/env python3
 """
 NFL Schedule Scraper
-Scrapes the 2025 NFL schedule from FantasyData and updates nfl_schedule.csv
+Scrapes the 2025 NFL schedule from FantasyData straight into team_schedule:
+the table is parsed into (team, week, opponent, is_home) records, validated in
+memory and upserted in one statement. nfl_schedule.csv is only written with --csv
+(uploadMatchup.py can still load a hand-edited CSV).
+
+Usage:
+    python scrape_nfl_schedule.py            # scrape, validate, upsert team_schedule
+    python scrape_nfl_schedule.py --csv      # ... and write nfl_schedule.csv
+    python scrape_nfl_schedule.py --dry-run  # scrape and validate only
 """
 
+import argparse
+import asyncio
+import csv
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import re
 import os
+from collections import Counter, namedtuple
 from typing import Dict, List, Tuple
 
+from matchups import TEAM_ALIASES
+
 # Team abbreviation mapping (FantasyData format to your format)
 TEAM_ABBREVIATIONS = {
     'Arizona Cardinals': 'ARI',
@@ -47,78 +60,23 @@ TEAM_ABBREVIATIONS = {
     'Washington Commanders': 'WAS'
 }
 
+SCHEDULE_URL = "https://fantasydata.com/nfl/schedule"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
 def scrape_nfl_schedule() -> Dict[str, List[str]]:
     """
     Scrape NFL schedule from FantasyData website
     Returns a dictionary with team names as keys and weekly opponents as values
     """
-    url = "https://fantasydata.com/nfl/schedule"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     try:
         print("🔄 Fetching NFL schedule from FantasyData...")
-        response = requests.get(url, headers=headers, timeout=30)
+        response = requests.get(SCHEDULE_URL, headers=HEADERS, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Find the schedule table
-        schedule_table = soup.find('table')
-        if not schedule_table:
-            raise Exception("Schedule table not found")
-        
-        # Parse the table rows
-        rows = schedule_table.find_all('tr')
-        schedule_data = {}
-        
-        for row in rows[1:]:  # Skip header row
-            cells = row.find_all(['td', 'th'])
-            if len(cells) < 2:
-                continue
-                
-            # Get team name from first cell
-            team_link = cells[0].find('a')
-            if not team_link:
-                continue
-                
-            team_name = team_link.text.strip()
-            
-            # Skip if not a valid team
-            if team_name not in TEAM_ABBREVIATIONS:
-                continue
-                
-            # Get weekly opponents (columns 1-18)
-            weekly_opponents = []
-            for i in range(1, 19):  # Weeks 1-18
-                if i < len(cells):
-                    cell = cells[i]
-                    
-                    # Get the full cell text content (including @ symbols)
-                    cell_text = cell.get_text(strip=True)
-                    
-                    # Check if there's a link in the cell and extract its text
-                    opponent_link = cell.find('a')
-                    if opponent_link:
-                        # Get the link text, but preserve any @ symbols from the full cell text
-                        link_text = opponent_link.get_text(strip=True)
-                        
-                        # If the cell text contains @ but the link text doesn't, add it
-                        if '@' in cell_text and not link_text.startswith('@'):
-                            cell_text = '@' + link_text
-                        else:
-                            cell_text = link_text
-                    
-                    weekly_opponents.append(cell_text)
-                else:
-                    weekly_opponents.append("")
-            
-            schedule_data[team_name] = weekly_opponents
-            print(f"✅ Parsed schedule for {team_name}")
-        
-        return schedule_data
+        return parse_schedule(response.content)
         
     except requests.RequestException as e:
         print(f"❌ Error fetching schedule: {e}")
@@ -127,6 +85,67 @@ def scrape_nfl_schedule() -> Dict[str, List[str]]:
         print(f"❌ Error parsing schedule: {e}")
         return {}
 
+def parse_schedule(content: bytes) -> Dict[str, List[str]]:
+    """
+    Parse the FantasyData schedule page into team name -> weekly opponents
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    # Find the schedule table
+    schedule_table = soup.find('table')
+    if not schedule_table:
+        raise Exception("Schedule table not found")
+    
+    # Parse the table rows
+    rows = schedule_table.find_all('tr')
+    schedule_data = {}
+    
+    for row in rows[1:]:  # Skip header row
+        cells = row.find_all(['td', 'th'])
+        if len(cells) < 2:
+            continue
+            
+        # Get team name from first cell
+        team_link = cells[0].find('a')
+        if not team_link:
+            continue
+            
+        team_name = team_link.text.strip()
+        
+        # Skip if not a valid team
+        if team_name not in TEAM_ABBREVIATIONS:
+            continue
+            
+        # Get weekly opponents (columns 1-18)
+        weekly_opponents = []
+        for i in range(1, 19):  # Weeks 1-18
+            if i < len(cells):
+                cell = cells[i]
+                
+                # Get the full cell text content (including @ symbols)
+                cell_text = cell.get_text(strip=True)
+                
+                # Check if there's a link in the cell and extract its text
+                opponent_link = cell.find('a')
+                if opponent_link:
+                    # Get the link text, but preserve any @ symbols from the full cell text
+                    link_text = opponent_link.get_text(strip=True)
+                    
+                    # If the cell text contains @ but the link text doesn't, add it
+                    if '@' in cell_text and not link_text.startswith('@'):
+                        cell_text = '@' + link_text
+                    else:
+                        cell_text = link_text
+                
+                weekly_opponents.append(cell_text)
+            else:
+                weekly_opponents.append("")
+        
+        schedule_data[team_name] = weekly_opponents
+        print(f"✅ Parsed schedule for {team_name}")
+    
+    return schedule_data
+
 def parse_opponent(opponent_text: str) -> str:
     """
     Parse opponent text to extract team abbreviation
@@ -151,39 +170,84 @@ def parse_opponent(opponent_text: str) -> str:
     # If not found, return original (might be a new format)
     return opponent
 
-def format_schedule_for_csv(schedule_data: Dict[str, List[str]]) -> pd.DataFrame:
+# One team's game in one week; opponent and is_home are None in its bye week
+ScheduleGame = namedtuple("ScheduleGame", ["team", "week", "opponent", "is_home"])
+
+WEEKS = 18
+
+# FantasyData writes Jacksonville as JAX in the grid; team_schedule keeps it that way
+OPPONENT_ALIASES = TEAM_ALIASES
+
+CSV_PATH = "nfl_schedule.csv"
+
+def schedule_records(schedule_data: Dict[str, List[str]]) -> List[ScheduleGame]:
     """
-    Convert scraped schedule data to DataFrame format matching your CSV structure
+    Convert scraped schedule data (team name -> weekly opponents) into one record per team and week
     """
-    # Create DataFrame with proper structure
-    df_data = {}
-    
+    records = []
     for team_name, weekly_opponents in schedule_data.items():
         team_abbrev = TEAM_ABBREVIATIONS[team_name]
-        formatted_opponents = []
-        
-        for week, opponent in enumerate(weekly_opponents, 1):
-            if week <= 18:  # Only process weeks 1-18
-                formatted_opp = parse_opponent(opponent)
-                formatted_opponents.append(formatted_opp)
-        
-        # Pad with empty strings if needed
-        while len(formatted_opponents) < 18:
-            formatted_opponents.append("")
-            
-        df_data[team_abbrev] = formatted_opponents
-    
-    # Create DataFrame
-    df = pd.DataFrame(df_data).T
-    
-    # Add week columns
-    week_columns = [str(i) for i in range(1, 19)]
-    df.columns = week_columns
-    
-    # Add TEAM column
-    df.insert(0, 'TEAM', df.index)
-    
-    return df
+        for week in range(1, WEEKS + 1):
+            opponent = parse_opponent(weekly_opponents[week - 1] if week <= len(weekly_opponents) else "")
+            if opponent == 'Bye':
+                records.append(ScheduleGame(team_abbrev, week, None, None))
+            else:
+                records.append(ScheduleGame(team_abbrev, week, opponent.lstrip('@'), not opponent.startswith('@')))
+    return sorted(records)
+
+def opponent_id(game: ScheduleGame) -> str:
+    """team_schedule.opponent_id: 'NO' at home, '@NO' away, 'Bye'"""
+    if game.opponent is None:
+        return 'Bye'
+    return game.opponent if game.is_home else '@' + game.opponent
+
+def schedule_rows(records: List[ScheduleGame]) -> List[Tuple[str, int, str]]:
+    """(team_id, week, opponent_id) rows for team_schedule"""
+    return [(game.team, game.week, opponent_id(game)) for game in records]
+
+def validate_schedule(records: List[ScheduleGame]) -> bool:
+    """
+    Validate the scraped schedule before it is written anywhere: every team has all
+    18 weeks, every opponent is a known team, and both sides of each game agree
+    """
+    valid_teams = set(TEAM_ABBREVIATIONS.values())
+    teams_in_schedule = {game.team for game in records}
+    errors = []
+
+    if teams_in_schedule != valid_teams:
+        missing = valid_teams - teams_in_schedule
+        extra = teams_in_schedule - valid_teams
+        if missing:
+            errors.append(f"Missing teams: {sorted(missing)}")
+        if extra:
+            errors.append(f"Extra teams: {sorted(extra)}")
+
+    weeks_per_team = Counter(game.team for game in records)
+    for team, count in sorted(weeks_per_team.items()):
+        if count != WEEKS:
+            errors.append(f"{team} has {count} weeks, expected {WEEKS}")
+
+    games = {(game.team, game.week): game for game in records}
+    for game in records:
+        if game.opponent is None:
+            continue
+        opponent = OPPONENT_ALIASES.get(game.opponent, game.opponent)
+        if opponent not in valid_teams:
+            errors.append(f"{game.team} week {game.week}: unknown opponent {game.opponent!r}")
+            continue
+        other = games.get((opponent, game.week))
+        if (other is None or OPPONENT_ALIASES.get(other.opponent, other.opponent) != game.team
+                or other.is_home == game.is_home):
+            errors.append(f"{game.team} week {game.week}: {opponent_id(game)} does not match {opponent}'s schedule")
+
+    for error in errors[:10]:
+        print(f"❌ {error}")
+    if len(errors) > 10:
+        print(f"❌ ... and {len(errors) - 10} more")
+    if errors:
+        return False
+    print(f"✅ Schedule validation passed ({len(teams_in_schedule)} teams, {len(records)} team-weeks)")
+    return True
 
 def backup_existing_schedule(csv_path: str) -> str:
     """
@@ -191,88 +255,90 @@ def backup_existing_schedule(csv_path: str) -> str:
     """
     if os.path.exists(csv_path):
         backup_path = csv_path.replace('.csv', '_backup.csv')
-        os.rename(csv_path, backup_path)
+        os.replace(csv_path, backup_path)
         print(f"📁 Backed up existing schedule to {backup_path}")
         return backup_path
     return ""
 
-def update_nfl_schedule():
+def write_schedule_csv(records: List[ScheduleGame], csv_path: str = CSV_PATH):
     """
-    Main function to scrape and update the NFL schedule
+    Write the schedule grid (TEAM, 1..18) that uploadMatchup.py reads
+    """
+    backup_existing_schedule(csv_path)
+    grid = {}
+    for game in records:
+        grid.setdefault(game.team, [""] * WEEKS)[game.week - 1] = opponent_id(game)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(['TEAM'] + [str(week) for week in range(1, WEEKS + 1)])
+        for team in sorted(grid):
+            writer.writerow([team] + grid[team])
+    print(f"✅ Wrote {csv_path} ({len(grid)} teams)")
+
+def update_nfl_schedule(schedule_data: Dict[str, List[str]] = None, upload: bool = True,
+                        write_csv: bool = False) -> bool:
+    """
+    Main function to scrape, validate and store the NFL schedule
+    (schedule_data is passed in when it was already fetched, e.g. by main_async)
     """
-    csv_path = "nfl_schedule.csv"
-    
     print("🏈 NFL Schedule Updater")
     print("=" * 50)
     
-    # Backup existing file
-    backup_path = backup_existing_schedule(csv_path)
-    
     # Scrape schedule data
-    schedule_data = scrape_nfl_schedule()
+    if schedule_data is None:
+        schedule_data = scrape_nfl_schedule()
     
     if not schedule_data:
         print("❌ Failed to scrape schedule data")
-        if backup_path:
-            os.rename(backup_path, csv_path)
-            print("🔄 Restored backup file")
         return False
     
-    # Convert to DataFrame
-    df = format_schedule_for_csv(schedule_data)
-    
-    # Sort teams alphabetically by abbreviation
-    df = df.sort_index()
-    
-    # Save to CSV
-    df.to_csv(csv_path, index=False)
-    
-    print(f"✅ Successfully updated {csv_path}")
-    print(f"📊 Updated schedule for {len(df)} teams")
-    
-    # Display first few rows
+    records = schedule_records(schedule_data)
+    if not validate_schedule(records):
+        print("❌ Schedule not stored")
+        return False
+
+    # Display first few weeks
     print("\n📋 Schedule Preview:")
-    print(df.head().to_string(index=False))
+    for game in records[:5]:
+        print(f"   {game.team} week {game.week}: {opponent_id(game)}")
+
+    if write_csv:
+        write_schedule_csv(records)
+
+    if upload:
+        # Imported here so --dry-run and --csv work without database credentials
+        from uploadMatchup import upload_schedule_to_db
+        if not upload_schedule_to_db(schedule_rows(records)):
+            return False
     
+    print(f"📊 Updated schedule for {len({game.team for game in records})} teams")
     return True
 
-def validate_schedule(csv_path: str) -> bool:
+async def main_async(ingest, week):
     """
-    Validate the updated schedule file
+    Coroutine version for async_ingest.py: the page comes through the shared HTTP client
+    and the rows go through the shared database pool
     """
+    from uploadMatchup import UPSERT_QUERY
+    import dimensions
+
+    print("🔄 Fetching NFL schedule from FantasyData...")
+    content = await ingest.get(SCHEDULE_URL, headers=HEADERS)
     try:
-        df = pd.read_csv(csv_path)
-        
-        # Check structure
-        expected_columns = ['TEAM'] + [str(i) for i in range(1, 19)]
-        if list(df.columns) != expected_columns:
-            print(f"❌ Invalid column structure. Expected: {expected_columns}")
-            return False
-        
-        # Check team count
-        if len(df) != 32:
-            print(f"❌ Expected 32 teams, found {len(df)}")
-            return False
-        
-        # Check for valid team abbreviations
-        valid_teams = set(TEAM_ABBREVIATIONS.values())
-        teams_in_file = set(df['TEAM'].values)
-        
-        if teams_in_file != valid_teams:
-            missing = valid_teams - teams_in_file
-            extra = teams_in_file - valid_teams
-            if missing:
-                print(f"❌ Missing teams: {missing}")
-            if extra:
-                print(f"❌ Extra teams: {extra}")
-            return False
-        
-        print("✅ Schedule validation passed")
-        return True
-        
+        schedule_data = await asyncio.to_thread(parse_schedule, content) if content else {}
     except Exception as e:
-        print(f"❌ Validation error: {e}")
-        return False
+        print(f"❌ Error parsing schedule: {e}")
+        schedule_data = {}
+
+    if not schedule_data:
+        raise RuntimeError("NFL Schedule update failed: no schedule data")
+    records = schedule_records(schedule_data)
+    if not validate_schedule(records):
+        raise RuntimeError("NFL Schedule update failed: schedule did not validate")
+
+    written = await ingest.write(batches=[(UPSERT_QUERY, schedule_rows(records))])
+    dimensions.invalidate("schedule")
+    print(f"✅ Upserted {written} team_schedule rows")
 
 if __name__ == "__main__":
     # Set UTF-8 encoding for Windows console
@@ -281,12 +347,16 @@ if __name__ == "__main__":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
         sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    parser = argparse.ArgumentParser(description="Scrape the NFL schedule into team_schedule")
+    parser.add_argument('--csv', action='store_true', help=f'Also write {CSV_PATH}')
+    parser.add_argument('--dry-run', action='store_true', help='Scrape and validate without writing to the database')
+    args = parser.parse_args()
     
-    success = update_nfl_schedule()
+    success = update_nfl_schedule(upload=not args.dry_run, write_csv=args.csv)
     
     if success:
-        # Validate the updated file
-        validate_schedule("nfl_schedule.csv")
         print("\n🎉 NFL Schedule update completed successfully!")
     else:
         print("\n💥 NFL Schedule update failed!")
+        sys.exit(1)
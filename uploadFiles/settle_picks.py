@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Pick Settlement
+Grades the website's over/under picks (picks) once a week's game logs are uploaded.
+Runs after uploadPlayer.py. Nothing in player_stats says whether a game is final (live
+mode writes the same rows mid-game), so run it only once the week's final stats are
+loaded: a pick graded against a game in progress keeps that result until --regrade.
+
+A pick carries a player name, a stat label ("Rushing Yards"), a value and Over/Under,
+and the season and week it was made for, which the website fills in on submit (the week
+after the one the pipeline last loaded, migration 0013). Each open pick for the week
+being settled is resolved to the player's game that week (player_stats.normalized_name,
+with the same normalization as names.py). Picks whose player has no game log yet stay
+open, and settling the week again picks them up. Open picks submitted before picks
+carried a week are never guessed at; the run reports how many are left. One UPDATE
+joins the week's open picks against player_stats and writes normalized_name, actual and
+result (win/loss/push). One upsert then recomputes the season record of every user it
+touched in user_pick_records (migration 0010). The cost is two statements however many
+users submitted picks.
+
+Usage:
+    python settle_picks.py 7              # grade open picks against week 7
+    python settle_picks.py 7 --regrade    # also re-grade week 7's settled picks (stat corrections)
+    python settle_picks.py 7 --dry-run    # grade and summarize, then roll back
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+
+from config import get_current_season
+from local_mirror import connect_db
+from matchups import WEEKS
+from names import normalize_name_sql
+
+# Load environment variables
+load_dotenv('../my-app/.env')
+
+CURRENT_SEASON = get_current_season()
+
+# Stat labels the website offers for picks -> player_stats column
+PICK_STATS = {
+    "rushing attempts": "rushing_attempts",
+    "rushing yards": "rushing_yards",
+    "rushing tds": "rushing_tds",
+    "receptions": "receptions",
+    "receiving yards": "receiving_yards",
+    "receiving tds": "receiving_tds",
+    "passing attempts": "passing_attempts",
+    "completions": "completions",
+    "passing yards": "passing_yards",
+    "passing tds": "passing_tds",
+    "interceptions": "interceptions",
+}
+
+# The pick's stat from its player's game log; NULL for a stat we can't grade
+_ACTUAL = "CASE lower(btrim(p.stat)) {} END".format(
+    " ".join(f"WHEN '{label}' THEN s.{column} WHEN '{column}' THEN s.{column}" for label, column in PICK_STATS.items())
+)
+
+SETTLE_QUERY = f"""
+    WITH graded AS (
+        SELECT DISTINCT ON (p.id) p.id, s.normalized_name, {_ACTUAL} AS actual
+        FROM picks p
+        JOIN player_stats s
+          ON s.season = p.season AND s.week = p.week
+         AND s.normalized_name = {normalize_name_sql('p.player_name')}
+        WHERE p.season = %(season)s AND p.week = %(week)s
+          AND (p.result IS NULL OR %(regrade)s)
+          AND lower(btrim(p.over_under)) IN ('over', 'under')
+          AND {_ACTUAL} IS NOT NULL
+        ORDER BY p.id, s.snaps DESC NULLS LAST
+    )
+    UPDATE picks p
+    SET normalized_name = g.normalized_name,
+        actual = g.actual,
+        result = CASE
+            WHEN g.actual = p.value THEN 'push'
+            WHEN (g.actual > p.value) = (lower(btrim(p.over_under)) = 'over') THEN 'win'
+            ELSE 'loss'
+        END,
+        settled_at = NOW()
+    FROM graded g
+    WHERE p.id = g.id
+    RETURNING p.name, p.result;
+"""
+
+RECORDS_QUERY = """
+    INSERT INTO user_pick_records (season, name, picks, wins, losses, pushes, win_pct, last_week, updated_at)
+    SELECT season,
+           name,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE result = 'win'),
+           COUNT(*) FILTER (WHERE result = 'loss'),
+           COUNT(*) FILTER (WHERE result = 'push'),
+           ROUND(COUNT(*) FILTER (WHERE result = 'win')::numeric
+                 / NULLIF(COUNT(*) FILTER (WHERE result <> 'push'), 0), 4),
+           MAX(week),
+           NOW()
+    FROM picks
+    WHERE season = %(season)s AND name = ANY(%(names)s) AND result IS NOT NULL
+    GROUP BY season, name
+    ON CONFLICT (season, name) DO UPDATE SET
+        picks = EXCLUDED.picks,
+        wins = EXCLUDED.wins,
+        losses = EXCLUDED.losses,
+        pushes = EXCLUDED.pushes,
+        win_pct = EXCLUDED.win_pct,
+        last_week = EXCLUDED.last_week,
+        updated_at = EXCLUDED.updated_at;
+"""
+
+# Open picks, and those among them with no week to grade against
+OPEN_QUERY = """
+    SELECT COUNT(*), COUNT(*) FILTER (WHERE week IS NULL)
+    FROM picks
+    WHERE result IS NULL;
+"""
+
+
+def settle(cursor, season: int, week: int, regrade: bool = False) -> Counter:
+    """Grade the week's picks and refresh the records of their users; result -> count."""
+    cursor.execute(SETTLE_QUERY, {"season": season, "week": week, "regrade": regrade})
+    graded = cursor.fetchall()
+    names = sorted({name for name, _ in graded})
+    if names:
+        cursor.execute(RECORDS_QUERY, {"season": season, "names": names})
+    results = Counter(result for _, result in graded)
+    results["users"] = len(names)
+    return results
+
+
+def settle_picks(week: int, regrade: bool = False, dry_run: bool = False) -> bool:
+    print(f"🎯 Settling picks against week {week} of {CURRENT_SEASON}...")
+    started = time.perf_counter()
+
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        results = settle(cursor, CURRENT_SEASON, week, regrade)
+        cursor.execute(OPEN_QUERY)
+        still_open, no_week = cursor.fetchone()
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+        settled = results["win"] + results["loss"] + results["push"]
+        print(f"✅ {'Would settle' if dry_run else 'Settled'} {settled} picks for {results['users']} users "
+              f"({results['win']}-{results['loss']}-{results['push']}) in {time.perf_counter() - started:.2f}s; "
+              f"{still_open} still open")
+        if no_week:
+            print(f"⚠️ {no_week} open picks have no week (submitted before picks carried one) and won't be graded")
+        return True
+    except Exception as e:
+        print(f"❌ Error settling picks: {e}")
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade user picks against the week's player stats")
+    parser.add_argument("week", type=int, help="Week whose final game logs were just uploaded (1-18); "
+                                                "not a week still being played")
+    parser.add_argument("--regrade", action="store_true", help="Also re-grade picks already settled in this week")
+    parser.add_argument("--dry-run", action="store_true", help="Grade and summarize, then roll back")
+    args = parser.parse_args()
+
+    if not 1 <= args.week <= WEEKS:
+        print("❌ Invalid week number! Please enter a number between 1 and 18.")
+        sys.exit(1)
+    if not settle_picks(args.week, args.regrade, args.dry_run):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Parquet Snapshots
+Exports the game logs, team_schedule and the derived tables to Parquet files, one file
+per (season, week) for the game logs and per week for the schedule, and restores them
+into a database with bulk COPY. Analysis code can open a snapshot memory-mapped through
+Arrow without any database connection:
+
+    import snapshot
+    stats = snapshot.open_table(snapshot.latest_snapshot(), "player_stats", seasons=[2025])
+    df = stats.to_pandas()
+
+Usage:
+    python snapshot.py export                        # everything into snapshots/<timestamp>/
+    python snapshot.py export --season 2025 --out snapshots/2025
+    python snapshot.py restore snapshots/20261019_120000 --dsn "host=localhost dbname=statsx"
+    python snapshot.py restore snapshots/20261019_120000 --dsn "host=localhost dbname=statsx" --season 2024
+    python snapshot.py info snapshots/20261019_120000
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from local_mirror import connect_db, pg_columns
+
+SNAPSHOT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+MANIFEST = "manifest.json"
+
+GAME_LOG_TABLES = ("player_stats", "general_defensive_stats", "qb_defensive_stats")
+SCHEDULE_TABLES = ("team_schedule",)
+DERIVED_TABLES = (
+    "player_list",
+    "player_averages",
+    "defense_averages",
+    "defense_averages_qb",
+    "all_defense_averages",
+    "all_defense_averages_qb",
+    "recent_player_stats",
+    "player_projections",
+    "defensive_matchup_rankings",
+    "hot_players",
+    "cold_players",
+    "players_to_watch",
+    "weekly_leaders",
+)
+SNAPSHOT_TABLES = GAME_LOG_TABLES + SCHEDULE_TABLES + DERIVED_TABLES
+
+ARROW_TYPES = {
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "smallint": pa.int16(),
+    "numeric": pa.float64(),
+    "double precision": pa.float64(),
+    "real": pa.float32(),
+    "boolean": pa.bool_(),
+    "date": pa.date32(),
+    "timestamp without time zone": pa.timestamp("us"),
+    "timestamp with time zone": pa.timestamp("us", tz="UTC"),
+}
+
+_NUMERIC = re.compile(r"numeric\((\d+),(\d+)\)")
+_PARTITION_FILE = re.compile(r"(?:season=(\d+)/)?(?:week=(\d+)\.parquet|data\.parquet)$")
+
+
+def arrow_type(data_type: str) -> pa.DataType:
+    numeric = _NUMERIC.fullmatch(data_type)
+    if numeric:
+        return pa.decimal128(int(numeric.group(1)), int(numeric.group(2)))
+    return ARROW_TYPES.get(data_type, pa.string())
+
+
+def partition_columns(columns: List[List[str]]) -> List[str]:
+    names = {name for name, _ in columns}
+    return [name for name in ("season", "week") if name in names]
+
+
+def partition_file(season: Optional[int], week: Optional[int]) -> str:
+    if week is None:
+        return "data.parquet"
+    path = f"week={week:02d}.parquet"
+    return f"season={season}/{path}" if season is not None else path
+
+
+# =====================================================
+# Export
+# =====================================================
+
+def read_table(pg_cursor, table: str, columns: List[List[str]], seasons: Optional[List[int]] = None) -> pa.Table:
+    """Pull a table out of Postgres with COPY and parse it straight into Arrow."""
+    select = []
+    for name, data_type in columns:
+        # CSV can't carry offsets Arrow understands; export timestamptz as UTC wall time
+        select.append(f"{name} AT TIME ZONE 'UTC' AS {name}" if data_type == "timestamp with time zone" else name)
+    where = pg_cursor.mogrify(" WHERE season = ANY(%s)", (seasons,)).decode() if seasons is not None else ""
+    order = ", ".join(partition_columns(columns) + (["id"] if any(n == "id" for n, _ in columns) else []))
+
+    buffer = io.BytesIO()
+    pg_cursor.copy_expert(
+        f"COPY (SELECT {', '.join(select)} FROM {table}{where}{' ORDER BY ' + order if order else ''}) "
+        f"TO STDOUT WITH (FORMAT csv, HEADER)",
+        buffer,
+    )
+    buffer.seek(0)
+
+    schema = pa.schema([(name, arrow_type(data_type)) for name, data_type in columns])
+    parsed = pa_csv.read_csv(
+        buffer,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={
+                field.name: pa.timestamp("us") if pa.types.is_timestamp(field.type) else field.type
+                for field in schema
+            },
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=False,
+            true_values=["t"],
+            false_values=["f"],
+        ),
+    )
+    return parsed.cast(schema)
+
+
+def split_partitions(data: pa.Table, keys: List[str]) -> Dict[tuple, pa.Table]:
+    """Slice a table (already sorted on `keys`) into one table per partition value."""
+    if not keys or data.num_rows == 0:
+        return {(): data} if not keys else {}
+    values = list(zip(*(data.column(key).to_pylist() for key in keys)))
+    parts, start = {}, 0
+    for i in range(1, len(values) + 1):
+        if i == len(values) or values[i] != values[start]:
+            parts[values[start]] = data.slice(start, i - start)
+            start = i
+    return parts
+
+
+def export_snapshot(pg_conn, out_dir: str, tables: Iterable[str] = SNAPSHOT_TABLES,
+                    seasons: Optional[List[int]] = None) -> dict:
+    """Write `tables` under `out_dir` and return the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {"tables": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    manifest["created_at"] = datetime.now().isoformat(timespec="seconds")
+
+    pg_cursor = pg_conn.cursor()
+    try:
+        for table in tables:
+            start = time.perf_counter()
+            columns = [list(column) for column in pg_columns(pg_cursor, table)]
+            if not columns:
+                print(f"⚠️ {table}: not found, skipped")
+                continue
+            keys = partition_columns(columns)
+            table_seasons = seasons if "season" in keys else None
+            data = read_table(pg_cursor, table, columns, table_seasons)
+
+            # Replace the table's files, or only those of the exported seasons
+            entry = manifest["tables"].get(table) or {"files": {}}
+            replace_all = table_seasons is None or entry.get("columns") != columns
+            for path in list(entry["files"]):
+                if replace_all or _season_of(path) in table_seasons:
+                    del entry["files"][path]
+                    if os.path.exists(os.path.join(out_dir, table, path)):
+                        os.remove(os.path.join(out_dir, table, path))
+            entry.update(columns=columns, partition_by=keys)
+
+            parts = split_partitions(data, keys)
+            for key, part in parts.items():
+                values = dict(zip(keys, key))
+                path = partition_file(values.get("season"), values.get("week"))
+                full_path = os.path.join(out_dir, table, path)
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                pq.write_table(part, full_path, compression="zstd")
+                entry["files"][path] = part.num_rows
+
+            entry["rows"] = sum(entry["files"].values())
+            manifest["tables"][table] = entry
+            print(f"📦 {table}: {data.num_rows} rows, {len(parts)} file(s) "
+                  f"in {time.perf_counter() - start:.2f}s")
+    finally:
+        pg_conn.rollback()
+        pg_cursor.close()
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# =====================================================
+# Offline reads
+# =====================================================
+
+def load_manifest(snapshot_dir: str) -> dict:
+    with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+        return json.load(f)
+
+
+def latest_snapshot(root: str = SNAPSHOT_ROOT) -> str:
+    candidates = sorted(
+        entry.path for entry in os.scandir(root)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, MANIFEST))
+    ) if os.path.isdir(root) else []
+    if not candidates:
+        raise FileNotFoundError(f"No snapshots under {root}")
+    return candidates[-1]
+
+
+def _season_of(path: str) -> Optional[int]:
+    match = _PARTITION_FILE.search(path)
+    return int(match.group(1)) if match and match.group(1) else None
+
+
+def _week_of(path: str) -> Optional[int]:
+    match = _PARTITION_FILE.search(path)
+    return int(match.group(2)) if match and match.group(2) else None
+
+
+def table_files(snapshot_dir: str, table: str, seasons: Optional[Iterable[int]] = None,
+                weeks: Optional[Iterable[int]] = None) -> List[str]:
+    """Files of `table` in the snapshot, pruned by season and week from their paths."""
+    entry = load_manifest(snapshot_dir)["tables"].get(table)
+    if entry is None:
+        raise KeyError(f"{table} is not in snapshot {snapshot_dir}")
+    seasons = set(seasons) if seasons is not None else None
+    weeks = set(weeks) if weeks is not None else None
+    files = []
+    for path in sorted(entry["files"]):
+        season, week = _season_of(path), _week_of(path)
+        if seasons is not None and season is not None and season not in seasons:
+            continue
+        if weeks is not None and week is not None and week not in weeks:
+            continue
+        files.append(os.path.join(snapshot_dir, table, path))
+    return files
+
+
+def open_table(snapshot_dir: str, table: str, seasons: Optional[Iterable[int]] = None,
+               weeks: Optional[Iterable[int]] = None, columns: Optional[List[str]] = None) -> pa.Table:
+    """Read a snapshot table memory-mapped into one Arrow table; no database involved."""
+    entry = load_manifest(snapshot_dir)["tables"][table]
+    schema = pa.schema([(name, arrow_type(data_type)) for name, data_type in entry["columns"]])
+    if columns is not None:
+        schema = pa.schema([schema.field(name) for name in columns])
+    parts = [pq.read_table(path, columns=columns, memory_map=True)
+             for path in table_files(snapshot_dir, table, seasons, weeks)]
+    return pa.concat_tables(parts) if parts else schema.empty_table()
+
+
+# =====================================================
+# Restore
+# =====================================================
+
+def copy_into_table(pg_cursor, table: str, data: pa.Table) -> int:
+    """Bulk load an Arrow table with a single COPY."""
+    if data.num_rows == 0:
+        return 0
+    buffer = io.BytesIO()
+    pa_csv.write_csv(data, buffer)
+    buffer.seek(0)
+    pg_cursor.copy_expert(
+        f"COPY {table} ({', '.join(data.column_names)}) FROM STDIN WITH (FORMAT csv, HEADER)", buffer
+    )
+    return data.num_rows
+
+
+def reset_sequences(pg_cursor, table: str, columns: List[str]):
+    """Move serial sequences past the restored ids so later inserts don't collide."""
+    for column in columns:
+        pg_cursor.execute("SELECT pg_get_serial_sequence(%s, %s);", (table, column))
+        sequence = pg_cursor.fetchone()[0]
+        if sequence:
+            pg_cursor.execute(
+                f"SELECT setval(%s, COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false);",
+                (sequence,),
+            )
+
+
+def restore_snapshot(pg_conn, snapshot_dir: str, tables: Optional[Iterable[str]] = None,
+                     seasons: Optional[List[int]] = None) -> int:
+    """
+    Load a snapshot into the database in one transaction. Season-partitioned tables replace
+    only the seasons being restored; every other table is truncated and reloaded. With
+    `seasons` and no explicit `tables`, only the season-partitioned tables are restored.
+    Tables, and seasons of a table, with no files in the snapshot are left untouched.
+    """
+    manifest = load_manifest(snapshot_dir)
+    if tables is None:
+        tables = [
+            table for table in SNAPSHOT_TABLES
+            if table in manifest["tables"]
+            and (seasons is None or "season" in manifest["tables"][table]["partition_by"])
+        ]
+
+    pg_cursor = pg_conn.cursor()
+    restored = 0
+    try:
+        # Export wrote timestamptz columns as UTC wall time; read them back as UTC
+        pg_cursor.execute("SET LOCAL TIME ZONE 'UTC';")
+        for table in tables:
+            start = time.perf_counter()
+            entry = manifest["tables"].get(table)
+            if not entry or not entry["files"]:
+                print(f"⚠️ {table}: no files in the snapshot, left as is")
+                continue
+
+            if "season" in entry["partition_by"]:
+                # Only the requested seasons the snapshot actually holds
+                restore_seasons = sorted(
+                    season for season in {_season_of(path) for path in entry["files"]}
+                    if seasons is None or season in seasons
+                )
+                if not restore_seasons:
+                    print(f"⚠️ {table}: no files for season(s) {', '.join(map(str, seasons))}, left as is")
+                    continue
+                data = open_table(snapshot_dir, table, seasons=restore_seasons)
+                for season in restore_seasons:
+                    pg_cursor.execute("SELECT create_season_partitions(%s);", (season,))
+                pg_cursor.execute(f"DELETE FROM {table} WHERE season = ANY(%s);", (restore_seasons,))
+            else:
+                data = open_table(snapshot_dir, table)
+                pg_cursor.execute(f"TRUNCATE {table};")
+
+            restored += copy_into_table(pg_cursor, table, data)
+            reset_sequences(pg_cursor, table, data.column_names)
+            print(f"📥 {table}: {data.num_rows} rows in {time.perf_counter() - start:.2f}s")
+        pg_cursor.execute("ANALYZE;")
+        pg_conn.commit()
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        pg_cursor.close()
+    return restored
+
+
+def print_info(snapshot_dir: str):
+    manifest = load_manifest(snapshot_dir)
+    print(f"Snapshot {snapshot_dir} (created {manifest.get('created_at')})")
+    for table, entry in sorted(manifest["tables"].items()):
+        seasons = sorted({s for s in (_season_of(path) for path in entry["files"]) if s is not None})
+        span = f" seasons {seasons[0]}-{seasons[-1]}" if seasons else ""
+        print(f"  {table:<28} {entry['rows']:>9} rows  {len(entry['files']):>4} file(s){span}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and restore Parquet snapshots of the StatsX tables")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write a snapshot")
+    export.add_argument("--out", default=None, help="Snapshot directory (default: snapshots/<timestamp>)")
+    export.add_argument("--tables", nargs="+", default=list(SNAPSHOT_TABLES), choices=SNAPSHOT_TABLES)
+    export.add_argument("--season", type=int, nargs="+", default=None,
+                        help="Only these seasons of the game logs (replaced in an existing snapshot)")
+    export.add_argument("--dsn", default=None, help="Export from this database instead of Supabase (read-only)")
+
+    restore = sub.add_parser("restore", help="Load a snapshot into a database")
+    restore.add_argument("snapshot", help="Snapshot directory")
+    restore.add_argument("--tables", nargs="+", default=None, choices=SNAPSHOT_TABLES)
+    restore.add_argument("--season", type=int, nargs="+", default=None, help="Only these seasons of the game logs")
+    # Restore truncates tables, so it never defaults to the production database
+    restore.add_argument("--dsn", required=True, help="Database to restore into")
+
+    info = sub.add_parser("info", help="Summarise a snapshot")
+    info.add_argument("snapshot", nargs="?", default=None, help="Snapshot directory (default: latest)")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print_info(args.snapshot or latest_snapshot())
+        return
+
+    start = time.perf_counter()
+    conn = psycopg2.connect(args.dsn) if args.dsn else connect_db()
+    try:
+        if args.command == "export":
+            conn.set_session(readonly=True)
+            out_dir = args.out or os.path.join(SNAPSHOT_ROOT, datetime.now().strftime("%Y%m%d_%H%M%S"))
+            manifest = export_snapshot(conn, out_dir, args.tables, args.season)
+            rows = sum(manifest["tables"][table]["rows"] for table in args.tables if table in manifest["tables"])
+            print(f"✅ Snapshot {out_dir} written in {time.perf_counter() - start:.1f}s ({rows} rows)")
+        else:
+            rows = restore_snapshot(conn, args.snapshot, args.tables, args.season)
+            print(f"✅ Restored {rows} rows from {args.snapshot} in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Set UTF-8 encoding for Windows console
+    if sys.platform == "win32":
+        import codecs
+        sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
+        sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
+
+    main()
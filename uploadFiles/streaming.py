@@ -0,0 +1,119 @@
+"""
+Streaming Stages
+Small building blocks for upload scripts that process data as it arrives instead of
+materializing each step as a full list. Stages are plain generators chained together;
+prefetch() and WriteBehind move one end of the chain onto a background thread,
+connected by a bounded queue. A full queue blocks the faster side (backpressure), so
+memory stays flat however many pages or rows go through.
+
+    pages = prefetch(fetch_pages(weeks), maxsize=4)          # network on a thread
+    rows = (row for page in pages for row in parse(page))     # parse as pages arrive
+    with WriteBehind(write_batch, maxsize=2) as sink:        # DB writes on a thread
+        for batch in batched(rows, 500):
+            sink.put(batch)
+"""
+
+import queue
+import threading
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, TypeVar
+
+T = TypeVar("T")
+
+# Marks the end of a queue; exceptions are passed through the queue as themselves
+_DONE = object()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group a stream into lists of at most `size` items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Run an iterable on a background thread, at most `maxsize` items ahead of the
+    consumer. An exception in the producer is raised in the consumer.
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        buffer.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put(_DONE)
+        except BaseException as e:
+            buffer.put(_Failure(e))
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # Consumer finished early or failed: let the producer exit instead of blocking
+        stop.set()
+
+
+class WriteBehind:
+    """
+    Context manager that hands items to `write` on a background thread. put() blocks
+    while `maxsize` items are waiting. The first error from `write` stops the writer
+    and is raised from the next put() or on exit.
+    """
+
+    def __init__(self, write: Callable[[T], None], maxsize: int):
+        self._write = write
+        self._buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+
+    def _run(self):
+        while True:
+            item = self._buffer.get()
+            if item is _DONE:
+                return
+            if self._error is not None:
+                continue  # drain so put() never blocks on a dead writer
+            try:
+                self._write(item)
+            except BaseException as e:
+                self._error = e
+
+    def put(self, item: T):
+        if self._error is not None:
+            raise self._error
+        self._buffer.put(item)
+
+    def __enter__(self) -> "WriteBehind":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._buffer.put(_DONE)
+        self._thread.join()
+        if exc_type is None and self._error is not None:
+            raise self._error
+        return False
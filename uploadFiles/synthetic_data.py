@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Synthetic NFL Data Generator
+Builds multi-season data matching database_schema.sql and migrations/ so the
+upload pipeline can be benchmarked without scraping CBS Sports or calling SportsData.
+"""
+
+import csv
+import io
+import random
+from typing import Dict, List, Tuple
+
+from config import get_current_season
+from names import normalize_name
+from scrape_nfl_schedule import TEAM_ABBREVIATIONS
+
+WEEKS_PER_SEASON = 18
+TEAMS = sorted(TEAM_ABBREVIATIONS.values())
+
+# Players rostered per team and position (roughly a real active game-day depth chart)
+ROSTER_SIZES = {"QB": 2, "RB": 3, "WR": 5, "TE": 2}
+
+# Chance that a rostered player is still with the team next season
+RETENTION_RATE = 0.8
+
+FIRST_NAMES = [
+    "Aaron", "Brandon", "Caleb", "Darius", "Elijah", "Franklin", "Garrett", "Hunter",
+    "Isaiah", "Jalen", "Keenan", "Lamar", "Marcus", "Nico", "Omar", "Patrick",
+    "Quentin", "Rashod", "Stefon", "Tyreek", "Umar", "Vance", "Wyatt", "Xavier",
+    "Yusuf", "Zach", "DeAndre", "Ja'Marr", "D.J.", "Amon-Ra", "CeeDee", "Kyler",
+]
+LAST_NAMES = [
+    "Adams", "Brown", "Carter", "Davis", "Evans", "Fields", "Green", "Harris",
+    "Irving", "Jackson", "Kelce", "Lockett", "Moore", "Nabers", "Olave", "Pitts",
+    "Quinn", "Robinson", "Smith", "Taylor", "Usher", "Vaughn", "Williams", "Young",
+    "St. Brown", "O'Connell", "Walker III", "Pittman Jr.", "Henry", "Mixon", "Hill", "Allen",
+]
+
+# Per-game means for a starter-level player; depth chart slots scale these down
+POSITION_PROFILES = {
+    "QB": {"passing_attempts": 34, "completion_rate": 0.65, "yards_per_attempt": 7.1,
+           "passing_td_rate": 0.045, "interception_rate": 0.024,
+           "rushing_attempts": 4, "yards_per_carry": 4.5, "rushing_td_rate": 0.04},
+    "RB": {"rushing_attempts": 15, "yards_per_carry": 4.3, "rushing_td_rate": 0.035,
+           "targets": 4, "catch_rate": 0.78, "yards_per_catch": 7.5, "receiving_td_rate": 0.03},
+    "WR": {"targets": 7.5, "catch_rate": 0.64, "yards_per_catch": 12.8, "receiving_td_rate": 0.08,
+           "rushing_attempts": 0.4, "yards_per_carry": 7.0, "rushing_td_rate": 0.02},
+    "TE": {"targets": 5, "catch_rate": 0.7, "yards_per_catch": 10.5, "receiving_td_rate": 0.07,
+           "rushing_attempts": 0.1, "yards_per_carry": 4.0, "rushing_td_rate": 0.01},
+}
+DEPTH_SHARES = {
+    "QB": [1.0, 0.05],
+    "RB": [1.0, 0.45, 0.15],
+    "WR": [1.0, 0.8, 0.55, 0.25, 0.1],
+    "TE": [1.0, 0.3],
+}
+
+PLAYER_STATS_COLUMNS = [
+    "season", "player_name", "normalized_name", "position_id", "team_id", "week", "matchup", "fpts",
+    "completions", "passing_attempts", "passing_yards", "passing_tds", "interceptions",
+    "rushing_attempts", "rushing_yards", "rushing_tds", "receptions", "receiving_yards",
+    "receiving_tds", "targets", "snaps", "opponent",
+]
+GENERAL_DEFENSE_COLUMNS = [
+    "season", "team_id", "position_id", "week", "matchup", "rushing_attempts", "total_rushing_yards",
+    "avg_yards_per_carry", "rushing_tds", "targets", "receptions", "total_receiving_yards",
+    "avg_yards_per_catch", "receiving_tds",
+]
+QB_DEFENSE_COLUMNS = [
+    "season", "team_id", "week", "matchup", "passing_attempts", "completions", "passing_yards",
+    "passing_tds", "interceptions", "rate", "rushing_attempts", "rushing_yards",
+    "avg_rushing_yards", "rushing_tds",
+]
+SCHEDULE_COLUMNS = ["team_id", "week", "opponent_id"]
+
+
+def generate_season_schedule(rng: random.Random) -> Dict[int, Dict[str, str]]:
+    """
+    Build an 18-week schedule: every team plays 17 games and has one bye in weeks 5-14.
+    Returns {week: {team: opponent}} where away opponents are prefixed with '@' and
+    byes are stored as 'Bye', matching nfl_schedule.csv.
+    """
+    teams = TEAMS[:]
+    rng.shuffle(teams)
+    bye_pairs = [teams[i:i + 2] for i in range(0, len(teams), 2)]
+    byes = {}
+    for slot, pair in enumerate(bye_pairs):
+        for team in pair:
+            byes[team] = 5 + slot % 10
+
+    schedule = {}
+    for week in range(1, WEEKS_PER_SEASON + 1):
+        playing = [team for team in TEAMS if byes[team] != week]
+        rng.shuffle(playing)
+        week_games = {}
+        for home, away in zip(playing[::2], playing[1::2]):
+            week_games[home] = away
+            week_games[away] = "@" + home
+        for team, bye_week in byes.items():
+            if bye_week == week:
+                week_games[team] = "Bye"
+        schedule[week] = week_games
+    return schedule
+
+
+def _random_name(rng: random.Random, taken: set) -> str:
+    while True:
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if name not in taken:
+            taken.add(name)
+            return name
+        # Name pool is finite; disambiguate the way real rosters do
+        suffixed = f"{name} {rng.randint(2, 99)}"
+        if suffixed not in taken:
+            taken.add(suffixed)
+            return suffixed
+
+
+def generate_rosters(rng: random.Random, previous: Dict[Tuple[str, str], List[dict]] = None,
+                     taken_names: set = None) -> Dict[Tuple[str, str], List[dict]]:
+    """
+    Create {(team, position): [player, ...]} ordered by depth chart.
+    When a previous season's rosters are given, most players carry over.
+    """
+    taken_names = taken_names if taken_names is not None else set()
+    rosters = {}
+    for team in TEAMS:
+        for position, size in ROSTER_SIZES.items():
+            carried = []
+            if previous:
+                carried = [p for p in previous[(team, position)] if rng.random() < RETENTION_RATE]
+            players = carried[:size]
+            while len(players) < size:
+                players.append({
+                    "player_name": _random_name(rng, taken_names),
+                    "talent": max(0.5, rng.gauss(1.0, 0.18)),
+                })
+            rng.shuffle(players)
+            players.sort(key=lambda p: p["talent"], reverse=True)
+            rosters[(team, position)] = players
+    return rosters
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    """Non-negative integer draw with roughly Poisson spread."""
+    if mean <= 0:
+        return 0
+    return max(0, int(round(rng.gauss(mean, mean ** 0.5))))
+
+
+def simulate_player_game(rng: random.Random, position: str, share: float) -> Dict[str, int]:
+    """Draw one game's box score for a player given their share of a starter's usage."""
+    profile = POSITION_PROFILES[position]
+    stats = {
+        "completions": 0, "passing_attempts": 0, "passing_yards": 0, "passing_tds": 0,
+        "interceptions": 0, "rushing_attempts": 0, "rushing_yards": 0, "rushing_tds": 0,
+        "receptions": 0, "receiving_yards": 0, "receiving_tds": 0, "targets": 0,
+    }
+    if position == "QB":
+        attempts = _count(rng, profile["passing_attempts"] * share)
+        completions = sum(1 for _ in range(attempts) if rng.random() < profile["completion_rate"])
+        stats["passing_attempts"] = attempts
+        stats["completions"] = completions
+        stats["passing_yards"] = max(0, int(rng.gauss(attempts * profile["yards_per_attempt"], 35 * share)))
+        stats["passing_tds"] = _count(rng, attempts * profile["passing_td_rate"])
+        stats["interceptions"] = _count(rng, attempts * profile["interception_rate"])
+    if "targets" in profile:
+        targets = _count(rng, profile["targets"] * share)
+        receptions = sum(1 for _ in range(targets) if rng.random() < profile["catch_rate"])
+        stats["targets"] = targets
+        stats["receptions"] = receptions
+        stats["receiving_yards"] = max(0, int(rng.gauss(receptions * profile["yards_per_catch"], 4 * receptions ** 0.5)))
+        stats["receiving_tds"] = _count(rng, receptions * profile["receiving_td_rate"])
+    carries = _count(rng, profile["rushing_attempts"] * share)
+    stats["rushing_attempts"] = carries
+    stats["rushing_yards"] = int(rng.gauss(carries * profile["yards_per_carry"], 3 * carries ** 0.5))
+    stats["rushing_tds"] = _count(rng, carries * profile["rushing_td_rate"])
+    return stats
+
+
+def fantasy_points(stats: Dict[str, int]) -> int:
+    """Standard scoring, rounded the way CBS displays FPTS."""
+    points = (
+        stats["passing_yards"] / 25 + stats["passing_tds"] * 4 - stats["interceptions"] * 2
+        + stats["rushing_yards"] / 10 + stats["rushing_tds"] * 6
+        + stats["receiving_yards"] / 10 + stats["receiving_tds"] * 6
+    )
+    return int(round(points))
+
+
+def generate_dataset(seasons: int, seed: int = 2025, last_season: int = None) -> Dict[str, List[tuple]]:
+    """
+    Generate `seasons` seasons of player and defensive game logs ending with
+    `last_season` (default: the configured current season). team_schedule has no
+    season column, so only the newest season's schedule is returned.
+    Returns rows keyed by table name, with columns in the *_COLUMNS order above.
+    """
+    last_season = last_season or get_current_season()
+    rng = random.Random(seed)
+    player_rows = []
+    general_defense_rows = []
+    qb_defense_rows = []
+    schedule_rows = []
+
+    taken_names = set()
+    rosters = None
+    for season in range(last_season - seasons + 1, last_season + 1):
+        rosters = generate_rosters(rng, rosters, taken_names)
+        schedule = generate_season_schedule(rng)
+
+        for week in range(1, WEEKS_PER_SEASON + 1):
+            # Totals allowed by each defense, keyed by (defense team, position)
+            allowed = {}
+
+            for team in TEAMS:
+                opponent_text = schedule[week][team]
+                if season == last_season:
+                    schedule_rows.append((team, week, opponent_text))
+                if opponent_text == "Bye":
+                    continue
+                opponent = opponent_text.lstrip("@")
+
+                for position in ROSTER_SIZES:
+                    for depth, player in enumerate(rosters[(team, position)]):
+                        share = DEPTH_SHARES[position][depth] * player["talent"]
+                        # Injuries and inactives: a few percent of games are missed
+                        if rng.random() < 0.06:
+                            continue
+                        stats = simulate_player_game(rng, position, share)
+                        name = player["player_name"]
+                        player_rows.append((
+                            season, name, normalize_name(name),
+                            position, team, week, opponent_text, fantasy_points(stats),
+                            stats["completions"], stats["passing_attempts"], stats["passing_yards"],
+                            stats["passing_tds"], stats["interceptions"], stats["rushing_attempts"],
+                            stats["rushing_yards"], stats["rushing_tds"], stats["receptions"],
+                            stats["receiving_yards"], stats["receiving_tds"], stats["targets"],
+                            1, opponent,
+                        ))
+                        totals = allowed.setdefault((opponent, position), {"matchup": team})
+                        for stat_name, value in stats.items():
+                            totals[stat_name] = totals.get(stat_name, 0) + value
+
+            for (defense, position), totals in allowed.items():
+                if position == "QB":
+                    attempts = totals.get("passing_attempts", 0)
+                    completions = totals.get("completions", 0)
+                    carries = totals.get("rushing_attempts", 0)
+                    rate = round(min(158.3, 100 * completions / attempts), 2) if attempts else 0
+                    qb_defense_rows.append((
+                        season, defense, week, totals["matchup"], attempts, completions,
+                        totals.get("passing_yards", 0), totals.get("passing_tds", 0),
+                        totals.get("interceptions", 0), rate, carries,
+                        totals.get("rushing_yards", 0),
+                        round(totals.get("rushing_yards", 0) / carries, 2) if carries else 0,
+                        totals.get("rushing_tds", 0),
+                    ))
+                else:
+                    carries = totals.get("rushing_attempts", 0)
+                    receptions = totals.get("receptions", 0)
+                    general_defense_rows.append((
+                        season, defense, position, week, totals["matchup"], carries,
+                        totals.get("rushing_yards", 0),
+                        round(totals.get("rushing_yards", 0) / carries, 2) if carries else 0,
+                        totals.get("rushing_tds", 0), totals.get("targets", 0), receptions,
+                        totals.get("receiving_yards", 0),
+                        round(totals.get("receiving_yards", 0) / receptions, 2) if receptions else 0,
+                        totals.get("receiving_tds", 0),
+                    ))
+
+    return {
+        "player_stats": player_rows,
+        "general_defensive_stats": general_defense_rows,
+        "qb_defensive_stats": qb_defense_rows,
+        "team_schedule": schedule_rows,
+    }
+
+
+TABLE_COLUMNS = {
+    "player_stats": PLAYER_STATS_COLUMNS,
+    "general_defensive_stats": GENERAL_DEFENSE_COLUMNS,
+    "qb_defensive_stats": QB_DEFENSE_COLUMNS,
+    "team_schedule": SCHEDULE_COLUMNS,
+}
+
+
+def copy_rows(cursor, table: str, rows: List[tuple]):
+    """Bulk load rows with COPY, which is far faster than INSERTs at benchmark scale."""
+    columns = TABLE_COLUMNS[table]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def load_dataset(conn, dataset: Dict[str, List[tuple]]):
+    """Load a generated dataset into a database created from database_schema.sql and migrated."""
+    cursor = conn.cursor()
+    for season in sorted({row[0] for row in dataset["player_stats"]}):
+        cursor.execute("SELECT create_season_partitions(%s);", (season,))
+    for table in ("team_schedule", "player_stats", "general_defensive_stats", "qb_defensive_stats"):
+        copy_rows(cursor, table, dataset[table])
+        print(f"✅ Loaded {len(dataset[table])} rows into {table}")
+    conn.commit()
+    cursor.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic NFL data")
+    parser.add_argument("--seasons", type=int, default=1, help="Number of seasons to generate")
+    parser.add_argument("--seed", type=int, default=2025, help="Random seed")
+    args = parser.parse_args()
+
+    data = generate_dataset(args.seasons, args.seed)
+    for table_name, table_rows in data.items():
+        print(f"{table_name}: {len(table_rows)} rows")
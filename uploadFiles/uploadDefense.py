@@ -1,9 +1,12 @@
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import psycopg2
 from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+import dimensions
+from config import get_current_season
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -15,6 +18,12 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+# Season partition the uploads go to (exported by run_all_uploads.py)
+CURRENT_SEASON = get_current_season()
+
+POSITIONS = ["TE", "WR", "RB", "QB"]
+BREAKDOWN_URL = "https://www.cbssports.com/fantasy/football/stats/posvsdef/{position}/{team}/teambreakdown/standard"
+
 # Connect to Supabase database
 def connect_db():
     try:
@@ -30,147 +39,170 @@ def connect_db():
         print(f"Error connecting to database: {e}")
         raise
 
-# Fetch team_id mapping from the database
+# Fetch team_id mapping from the database (cached for the life of the process)
 def get_team_mapping():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT team_id, abbreviation FROM teams;")
-    team_mapping = {row[1]: row[0] for row in cursor.fetchall()}  # Map abbreviation to team_id
-    cursor.close()
-    conn.close()
-    return team_mapping
+    return dimensions.teams(connect_db)
 
 # Fetch position validation from the database
 def get_valid_positions():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT position_id FROM positions;")
-    valid_positions = [row[0] for row in cursor.fetchall()]  # List of valid position IDs
-    cursor.close()
-    conn.close()
-    return valid_positions
+    return dimensions.positions(connect_db)
 
-# Scrape data function
-def scrape_data(team_mapping, valid_positions):
+# Parse one team/position breakdown page into general or QB defensive rows
+def parse_breakdown(html, team_id, position):
     general_stats = []
     qb_stats = []
 
-    positions = ["TE", "WR", "RB", "QB"]
-    teams = list(team_mapping.keys())
+    soup = BeautifulSoup(html, 'html.parser')
 
-    for position in positions:
+    rows = soup.select('tr.row1, tr.row2')
+
+    for row in rows:
+        cells = row.find_all('td')
+        week_text = cells[0].text.strip()
+        if not week_text.isdigit():
+            continue
+
+        week = int(week_text)
+        matchup = cells[1].text.strip().replace("[+]", "").strip()
+
+        try:
+            if position == "QB":
+                qb_stats.append((
+                    team_id, week, matchup,
+                    int(float(cells[2].text.strip())),
+                    int(float(cells[3].text.strip())),
+                    int(float(cells[4].text.strip())),
+                    int(float(cells[5].text.strip())),
+                    int(float(cells[6].text.strip())),
+                    float(cells[7].text.strip()),
+                    int(float(cells[8].text.strip())),
+                    int(float(cells[9].text.strip())),
+                    float(cells[10].text.strip()),
+                    int(float(cells[11].text.strip()))
+                ))
+            else:
+                general_stats.append((  
+                    team_id, position, week, matchup,
+                    int(float(cells[2].text.strip())),
+                    int(float(cells[3].text.strip())),
+                    float(cells[4].text.strip()),
+                    int(float(cells[5].text.strip())),
+                    int(float(cells[6].text.strip())),
+                    int(float(cells[7].text.strip())),
+                    int(float(cells[8].text.strip())),
+                    float(cells[9].text.strip()),
+                    int(float(cells[10].text.strip()))
+                ))
+        except ValueError as e:
+            print(f"Error processing row: {e}")
+            continue
+
+    return general_stats, qb_stats
+
+# (team_id, position, url) for every page to scrape
+def breakdown_pages(team_mapping, valid_positions):
+    for position in POSITIONS:
         if position not in valid_positions:
             print(f"Skipping invalid position: {position}")
             continue
 
-        for team in teams:
+        for team in list(team_mapping.keys()):
             team_id = team_mapping.get(team)  # Fetch team_id directly
             if not team_id:
                 print(f"Team {team} not found in database, skipping...")
                 continue
 
-            url = f"https://www.cbssports.com/fantasy/football/stats/posvsdef/{position}/{team}/teambreakdown/standard"
-            print(f"Scraping URL: {url}")
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            rows = soup.select('tr.row1, tr.row2')
-
-            for row in rows:
-                cells = row.find_all('td')
-                week_text = cells[0].text.strip()
-                if not week_text.isdigit():
-                    continue
-
-                week = int(week_text)
-                matchup = cells[1].text.strip().replace("[+]", "").strip()
-
-                try:
-                    if position == "QB":
-                        qb_stats.append((
-                            team_id, week, matchup,
-                            int(float(cells[2].text.strip())),
-                            int(float(cells[3].text.strip())),
-                            int(float(cells[4].text.strip())),
-                            int(float(cells[5].text.strip())),
-                            int(float(cells[6].text.strip())),
-                            float(cells[7].text.strip()),
-                            int(float(cells[8].text.strip())),
-                            int(float(cells[9].text.strip())),
-                            float(cells[10].text.strip()),
-                            int(float(cells[11].text.strip()))
-                        ))
-                    else:
-                        general_stats.append((  
-                            team_id, position, week, matchup,
-                            int(float(cells[2].text.strip())),
-                            int(float(cells[3].text.strip())),
-                            float(cells[4].text.strip()),
-                            int(float(cells[5].text.strip())),
-                            int(float(cells[6].text.strip())),
-                            int(float(cells[7].text.strip())),
-                            int(float(cells[8].text.strip())),
-                            float(cells[9].text.strip()),
-                            int(float(cells[10].text.strip()))
-                        ))
-                except ValueError as e:
-                    print(f"Error processing row: {e}")
-                    continue
+            yield team_id, position, BREAKDOWN_URL.format(position=position, team=team)
+
+# Scrape data function
+def scrape_data(team_mapping, valid_positions):
+    general_stats = []
+    qb_stats = []
+
+    for team_id, position, url in breakdown_pages(team_mapping, valid_positions):
+        print(f"Scraping URL: {url}")
+        response = requests.get(url)
+        general, qb = parse_breakdown(response.text, team_id, position)
+        general_stats.extend(general)
+        qb_stats.extend(qb)
 
     return general_stats, qb_stats
 
+# Upserts for the defensive game logs
+QB_QUERY = """
+INSERT INTO qb_defensive_stats (
+    season, team_id, week, matchup, passing_attempts, completions, passing_yards, 
+    passing_tds, interceptions, rate, rushing_attempts, rushing_yards, 
+    avg_rushing_yards, rushing_tds
+) VALUES %s
+ON CONFLICT (season, team_id, week) DO UPDATE SET
+    matchup = EXCLUDED.matchup,
+    passing_attempts = EXCLUDED.passing_attempts,
+    completions = EXCLUDED.completions,
+    passing_yards = EXCLUDED.passing_yards,
+    passing_tds = EXCLUDED.passing_tds,
+    interceptions = EXCLUDED.interceptions,
+    rate = EXCLUDED.rate,
+    rushing_attempts = EXCLUDED.rushing_attempts,
+    rushing_yards = EXCLUDED.rushing_yards,
+    avg_rushing_yards = EXCLUDED.avg_rushing_yards,
+    rushing_tds = EXCLUDED.rushing_tds;
+"""
+
+GENERAL_QUERY = """
+INSERT INTO general_defensive_stats (
+    season, team_id, position_id, week, matchup, rushing_attempts, total_rushing_yards, 
+    avg_yards_per_carry, rushing_tds, targets, receptions, total_receiving_yards, 
+    avg_yards_per_catch, receiving_tds
+) VALUES %s
+ON CONFLICT (season, team_id, position_id, week) DO UPDATE SET
+    matchup = EXCLUDED.matchup,
+    rushing_attempts = EXCLUDED.rushing_attempts,
+    total_rushing_yards = EXCLUDED.total_rushing_yards,
+    avg_yards_per_carry = EXCLUDED.avg_yards_per_carry,
+    rushing_tds = EXCLUDED.rushing_tds,
+    targets = EXCLUDED.targets,
+    receptions = EXCLUDED.receptions,
+    total_receiving_yards = EXCLUDED.total_receiving_yards,
+    avg_yards_per_catch = EXCLUDED.avg_yards_per_catch,
+    receiving_tds = EXCLUDED.receiving_tds;
+"""
+
 # Insert data into Supabase tables
 def insert_data(general_stats, qb_stats):
     conn = connect_db()
     cursor = conn.cursor()
 
-    # QB stats insertion
-    qb_query = """
-    INSERT INTO qb_defensive_stats (
-        team_id, week, matchup, passing_attempts, completions, passing_yards, 
-        passing_tds, interceptions, rate, rushing_attempts, rushing_yards, 
-        avg_rushing_yards, rushing_tds
-    ) VALUES %s
-    ON CONFLICT (team_id, week) DO UPDATE SET
-        matchup = EXCLUDED.matchup,
-        passing_attempts = EXCLUDED.passing_attempts,
-        completions = EXCLUDED.completions,
-        passing_yards = EXCLUDED.passing_yards,
-        passing_tds = EXCLUDED.passing_tds,
-        interceptions = EXCLUDED.interceptions,
-        rate = EXCLUDED.rate,
-        rushing_attempts = EXCLUDED.rushing_attempts,
-        rushing_yards = EXCLUDED.rushing_yards,
-        avg_rushing_yards = EXCLUDED.avg_rushing_yards,
-        rushing_tds = EXCLUDED.rushing_tds;
-    """
-    execute_values(cursor, qb_query, qb_stats)
-
-    # General stats insertion
-    general_query = """
-    INSERT INTO general_defensive_stats (
-        team_id, position_id, week, matchup, rushing_attempts, total_rushing_yards, 
-        avg_yards_per_carry, rushing_tds, targets, receptions, total_receiving_yards, 
-        avg_yards_per_catch, receiving_tds
-    ) VALUES %s
-    ON CONFLICT (team_id, position_id, week) DO UPDATE SET
-        matchup = EXCLUDED.matchup,
-        rushing_attempts = EXCLUDED.rushing_attempts,
-        total_rushing_yards = EXCLUDED.total_rushing_yards,
-        avg_yards_per_carry = EXCLUDED.avg_yards_per_carry,
-        rushing_tds = EXCLUDED.rushing_tds,
-        targets = EXCLUDED.targets,
-        receptions = EXCLUDED.receptions,
-        total_receiving_yards = EXCLUDED.total_receiving_yards,
-        avg_yards_per_catch = EXCLUDED.avg_yards_per_catch,
-        receiving_tds = EXCLUDED.receiving_tds;
-    """
-    execute_values(cursor, general_query, general_stats)
+    # Make sure the season's partition exists (migrations/0002)
+    cursor.execute("SELECT create_season_partitions(%s);", (CURRENT_SEASON,))
+    qb_stats = [(CURRENT_SEASON,) + row for row in qb_stats]
+    general_stats = [(CURRENT_SEASON,) + row for row in general_stats]
+
+    execute_values(cursor, QB_QUERY, qb_stats)
+    execute_values(cursor, GENERAL_QUERY, general_stats)
 
     conn.commit()
     cursor.close()
     conn.close()
 
+# main() for async_ingest.py: all 128 team/position pages are fetched concurrently
+async def main_async(ingest, week):
+    team_rows = await ingest.fetch_all("SELECT team_id, abbreviation FROM teams;")
+    team_mapping = {row[1]: row[0] for row in team_rows}
+    valid_positions = [row[0] for row in await ingest.fetch_all("SELECT position_id FROM positions;")]
+
+    async def scrape(team_id, position, url):
+        html = await ingest.get(url)
+        return await asyncio.to_thread(parse_breakdown, html or b"", team_id, position)
+
+    pages = await asyncio.gather(*(scrape(*page) for page in breakdown_pages(team_mapping, valid_positions)))
+    general_stats = [(CURRENT_SEASON,) + row for general, _ in pages for row in general]
+    qb_stats = [(CURRENT_SEASON,) + row for _, qb in pages for row in qb]
+
+    partitions = ("SELECT create_season_partitions(%s);", (CURRENT_SEASON,))
+    await ingest.write([partitions], [(QB_QUERY, qb_stats), (GENERAL_QUERY, general_stats)])
+    print(f"Data successfully scraped and inserted ({len(qb_stats)} QB rows, {len(general_stats)} general rows).")
+
 # Main function
 if __name__ == "__main__":
     team_mapping = get_team_mapping()
@@ -2,6 +2,8 @@ import psycopg2
 from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+import local_mirror
+from config import get_current_season
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -13,6 +15,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 # Connect to Supabase database
 def connect_db():
     try:
@@ -30,7 +34,7 @@ def connect_db():
 
 # Fetch and calculate averages from existing stats
 def calculate_defense_averages():
-    conn = connect_db()
+    conn = local_mirror.connect_analytics(connect_db)
     cursor = conn.cursor()
 
     # General Defensive Averages
@@ -47,8 +51,9 @@ def calculate_defense_averages():
             AVG(avg_yards_per_catch) AS avg_yards_per_catch,
             AVG(receiving_tds) AS avg_receiving_tds
         FROM general_defensive_stats
+        WHERE season = %s
         GROUP BY team_id, position_id;
-    """)
+    """, (CURRENT_SEASON,))
     general_averages = cursor.fetchall()
 
     # QB Defensive Averages
@@ -66,8 +71,9 @@ def calculate_defense_averages():
             AVG(avg_rushing_yards) AS avg_qb_avg_rushing_yards,
             AVG(rushing_tds) AS avg_qb_rushing_tds
         FROM qb_defensive_stats
+        WHERE season = %s
         GROUP BY team_id;
-    """)
+    """, (CURRENT_SEASON,))
     qb_averages = cursor.fetchall()
 
     cursor.close()
@@ -3,6 +3,7 @@ import psycopg2
 from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+import dimensions
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -32,8 +33,7 @@ def connect_db():
         print(f"Error connecting to database: {e}")
         raise
 
-# Read the schedule grid from a CSV file
-# Read the schedule grid from a CSV file
+# Read the schedule grid from a CSV file (nfl_schedule.csv, or a hand-edited copy)
 def read_schedule_csv(file_path):
     print(f"Reading schedule from CSV file: {file_path}...")
     schedule_data = []
@@ -57,25 +57,32 @@ def read_schedule_csv(file_path):
         raise
 
 
-# Upload schedule data to the database
+# Rows whose opponent is unchanged are left alone
+UPSERT_QUERY = """
+    INSERT INTO team_schedule (team_id, week, opponent_id)
+    VALUES %s
+    ON CONFLICT (team_id, week) DO UPDATE SET opponent_id = EXCLUDED.opponent_id
+    WHERE team_schedule.opponent_id IS DISTINCT FROM EXCLUDED.opponent_id;
+"""
+
+# Upload schedule data to the database (also used by scrape_nfl_schedule.py)
 def upload_schedule_to_db(schedule_data):
-    query = """
-        INSERT INTO team_schedule (team_id, week, opponent_id)
-        VALUES %s
-        ON CONFLICT (team_id, week) DO UPDATE SET opponent_id = EXCLUDED.opponent_id;
-    """
     try:
         print("Uploading schedule data to the database...")
         conn = connect_db()
         cursor = conn.cursor()
         print(f"Inserting {len(schedule_data)} records into the database...")
-        execute_values(cursor, query, schedule_data)
+        # One statement for the whole season (18 weeks x 32 teams)
+        execute_values(cursor, UPSERT_QUERY, schedule_data, page_size=max(len(schedule_data), 1))
         conn.commit()
         cursor.close()
         conn.close()
+        dimensions.invalidate("schedule")
         print("Schedule data uploaded successfully.")
+        return True
     except Exception as e:
         print(f"Error uploading schedule data: {e}")
+        return False
 
 # Main function
 def main():
@@ -1,8 +1,10 @@
 import psycopg2
 from psycopg2.extras import execute_values
 from datetime import datetime, timezone
+import math
 import os
 from dotenv import load_dotenv
+import matchup_factors
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -29,38 +31,30 @@ def connect_db():
         print(f"Error connecting to database: {e}")
         raise
 
-# Fetch defensive averages and league-wide averages from the database
-def get_defensive_data():
-    conn = connect_db()
-    cursor = conn.cursor()
+# Stat each position is ranked by
+RANKING_STATS = {
+    'QB': 'passing_yards',
+    'RB': 'rushing_yards',
+    'WR': 'receiving_yards',
+    'TE': 'receiving_yards',
+}
 
-    # Fetch team defensive averages with corrected TE/WR separation
-    cursor.execute("""
-        SELECT team_id, 'QB' AS position, avg_passing_yards AS avg_stat FROM defense_averages_qb
-        UNION ALL
-        SELECT team_id, 'RB', avg_rushing_yards FROM defense_averages
-        WHERE position_id = 'RB'
-        UNION ALL
-        SELECT team_id, 'WR', avg_receiving_yards FROM defense_averages WHERE position_id = 'WR'
-        UNION ALL
-        SELECT team_id, 'TE', avg_receiving_yards FROM defense_averages WHERE position_id = 'TE'
-    """)
-    team_defense = cursor.fetchall()
-
-    # Fetch league-wide averages with corrected TE/WR separation
-    cursor.execute("""
-        SELECT 'QB' AS position, avg_passing_yards AS avg_stat FROM all_defense_averages_qb
-        UNION ALL
-        SELECT 'RB', avg_rushing_yards FROM all_defense_averages WHERE position_id = 'RB'
-        UNION ALL
-        SELECT 'WR', avg_receiving_yards FROM all_defense_averages WHERE position_id = 'WR'
-        UNION ALL
-        SELECT 'TE', avg_receiving_yards FROM all_defense_averages WHERE position_id = 'TE'
-    """)
-    league_avg = {row[0]: row[1] for row in cursor.fetchall()}
+# Defensive averages and league-wide averages from the published matchup factors
+def get_defensive_data():
+    factors = matchup_factors.load(connect_db)
+
+    # Team and league-wide averages of each position's primary yards, with TE/WR kept separate
+    team_defense = []
+    league_avg = {}
+    for position, stat in RANKING_STATS.items():
+        league_stat = factors.league_average(position, stat)
+        if not math.isnan(league_stat):
+            league_avg[position] = league_stat
+        for team_id in factors.teams:
+            avg_stat = factors.allowed(team_id, position, stat)
+            if not math.isnan(avg_stat):
+                team_defense.append((team_id, position, avg_stat))
 
-    cursor.close()
-    conn.close()
     return team_defense, league_avg
 
 # Calculate defensive matchup rankings
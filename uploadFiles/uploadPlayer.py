@@ -1,9 +1,17 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import psycopg2
 from psycopg2.extras import execute_values
 import os
+import sys
 from dotenv import load_dotenv
+import dimensions
+import run_metrics
+from config import get_current_season
+from crosswalk import CandidateIndex, PlayerResolver
+from names import normalize_name
+from streaming import WriteBehind, batched, prefetch
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -16,26 +24,22 @@ SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 API_KEY = os.getenv("SPORTSDATA_API_KEY")
 
+# Season partition the uploads go to (exported by run_all_uploads.py)
+CURRENT_SEASON = get_current_season()
+
 position_map = {"WR": "WR", "QB": "QB", "RB": "RB", "TE": "TE"}
 
+# Pages fetched ahead of the parser, and row batches queued for the writer; both
+# bound memory and make the faster side wait for the slower one
+PREFETCH_PAGES = 4
+WRITE_BATCH_SIZE = 500
+PENDING_BATCHES = 2
 
-def normalize_name_for_matching(name):
-    """Normalize names for better matching between CBS and API"""
-    # Remove common suffixes and normalize
-    normalized = name.strip()
-    
-    # Remove Sr, Jr, III, IV, V suffixes (case insensitive)
-    suffixes_to_remove = [' Sr', ' Jr', ' III', ' IV', ' V', ' sr', ' jr', ' iii', ' iv', ' v']
-    for suffix in suffixes_to_remove:
-        if normalized.endswith(suffix):
-            normalized = normalized[:-len(suffix)].strip()
-            break
-    
-    # Also try regex approach for more robust matching (handles periods)
-    import re
-    normalized = re.sub(r'\s+(Sr|Jr|III|IV|V)\.?$', '', normalized, flags=re.IGNORECASE).strip()
-    
-    return normalized
+# Only the stats table rows are built into a tree, not the whole page
+STATS_ROWS = SoupStrainer("tr", class_="TableBase-bodyTr")
+
+LEADERS_URL = "https://www.cbssports.com/nfl/stats/leaders/live/{position}/{week}/"
+API_URL = "https://api.sportsdata.io/v3/nfl/stats/json/PlayerGameStatsByWeek/{season}/{week}"
 
 
 def connect_db():
@@ -54,19 +58,20 @@ def connect_db():
         raise
 
 
-def scrape_stats(week, position):
-    """Scrape stats for a given week and position."""
-    url = f"https://www.cbssports.com/nfl/stats/leaders/live/{position}/{week}/"
-    response = requests.get(url)
+def fetch_page(session, week, position):
+    """Fetch the CBS leaders page for a week and position (None if the request fails)."""
+    response = session.get(LEADERS_URL.format(position=position, week=week))
     if response.status_code != 200:
         print(f"Failed to fetch data for Week {week}, Position {position}")
-        return []
+        return None
+    return response.content
 
-    soup = BeautifulSoup(response.content, "html.parser")
-    rows = soup.select(".TableBase-bodyTr")
-    player_data = []
 
-    for row in rows:
+def parse_page(content, week, position):
+    """Yield one stats dict per player row of a CBS leaders page."""
+    soup = BeautifulSoup(content, "html.parser", parse_only=STATS_ROWS)
+
+    for row in soup.find_all("tr"):
         columns = row.find_all("td")
         if len(columns) < 3:  # Skip rows with insufficient data
             continue
@@ -128,17 +133,19 @@ def scrape_stats(week, position):
             player_stats["rushing_yards"] = int(columns[8].text.strip()) if columns[8].text.strip().isdigit() else 0
             player_stats["rushing_tds"] = int(columns[9].text.strip()) if columns[9].text.strip().isdigit() else 0
 
-        player_data.append(player_stats)
+        yield player_stats
 
-    return player_data
 
+def scrape_stats(week, position):
+    """Scrape stats for a given week and position."""
+    content = fetch_page(requests.Session(), week, position)
+    return list(parse_page(content, week, position)) if content else []
 
 
-def fetch_player_stats(season, week):
+def fetch_player_stats(season, week, session=requests):
     """Fetch player stats from the SportsDataIO API."""
-    url = f"https://api.sportsdata.io/v3/nfl/stats/json/PlayerGameStatsByWeek/{season}/{week}"
     headers = {"Ocp-Apim-Subscription-Key": API_KEY}
-    response = requests.get(url, headers=headers)
+    response = session.get(API_URL.format(season=season, week=week), headers=headers)
 
     if response.status_code != 200:
         print(f"Error fetching data: {response.status_code}, {response.text}")
@@ -147,175 +154,246 @@ def fetch_player_stats(season, week):
     return response.json()
 
 
-def merge_stats(scraped_data, api_data, team_mapping):
-    """Merge API fields (`snaps`, `team_id`, `opponent`) into scraped data using API."""
+def fetch_weeks(weeks, season):
+    """
+    Yield (week, position, page, api_data) for every CBS page of the given weeks. The
+    SportsData payload is the same for every position, so it is fetched once per week.
+    """
+    session = requests.Session()
+    for week in weeks:
+        api_data = fetch_player_stats(season, week, session)
+        for position_code in position_map.values():
+            content = fetch_page(session, week, position_code)
+            if content:
+                yield week, position_code, content, api_data
+
+
+def build_api_index(api_data):
+    """
+    PlayerID lookup for crosswalk hits, and the candidate index for matching new names. A
+    record's game (Team and Opponent) tells apart players sharing a name and position.
+    """
+    api_by_id = {api_player["PlayerID"]: api_player for api_player in api_data}
+    api_index = CandidateIndex(
+        api_data, id_of=lambda p: p["PlayerID"], name_of=lambda p: p["Name"],
+        position_of=lambda p: p.get("Position"), teams_of=lambda p: (p.get("Team"), p.get("Opponent")),
+    )
+    return api_by_id, api_index
+
+
+def merge_stats(scraped_rows, api_by_id, api_index, team_mapping, resolver, unmatched_players):
+    """Merge API fields (`snaps`, `team_id`, `opponent`) into scraped rows, yielding each merged row."""
     
     # Manual correction for mismatched team abbreviations
     abbreviation_fixes = {
         "JAX": "JAC"  # Map JAX (API) to JAC (database)
     }
 
-    merged_data = []
-    unmatched_players = []
-    
-    for player in scraped_data:
-        player_matched = False
-        
-        # Try exact match first
-        for api_player in api_data:
-            team_abbr = api_player.get("Team")
-            corrected_team_abbr = abbreviation_fixes.get(team_abbr, team_abbr)
-            if api_player["Name"] == player["player_name"]:
-                player['snaps'] = api_player.get('Played', 0)
-                player['team_id'] = team_mapping.get(corrected_team_abbr)
-                player['opponent'] = api_player.get('Opponent')
-                player_matched = True
-                break
-        
-        # If exact match failed, try normalized name matching
-        if not player_matched:
-            cbs_normalized = normalize_name_for_matching(player["player_name"])
-            matching_players = []
-            
-            for api_player in api_data:
-                api_name = api_player["Name"]
-                api_normalized = normalize_name_for_matching(api_name)
-                
-                if cbs_normalized.lower() == api_normalized.lower():
-                    matching_players.append(api_player)
-            
-            # If we found multiple matches, be more selective
-            if len(matching_players) > 1:
-                print(f"⚠️  Multiple matches found for {player['player_name']}:")
-                for match in matching_players:
-                    print(f"    {match['Name']} - {match.get('Team', 'N/A')}")
-                
-                # For Deebo Samuel, prefer WAS team
-                if "deebo" in player["player_name"].lower() and "samuel" in player["player_name"].lower():
-                    preferred_match = next((p for p in matching_players if p.get("Team") == "WAS"), None)
-                    if preferred_match:
-                        api_player = preferred_match
-                        print(f"✅ Selected WAS team match for Deebo Samuel: {api_player['Name']}")
-                    else:
-                        api_player = matching_players[0]  # Fallback to first match
-                        print(f"⚠️  No WAS team match found, using first match: {api_player['Name']}")
-                else:
-                    api_player = matching_players[0]  # Use first match for other players
-                    print(f"✅ Using first match: {api_player['Name']}")
-            elif len(matching_players) == 1:
-                api_player = matching_players[0]
-                print(f"✅ Single match found: {api_player['Name']}")
-            else:
-                api_player = None
-            
+    for player in scraped_rows:
+        # CBS lists the opponent ("@LV" away), which picks the game when a name is shared
+        opponent = player["matchup"].lstrip("@").strip() or None
+        player_id = resolver.resolve(player["player_name"], player["position_id"])
+        if player_id is not None:
+            api_player = api_by_id.get(player_id)
+            if not api_player:
+                print(f"⚠️  {player['player_name']} ({player_id}) is missing from this week's API data")
+            elif opponent and not api_index.in_game(api_player, opponent):
+                # The link is to another player with the same name and position (Mike Williams,
+                # WR, on two teams); match this row by its game, keeping the stored link
+                api_player = resolver.match(player["player_name"], player["position_id"], api_index,
+                                            team=opponent, link=False)
+                if api_player and api_player["PlayerID"] == player_id:
+                    api_player = None
+        else:
+            api_player = resolver.match(player["player_name"], player["position_id"], api_index, team=opponent)
             if api_player:
-                team_abbr = api_player.get("Team")
-                corrected_team_abbr = abbreviation_fixes.get(team_abbr, team_abbr)
-                player['snaps'] = api_player.get('Played', 0)
-                player['team_id'] = team_mapping.get(corrected_team_abbr)
-                player['opponent'] = api_player.get('Opponent')
-                print(f"✅ Matched with normalization: {player['player_name']} -> {api_player['Name']} ({corrected_team_abbr})")
-                player_matched = True
-        
-        if not player_matched:
-            # Player not found in API
+                print(f"✅ New crosswalk link: {player['player_name']} -> {api_player['Name']} ({api_player.get('Team')})")
+
+        if not api_player:
+            # Held for review rather than dropped; re-run the week once the API has the
+            # player or the link is confirmed
+            resolver.hold(player["player_name"], player["position_id"], CURRENT_SEASON, player["week"], player)
             print(f"❌ No match: {player['player_name']}")
             unmatched_players.append(player['player_name'])
             continue
+
+        team_abbr = api_player.get("Team")
+        corrected_team_abbr = abbreviation_fixes.get(team_abbr, team_abbr)
+        player['player_id'] = api_player["PlayerID"]
+        player['snaps'] = api_player.get('Played', 0)
+        player['team_id'] = team_mapping.get(corrected_team_abbr)
+        player['opponent'] = api_player.get('Opponent')
         
         # Ensure `team_id` is not None
         if player['team_id']:
-            merged_data.append(player)
-
-    if unmatched_players:
-        print(f"\n📊 Summary: {len(merged_data)} players matched, {len(unmatched_players)} unmatched")
-        print(f"Unmatched players: {unmatched_players[:5]}{'...' if len(unmatched_players) > 5 else ''}")
-
-    return merged_data
+            yield player
 
 
-
-def upload_to_database(player_data):
-    """Upload merged data to the database."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    # Ensure unique constraint exists
-    cursor.execute("""
-    DO $$ 
-    BEGIN
-        IF NOT EXISTS (
-            SELECT 1 
-            FROM pg_indexes 
-            WHERE tablename = 'player_stats' AND indexname = 'unique_player_week_team'
-        ) THEN
-            ALTER TABLE player_stats ADD CONSTRAINT unique_player_week_team UNIQUE (player_name, team_id, week);
-        END IF;
-    END $$;
-    """)
-
-    query = """
+UPSERT_QUERY = """
     INSERT INTO player_stats (
-        player_name, position_id, team_id, week, matchup, fpts,
+        season, player_name, normalized_name, player_id, position_id, team_id, week, matchup, fpts,
         completions, passing_attempts, passing_yards, passing_tds, interceptions,
         rushing_attempts, rushing_yards, rushing_tds, receptions, receiving_yards, receiving_tds,
         targets, snaps, opponent
     ) VALUES %s
-    ON CONFLICT (player_name, team_id, week) DO UPDATE SET
+    ON CONFLICT (season, player_name, team_id, week) DO UPDATE SET
+        normalized_name = EXCLUDED.normalized_name,
+        player_id = COALESCE(EXCLUDED.player_id, player_stats.player_id),
         snaps = COALESCE(EXCLUDED.snaps, player_stats.snaps),
         opponent = COALESCE(EXCLUDED.opponent, player_stats.opponent),
         team_id = COALESCE(EXCLUDED.team_id, player_stats.team_id);
+"""
+
+
+def stats_values(p):
+    """Row tuple for UPSERT_QUERY."""
+    return (
+        CURRENT_SEASON, p['player_name'], normalize_name(p['player_name']), p.get('player_id'), p['position_id'], p['team_id'], p['week'], p['matchup'], p['fpts'],
+        p['completions'], p['passing_attempts'], p['passing_yards'], p['passing_tds'], p['interceptions'],
+        p['rushing_attempts'], p['rushing_yards'], p['rushing_tds'], p['receptions'], p['receiving_yards'], p['receiving_tds'],
+        p['targets'], p['snaps'], p['opponent']
+    )
+
+
+def unique_rows(rows):
     """
+    One row per (player_name, team_id, week). A player listed under two positions appears
+    twice; one upsert statement cannot touch the same row twice, and the first position's
+    stats are the ones kept.
+    """
+    unique = {}
+    for values in rows:
+        unique.setdefault((values[1], values[5], values[6]), values)
+    return list(unique.values())
 
-    values = [
-        (
-            p['player_name'], p['position_id'], p['team_id'], p['week'], p['matchup'], p['fpts'],
-            p['completions'], p['passing_attempts'], p['passing_yards'], p['passing_tds'], p['interceptions'],
-            p['rushing_attempts'], p['rushing_yards'], p['rushing_tds'], p['receptions'], p['receiving_yards'], p['receiving_tds'],
-            p['targets'], p['snaps'], p['opponent']
-        )
-        for p in player_data if p['team_id']
-    ]
 
-    if values:
-        execute_values(cursor, query, values)
+def upload_to_database(player_rows):
+    """
+    Upload merged rows in batches of WRITE_BATCH_SIZE, committing each batch. Batches are
+    written on a background thread with their own connection while the caller keeps
+    fetching and merging. Returns the number of rows written.
+    """
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    # Make sure the season's partition exists (migrations/0002)
+    cursor.execute("SELECT create_season_partitions(%s);", (CURRENT_SEASON,))
+    conn.commit()
+
+    def write_batch(batch):
+        batch = unique_rows(batch)
+        execute_values(cursor, UPSERT_QUERY, batch, page_size=len(batch))
         conn.commit()
-        print(f"Inserted/Updated {len(values)} rows.")
+        run_metrics.incr("batches_written")
+
+    written = 0
+    try:
+        with WriteBehind(write_batch, maxsize=PENDING_BATCHES) as writer:
+            for batch in batched((stats_values(p) for p in player_rows if p['team_id']), WRITE_BATCH_SIZE):
+                writer.put(batch)
+                written += len(batch)
+    finally:
+        cursor.close()
+        conn.close()
+
+    if written:
+        print(f"Inserted/Updated {written} rows.")
     else:
         print("No valid data to insert.")
+    return written
 
-    cursor.close()
-    conn.close()
+
+def parse_weeks(args):
+    """Weeks from the command line, e.g. `6`, `1 2 3` or `1-6`."""
+    weeks = []
+    for arg in args:
+        first, _, last = arg.partition("-")
+        weeks.extend(range(int(first), int(last or first) + 1))
+    return weeks
 
 
 def main():
-    season = "2025REG"  # Current season
+    season = f"{CURRENT_SEASON}REG"  # Current season
     current_week = 6  # Set current week to 2
+    # Backfill several weeks with e.g. `python uploadPlayer.py 1-6`
+    weeks = parse_weeks(sys.argv[1:]) or [current_week]
 
     conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT team_id, abbreviation FROM teams;")
-    team_mapping = {row[1]: row[0] for row in cursor.fetchall()}
-    cursor.close()
+    team_mapping = dimensions.teams(conn)
+
+    # CBS name -> SportsData PlayerID links confirmed on earlier runs
+    resolver = PlayerResolver(conn, "cbs")
+    unmatched_players = []
+
+    def merged_rows():
+        # Pages are fetched on a background thread and parsed as they arrive; each
+        # row is merged against the week's API index and passed straight on
+        indexed_week = None
+        for week, position, content, api_data in prefetch(fetch_weeks(weeks, season), maxsize=PREFETCH_PAGES):
+            if week != indexed_week:
+                api_by_id, api_index = build_api_index(api_data)
+                indexed_week = week
+            print(f"Merging Week {week}, Position {position}")
+            yield from merge_stats(
+                parse_page(content, week, position), api_by_id, api_index, team_mapping, resolver, unmatched_players
+            )
+            resolver.flush()
+
+    with run_metrics.span("ingest"):
+        written = upload_to_database(merged_rows())
+
+    run_metrics.incr("players_unmatched", len(unmatched_players))
+    if unmatched_players:
+        print(f"\n📊 Summary: {written} players matched, {len(unmatched_players)} unmatched")
+        print(f"Unmatched players: {unmatched_players[:5]}{'...' if len(unmatched_players) > 5 else ''}")
+    print(f"Uploaded data for Week(s) {', '.join(map(str, weeks))}")
+
     conn.close()
 
-    # Upload data for current week only
-    for position, position_code in position_map.items():
-        print(f"Scraping Week {current_week}, Position {position}")
-        scraped_data = scrape_stats(current_week, position_code)
-        api_data = fetch_player_stats(season, current_week)
-        merged_data = merge_stats(scraped_data, api_data, team_mapping)
 
-        # Debugging merged data before uploading
-        print("Sample Merged Data:", merged_data[:3])
+async def main_async(ingest, week):
+    """main() for async_ingest.py: pages for every position are fetched concurrently."""
+    season = f"{CURRENT_SEASON}REG"
+    team_mapping = {abbreviation: team_id for team_id, abbreviation in
+                    await ingest.fetch_all("SELECT team_id, abbreviation FROM teams;")}
+
+    # The crosswalk keeps its psycopg2 connection; it only reads once and flushes once
+    conn = await asyncio.to_thread(connect_db)
+    try:
+        resolver = await asyncio.to_thread(PlayerResolver, conn, "cbs")
+        api_data = await ingest.get_json(API_URL.format(season=season, week=week),
+                                         headers={"Ocp-Apim-Subscription-Key": API_KEY})
+        api_by_id, api_index = build_api_index(api_data)
+        unmatched_players = []
+
+        async def fetch(position_code):
+            return position_code, await ingest.get(LEADERS_URL.format(position=position_code, week=week))
+
+        def merge_page(content, position_code):
+            rows = merge_stats(parse_page(content, week, position_code), api_by_id, api_index,
+                               team_mapping, resolver, unmatched_players)
+            return [stats_values(p) for p in rows]
+
+        values = []
+        for page in asyncio.as_completed([fetch(code) for code in position_map.values()]):
+            position_code, content = await page
+            if content:
+                print(f"Merging Week {week}, Position {position_code}")
+                values.extend(await asyncio.to_thread(merge_page, content, position_code))
+
+        written = await ingest.write(
+            [("SELECT create_season_partitions(%s);", (CURRENT_SEASON,))], [(UPSERT_QUERY, unique_rows(values))]
+        )
+        await asyncio.to_thread(resolver.flush)
+    finally:
+        conn.close()
 
-        upload_to_database(merged_data)
-        print(f"Uploaded data for Week {current_week}, Position {position}")
+    run_metrics.incr("players_unmatched", len(unmatched_players))
+    print(f"Inserted/Updated {written} rows for Week {week} ({len(unmatched_players)} unmatched)")
 
 
 if __name__ == "__main__":
     # Set UTF-8 encoding for Windows console
-    import sys
     if sys.platform == "win32":
         import codecs
         sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
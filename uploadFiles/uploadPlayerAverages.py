@@ -2,6 +2,8 @@ import psycopg2
 from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+import local_mirror
+from config import get_current_season
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -13,6 +15,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 # Connect to Supabase database
 def connect_db():
     try:
@@ -31,7 +35,7 @@ def connect_db():
 # Fetch player stats from the database
 def fetch_and_calculate_averages():
     """Fetch player stats and calculate averages where snaps = 1."""
-    conn = connect_db()
+    conn = local_mirror.connect_analytics(connect_db)
     cursor = conn.cursor()
 
     # Fetch player stats where snaps = 1
@@ -54,9 +58,9 @@ def fetch_and_calculate_averages():
             AVG(targets) AS avg_targets,  -- New column for targets
             AVG(snaps) AS avg_snaps
         FROM player_stats
-        WHERE snaps = 1
+        WHERE season = %s AND snaps = 1
         GROUP BY player_name, position_id, team_id
-    """)
+    """, (CURRENT_SEASON,))
     
     raw_averages = cursor.fetchall()
     cursor.close()
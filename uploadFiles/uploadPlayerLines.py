@@ -1,7 +1,14 @@
 import psycopg2
 import csv
+import io
+import os
+import statistics
+from dotenv import load_dotenv
 from psycopg2.extras import execute_values
 from datetime import datetime, timezone
+from config import get_current_season
+from crosswalk import CandidateIndex, PlayerResolver
+from names import normalize_name
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -13,6 +20,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 # Connect to Supabase database
 def connect_db():
     return psycopg2.connect(
@@ -24,17 +33,6 @@ def connect_db():
         sslmode="require"
     )
 
-# Function to normalize player names (match website logic)
-def normalize_string(s):
-    return (
-        s.lower()
-        .replace("-", "")
-        .replace(".", "")
-        .replace("'", "")
-        .replace("’", "")
-        .strip()
-    )
-
 # Mapping stat names in CSV to database column names
 STAT_MAPPING = {
     "player_pass_attempts": "projected_passing_attempts",
@@ -50,6 +48,161 @@ STAT_MAPPING = {
     "player_receiving_tds": "projected_receiving_tds",
 }
 
+# Columns of PlayerProps.csv the ingester reads, and the size of each block it parses
+PROP_COLUMNS = ["bookmaker", "market", "label", "description", "price", "point"]
+CHUNK_BYTES = 1 << 20
+
+# player_line_history / player_line_consensus stat_key for a player_lines column
+def stat_key(db_column):
+    return db_column[len("projected_"):]
+
+def _arrow():
+    """pyarrow's streaming CSV reader (snapshot.py uses pyarrow too)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        raise RuntimeError("Reading PlayerProps.csv needs pyarrow: pip install pyarrow")
+    return pa, pc, pa_csv
+
+# Stream the mapped markets' rows out of the CSV one block at a time
+def read_prop_rows(csv_file_path, chunk_bytes=CHUNK_BYTES):
+    pa, pc, pa_csv = _arrow()
+    reader = pa_csv.open_csv(
+        csv_file_path,
+        read_options=pa_csv.ReadOptions(block_size=chunk_bytes),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=PROP_COLUMNS,
+            column_types={"bookmaker": pa.string(), "market": pa.string(), "label": pa.string(),
+                          "description": pa.string(), "price": pa.float64(), "point": pa.float64()},
+            null_values=["", "N/A"],
+        ),
+    )
+    markets = pa.array(list(STAT_MAPPING))
+    for batch in reader:
+        # Unmapped markets and missing lines are dropped before anything reaches Python
+        keep = pc.and_(pc.is_in(pc.utf8_trim_whitespace(batch.column("market")), value_set=markets),
+                       pc.is_valid(batch.column("point")))
+        batch = batch.filter(keep)
+        yield from zip(*(batch.column(name).to_pylist() for name in PROP_COLUMNS))
+
+# Every price quoted per player and market, alternate lines included:
+# (player_name, db_column) -> {(bookmaker, point, side): latest price}
+def collect_quotes(rows):
+    player_names = {}  # normalized name -> first spelling seen
+    quotes = {}
+    for bookmaker, market, label, description, price, point in rows:
+        if not description or not description.strip():
+            continue
+        side = (label or "").strip().lower()
+        if side not in ("over", "under"):
+            continue
+        player_name = player_names.setdefault(normalize_name(description), description.strip())
+        market_quotes = quotes.setdefault((player_name, STAT_MAPPING[market.strip()]), {})
+        market_quotes[((bookmaker or "").strip(), point, side)] = price
+    return quotes
+
+# Each book's main line per player and market: (player_name, db_column, bookmaker) -> (point, over, under).
+# Books also list alternate lines; the main one is the point priced on both sides with the
+# most even prices, else (one-sided quotes only) the point whose price is closest to even money
+def book_lines(quotes):
+    lines = {}
+    for (player_name, db_column), market_quotes in quotes.items():
+        by_book = {}
+        for (bookmaker, point, side), price in market_quotes.items():
+            prices = by_book.setdefault(bookmaker, {}).setdefault(point, [None, None])
+            prices[0 if side == "over" else 1] = price
+        for bookmaker, points in by_book.items():
+            two_sided = [(point, over, under) for point, (over, under) in points.items()
+                         if over is not None and under is not None]
+            if two_sided:
+                main = min(two_sided, key=lambda line: (abs(line[1] - line[2]), line[0]))
+            else:
+                main = min(((point, over, under) for point, (over, under) in points.items()),
+                           key=lambda line: (abs((line[1] if line[1] is not None else line[2]) - 2.0), line[0]))
+            lines[(player_name, db_column, bookmaker)] = main
+    return lines
+
+def _median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+# Median line and prices across books, and the best line for each side, per (player_name, db_column)
+def line_consensus(lines):
+    by_market = {}
+    for (player_name, db_column, bookmaker), (point, over_price, under_price) in lines.items():
+        by_market.setdefault((player_name, db_column), []).append((bookmaker, point, over_price, under_price))
+
+    consensus = {}
+    for key, books in by_market.items():
+        overs = [book for book in books if book[2] is not None]
+        unders = [book for book in books if book[3] is not None]
+        # The over is best at the lowest line (then the longest price), the under at the highest
+        best_over = min(overs, key=lambda book: (book[1], -book[2]), default=(None,) * 4)
+        best_under = max(unders, key=lambda book: (book[1], book[3]), default=(None,) * 4)
+        consensus[key] = (
+            len(books),
+            _median(book[1] for book in books),
+            _median(book[2] for book in books),
+            _median(book[3] for book in books),
+            best_over[1], best_over[2], best_over[0],
+            best_under[1], best_under[3], best_under[0],
+        )
+    return consensus
+
+# Upsert the week's consensus lines
+def write_consensus(cursor, week, consensus, updated_at):
+    execute_values(cursor, """
+        INSERT INTO player_line_consensus (
+            season, week, player_name, stat_key, books, line, over_price, under_price,
+            best_over_line, best_over_price, best_over_book,
+            best_under_line, best_under_price, best_under_book, updated_at
+        ) VALUES %s
+        ON CONFLICT (season, week, player_name, stat_key) DO UPDATE SET
+            books = EXCLUDED.books,
+            line = EXCLUDED.line,
+            over_price = EXCLUDED.over_price,
+            under_price = EXCLUDED.under_price,
+            best_over_line = EXCLUDED.best_over_line,
+            best_over_price = EXCLUDED.best_over_price,
+            best_over_book = EXCLUDED.best_over_book,
+            best_under_line = EXCLUDED.best_under_line,
+            best_under_price = EXCLUDED.best_under_price,
+            best_under_book = EXCLUDED.best_under_book,
+            updated_at = EXCLUDED.updated_at;
+    """, [(CURRENT_SEASON, week, player_name, stat_key(db_column), *values, updated_at)
+          for (player_name, db_column), values in consensus.items()])
+
+# Append each book's main line to player_line_history where it differs from the book's last snapshot
+def write_line_history(cursor, week, lines, observed_at):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        (CURRENT_SEASON, week, player_name, stat_key(db_column), bookmaker, point, over_price, under_price,
+         observed_at.isoformat())
+        for (player_name, db_column, bookmaker), (point, over_price, under_price) in lines.items()
+    )
+    buffer.seek(0)
+    cursor.execute("CREATE TEMP TABLE line_snapshot (LIKE player_line_history) ON COMMIT DROP;")
+    cursor.copy_expert("COPY line_snapshot FROM STDIN WITH (FORMAT csv)", buffer)
+    # The last snapshot per book is one backward step on the primary key, however long the history
+    cursor.execute("""
+        INSERT INTO player_line_history
+        SELECT s.*
+        FROM line_snapshot s
+        LEFT JOIN LATERAL (
+            SELECT h.point, h.over_price, h.under_price
+            FROM player_line_history h
+            WHERE h.season = s.season AND h.week = s.week AND h.player_name = s.player_name
+              AND h.stat_key = s.stat_key AND h.bookmaker = s.bookmaker
+            ORDER BY h.observed_at DESC
+            LIMIT 1
+        ) last ON TRUE
+        WHERE (last.point, last.over_price, last.under_price)
+              IS DISTINCT FROM (s.point, s.over_price, s.under_price);
+    """)
+    return cursor.rowcount
+
 # Parse CSV and insert into database
 def upload_player_lines(csv_file_path, week):
     conn = connect_db()
@@ -57,58 +210,70 @@ def upload_player_lines(csv_file_path, week):
 
     try:
         print(f"📂 Reading PlayerProps.csv for Week {week}...")
-        player_lines = {}
+        observed_at = datetime.now(timezone.utc)
+        quotes = collect_quotes(read_prop_rows(csv_file_path))
+        lines = book_lines(quotes)
+        consensus = line_consensus(lines)
+        books = {bookmaker for _, _, bookmaker in lines}
+        print(f"📚 {len(lines)} lines from {len(books)} books "
+              f"({sum(map(len, quotes.values()))} prices incl. alternates), {len(consensus)} player markets")
 
-        with open(csv_file_path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                player_name = normalize_string(row["description"])
-                stat_key = row["market"].strip()
-                line_value = row["point"].strip()
-
-                if not line_value or line_value == "N/A":
-                    continue  # Skip missing values
-
-                # Initialize player entry if not already present
-                if player_name not in player_lines:
-                    player_lines[player_name] = {
-                        "player_name": row["description"],
-                        "position": None,  # Will fill later
-                        "team_id": None,   # Will fill later
-                        "week": week,
-                        "opponent_id": None,  # Will fill later
-                        "projected_passing_attempts": None,
-                        "projected_completions": None,
-                        "projected_passing_yards": None,
-                        "projected_passing_tds": 1.5,  # Default value
-                        "projected_interceptions": None,
-                        "projected_rushing_attempts": None,
-                        "projected_rushing_yards": None,
-                        "projected_rushing_tds": 0.5,  # Default value
-                        "projected_receptions": None,
-                        "projected_receiving_yards": None,
-                        "projected_receiving_tds": 0.5,  # Default value
-                        "updated_at": datetime.now(timezone.utc),
-                    }
-
-                # Map CSV stat key to database column and insert value
-                db_column = STAT_MAPPING.get(stat_key)
-                if db_column:
-                    player_lines[player_name][db_column] = float(line_value)
+        # player_lines gets the median line across books
+        player_lines = {}
+        for (player_name, db_column), values in consensus.items():
+            # Initialize player entry if not already present
+            if player_name not in player_lines:
+                player_lines[player_name] = {
+                    "player_name": player_name,
+                    "position": None,  # Will fill later
+                    "team_id": None,   # Will fill later
+                    "week": week,
+                    "opponent_id": None,  # Will fill later
+                    "projected_passing_attempts": None,
+                    "projected_completions": None,
+                    "projected_passing_yards": None,
+                    "projected_passing_tds": 1.5,  # Default value
+                    "projected_interceptions": None,
+                    "projected_rushing_attempts": None,
+                    "projected_rushing_yards": None,
+                    "projected_rushing_tds": 0.5,  # Default value
+                    "projected_receptions": None,
+                    "projected_receiving_yards": None,
+                    "projected_receiving_tds": 0.5,  # Default value
+                    "updated_at": observed_at,
+                }
+            player_lines[player_name][db_column] = values[1]
 
         print(f"✅ Parsed {len(player_lines)} players from CSV.")
 
-        # Fetch additional player data (position, team, opponent) from database
-        cursor.execute("SELECT player_name, position, team_id FROM player_projections WHERE week = %s;", (week,))
-        db_players = cursor.fetchall()
+        # Fetch additional player data (position, team) from each player's latest game log
+        cursor.execute("""
+            SELECT DISTINCT ON (player_id) player_id, player_name, position_id, team_id
+            FROM player_stats
+            WHERE season = %s AND player_id IS NOT NULL
+            ORDER BY player_id, week DESC;
+        """, (CURRENT_SEASON,))
+        db_players = {row[0]: row for row in cursor.fetchall()}
 
-        for db_player in db_players:
-            db_name, position, team_id = db_player
-            normalized_name = normalize_string(db_name)
+        # Odds names confirmed on earlier runs resolve by lookup; only new names are matched
+        resolver = PlayerResolver(conn, "odds")
+        db_index = None
+        for line in player_lines.values():
+            player_id = resolver.resolve(line["player_name"])
+            if player_id is None:
+                if db_index is None:
+                    db_index = CandidateIndex(db_players.values(), id_of=lambda p: p[0], name_of=lambda p: p[1])
+                match = resolver.match(line["player_name"], None, db_index)
+                player_id = match[0] if match else None
+                if match is None:
+                    # The line is still uploaded without position/team; hold it for review too
+                    resolver.hold(line["player_name"], None, CURRENT_SEASON, line["week"], line)
 
-            if normalized_name in player_lines:
-                player_lines[normalized_name]["position"] = position
-                player_lines[normalized_name]["team_id"] = team_id
+            db_player = db_players.get(player_id)
+            if db_player:
+                line["position"] = db_player[2]
+                line["team_id"] = db_player[3]
+        resolver.flush()
 
         # Convert data into insert format
         insert_data = [tuple(p.values()) for p in player_lines.values()]
@@ -141,7 +306,12 @@ def upload_player_lines(csv_file_path, week):
             """
 
             execute_values(cursor, query, insert_data)
+
+            # Every book's line: the consensus, and the history of what moved
+            write_consensus(cursor, week, consensus, observed_at)
+            changed = write_line_history(cursor, week, lines, observed_at)
             conn.commit()
+            print(f"📈 {changed} of {len(lines)} book lines changed since the last snapshot")
             print(f"✅ Successfully uploaded player lines for Week {week}!")
 
         else:
@@ -1,3 +1,4 @@
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import psycopg2
@@ -17,6 +18,17 @@ SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
 position_map = {"WR": "WR", "QB": "QB", "RB": "RB", "TE": "TE"}
 
+LEADERS_URL = "https://www.cbssports.com/nfl/stats/leaders/live/{position}/{week}/"
+
+# Scrape from multiple weeks to get comprehensive player list
+WEEKS_TO_SCRAPE = [1, 2, 3, 4, 5]  # Scrape first 5 weeks to get most players
+
+INSERT_QUERY = """
+INSERT INTO player_list (player_name) 
+VALUES %s
+ON CONFLICT (player_name) DO NOTHING;
+"""
+
 
 def connect_db():
     """Establish a connection to the database."""
@@ -36,13 +48,17 @@ def connect_db():
 
 def scrape_player_names(week, position):
     """Scrape player names for a given week and position."""
-    url = f"https://www.cbssports.com/nfl/stats/leaders/live/{position}/{week}/"
-    response = requests.get(url)
+    response = requests.get(LEADERS_URL.format(position=position, week=week))
     if response.status_code != 200:
         print(f"Failed to fetch data for Week {week}, Position {position}")
         return []
 
-    soup = BeautifulSoup(response.content, "html.parser")
+    return parse_player_names(response.content)
+
+
+def parse_player_names(content):
+    """Player names on one CBS leaders page, in page order."""
+    soup = BeautifulSoup(content, "html.parser")
     rows = soup.select(".TableBase-bodyTr")
     player_names = []
 
@@ -66,10 +82,7 @@ def get_all_player_names():
     """Get all unique player names from multiple weeks and positions."""
     all_players = set()
     
-    # Scrape from multiple weeks to get comprehensive player list
-    weeks_to_scrape = [1, 2, 3, 4, 5]  # Scrape first 5 weeks to get most players
-    
-    for week in weeks_to_scrape:
+    for week in WEEKS_TO_SCRAPE:
         print(f"Scraping Week {week}...")
         for position, position_code in position_map.items():
             print(f"  Getting {position} players...")
@@ -92,15 +105,8 @@ def upload_player_list_to_database(player_names):
     # Prepare data for insertion
     player_data = [(name,) for name in player_names]
 
-    # Insert player names
-    query = """
-    INSERT INTO player_list (player_name) 
-    VALUES %s
-    ON CONFLICT (player_name) DO NOTHING;
-    """
-
     if player_data:
-        execute_values(cursor, query, player_data)
+        execute_values(cursor, INSERT_QUERY, player_data)
         conn.commit()
         print(f"Successfully inserted {len(player_data)} unique player names into player_list table.")
     else:
@@ -137,5 +143,26 @@ def main():
         print(f"  ... and {len(all_player_names) - 10} more players")
 
 
+async def main_async(ingest, week):
+    """main() for async_ingest.py: every week/position page is fetched concurrently."""
+    async def names(scrape_week, position_code):
+        content = await ingest.get(LEADERS_URL.format(position=position_code, week=scrape_week))
+        return await asyncio.to_thread(parse_player_names, content) if content else []
+
+    # Like main(), the list always comes from WEEKS_TO_SCRAPE whatever the current week is
+    pages = await asyncio.gather(*(
+        names(scrape_week, position_code)
+        for scrape_week in WEEKS_TO_SCRAPE for position_code in position_map.values()
+    ))
+    all_player_names = sorted(set().union(*pages))
+    print(f"Found {len(all_player_names)} unique players total")
+
+    # Same replace-everything upload as main(), in one transaction
+    written = await ingest.write(
+        [("DELETE FROM player_list;", ())], [(INSERT_QUERY, [(name,) for name in all_player_names])]
+    )
+    print(f"Successfully inserted {written} unique player names into player_list table.")
+
+
 if __name__ == "__main__":
     main()
@@ -2,8 +2,16 @@ import psycopg2
 from psycopg2.extras import execute_values
 from datetime import datetime, timezone
 from decimal import Decimal
+import math
 import os
 from dotenv import load_dotenv
+import dimensions
+import local_mirror
+import matchup_factors
+import recency
+from config import get_current_season
+from matchups import canonical_team
+from names import normalize_name
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -15,6 +23,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 # Connect to Supabase database
 def connect_db():
     return psycopg2.connect(
@@ -34,10 +44,9 @@ def to_float(value):
         return float(value)
     return value
 
-# Fetch team schedule for the given week
-def get_team_schedule(cursor, week):
-    cursor.execute("SELECT team_id, week, opponent_id FROM team_schedule WHERE week = %s;", (week,))
-    return cursor.fetchall()
+# Season schedule indexed by (team, week) (cached until the schedule is rewritten)
+def get_schedule_index(cursor):
+    return dimensions.matchups(cursor)
 
 # Fetch player stats and ensure all stats are available
 def get_player_stats(cursor):
@@ -53,8 +62,9 @@ def get_player_stats(cursor):
                COALESCE(AVG(passing_yards), 0) AS passing_yards,
                COALESCE(AVG(passing_tds), 0) AS passing_tds
         FROM player_stats
+        WHERE season = %s
         GROUP BY player_name, position_id, team_id;
-    """)
+    """, (CURRENT_SEASON,))
     result = cursor.fetchall()
     
     for row in result:
@@ -64,65 +74,31 @@ def get_player_stats(cursor):
             continue  # Skip this row if the number of columns is incorrect
         yield row
 
-# Fetch defense stats for the opponent
-def get_defense_stats(cursor, team_id, position_id):
-    if position_id == "QB":
-        query = """
-            SELECT avg_passing_attempts, avg_completions, avg_passing_yards,
-                   avg_passing_tds, avg_interceptions,
-                   avg_qb_rushing_attempts, avg_qb_rushing_yards, avg_qb_rushing_tds
-            FROM defense_averages_qb
-            WHERE team_id = %s;
-        """
-        cursor.execute(query, (team_id,))
-    else:
-        query = """
-            SELECT avg_rushing_attempts, avg_rushing_yards, avg_rushing_tds,
-                   avg_targets, avg_receptions, avg_receiving_yards, avg_receiving_tds
-            FROM defense_averages
-            WHERE team_id = %s AND position_id = %s;
-        """
-        cursor.execute(query, (team_id, position_id))
-
-    return cursor.fetchone()
-
-# Fetch league-wide averages for a given position
-def get_league_averages(cursor, position_id):
-    if position_id == "QB":
-        query = """
-            SELECT avg_passing_attempts, avg_completions, avg_passing_yards,
-                   avg_passing_tds, avg_interceptions,
-                   avg_qb_rushing_attempts, avg_qb_rushing_yards, avg_qb_rushing_tds
-            FROM all_defense_averages_qb;
-        """
-        cursor.execute(query)
-    else:
-        query = """
-            SELECT avg_rushing_attempts, avg_rushing_yards, avg_rushing_tds,
-                   avg_targets, avg_receptions, avg_receiving_yards, avg_receiving_tds
-            FROM all_defense_averages
-            WHERE position_id = %s;
-        """
-        cursor.execute(query, (position_id,))
-
-    return cursor.fetchone()
-
-# Calculate projections based on the website's formula
-def calculate_projection(player_avg, defense_avg, league_avg):
-    if player_avg is None or defense_avg is None or league_avg is None:
-        return None  # Skip calculations if any value is None
+# Same row shape as get_player_stats(), from the exponentially weighted averages (recency.py)
+def get_recency_stats(cursor, half_life):
+    columns = ['rushing_attempts', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards',
+               'receiving_tds', 'passing_attempts', 'passing_yards', 'passing_tds']
+    for (player_name, position_id), player in recency.load_averages(cursor, CURRENT_SEASON, half_life).items():
+        yield (player_name, position_id, player.team_id, *(player.averages.get(column, 0) for column in columns))
+
+# Defense stat each projected value is scaled by, in stat_keys order (the column order of
+# defense_averages_qb / defense_averages)
+QB_DEFENSE_STATS = ['passing_attempts', 'completions', 'passing_yards', 'passing_tds', 'interceptions',
+                    'rushing_attempts', 'rushing_yards', 'rushing_tds']
+DEFENSE_STATS = ['rushing_attempts', 'rushing_yards', 'rushing_tds', 'targets', 'receptions',
+                 'receiving_yards', 'receiving_tds']
+
+# Calculate projections based on the website's formula (factor = defense avg / league avg)
+def calculate_projection(player_avg, factor):
+    if player_avg is None or factor is None or math.isnan(factor):
+        return None  # Skip calculations if any value is missing
 
     # Ensure the values are converted to float or default to 0
     player_avg = to_float(player_avg) or 0  # Convert and handle None values
-    defense_avg = to_float(defense_avg) or 0
-    league_avg = to_float(league_avg) or 0
-
-    if league_avg == 0:  # Avoid division by zero
-        return round(player_avg, 1)
 
     player_weight = 0.7
     defense_weight = 0.3
-    defense_factor = player_avg * (defense_avg / league_avg)
+    defense_factor = player_avg * factor
 
     return round(player_avg * player_weight + defense_factor * defense_weight, 1)
 
@@ -154,34 +130,45 @@ def upload_player_projections(week):
     try:
         print(f"📅 Fetching data for Week {week}...")
 
-        schedules = get_team_schedule(cursor, week)
-        players = list(get_player_stats(cursor))  # Convert the generator to a list
-
-        print(f"✅ Fetched {len(schedules)} schedules for Week {week}")
+        # Schedule and player averages come from the local mirror when one is available
+        stats_conn = local_mirror.connect_analytics(connect_db)
+        try:
+            stats_cursor = stats_conn.cursor()
+            schedule_index = get_schedule_index(stats_cursor)
+            players = list(get_player_stats(stats_cursor))  # Convert the generator to a list
+        finally:
+            stats_conn.close()
+
+        # Recency-weighted averages instead of season averages when a half-life is configured
+        half_life = recency.configured_half_life()
+        if half_life:
+            recency_players = list(get_recency_stats(cursor, half_life))
+            if recency_players:
+                print(f"📈 Using recency averages (half-life {half_life:g} weeks)")
+                players = recency_players
+            else:
+                print(f"⚠️ No recency averages stored for half-life {half_life:g}, using season averages")
+
+        # Defense/league ratios for every matchup, published by the averages phase
+        factors = matchup_factors.load(connect_db)
+
+        opponents = schedule_index.week(week)
+        print(f"✅ Fetched {len(opponents)} schedules for Week {week}")
         print(f"✅ Fetched {len(players)} players")  # Now we can safely use len()
 
         projections_dict = {}
-        
-        # Manual correction for mismatched team abbreviations
-        abbreviation_fixes = {
-            "JAX": "JAC"  # Map JAX (API) to JAC (database)
-        }
-
-        for team_id, week, opponent_id in schedules:
-            opponent_id = opponent_id.lstrip("@")  # Remove '@' from opponent_id
-            
-            # Apply team abbreviation fixes
-            corrected_team_id = abbreviation_fixes.get(team_id, team_id)
-            corrected_opponent_id = abbreviation_fixes.get(opponent_id, opponent_id)
-
-            for player in players:
-                player_name, position_id, player_team, *player_averages = player
-                
-                # Apply team abbreviation fixes to player team
-                corrected_player_team = abbreviation_fixes.get(player_team, player_team)
 
-                if corrected_player_team != corrected_team_id:
-                    continue  
+        # Opponents come back as canonical team_ids (JAX -> JAC, no '@')
+        players_by_team = {}
+        for player in players:
+            players_by_team.setdefault(canonical_team(player[2]), []).append(player)
+
+        for team_id, opponent_id in sorted(opponents.items()):
+            if opponent_id is None:
+                continue  # Bye week
+
+            for player in players_by_team.get(team_id, []):
+                player_name, position_id, player_team, *player_averages = player
 
                 # Debugging: Print player stats before calculating projection
                 print(f"Processing {player_name} ({position_id}) - Averaged stats count: {len(player_averages)} - Stats: {player_averages}")
@@ -191,48 +178,38 @@ def upload_player_projections(week):
                     print(f"⚠️ Skipping {player_name} due to incomplete stats.")
                     continue
 
-                defense_stats = get_defense_stats(cursor, corrected_opponent_id, position_id)
-                league_averages = get_league_averages(cursor, position_id)
+                defense_factors = factors.factor_row(opponent_id, position_id)
 
-                # Ensure that defense_stats and league_averages have the expected number of elements
-                if not defense_stats or not league_averages:
+                if defense_factors is None:
                     print(f"⚠️ Missing defense or league averages for {player_name} vs {opponent_id}. Skipping...")
-                    continue  
-
-                # Debugging: Print defense and league averages before calculation
-                print(f"Defense stats for {player_name}: {defense_stats}")
-                print(f"League averages for {player_name}: {league_averages}")
-
-                # Check for the correct number of stats per position
-                if position_id == 'QB':
-                    expected_length = 8  # QBs have passing and rushing stats (8 values)
-                else:
-                    expected_length = 7  # RB, WR, TE have rushing/receiving stats (7 values)
-
-                if len(defense_stats) != expected_length or len(league_averages) != expected_length:
-                    print(f"⚠️ Mismatch in stats count for {player_name}. Skipping...")
                     continue
 
-                # Create normalized name for database consistency
-                normalized_name = player_name.lower().replace(" ", "").replace(".", "").replace("'", "")
+                # Debugging: Print defense factors before calculation
+                print(f"Defense factors for {player_name}: {defense_factors}")
+
+                # Same normalized_name as player_stats and the website lookups
+                normalized_name = normalize_name(player_name)
                 
                 # Define stat keys based on position
                 if position_id == 'QB':
                     stat_keys = ['rushing_attempts', 'rushing_yards', 'rushing_tds', 'passing_attempts', 'passing_completions', 'passing_yards', 'passing_tds', 'interceptions']
+                    defense_stats = QB_DEFENSE_STATS
                 else:
                     stat_keys = ['rushing_attempts', 'rushing_yards', 'rushing_tds', 'receptions', 'receiving_yards', 'receiving_tds', 'targets']
+                    defense_stats = DEFENSE_STATS
 
                 # Calculate projections for each stat
                 for i, stat_key in enumerate(stat_keys):
                     if i < len(player_averages) and player_averages[i] is not None:
-                        projection_value = calculate_projection(player_averages[i], defense_stats[i], league_averages[i])
+                        factor = float(defense_factors[matchup_factors.FACTOR_STATS.index(defense_stats[i])])
+                        projection_value = calculate_projection(player_averages[i], factor)
                         
                         # Create individual projection row for each stat
                         projection_row = (
                             player_name,
                             normalized_name,
                             position_id,
-                            corrected_opponent_id,
+                            opponent_id,
                             stat_key,
                             projection_value
                         )
@@ -2,6 +2,8 @@ import psycopg2
 from psycopg2.extras import execute_values
 import os
 from dotenv import load_dotenv
+import local_mirror
+from config import get_current_season
 
 # Load environment variables
 load_dotenv('../my-app/.env')
@@ -13,6 +15,8 @@ SUPABASE_DB = os.getenv("SUPABASE_DB")
 SUPABASE_USER = os.getenv("SUPABASE_USER")
 SUPABASE_PASSWORD = os.getenv("SUPABASE_PASSWORD")
 
+CURRENT_SEASON = get_current_season()
+
 def connect_db():
     """Establish connection to the database."""
     try:
@@ -72,13 +76,13 @@ def fetch_recent_stats(current_week):
             receiving_tds,
             targets
         FROM player_stats
-        WHERE week IN (%s, %s, %s);
+        WHERE season = %s AND week IN (%s, %s, %s);
     """
     weeks = (current_week, current_week - 1, current_week - 2)
-    conn = connect_db()
+    conn = local_mirror.connect_analytics(connect_db)
     cursor = conn.cursor()
     try:
-        cursor.execute(query, weeks)
+        cursor.execute(query, (CURRENT_SEASON,) + weeks)
         results = cursor.fetchall()
         print(f"Fetched {len(results)} rows of recent stats.")
         return results